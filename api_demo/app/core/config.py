@@ -17,6 +17,64 @@ class Settings:
 	SUPER_ADMIN_PASSWORD = os.getenv("SUPER_ADMIN_PASSWORD", "superadmin")
 	AUTO_SEED_ON_START = os.getenv("AUTO_SEED_ON_START", "false").lower() == "true"
 	AUTO_CREATE_SUPER_ADMIN = os.getenv("AUTO_CREATE_SUPER_ADMIN", "false").lower() == "true"
+	METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+	# Statements slower than this are logged (0 disables); a sample get EXPLAINed.
+	SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+	SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+	SLOW_QUERY_EXPLAIN_INTERVAL_SEC = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SEC", "300"))
+	SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "false").lower() == "true"
+	# Admin-only per-request sampling profiler (X-Profile: 1 or ?profile=1).
+	PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+	PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+	PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+	PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+	# Skip schema/seed/admin work whose fingerprint is unchanged; seed + admin run in the background.
+	FAST_START = os.getenv("FAST_START", "false").lower() == "true"
+
+	# Log records are queued and written by a background thread; full queue = record dropped.
+	LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+	# Per-event sampling, e.g. "dictionary_update=0.1,access=0.05" (unlisted events: 1.0).
+	LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+	ACCESS_LOG_ENABLED = os.getenv("ACCESS_LOG_ENABLED", "true").lower() == "true"
+	# Large list responses skip jsonable_encoder/response_model validation (orjson if installed).
+	FAST_JSON = os.getenv("FAST_JSON", "false").lower() == "true"
+	# Offline per-language SQLite bundles (app/db/bundles.py); auto rebuild follows the change log.
+	BUNDLE_DIR = os.getenv("BUNDLE_DIR", "bundles")
+	BUNDLE_KEEP = int(os.getenv("BUNDLE_KEEP", "2"))
+	BUNDLE_AUTO_REBUILD = os.getenv("BUNDLE_AUTO_REBUILD", "false").lower() == "true"
+	BUNDLE_DEBOUNCE_SEC = float(os.getenv("BUNDLE_DEBOUNCE_SEC", "30"))
+	BUNDLE_MAX_DELAY_SEC = float(os.getenv("BUNDLE_MAX_DELAY_SEC", "300"))
+	# Static JSON publication of published entries (app/db/publisher.py): "local" writes to
+	# PUBLISH_DIR (mounted at /public when PUBLISH_SERVE), "s3" to S3_BUCKET under PUBLISH_S3_PREFIX.
+	PUBLISH_STORAGE = os.getenv("PUBLISH_STORAGE", "local").lower()
+	PUBLISH_DIR = os.getenv("PUBLISH_DIR", "public")
+	PUBLISH_S3_PREFIX = os.getenv("PUBLISH_S3_PREFIX", "public/")
+	PUBLISH_SERVE = os.getenv("PUBLISH_SERVE", "true").lower() == "true"
+	PUBLISH_AUTO = os.getenv("PUBLISH_AUTO", "false").lower() == "true"
+	PUBLISH_SHARD_PREFIX_LEN = int(os.getenv("PUBLISH_SHARD_PREFIX_LEN", "2"))
+	PUBLISH_DEBOUNCE_SEC = float(os.getenv("PUBLISH_DEBOUNCE_SEC", "10"))
+	PUBLISH_MAX_DELAY_SEC = float(os.getenv("PUBLISH_MAX_DELAY_SEC", "60"))
+	# SQLite: one database file per language under PARTITION_DIR (app/db/partitions.py).
+	PARTITION_BY_LANGUAGE = os.getenv("PARTITION_BY_LANGUAGE", "false").lower() == "true"
+	PARTITION_DIR = os.getenv("PARTITION_DIR", "partitions")
+	# Comma-separated replica URLs; GET /dictionary reads go to a caught-up one (app/db/replicas.py).
+	READ_REPLICA_URLS = os.getenv("READ_REPLICA_URLS", "")
+	REPLICA_MAX_LAG_SEC = float(os.getenv("REPLICA_MAX_LAG_SEC", "5"))
+	REPLICA_LAG_CHECK_SEC = float(os.getenv("REPLICA_LAG_CHECK_SEC", "1"))
+	READ_YOUR_WRITES_SEC = float(os.getenv("READ_YOUR_WRITES_SEC", "30"))
+	# uvicorn --workers also defaults to WEB_CONCURRENCY. Locks, shared state and the cache
+	# invalidation file live in COORDINATION_DIR (app/db/coordination.py).
+	WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+	COORDINATION_DIR = os.getenv("COORDINATION_DIR", ".coordination")
+	CACHE_INVALIDATION_POLL_SEC = float(os.getenv("CACHE_INVALIDATION_POLL_SEC", "0.5"))
+
+	# bcrypt runs in a dedicated process pool (0 workers = inline, useful for tests).
+	PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "-1"))
+	PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+	PASSWORD_HASH_WAIT_TIMEOUT_SEC = float(os.getenv("PASSWORD_HASH_WAIT_TIMEOUT_SEC", "2"))
+	BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+	BCRYPT_CALIBRATE_ON_START = os.getenv("BCRYPT_CALIBRATE_ON_START", "false").lower() == "true"
+	BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
 
 	WORD_LIST_PATH = os.getenv("WORD_LIST_PATH", "nufi_word_list.txt")
 
@@ -37,8 +95,27 @@ class Settings:
 	S3_PREFIX = os.getenv("S3_PREFIX", "backups")
 	S3_AUTO_BACKUP_ENABLED = os.getenv("S3_AUTO_BACKUP_ENABLED", "false").lower() == "true"
 	S3_AUTO_BACKUP_MIN_INTERVAL_SEC = int(os.getenv("S3_AUTO_BACKUP_MIN_INTERVAL_SEC", "0"))
+	# Commit signals are coalesced: back up after DEBOUNCE quiet seconds, at most MAX_DELAY after the first.
+	S3_BACKUP_DEBOUNCE_SEC = float(os.getenv("S3_BACKUP_DEBOUNCE_SEC", "5"))
+	S3_BACKUP_MAX_DELAY_SEC = float(os.getenv("S3_BACKUP_MAX_DELAY_SEC", "60"))
 	S3_SNAPSHOT_RETENTION = int(os.getenv("S3_SNAPSHOT_RETENTION", "1"))
 	S3_SQLITE_SNAPSHOT_ENABLED = os.getenv("S3_SQLITE_SNAPSHOT_ENABLED", "false").lower() == "true"
 	S3_SQLITE_SNAPSHOT_RETENTION = int(os.getenv("S3_SQLITE_SNAPSHOT_RETENTION", "1"))
+	SQLITE_EXPORT_WORKERS = int(os.getenv("SQLITE_EXPORT_WORKERS", "4"))
+	SQLITE_EXPORT_BATCH_SIZE = int(os.getenv("SQLITE_EXPORT_BATCH_SIZE", "5000"))
+	# Ship only changed SQLite pages; a full base is taken every S3_SQLITE_FULL_EVERY deltas.
+	S3_SQLITE_INCREMENTAL = os.getenv("S3_SQLITE_INCREMENTAL", "false").lower() == "true"
+	S3_SQLITE_FULL_EVERY = int(os.getenv("S3_SQLITE_FULL_EVERY", "50"))
+	# Skip a backup when the database fingerprint/snapshot hash matches the last upload.
+	S3_BACKUP_DEDUP = os.getenv("S3_BACKUP_DEDUP", "true").lower() == "true"
+
+	# "s3" uploads to S3_BUCKET; "local" writes to BACKUP_LOCAL_DIR (stand-in for S3).
+	BACKUP_STORAGE = os.getenv("BACKUP_STORAGE", "s3").lower()
+	BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "gzip").lower()  # gzip, zstd or none
+	S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "")  # e.g. a MinIO stand-in
+	S3_UPLOAD_PART_SIZE_MB = int(os.getenv("S3_UPLOAD_PART_SIZE_MB", "8"))
+	S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+	BACKUP_LOCAL_DIR = os.getenv("BACKUP_LOCAL_DIR", "backups")
+	BACKUP_STATE_DIR = os.getenv("BACKUP_STATE_DIR", ".backup_state")
 
 settings = Settings()
@@ -1,20 +1,137 @@
+import atexit
 import json
 import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
 import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
 from fastapi import Request
 
+from app.core.config import settings
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+	"""``"dictionary_update=0.1,access=0.05"`` -> ``{"dictionary_update": 0.1, "access": 0.05}``."""
+	rates = {}
+	for item in spec.split(","):
+		name, _, rate = item.partition("=")
+		if name.strip() and rate.strip():
+			rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+	return rates
+
+
+class JsonFormatter(logging.Formatter):
+	"""Serializes ``log_event`` payloads; runs on the listener thread, not the caller's."""
+
+	def format(self, record: logging.LogRecord) -> str:
+		if isinstance(record.msg, dict):
+			return json.dumps(record.msg, ensure_ascii=False, default=str)
+		return super().format(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+	"""Hands records to the listener untouched and drops them when the queue is full."""
+
+	def __init__(self, log_queue: queue.Queue):
+		super().__init__(log_queue)
+		self.dropped = 0
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		# The stock prepare() formats on the calling thread; the listener does it instead.
+		return record
+
+	def enqueue(self, record: logging.LogRecord) -> None:
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			self.dropped += 1
+
+
 logger = logging.getLogger("api")
 logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-handler.setFormatter(logging.Formatter("%(message)s"))
+logger.propagate = False
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(JsonFormatter("%(message)s"))
+_log_queue: queue.Queue = queue.Queue(maxsize=max(0, settings.LOG_QUEUE_SIZE))
+handler = DroppingQueueHandler(_log_queue)
 logger.addHandler(handler)
+listener = logging.handlers.QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+listener.start()
+
+def stop_logging() -> None:
+	"""Drain queued records and stop the writer thread (safe to call more than once)."""
+	if listener._thread is not None:
+		listener.stop()
+
+atexit.register(stop_logging)
+
+_sample_rates = parse_sample_rates(settings.LOG_SAMPLE_RATES)
+_random = random.Random()
+_counts = {"emitted": 0, "sampled_out": 0}
+_counts_lock = threading.Lock()  # log_event runs on the event loop and on threadpool workers
+
+# Per-request context for code that has no Request object (e.g. engine event hooks).
+request_context: ContextVar[Optional[dict]] = ContextVar("request_context", default=None)
 
 async def request_id_middleware(request: Request, call_next):
 	request.state.request_id = str(uuid.uuid4())
-	response = await call_next(request)
+	token = request_context.set(
+		{"request_id": request.state.request_id, "method": request.method, "path": request.url.path, "route": None}
+	)
+	started = time.perf_counter()
+	status = 500
+	try:
+		response = await call_next(request)
+		status = response.status_code
+	finally:
+		if settings.ACCESS_LOG_ENABLED:
+			_access_log(request, status, time.perf_counter() - started)
+		request_context.reset(token)
 	response.headers["X-Request-Id"] = request.state.request_id
 	return response
 
+def _access_log(request: Request, status: int, elapsed: float) -> None:
+	context = request_context.get() or {}
+	fields = dict(
+		request_id=request.state.request_id,
+		method=request.method,
+		path=request.url.path,
+		route=context.get("route"),
+		status=status,
+		duration_ms=round(elapsed * 1000, 3),
+		client=request.client.host if request.client else None,
+	)
+	# Server errors are always kept, whatever the access sample rate.
+	if status >= 500:
+		_emit("access", fields)
+	else:
+		log_event("access", **fields)
+
 def log_event(event: str, **kwargs):
-	payload = {"event": event, **kwargs}
-	logger.info(json.dumps(payload, ensure_ascii=False))
+	rate = _sample_rates.get(event, 1.0)
+	if rate < 1.0:
+		if _random.random() >= rate:
+			with _counts_lock:
+				_counts["sampled_out"] += 1
+			return
+		kwargs["sample_rate"] = rate
+	_emit(event, kwargs)
+
+def _emit(event: str, fields: dict) -> None:
+	with _counts_lock:
+		_counts["emitted"] += 1
+	logger.info({"event": event, **fields})
+
+def logging_stats() -> dict:
+	with _counts_lock:
+		counts = dict(_counts)
+	return {
+		"emitted": counts["emitted"],
+		"sampled_out": counts["sampled_out"],
+		"dropped": handler.dropped,
+		"queue_depth": _log_queue.qsize(),
+	}
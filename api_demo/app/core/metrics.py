@@ -0,0 +1,384 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in a module-level registry and are rendered by
+``GET /metrics``. Values that already live elsewhere (pool sizes, scheduler and
+password-pool stats) are copied into gauges by collectors right before rendering.
+
+SQL work is attributed to the current request through a context variable, which
+Starlette copies into the threadpool that runs sync endpoints.
+"""
+
+import contextvars
+import threading
+import time
+import weakref
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+
+from app.core.logging import request_context
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(11))  # 1 KiB .. 1 GiB
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+	parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+	if value == float("inf"):
+		return "+Inf"
+	if float(value).is_integer():
+		return str(int(value))
+	return repr(float(value))
+
+
+class _Metric:
+	kind = ""
+
+	def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+
+	def _key(self, labels: Dict[str, str]) -> LabelKey:
+		return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+		lines.extend(self._samples())
+		return lines
+
+	def _samples(self) -> List[str]:
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	kind = "counter"
+
+	def __init__(self, name, documentation, labelnames=()):
+		super().__init__(name, documentation, labelnames)
+		self._values: Dict[LabelKey, float] = {}
+
+	def inc(self, amount: float = 1.0, **labels) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def value(self, **labels) -> float:
+		with self._lock:
+			return self._values.get(self._key(labels), 0.0)
+
+	def remove(self, **labels) -> None:
+		"""Drop every series whose labels include ``labels``."""
+		match = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+		with self._lock:
+			for key in [key for key in self._values if all(key[index] == value for index, value in match)]:
+				del self._values[key]
+
+	def _samples(self) -> List[str]:
+		with self._lock:
+			items = sorted(self._values.items())
+		return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+	kind = "gauge"
+
+	def set(self, value: float, **labels) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = float(value)
+
+	def dec(self, amount: float = 1.0, **labels) -> None:
+		self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+	kind = "histogram"
+
+	def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+		super().__init__(name, documentation, labelnames)
+		self.buckets = tuple(sorted(buckets))
+		self._series: Dict[LabelKey, list] = {}
+
+	def observe(self, value: float, **labels) -> None:
+		key = self._key(labels)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				# Per-bucket counts (non-cumulative), then sum and count.
+				series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+			for index, bound in enumerate(self.buckets):
+				if value <= bound:
+					series[0][index] += 1
+					break
+			series[1] += value
+			series[2] += 1
+
+	def snapshot(self, **labels) -> Optional[dict]:
+		with self._lock:
+			series = self._series.get(self._key(labels))
+			if series is None:
+				return None
+			return {"sum": series[1], "count": series[2]}
+
+	def _samples(self) -> List[str]:
+		with self._lock:
+			items = sorted((key, [list(series[0]), series[1], series[2]]) for key, series in self._series.items())
+		lines = []
+		for key, (counts, total, count) in items:
+			cumulative = 0
+			for bound, bucket_count in zip(self.buckets, counts):
+				cumulative += bucket_count
+				le = f'le="{_format_value(bound)}"'
+				lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+			le = 'le="+Inf"'
+			lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+			lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+			lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+		return lines
+
+
+class Registry:
+	def __init__(self):
+		self._metrics: Dict[str, _Metric] = {}
+		self._collectors: List[Callable[[], None]] = []
+		self._lock = threading.Lock()
+
+	def _register(self, metric: _Metric) -> _Metric:
+		with self._lock:
+			existing = self._metrics.get(metric.name)
+			if existing is not None:
+				return existing
+			self._metrics[metric.name] = metric
+			return metric
+
+	def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+		return self._register(Counter(name, documentation, labelnames))
+
+	def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+		return self._register(Gauge(name, documentation, labelnames))
+
+	def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+		return self._register(Histogram(name, documentation, labelnames, buckets))
+
+	def register_collector(self, collector: Callable[[], None]) -> None:
+		"""Run ``collector`` before every render; it should refresh gauges it owns."""
+		with self._lock:
+			if collector not in self._collectors:
+				self._collectors.append(collector)
+
+	def unregister_collector(self, collector: Callable[[], None]) -> None:
+		with self._lock:
+			if collector in self._collectors:
+				self._collectors.remove(collector)
+
+	def render(self) -> str:
+		with self._lock:
+			collectors = list(self._collectors)
+		for collector in collectors:
+			try:
+				collector()
+			except Exception:
+				# A broken collector must not take the whole endpoint down.
+				scrape_errors.inc(collector=getattr(collector, "__name__", "collector"))
+		with self._lock:
+			metrics = [self._metrics[name] for name in sorted(self._metrics)]
+		lines: List[str] = []
+		for metric in metrics:
+			lines.extend(metric.render())
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+scrape_errors = REGISTRY.counter(
+	"metrics_collector_errors_total", "Collectors or statement observers that raised.", ["collector"]
+)
+
+http_requests = REGISTRY.counter(
+	"http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"]
+)
+http_latency = REGISTRY.histogram(
+	"http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route"]
+)
+http_in_flight = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served.", ["method", "route"])
+request_sql_statements = REGISTRY.histogram(
+	"http_request_sql_statements",
+	"SQL statements executed per request.",
+	["method", "route"],
+	buckets=SQL_COUNT_BUCKETS,
+)
+request_sql_seconds = REGISTRY.histogram(
+	"http_request_sql_seconds", "Time spent in SQL per request.", ["method", "route"]
+)
+sql_statements = REGISTRY.counter("sql_statements_total", "SQL statements executed.", ["operation"])
+sql_latency = REGISTRY.histogram("sql_statement_duration_seconds", "SQL statement latency.", ["operation"])
+pool_connections = REGISTRY.gauge("db_pool_connections", "Connection pool usage per engine.", ["engine", "state"])
+
+
+class RequestStats:
+	__slots__ = ("method", "route", "sql_count", "sql_seconds")
+
+	def __init__(self, method: str, route: str):
+		self.method = method
+		self.route = route
+		self.sql_count = 0
+		self.sql_seconds = 0.0
+
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+	"current_request_stats", default=None
+)
+
+
+def route_template(request: Request) -> str:
+	"""The matched route's path template (``/dictionary/words/{word_id}``), never the raw path.
+
+	Only known once routing ran, i.e. inside the endpoint or after ``call_next``.
+	"""
+	route = request.scope.get("route")
+	return getattr(route, "path", None) or "unmatched"
+
+
+async def track_in_flight(request: Request):
+	"""App-wide dependency: in-flight gauge per route (the route is resolved by now)."""
+	labels = {"method": request.method, "route": route_template(request)}
+	context = request_context.get()
+	if context is not None:
+		context["route"] = labels["route"]
+	if labels["route"] == "/metrics":
+		yield
+		return
+	http_in_flight.inc(**labels)
+	try:
+		yield
+	finally:
+		http_in_flight.dec(**labels)
+
+
+async def metrics_middleware(request: Request, call_next):
+	if request.url.path == "/metrics":
+		return await call_next(request)
+	stats = RequestStats(request.method, "unmatched")
+	token = current_request.set(stats)
+	started = time.perf_counter()
+	status = "500"
+	try:
+		response = await call_next(request)
+		status = str(response.status_code)
+		return response
+	finally:
+		elapsed = time.perf_counter() - started
+		labels = {"method": request.method, "route": route_template(request)}
+		stats.route = labels["route"]
+		http_requests.inc(status=status, **labels)
+		http_latency.observe(elapsed, **labels)
+		request_sql_statements.observe(stats.sql_count, **labels)
+		request_sql_seconds.observe(stats.sql_seconds, **labels)
+		current_request.reset(token)
+
+
+def _operation(statement: str) -> str:
+	word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+	return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "WITH") else "OTHER"
+
+
+_instrumented_engines = weakref.WeakSet()
+# engine -> (name, pool collector), so a disposed engine's series can be dropped.
+_pool_collectors = weakref.WeakKeyDictionary()
+_statement_observers: List[Callable] = []
+
+
+def add_statement_observer(observer: Callable) -> None:
+	"""Call ``observer(conn, statement, parameters, executemany, elapsed_sec)`` after each statement."""
+	if observer not in _statement_observers:
+		_statement_observers.append(observer)
+
+
+def instrument_engine(engine, name: str = "primary") -> None:
+	"""Count and time every statement run on ``engine``; its pool is reported as ``engine=name``."""
+	if engine in _instrumented_engines:
+		return
+	_instrumented_engines.add(engine)
+
+	@event.listens_for(engine, "before_cursor_execute")
+	def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+	@event.listens_for(engine, "after_cursor_execute")
+	def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		starts = conn.info.get("metrics_query_start")
+		if not starts:
+			return
+		elapsed = time.perf_counter() - starts.pop()
+		operation = _operation(statement)
+		sql_statements.inc(operation=operation)
+		sql_latency.observe(elapsed, operation=operation)
+		stats = current_request.get()
+		if stats is not None:
+			stats.sql_count += 1
+			stats.sql_seconds += elapsed
+		for observer in _statement_observers:
+			try:
+				observer(conn, statement, parameters, executemany, elapsed)
+			except Exception:
+				scrape_errors.inc(collector=getattr(observer, "__name__", "observer"))
+
+	@event.listens_for(engine, "handle_error")
+	def _handle_error(exception_context):
+		conn = exception_context.connection
+		if conn is not None and conn.info.get("metrics_query_start"):
+			conn.info["metrics_query_start"].pop()
+
+	engine_ref = weakref.ref(engine)
+
+	def collect_pool() -> None:
+		pool = getattr(engine_ref(), "pool", None)
+		for state, attr in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+			getter = getattr(pool, attr, None)
+			if callable(getter):
+				# QueuePool.overflow() goes negative while the pool is below its size.
+				pool_connections.set(max(0, getter()), engine=name, state=state)
+
+	_pool_collectors[engine] = (name, collect_pool)
+	REGISTRY.register_collector(collect_pool)
+
+
+def uninstrument_engine(engine) -> None:
+	"""Stop reporting ``engine``'s pool (call when it is disposed for good)."""
+	entry = _pool_collectors.pop(engine, None)
+	if entry is None:
+		return
+	name, collector = entry
+	REGISTRY.unregister_collector(collector)
+	pool_connections.remove(engine=name)
+
+
+def export_stats(prefix: str, documentation: str, stats: Dict[str, object], labels: Optional[Dict[str, str]] = None) -> None:
+	"""Copy the numeric values of a ``stats()`` dict into gauges named ``<prefix>_<key>``."""
+	labels = labels or {}
+	for key, value in stats.items():
+		if isinstance(value, bool):
+			value = int(value)
+		if not isinstance(value, (int, float)):
+			continue
+		REGISTRY.gauge(f"{prefix}_{key}", f"{documentation} ({key}).", list(labels)).set(value, **labels)
+
+
+def render_metrics() -> str:
+	return REGISTRY.render()
@@ -0,0 +1,174 @@
+"""Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt is deliberately slow, so it runs in a small dedicated process pool instead
+of the request threadpool. A semaphore bounds the number of pending jobs; callers
+that cannot get a slot within the wait timeout get ``PasswordPoolBusy`` so a login
+burst turns into fast 503s instead of starving dictionary reads.
+
+Async endpoints use ``hash_async``/``verify_async``: they never wait for a slot (a full
+queue is an immediate ``PasswordPoolBusy``) and await the job without holding a thread.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict
+
+from passlib.context import CryptContext
+
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _crypt_context(rounds: int) -> CryptContext:
+	ctx = _contexts.get(rounds)
+	if ctx is None:
+		ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+		_contexts[rounds] = ctx
+	return ctx
+
+
+# Worker entry points must stay at module level so the spawned processes can import them.
+def _hash_worker(password: str, rounds: int) -> str:
+	return _crypt_context(rounds).hash(password)
+
+
+def _verify_worker(password: str, password_hash: str, rounds: int) -> bool:
+	return _crypt_context(rounds).verify(password, password_hash)
+
+
+class PasswordPoolBusy(Exception):
+	"""Raised when the hashing queue is full and the caller should retry later."""
+
+
+class PasswordHashPool:
+	def __init__(self, workers: int, max_pending: int, wait_timeout: float):
+		self.workers = workers
+		self.max_pending = max(1, max_pending)
+		self.wait_timeout = wait_timeout
+		self._slots = threading.BoundedSemaphore(self.max_pending)
+		self._lock = threading.Lock()
+		self._executor = None
+		self._pending = 0
+		self._running = 0
+		self._completed = 0
+		self._rejected = 0
+		self._wait_total = 0.0
+		self._run_total = 0.0
+
+	def _get_executor(self) -> ProcessPoolExecutor:
+		with self._lock:
+			if self._executor is None:
+				self._executor = ProcessPoolExecutor(
+					max_workers=self.workers,
+					mp_context=get_context("spawn"),
+				)
+			return self._executor
+
+	def hash(self, password: str, rounds: int) -> str:
+		return self._run(_hash_worker, password, rounds)
+
+	def verify(self, password: str, password_hash: str, rounds: int) -> bool:
+		return self._run(_verify_worker, password, password_hash, rounds)
+
+	async def hash_async(self, password: str, rounds: int) -> str:
+		return await self._run_async(_hash_worker, password, rounds)
+
+	async def verify_async(self, password: str, password_hash: str, rounds: int) -> bool:
+		return await self._run_async(_verify_worker, password, password_hash, rounds)
+
+	def _reject(self) -> None:
+		with self._lock:
+			self._rejected += 1
+		raise PasswordPoolBusy("Password hashing queue is full")
+
+	def _run(self, fn, *args):
+		queued_at = time.perf_counter()
+		if not self._slots.acquire(timeout=self.wait_timeout):
+			self._reject()
+		with self._lock:
+			self._pending += 1
+		try:
+			started_at = time.perf_counter()
+			with self._lock:
+				self._running += 1
+			try:
+				if self.workers <= 0:
+					result = fn(*args)
+				else:
+					result = self._get_executor().submit(fn, *args).result()
+			finally:
+				finished_at = time.perf_counter()
+				with self._lock:
+					self._running -= 1
+					self._completed += 1
+					self._wait_total += started_at - queued_at
+					self._run_total += finished_at - started_at
+			return result
+		finally:
+			with self._lock:
+				self._pending -= 1
+			self._slots.release()
+
+	async def _run_async(self, fn, *args):
+		if not self._slots.acquire(blocking=False):
+			self._reject()
+		started_at = time.perf_counter()
+		with self._lock:
+			self._pending += 1
+			self._running += 1
+		try:
+			if self.workers <= 0:
+				return await asyncio.to_thread(fn, *args)
+			return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+		finally:
+			with self._lock:
+				self._pending -= 1
+				self._running -= 1
+				self._completed += 1
+				# Time queued inside the executor is not visible here; it counts as run time.
+				self._run_total += time.perf_counter() - started_at
+			self._slots.release()
+
+	def stats(self) -> dict:
+		with self._lock:
+			completed = self._completed
+			return {
+				"workers": self.workers,
+				"max_pending": self.max_pending,
+				"queue_depth": self._pending,
+				"running": self._running,
+				"completed": completed,
+				"rejected": self._rejected,
+				"avg_wait_ms": round(self._wait_total * 1000 / completed, 3) if completed else 0.0,
+				"avg_run_ms": round(self._run_total * 1000 / completed, 3) if completed else 0.0,
+			}
+
+	def shutdown(self) -> None:
+		with self._lock:
+			executor, self._executor = self._executor, None
+		if executor is not None:
+			executor.shutdown(wait=True)
+
+
+def default_worker_count() -> int:
+	return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 15) -> tuple[int, float]:
+	"""Pick the highest bcrypt cost whose hash time stays under target_ms.
+
+	Each extra round doubles the work, so one timed hash at min_rounds is enough to
+	extrapolate. Returns (rounds, measured_ms_at_min_rounds).
+	"""
+	ctx = _crypt_context(min_rounds)
+	ctx.hash("calibration-warmup")
+	started = time.perf_counter()
+	ctx.hash("calibration-probe")
+	base_ms = (time.perf_counter() - started) * 1000
+	rounds = min_rounds
+	while rounds < max_rounds and base_ms * (2 ** (rounds + 1 - min_rounds)) <= target_ms:
+		rounds += 1
+	return rounds, base_ms
@@ -0,0 +1,243 @@
+"""On-demand sampling profiler for single requests (admin only).
+
+Send ``X-Profile: 1`` (or ``?profile=1``) with an admin bearer token and the request is
+sampled every ``PROFILE_INTERVAL_MS``. The profile is kept under the request id (see the
+``X-Profile-Id`` response header) and served by ``GET /admin/profiles/{request_id}``:
+JSON with the time split between SQL, serialization and other Python code, or
+``?format=folded`` for collapsed stacks that flamegraph.pl and speedscope read.
+
+The event-loop thread is sampled for the whole request. Worker threads are sampled once
+they run a SQL statement for the request, since that is where sync endpoints and their
+dependencies do their work, and dropped again once they are back waiting in the threadpool
+or run SQL for another request. Samples where a thread is idle are dropped.
+"""
+
+import collections
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.logging import log_event, request_context
+from app.core.metrics import add_statement_observer, current_request
+
+SQL_MODULES = ("sqlalchemy", "sqlite3", "_sqlite3", "psycopg2", "psycopg", "app.db.session")
+SERIALIZATION_MODULES = ("pydantic", "pydantic_core", "fastapi.encoders", "json", "orjson")
+SERIALIZATION_FUNCTIONS = ("serialize_response", "jsonable_encoder", "render", "_prepare_response_content")
+IDLE_FRAMES = {
+	("selectors", "select"),
+	("threading", "wait"),
+	("queue", "get"),
+	("concurrent.futures.thread", "_worker"),
+}
+MAX_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+	module = frame.f_globals.get("__name__", "?")
+	return f"{module}:{frame.f_code.co_name}"
+
+
+def _stack(frame) -> List[str]:
+	labels = []
+	while frame is not None and len(labels) < MAX_DEPTH:
+		labels.append(_frame_label(frame))
+		frame = frame.f_back
+	labels.reverse()  # root first, as folded stacks expect
+	return labels
+
+
+def _is_idle(frame) -> bool:
+	return (frame.f_globals.get("__name__", ""), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def classify(stack: List[str]) -> str:
+	"""Attribute a sample to the innermost category found on the stack."""
+	for label in reversed(stack):
+		module, _, function = label.partition(":")
+		root = module.split(".", 1)[0]
+		if root in SQL_MODULES or module in SQL_MODULES:
+			return "sql"
+		if root in SERIALIZATION_MODULES or module in SERIALIZATION_MODULES or function in SERIALIZATION_FUNCTIONS:
+			return "serialization"
+	return "python"
+
+
+class RequestProfile:
+	def __init__(self, request_id: str, interval_sec: float, loop_thread: int):
+		self.request_id = request_id
+		self.interval_sec = interval_sec
+		self.loop_thread = loop_thread
+		self.threads = {loop_thread}
+		self.stacks: collections.Counter = collections.Counter()
+		self.categories: collections.Counter = collections.Counter()
+		self.started = time.perf_counter()
+		self.duration_ms = 0.0
+		self.meta: Dict[str, object] = {}
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, name=f"profiler-{request_id[:8]}", daemon=True)
+
+	def start(self) -> None:
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		self._thread.join()
+		self.duration_ms = (time.perf_counter() - self.started) * 1000
+
+	def add_thread(self, thread_id: int) -> None:
+		self.threads.add(thread_id)
+
+	def _run(self) -> None:
+		own = threading.get_ident()
+		while not self._stop.wait(self.interval_sec):
+			frames = sys._current_frames()
+			for thread_id in list(self.threads):
+				frame = frames.get(thread_id)
+				if frame is None or thread_id == own:
+					continue
+				if thread_id != self.loop_thread and (
+					_is_idle(frame) or _thread_requests.get(thread_id) != self.request_id
+				):
+					# The worker is back in the pool, or already working for another request.
+					self.threads.discard(thread_id)
+					continue
+				if _is_idle(frame):
+					continue
+				stack = _stack(frame)
+				self.stacks[";".join(stack)] += 1
+				self.categories[classify(stack)] += 1
+
+	def folded(self) -> str:
+		return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+	def summary(self) -> dict:
+		total = sum(self.categories.values())
+		interval_ms = self.interval_sec * 1000
+		return {
+			"request_id": self.request_id,
+			"duration_ms": round(self.duration_ms, 3),
+			"interval_ms": interval_ms,
+			"samples": total,
+			"threads": len(self.threads),
+			"split": {
+				category: {
+					"samples": self.categories.get(category, 0),
+					"share": round(self.categories.get(category, 0) / total, 4) if total else 0.0,
+					"approx_ms": round(self.categories.get(category, 0) * interval_ms, 3),
+				}
+				for category in ("sql", "serialization", "python")
+			},
+			**self.meta,
+		}
+
+
+class ProfileStore:
+	"""Most recent profiles in memory, optionally mirrored to PROFILE_DIR."""
+
+	def __init__(self, keep: int, directory: str = ""):
+		self.keep = max(1, keep)
+		self.directory = Path(directory) if directory else None
+		self._profiles: "collections.OrderedDict[str, RequestProfile]" = collections.OrderedDict()
+		self._lock = threading.Lock()
+
+	def save(self, profile: RequestProfile) -> None:
+		with self._lock:
+			self._profiles[profile.request_id] = profile
+			while len(self._profiles) > self.keep:
+				self._profiles.popitem(last=False)
+		if self.directory is not None:
+			self.directory.mkdir(parents=True, exist_ok=True)
+			(self.directory / f"{profile.request_id}.folded").write_text(profile.folded(), encoding="utf-8")
+
+	def get(self, request_id: str) -> Optional[RequestProfile]:
+		with self._lock:
+			return self._profiles.get(request_id)
+
+	def list(self) -> List[dict]:
+		with self._lock:
+			profiles = list(self._profiles.values())
+		return [profile.summary() for profile in reversed(profiles)]
+
+
+profile_store = ProfileStore(settings.PROFILE_KEEP, settings.PROFILE_DIR)
+_active: Dict[str, RequestProfile] = {}
+# Worker thread -> request its last SQL statement ran for; kept only while something is profiled.
+_thread_requests: Dict[int, Optional[str]] = {}
+
+
+def _register_sql_thread(conn, statement, parameters, executemany, elapsed) -> None:
+	if not _active:
+		return
+	context = request_context.get()
+	request_id = context["request_id"] if context is not None else None
+	thread_id = threading.get_ident()
+	_thread_requests[thread_id] = request_id
+	profile = _active.get(request_id)
+	if profile is not None:
+		profile.add_thread(thread_id)
+
+
+add_statement_observer(_register_sql_thread)
+
+
+def profiling_requested(request: Request) -> bool:
+	if not settings.PROFILING_ENABLED:
+		return False
+	return request.headers.get("x-profile", "").lower() in ("1", "true") or request.query_params.get("profile") in ("1", "true")
+
+
+def _is_admin_request(request: Request) -> bool:
+	# Imported here: security pulls in the DB session, which must not load with this module.
+	from app.core.security import decode_token, is_super_admin
+	from app.db.models import User
+	from app.db.session import SessionLocal
+
+	auth = request.headers.get("authorization", "")
+	if not auth.lower().startswith("bearer "):
+		return False
+	try:
+		payload = decode_token(auth.split(" ", 1)[1])
+	except Exception:
+		return False
+	if payload.get("type") != "access" or not payload.get("sub"):
+		return False
+	db = SessionLocal()
+	try:
+		user = db.query(User).filter(User.email == payload["sub"]).first()
+		return bool(user and not user.is_deleted and (user.role == "admin" or is_super_admin(user)))
+	finally:
+		db.close()
+
+
+async def profiling_middleware(request: Request, call_next):
+	# The admin check queries the database, so it runs in the threadpool, off the event loop.
+	if not profiling_requested(request) or not await run_in_threadpool(_is_admin_request, request):
+		return await call_next(request)
+	context = request_context.get()
+	request_id = context["request_id"] if context else request.state.request_id
+	profile = RequestProfile(request_id, settings.PROFILE_INTERVAL_MS / 1000, threading.get_ident())
+	_active[request_id] = profile
+	profile.start()
+	try:
+		response = await call_next(request)
+	finally:
+		profile.stop()
+		_active.pop(request_id, None)
+		if not _active:
+			_thread_requests.clear()
+		stats = current_request.get()
+		if stats is not None:
+			profile.meta["sql_statements"] = stats.sql_count
+			profile.meta["sql_ms_measured"] = round(stats.sql_seconds * 1000, 3)
+		profile.meta["route"] = (context or {}).get("route") or request.url.path
+		profile_store.save(profile)
+	summary = profile.summary()
+	log_event("request_profiled", **{k: v for k, v in summary.items() if k != "split"})
+	response.headers["X-Profile-Id"] = request_id
+	return response
@@ -0,0 +1,155 @@
+"""Single long-lived worker that coalesces bursts of signals into one run.
+
+``notify`` is cheap and never blocks the caller. The worker waits until the signals
+have been quiet for ``debounce_sec`` (but never longer than ``max_delay_sec`` after the
+first pending signal), then runs the target once for the whole batch. At most one run
+is in progress at a time, and runs start at least ``min_interval_sec`` apart.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from app.core.logging import log_event
+
+
+class CoalescingScheduler:
+	def __init__(
+		self,
+		name: str,
+		target: Callable[[str], None],
+		debounce_sec: float,
+		max_delay_sec: float,
+		min_interval_sec: float = 0.0,
+	):
+		self.name = name
+		self.target = target
+		self.debounce_sec = max(0.0, debounce_sec)
+		self.max_delay_sec = max(self.debounce_sec, max_delay_sec)
+		self.min_interval_sec = max(0.0, min_interval_sec)
+		self._cond = threading.Condition()
+		self._thread: Optional[threading.Thread] = None
+		self._stopping = False
+		self._pending = 0
+		self._pending_reasons: set = set()
+		self._first_signal_at: Optional[float] = None
+		self._last_signal_at: Optional[float] = None
+		self._last_run_started_at: Optional[float] = None
+		self._running = False
+		self._force = False
+		self._signals = 0
+		self._runs = 0
+		self._failures = 0
+		self._coalesced = 0
+		self._last_lag_ms = 0.0
+		self._last_duration_ms = 0.0
+		self._last_batch = 0
+
+	def notify(self, reason: str = "signal") -> None:
+		with self._cond:
+			now = time.monotonic()
+			self._signals += 1
+			self._pending += 1
+			self._pending_reasons.add(reason)
+			if self._first_signal_at is None:
+				self._first_signal_at = now
+			self._last_signal_at = now
+			self._ensure_thread()
+			self._cond.notify()
+
+	def _ensure_thread(self) -> None:
+		if self._thread is None or not self._thread.is_alive():
+			self._stopping = False
+			self._thread = threading.Thread(target=self._loop, name=f"{self.name}-scheduler", daemon=True)
+			self._thread.start()
+
+	def _due_at(self) -> float:
+		if self._force:
+			return 0.0
+		due = min(self._last_signal_at + self.debounce_sec, self._first_signal_at + self.max_delay_sec)
+		if self._last_run_started_at is not None:
+			due = max(due, self._last_run_started_at + self.min_interval_sec)
+		return due
+
+	def _loop(self) -> None:
+		while True:
+			with self._cond:
+				while not self._pending and not self._stopping:
+					self._cond.wait()
+				if self._stopping and not self._pending:
+					return
+				# New signals push the debounce deadline out, so re-check after every wake-up.
+				while self._pending and not self._stopping:
+					remaining = self._due_at() - time.monotonic()
+					if remaining <= 0:
+						break
+					self._cond.wait(timeout=remaining)
+				started_at = time.monotonic()
+				batch = self._pending
+				reasons = ",".join(sorted(self._pending_reasons))
+				self._last_lag_ms = (started_at - self._first_signal_at) * 1000
+				self._last_batch = batch
+				self._coalesced += batch - 1
+				self._pending = 0
+				self._pending_reasons = set()
+				self._first_signal_at = None
+				self._last_signal_at = None
+				self._last_run_started_at = started_at
+				self._force = False
+				self._running = True
+			try:
+				self.target(reasons)
+			except Exception as exc:
+				with self._cond:
+					self._failures += 1
+				log_event(f"{self.name}_scheduler_failed", error=str(exc))
+			finally:
+				with self._cond:
+					self._running = False
+					self._runs += 1
+					self._last_duration_ms = (time.monotonic() - started_at) * 1000
+					self._cond.notify_all()
+			log_event(
+				f"{self.name}_scheduler_run",
+				batch=batch,
+				lag_ms=round(self._last_lag_ms, 3),
+				duration_ms=round(self._last_duration_ms, 3),
+			)
+
+	def flush(self, timeout: Optional[float] = None) -> bool:
+		"""Run pending work now and wait for it; returns False on timeout."""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		with self._cond:
+			if self._pending:
+				self._force = True
+				self._cond.notify_all()
+			while self._pending or self._running:
+				remaining = None if deadline is None else deadline - time.monotonic()
+				if remaining is not None and remaining <= 0:
+					return False
+				self._cond.wait(timeout=remaining)
+		return True
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		with self._cond:
+			self._stopping = True
+			self._cond.notify_all()
+			thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+
+	def stats(self) -> dict:
+		with self._cond:
+			now = time.monotonic()
+			return {
+				"signals": self._signals,
+				"runs": self._runs,
+				"failures": self._failures,
+				"coalesced": self._coalesced,
+				"queue_depth": self._pending,
+				"running": self._running,
+				"oldest_pending_sec": round(now - self._first_signal_at, 3) if self._first_signal_at else 0.0,
+				"last_lag_ms": round(self._last_lag_ms, 3),
+				"last_duration_ms": round(self._last_duration_ms, 3),
+				"last_batch": self._last_batch,
+			}
@@ -4,14 +4,24 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import REGISTRY, export_stats
+from app.core.password_pool import PasswordHashPool, PasswordPoolBusy, calibrate_rounds, default_worker_count
 from app.db.session import get_db
 from app.db.models import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_bcrypt_rounds = settings.BCRYPT_ROUNDS
+password_pool = PasswordHashPool(
+	workers=settings.PASSWORD_HASH_WORKERS if settings.PASSWORD_HASH_WORKERS >= 0 else default_worker_count(),
+	max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+	wait_timeout=settings.PASSWORD_HASH_WAIT_TIMEOUT_SEC,
+)
+REGISTRY.register_collector(
+	lambda: export_stats("password_hash_pool", "bcrypt worker pool", dict(password_pool.stats(), bcrypt_rounds=_bcrypt_rounds))
+)
 security = HTTPBearer(auto_error=True)
 optional_security = HTTPBearer(auto_error=False)
 
@@ -23,10 +33,43 @@ def _normalize_password(password: str) -> str:
 	return raw[:72].decode("utf-8", errors="ignore")
 
 def hash_password(password: str) -> str:
-	return pwd_context.hash(_normalize_password(password))
+	return _run_password_job(password_pool.hash, _normalize_password(password), _bcrypt_rounds)
 
 def verify_password(password: str, password_hash: str) -> bool:
-	return pwd_context.verify(_normalize_password(password), password_hash)
+	return _run_password_job(password_pool.verify, _normalize_password(password), password_hash, _bcrypt_rounds)
+
+async def hash_password_async(password: str) -> str:
+	try:
+		return await password_pool.hash_async(_normalize_password(password), _bcrypt_rounds)
+	except PasswordPoolBusy:
+		raise _pool_busy()
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+	try:
+		return await password_pool.verify_async(_normalize_password(password), password_hash, _bcrypt_rounds)
+	except PasswordPoolBusy:
+		raise _pool_busy()
+
+def _run_password_job(job, *args):
+	try:
+		return job(*args)
+	except PasswordPoolBusy:
+		raise _pool_busy()
+
+def _pool_busy() -> HTTPException:
+	log_event("password_pool_busy", **password_pool.stats())
+	return HTTPException(
+		status_code=503,
+		detail="Authentication is busy, retry shortly",
+		headers={"Retry-After": "1"},
+	)
+
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+	global _bcrypt_rounds
+	rounds, base_ms = calibrate_rounds(target_ms)
+	_bcrypt_rounds = rounds
+	log_event("bcrypt_calibrated", rounds=rounds, target_ms=target_ms, base_ms=round(base_ms, 3))
+	return rounds
 
 def _create_token(subject: str, token_type: str, expires_delta: Optional[timedelta]) -> str:
 	now = datetime.utcnow()
@@ -32,6 +32,21 @@ def normalize_for_search(text: str) -> str:
 	return normalized.lower()
 
 
+def fold_for_search(text: str) -> str:
+	"""
+	Normalize text for accent-insensitive search (case-folded, tone marks and other
+	diacritics removed, NFC).
+	
+	Args:
+		text: Input text
+	
+	Returns:
+		Folded text for search
+	"""
+	decomposed = unicodedata.normalize('NFD', text.strip().casefold())
+	return unicodedata.normalize('NFC', ''.join(ch for ch in decomposed if not unicodedata.combining(ch)))
+
+
 def check_unicode_equivalence(raw: str, nfc: str) -> bool:
 	"""
 	Check if raw and NFC forms are visually equivalent.
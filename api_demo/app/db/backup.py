@@ -1,3 +1,4 @@
+import atexit
 import json
 import sqlite3
 import subprocess
@@ -5,72 +6,283 @@ import tempfile
 import time
 from pathlib import Path
 from threading import Lock
+from typing import Iterator
 
-from sqlalchemy import create_engine, select
 from sqlalchemy.engine.url import make_url
 
 from app.core.config import settings
 from app.core.logging import log_event
-from app.db.base import Base
-import app.db.models  # noqa: F401
-
-_backup_lock = Lock()
-_last_backup_at = 0.0
+from app.core.metrics import BYTES_BUCKETS, REGISTRY, export_stats
+from app.core.scheduler import CoalescingScheduler
+from app.db.coordination import process_lock, read_state, write_state
+from app.db.compression import compress_chunks, compression_suffix, resolve_method
+from app.db.fingerprint import (
+	file_sha256,
+	postgres_fingerprint,
+	read_backup_fingerprint,
+	sqlite_fingerprint,
+	write_backup_fingerprint,
+)
+from app.db.manifest import (
+	HashingCounter,
+	build_manifest,
+	manifest_key,
+	postgres_snapshot,
+	sqlite_row_counts,
+	write_manifest,
+)
+from app.db.sqlite_export import export_to_sqlite
+from app.db.sqlite_incremental import ChainState, build_delta, page_hashes, read_page_size, restore_chain
+from app.db.storage import BackupStorage, get_storage
+
+# Backups themselves run under process_lock("backup"); this only guards _run_counts.
+_run_counts_lock = Lock()
+LAST_BACKUP_STATE = "backup_last_run"
+
+backup_duration = REGISTRY.histogram(
+	"backup_duration_seconds",
+	"Backup run duration by result (uploaded, skipped, failed).",
+	["result"],
+	buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+backup_uploaded_bytes = REGISTRY.histogram(
+	"backup_uploaded_bytes", "Bytes uploaded per backup run.", buckets=BYTES_BUCKETS
+)
+backup_snapshot_bytes = REGISTRY.gauge("backup_last_snapshot_bytes", "Uncompressed size of the last snapshot.")
+_run_counts = {"runs": 0, "uploaded": 0, "skipped_unchanged": 0, "bytes_uploaded": 0}
 
 
 def backup_db_to_s3(reason: str = "commit") -> None:
 	if not settings.S3_AUTO_BACKUP_ENABLED:
 		return
 
-	if not settings.S3_BUCKET:
+	if not _storage_configured():
 		log_event("s3_backup_skipped", reason="missing_bucket")
 		return
 
 	min_interval = settings.S3_AUTO_BACKUP_MIN_INTERVAL_SEC
-	now = time.time()
-	with _backup_lock:
-		global _last_backup_at
-		if min_interval and now - _last_backup_at < min_interval:
+	# One backup at a time across worker processes; the throttle is shared through the same lock.
+	with process_lock("backup"):
+		now = time.time()
+		if min_interval and now - _last_backup_at() < min_interval:
 			log_event("s3_backup_skipped", reason="throttled")
 			return
-		_last_backup_at = now
+		write_state(LAST_BACKUP_STATE, str(now))
+		_run_backup(reason)
+
+
+def _last_backup_at() -> float:
+	try:
+		return float(read_state(LAST_BACKUP_STATE) or 0)
+	except ValueError:
+		return 0.0
 
+
+def _storage_configured() -> bool:
+	return settings.BACKUP_STORAGE == "local" or bool(settings.S3_BUCKET)
+
+
+def _run_backup(reason: str) -> None:
+	started = time.perf_counter()
+	result = "failed"
 	try:
-		_upload_database_backup(reason=reason)
+		result = _upload_database_backup(reason=reason)
 	except Exception as exc:
 		log_event("s3_backup_failed", reason=reason, error=str(exc))
+	finally:
+		backup_duration.observe(time.perf_counter() - started, result=result)
+
+
+def _scheduled_backup(reason: str) -> None:
+	# The scheduler spaces this process's runs by S3_AUTO_BACKUP_MIN_INTERVAL_SEC. Other workers'
+	# runs wait on the lock, and one that finds the data already uploaded is skipped as unchanged.
+	if not _storage_configured():
+		log_event("s3_backup_skipped", reason="missing_bucket")
+		return
+	with process_lock("backup"):
+		write_state(LAST_BACKUP_STATE, str(time.time()))
+		_run_backup(reason)
+
+
+backup_scheduler = CoalescingScheduler(
+	"s3_backup",
+	_scheduled_backup,
+	debounce_sec=settings.S3_BACKUP_DEBOUNCE_SEC,
+	max_delay_sec=settings.S3_BACKUP_MAX_DELAY_SEC,
+	min_interval_sec=settings.S3_AUTO_BACKUP_MIN_INTERVAL_SEC,
+)
+
+
+def _collect_backup_metrics() -> None:
+	export_stats("backup_runs", "Backup run counters", backup_stats())
+	export_stats("backup_scheduler", "Backup scheduler state", backup_scheduler.stats())
+
+
+REGISTRY.register_collector(_collect_backup_metrics)
+
+
+# Give a pending coalesced backup a chance to run before the process exits.
+atexit.register(backup_scheduler.flush, timeout=30)
+
+
+def request_backup(reason: str = "commit") -> None:
+	"""Signal that data changed; the scheduler coalesces signals into one backup."""
+	if not settings.S3_AUTO_BACKUP_ENABLED:
+		return
+	backup_scheduler.notify(reason)
+
+
+def backup_stats() -> dict:
+	"""Counters for backup runs, including how many were skipped as unchanged."""
+	with _run_counts_lock:
+		counts = dict(_run_counts)
+	runs = counts["runs"]
+	counts["skip_ratio"] = round(counts["skipped_unchanged"] / runs, 4) if runs else 0.0
+	counts["upload_ratio"] = round(counts["uploaded"] / runs, 4) if runs else 0.0
+	return counts
+
+
+def _count_run(uploaded_bytes: int = None) -> None:
+	with _run_counts_lock:
+		_run_counts["runs"] += 1
+		if uploaded_bytes is None:
+			_run_counts["skipped_unchanged"] += 1
+		else:
+			_run_counts["uploaded"] += 1
+			_run_counts["bytes_uploaded"] += uploaded_bytes
+
+
+def _skip_unchanged(reason: str, base_name: str, check: str) -> None:
+	_count_run()
+	stats = backup_stats()
+	log_event(
+		"s3_backup_skipped",
+		reason="unchanged",
+		trigger=reason,
+		base_name=base_name,
+		check=check,
+		skip_ratio=stats["skip_ratio"],
+		upload_ratio=stats["upload_ratio"],
+	)
+
+
+def _backup_target(prefix: str) -> str:
+	# A fingerprint only counts for the destination it was uploaded to.
+	if settings.BACKUP_STORAGE == "local":
+		return f"local:{Path(settings.BACKUP_LOCAL_DIR).resolve()}/{prefix}"
+	return f"s3:{settings.S3_BUCKET}/{prefix}"
+
+
+def _previous_fingerprint(base_name: str, target: str) -> dict:
+	if not settings.S3_BACKUP_DEDUP:
+		return {}
+	previous = read_backup_fingerprint(base_name)
+	return previous if previous.get("target") == target else {}
 
 
-def _upload_database_backup(reason: str) -> None:
+def _upload_database_backup(reason: str) -> str:
+	"""Run one backup; returns "uploaded" or "skipped" (database unchanged)."""
 	url = make_url(settings.DATABASE_URL)
 	driver = url.drivername or ""
 	prefix = settings.S3_PREFIX.strip("/") if settings.S3_PREFIX else "backups"
 	timestamp = time.strftime("%Y%m%d-%H%M%S")
+	storage = get_storage()
+	target = _backup_target(prefix)
 
 	if driver.startswith("sqlite"):
-		source_path = Path(url.database or "").expanduser()
-		if not source_path.is_absolute():
-			source_path = (Path.cwd() / source_path).resolve()
-		if not source_path.exists():
-			raise FileNotFoundError(f"SQLite file not found: {source_path}")
+		source_path = _sqlite_source_path(url)
 		base_name = source_path.stem
+		previous = _previous_fingerprint(base_name, target)
+		fingerprint = sqlite_fingerprint(source_path)
+		if fingerprint and previous.get("fingerprint") == fingerprint:
+			_skip_unchanged(reason, base_name, "fingerprint")
+			return "skipped"
+		suffix = ".db"
 		object_name = f"{prefix}/{base_name}-{timestamp}.db"
 		with tempfile.TemporaryDirectory() as temp_dir:
 			tmp_path = Path(temp_dir) / f"{source_path.stem}-{timestamp}.db"
 			_write_sqlite_backup(source_path, tmp_path)
-			_upload_to_s3(tmp_path, object_name)
+			snapshot_bytes = tmp_path.stat().st_size
+			# The header/mtime fingerprint also moves on no-op writes; the snapshot hash does not.
+			content_sha256 = file_sha256(tmp_path)
+			if previous.get("sha256") == content_sha256:
+				write_backup_fingerprint(
+					base_name,
+					target=target,
+					fingerprint=fingerprint,
+					sha256=content_sha256,
+					object_key=previous.get("object_key"),
+				)
+				_skip_unchanged(reason, base_name, "content")
+				return "skipped"
+			manifest_extra = {}
+			if settings.S3_SQLITE_INCREMENTAL:
+				object_name, uploaded = _upload_sqlite_incremental(
+					storage, tmp_path, prefix, base_name, timestamp
+				)
+				if object_name.endswith(".delta.gz"):
+					manifest_extra["chain"] = ChainState(_chain_state_path(base_name)).manifest()
+			else:
+				uploaded = storage.put_file(tmp_path, object_name)
+			manifest = build_manifest(
+				object_name,
+				"sqlite_delta" if manifest_extra else "sqlite",
+				content_sha256,
+				snapshot_bytes,
+				sqlite_row_counts(tmp_path),
+				**manifest_extra,
+			)
 	else:
 		db_name = url.database or "database"
 		pg_url = _normalize_pg_url(url)
 		base_name = db_name
-		object_name = f"{prefix}/{base_name}-{timestamp}.sql"
-		with tempfile.TemporaryDirectory() as temp_dir:
-			tmp_path = Path(temp_dir) / f"{db_name}-{timestamp}.sql"
-			_dump_postgres(tmp_path, pg_url)
-			_upload_to_s3(tmp_path, object_name)
+		previous = _previous_fingerprint(base_name, target)
+		# Taken before the dump, so writes racing the dump trigger another backup later.
+		fingerprint = postgres_fingerprint(pg_url)
+		if fingerprint and previous.get("fingerprint") == fingerprint:
+			_skip_unchanged(reason, base_name, "fingerprint")
+			return "skipped"
+		content_sha256 = None
+		suffix = (".sql", ".sql.gz", ".sql.zst")
+		compression = resolve_method(settings.BACKUP_COMPRESSION)
+		object_name = f"{prefix}/{base_name}-{timestamp}.sql{compression_suffix(compression)}"
+		with postgres_snapshot(pg_url) as (snapshot_id, row_counts):
+			# pg_dump output is compressed and uploaded as it is produced; nothing touches disk.
+			dump = HashingCounter(_stream_postgres_dump(pg_url, snapshot=snapshot_id))
+			uploaded = storage.put_stream(compress_chunks(dump, compression), object_name)
+		snapshot_bytes = dump.count
+		manifest = build_manifest(
+			object_name,
+			"pg_dump",
+			dump.hexdigest(),
+			snapshot_bytes,
+			row_counts,
+			compression=compression,
+			row_counts_exact=snapshot_id is not None,
+		)
 
-	log_event("s3_backup_complete", reason=reason, object_key=object_name)
-	_cleanup_old_backups(prefix, base_name, settings.S3_SNAPSHOT_RETENTION)
+	uploaded += write_manifest(storage, manifest)
+	write_backup_fingerprint(
+		base_name,
+		target=target,
+		fingerprint=fingerprint,
+		sha256=content_sha256,
+		object_key=object_name,
+	)
+	_count_run(uploaded)
+	backup_uploaded_bytes.observe(uploaded)
+	backup_snapshot_bytes.set(snapshot_bytes)
+	stats = backup_stats()
+	log_event(
+		"s3_backup_complete",
+		reason=reason,
+		object_key=object_name,
+		snapshot_bytes=snapshot_bytes,
+		bytes_uploaded=uploaded,
+		skip_ratio=stats["skip_ratio"],
+		upload_ratio=stats["upload_ratio"],
+	)
+	_cleanup_old_backups(storage, prefix, base_name, settings.S3_SNAPSHOT_RETENTION, suffix)
 
 	if (not driver.startswith("sqlite")) and settings.S3_SQLITE_SNAPSHOT_ENABLED:
 		sqlite_base = f"{base_name}-sqlite"
@@ -78,9 +290,108 @@ def _upload_database_backup(reason: str) -> None:
 		with tempfile.TemporaryDirectory() as temp_dir:
 			sqlite_path = Path(temp_dir) / f"{sqlite_base}-{timestamp}.db"
 			_export_postgres_to_sqlite(sqlite_path, pg_url)
-			_upload_to_s3(sqlite_path, sqlite_object_name)
+			storage.put_file(sqlite_path, sqlite_object_name)
+			write_manifest(
+				storage,
+				build_manifest(
+					sqlite_object_name,
+					"sqlite",
+					file_sha256(sqlite_path),
+					sqlite_path.stat().st_size,
+					sqlite_row_counts(sqlite_path),
+				),
+			)
 		log_event("s3_sqlite_backup_complete", reason=reason, object_key=sqlite_object_name)
-		_cleanup_old_backups(prefix, sqlite_base, settings.S3_SQLITE_SNAPSHOT_RETENTION)
+		_cleanup_old_backups(storage, prefix, sqlite_base, settings.S3_SQLITE_SNAPSHOT_RETENTION, ".db")
+	return "uploaded"
+
+
+def _sqlite_source_path(url) -> Path:
+	source_path = Path(url.database or "").expanduser()
+	if not source_path.is_absolute():
+		source_path = (Path.cwd() / source_path).resolve()
+	if not source_path.exists():
+		raise FileNotFoundError(f"SQLite file not found: {source_path}")
+	return source_path
+
+
+def _incremental_prefix(prefix: str, base_name: str) -> str:
+	return f"{prefix}/incremental/{base_name}"
+
+
+def _chain_state_path(base_name: str) -> Path:
+	return Path(settings.BACKUP_STATE_DIR) / f"{base_name}-chain.json"
+
+
+def _upload_sqlite_incremental(
+	storage: BackupStorage,
+	snapshot_path: Path,
+	prefix: str,
+	base_name: str,
+	timestamp: str,
+) -> tuple:
+	"""Upload only the pages that changed since the previous snapshot.
+
+	A new full base is taken when there is no usable chain, after
+	S3_SQLITE_FULL_EVERY deltas, or when most pages changed anyway.
+	"""
+	state = ChainState(_chain_state_path(base_name))
+	page_size = read_page_size(snapshot_path)
+	chain_prefix = _incremental_prefix(prefix, base_name)
+
+	if state.base_key and state.page_size == page_size and len(state.deltas) < settings.S3_SQLITE_FULL_EVERY:
+		seq = len(state.deltas) + 1
+		delta, hashes, changed = build_delta(
+			snapshot_path,
+			page_size,
+			state.hashes,
+			{"base_key": state.base_key, "seq": seq, "timestamp": timestamp},
+		)
+		if changed * 2 <= len(hashes):
+			delta_key = f"{chain_prefix}/{state.chain_id}/{seq:06d}-{timestamp}.delta.gz"
+			uploaded = storage.put_bytes(delta, delta_key)
+			state.add_delta(delta_key, hashes)
+			uploaded += _publish_chain(storage, chain_prefix, state)
+			state.save()
+			log_event("s3_backup_incremental", object_key=delta_key, changed_pages=changed, pages=len(hashes))
+			return delta_key, uploaded
+
+	chain_id = timestamp
+	attempt = 1
+	while chain_id == state.chain_id or storage.list(f"{chain_prefix}/{chain_id}/"):
+		# Two bases within the same second must not share a chain directory.
+		chain_id = f"{timestamp}.{attempt}"
+		attempt += 1
+	base_key = f"{prefix}/{base_name}-{chain_id}.db"
+	uploaded = storage.put_file(snapshot_path, base_key)
+	state.start_chain(base_key, chain_id, page_size, page_hashes(snapshot_path, page_size))
+	uploaded += _publish_chain(storage, chain_prefix, state)
+	state.save()
+	return base_key, uploaded
+
+
+def _publish_chain(storage: BackupStorage, chain_prefix: str, state: ChainState) -> int:
+	manifest = json.dumps(state.manifest(), sort_keys=True).encode("utf-8")
+	uploaded = storage.put_bytes(manifest, f"{chain_prefix}/{state.chain_id}/chain.json")
+	uploaded += storage.put_bytes(manifest, f"{chain_prefix}/latest.json")
+	return uploaded
+
+
+def restore_sqlite_backup(dest_path: Path, base_name: str, storage: BackupStorage = None) -> dict:
+	"""Rebuild the newest SQLite snapshot at dest_path (base + replayed deltas)."""
+	storage = storage or get_storage()
+	prefix = settings.S3_PREFIX.strip("/") if settings.S3_PREFIX else "backups"
+	chain_prefix = _incremental_prefix(prefix, base_name)
+	if storage.list(f"{chain_prefix}/latest.json"):
+		manifest = json.loads(storage.get_bytes(f"{chain_prefix}/latest.json").decode("utf-8"))
+	else:
+		bases = [item for item in storage.list(f"{prefix}/{base_name}-") if item["Key"].endswith(".db")]
+		if not bases:
+			raise FileNotFoundError(f"No SQLite backups for {base_name}")
+		bases.sort(key=lambda item: item.get("LastModified", ""))
+		manifest = {"base_key": bases[-1]["Key"], "deltas": []}
+	downloaded = restore_chain(storage, manifest, Path(dest_path))
+	return {"base_key": manifest["base_key"], "deltas": len(manifest.get("deltas", [])), "bytes_downloaded": downloaded}
 
 
 def _write_sqlite_backup(source_path: Path, dest_path: Path) -> None:
@@ -94,32 +405,30 @@ def _write_sqlite_backup(source_path: Path, dest_path: Path) -> None:
 		source_conn.close()
 
 
-def _dump_postgres(dest_path: Path, url) -> None:
+def _render_url(url) -> str:
 	if hasattr(url, "render_as_string"):
-		url_str = url.render_as_string(hide_password=False)
-	else:
-		url_str = str(url)
-	with dest_path.open("wb") as handle:
-		result = subprocess.run(
-			["pg_dump", url_str],
-			check=False,
-			stdout=handle,
-			stderr=subprocess.PIPE,
-		)
-	if result.returncode != 0:
-		raise RuntimeError(result.stderr.decode("utf-8", errors="replace"))
+		return url.render_as_string(hide_password=False)
+	return str(url)
 
 
-def _upload_to_s3(local_path: Path, object_key: str) -> None:
-	remote_uri = f"s3://{settings.S3_BUCKET}/{object_key}"
-	result = subprocess.run(
-		["aws", "s3", "cp", str(local_path), remote_uri],
-		check=False,
-		stdout=subprocess.PIPE,
-		stderr=subprocess.PIPE,
-	)
-	if result.returncode != 0:
-		raise RuntimeError(result.stderr.decode("utf-8", errors="replace"))
+def _stream_postgres_dump(url, chunk_size: int = 1024 * 1024, snapshot: str = None) -> Iterator[bytes]:
+	command = ["pg_dump", _render_url(url)]
+	if snapshot:
+		command.append(f"--snapshot={snapshot}")
+	with tempfile.TemporaryFile() as stderr:
+		process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+		try:
+			while True:
+				chunk = process.stdout.read(chunk_size)
+				if not chunk:
+					break
+				yield chunk
+		finally:
+			process.stdout.close()
+			returncode = process.wait()
+		if returncode != 0:
+			stderr.seek(0)
+			raise RuntimeError(stderr.read().decode("utf-8", errors="replace"))
 
 
 def _normalize_pg_url(url):
@@ -132,75 +441,48 @@ def _normalize_pg_url(url):
 
 
 def _export_postgres_to_sqlite(sqlite_path: Path, pg_url) -> None:
-	src_engine = create_engine(pg_url)
-	dest_engine = create_engine(f"sqlite:///{sqlite_path}")
-
-	Base.metadata.create_all(bind=dest_engine)
-
-	with src_engine.connect() as src_conn, dest_engine.begin() as dest_conn:
-		for table in Base.metadata.sorted_tables:
-			result = src_conn.execute(select(table))
-			while True:
-				rows = result.fetchmany(1000)
-				if not rows:
-					break
-				dest_conn.execute(table.insert(), [dict(row._mapping) for row in rows])
+	stats = export_to_sqlite(
+		pg_url,
+		sqlite_path,
+		workers=settings.SQLITE_EXPORT_WORKERS,
+		batch_size=settings.SQLITE_EXPORT_BATCH_SIZE,
+	)
+	log_event("sqlite_export_complete", **{k: v for k, v in stats.items() if k != "rows_per_table"})
 
 
-def _cleanup_old_backups(prefix: str, base_name: str, retention: int) -> None:
+def _cleanup_old_backups(
+	storage: BackupStorage,
+	prefix: str,
+	base_name: str,
+	retention: int,
+	suffix,
+) -> None:
 	if retention <= 0:
 		return
 
 	list_prefix = f"{prefix}/{base_name}-"
-	result = subprocess.run(
-		[
-			"aws",
-			"s3api",
-			"list-objects-v2",
-			"--bucket",
-			settings.S3_BUCKET,
-			"--prefix",
-			list_prefix,
-		],
-		check=False,
-		stdout=subprocess.PIPE,
-		stderr=subprocess.PIPE,
-	)
-	if result.returncode != 0:
-		log_event(
-			"s3_backup_cleanup_failed",
-			error=result.stderr.decode("utf-8", errors="replace"),
-		)
+	try:
+		contents = [item for item in storage.list(list_prefix) if item["Key"].endswith(suffix)]
+	except Exception as exc:
+		log_event("s3_backup_cleanup_failed", error=str(exc))
 		return
-
-	payload = json.loads(result.stdout.decode("utf-8") or "{}")
-	contents = payload.get("Contents", [])
 	if len(contents) <= retention:
 		return
 
 	contents.sort(key=lambda item: item.get("LastModified", ""))
-	to_delete = contents[:-retention]
-	delete_payload = {"Objects": [{"Key": item["Key"]} for item in to_delete], "Quiet": True}
-
-	delete_result = subprocess.run(
-		[
-			"aws",
-			"s3api",
-			"delete-objects",
-			"--bucket",
-			settings.S3_BUCKET,
-			"--delete",
-			json.dumps(delete_payload),
-		],
-		check=False,
-		stdout=subprocess.PIPE,
-		stderr=subprocess.PIPE,
-	)
-	if delete_result.returncode != 0:
-		log_event(
-			"s3_backup_cleanup_failed",
-			error=delete_result.stderr.decode("utf-8", errors="replace"),
-		)
+	pruned_bases = [item["Key"] for item in contents[:-retention]]
+	to_delete = pruned_bases + [manifest_key(key) for key in pruned_bases]
+
+	# Incremental chains whose base is being pruned go with it.
+	chain_prefix = _incremental_prefix(prefix, base_name)
+	for key in pruned_bases:
+		chain_id = key[len(list_prefix):].rsplit(".db", 1)[0]
+		to_delete.extend(item["Key"] for item in storage.list(f"{chain_prefix}/{chain_id}/"))
+
+	try:
+		storage.delete(to_delete)
+	except Exception as exc:
+		log_event("s3_backup_cleanup_failed", error=str(exc))
 		return
 
 	log_event("s3_backup_pruned", removed=len(to_delete), remaining=retention)
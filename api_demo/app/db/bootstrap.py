@@ -0,0 +1,277 @@
+"""Startup initialization with fingerprints so restarts skip work that is already current.
+
+Each phase (schema, seed, super admin) hashes its inputs and stores the result in
+``bootstrap_state``. In fast-start mode a phase whose fingerprint matches is skipped,
+and the seed/admin phases run in a background thread after the app starts serving.
+"""
+
+import hashlib
+import hmac
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.security import hash_password
+from app.db.base import Base
+from app.db.changes import backfill_change_log
+from app.db.coordination import process_lock
+from app.db.models import BootstrapState, ChangeLog, DictionaryStat, Language, User
+from app.db.partitions import language_files, main_tables, routing_enabled
+from app.db.seed import resolve_word_list_path, seed_languages, seed_words
+from app.db.stats import backfill_defined_by, reconcile_stats, refresh_definition_flags
+
+DEFAULT_LANGUAGES = ["Nufi", "Medumba", "Ghomala'", "Yoruba"]
+
+
+def seed_dictionary(session_factory, project_dir: Path, configured_path: str) -> None:
+	word_list_path = resolve_word_list_path(project_dir, configured_path)
+	db = session_factory()
+	try:
+		seed_languages(db, DEFAULT_LANGUAGES)
+		nufi = db.query(Language).filter(Language.name == "Nufi").first()
+		if nufi:
+			seed_words(db, word_list_path, nufi, force=False)
+	finally:
+		db.close()
+
+
+def schema_fingerprint() -> str:
+	digest = hashlib.sha256()
+	for table in Base.metadata.sorted_tables:
+		digest.update(table.name.encode("utf-8"))
+		for column in table.columns:
+			digest.update(f"|{column.name}:{column.type!r}:{column.nullable}".encode("utf-8"))
+		for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+			digest.update(f"|ix:{index.name}".encode("utf-8"))
+	return digest.hexdigest()
+
+
+def seed_fingerprint(word_list_path: Path) -> str:
+	digest = hashlib.sha256("\n".join(DEFAULT_LANGUAGES).encode("utf-8"))
+	digest.update(str(word_list_path.name).encode("utf-8"))
+	if word_list_path.exists():
+		digest.update(word_list_path.read_bytes())
+	return digest.hexdigest()
+
+
+def admin_fingerprint(email: str, password: str) -> str:
+	# Keyed so the stored value does not allow offline guessing of the admin password.
+	message = f"{email.lower()}\0{password}".encode("utf-8")
+	return hmac.new(settings.JWT_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def read_fingerprint(db, key: str) -> Optional[str]:
+	try:
+		row = db.query(BootstrapState).filter(BootstrapState.key == key).first()
+	except SQLAlchemyError:
+		db.rollback()
+		return None
+	return row.fingerprint if row else None
+
+
+def write_fingerprint(db, key: str, fingerprint: str) -> None:
+	row = db.query(BootstrapState).filter(BootstrapState.key == key).first()
+	if row:
+		row.fingerprint = fingerprint
+	else:
+		db.add(BootstrapState(key=key, fingerprint=fingerprint))
+	db.commit()
+
+
+def ensure_schema(engine, session_factory, fast_start: bool) -> bool:
+	"""Create missing tables unless the stored schema fingerprint is current. Returns True if work ran."""
+	fingerprint = schema_fingerprint()
+	db = session_factory()
+	try:
+		if fast_start and read_fingerprint(db, "schema") == fingerprint:
+			return False
+	finally:
+		db.close()
+	# With per-language SQLite files the dictionary tables are created per file (app/db/partitions.py).
+	routed = routing_enabled()
+	if not routed and engine.dialect.name == "sqlite" and language_files():
+		log_event("partition_files_ignored", detail="PARTITION_BY_LANGUAGE is off but language files exist")
+	tables = main_tables()
+	new_change_log = not routed and not inspect(engine).has_table(ChangeLog.__tablename__)
+	reconcile = not routed and not inspect(engine).has_table(DictionaryStat.__tablename__)
+	Base.metadata.create_all(bind=engine, tables=tables)
+	added = add_missing_columns(engine)
+	# create_all skips tables that already exist, so add indexes introduced since they were created.
+	# Only SQLite needs this: Postgres gets its indexes from the Alembic migrations.
+	if engine.dialect.name == "sqlite":
+		with engine.begin() as conn:
+			for table in tables:
+				for index in table.indexes:
+					conn.execute(CreateIndex(index, if_not_exists=True))
+	db = session_factory()
+	try:
+		if added:
+			if not routed:  # language files refresh their own flags when opened
+				refresh_definition_flags(db)
+				# New defined_by_id columns: credit existing definitions, then recount, as migration 0017 does.
+				reconcile = backfill_defined_by(db) > 0 or reconcile
+				db.commit()
+			log_event("schema_columns_added", columns=added)
+		if new_change_log:
+			# Existing rows become the first changes, as migration 0016 does on Postgres.
+			backfill_change_log(db)
+			db.commit()
+		if reconcile:
+			# Write paths only add deltas to the counters, so start them from the existing rows.
+			reconcile_stats(db)
+		write_fingerprint(db, "schema", fingerprint)
+	finally:
+		db.close()
+	return True
+
+
+def add_missing_columns(engine) -> List[str]:
+	"""SQLite only: add model columns that existing tables lack (Postgres goes through Alembic)."""
+	if engine.dialect.name != "sqlite":
+		return []
+	inspector = inspect(engine)
+	existing_tables = set(inspector.get_table_names())
+	added = []
+	with engine.begin() as conn:
+		for table in Base.metadata.sorted_tables:
+			if table.name not in existing_tables:
+				continue
+			present = {column["name"] for column in inspector.get_columns(table.name)}
+			for column in table.columns:
+				if column.name in present or (not column.nullable and column.server_default is None):
+					continue
+				ddl = CreateColumn(column).compile(dialect=engine.dialect)
+				conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}'))
+				added.append(f"{table.name}.{column.name}")
+	return added
+
+
+def ensure_seed(session_factory, project_dir: Path, configured_path: str, fast_start: bool) -> bool:
+	word_list_path = resolve_word_list_path(project_dir, configured_path)
+	fingerprint = seed_fingerprint(word_list_path)
+	db = session_factory()
+	try:
+		if fast_start and read_fingerprint(db, "seed") == fingerprint:
+			present = db.query(Language).filter(Language.name.in_(DEFAULT_LANGUAGES)).count()
+			if present == len(DEFAULT_LANGUAGES):
+				return False
+	finally:
+		db.close()
+	seed_dictionary(session_factory, project_dir, configured_path)
+	db = session_factory()
+	try:
+		write_fingerprint(db, "seed", fingerprint)
+	finally:
+		db.close()
+	return True
+
+
+def ensure_super_admin(session_factory, email: str, password: str, fast_start: bool) -> bool:
+	email = email.lower()
+	fingerprint = admin_fingerprint(email, password)
+	db = session_factory()
+	try:
+		user = db.query(User).filter(User.email == email).first()
+		current = (
+			user is not None
+			and user.role == "super_admin"
+			and user.is_verified
+			and not user.is_deleted
+		)
+		if fast_start and current and read_fingerprint(db, "super_admin") == fingerprint:
+			return False
+		if not user:
+			user = User(
+				email=email,
+				password_hash=hash_password(password),
+				role="super_admin",
+				is_verified=True,
+			)
+			db.add(user)
+		else:
+			user.role = "super_admin"
+			user.password_hash = hash_password(password)
+			user.is_verified = True
+		db.commit()
+		write_fingerprint(db, "super_admin", fingerprint)
+	finally:
+		db.close()
+	return True
+
+
+class Bootstrapper:
+	"""Runs startup phases and records how long each took."""
+
+	def __init__(self, engine, session_factory, project_dir: Path, fast_start: bool):
+		self.engine = engine
+		self.session_factory = session_factory
+		self.project_dir = project_dir
+		self.fast_start = fast_start
+		self.started_at = time.perf_counter()
+		self.phases = {}
+		self.startup_ms = None
+		self.completed_ms = None
+		self.ready = threading.Event()
+		self._thread = None
+
+	def _timed(self, name: str, fn, *args) -> None:
+		started = time.perf_counter()
+		ran = fn(*args)
+		self.phases[name] = {
+			"ran": bool(ran),
+			"duration_ms": round((time.perf_counter() - started) * 1000, 3),
+		}
+
+	def run_schema(self) -> None:
+		# Workers start together: one at a time runs each phase, and fast start lets the rest skip it.
+		with process_lock("bootstrap"):
+			self._timed("schema", ensure_schema, self.engine, self.session_factory, self.fast_start)
+
+	def run_deferred(self) -> None:
+		try:
+			with process_lock("bootstrap"):
+				if settings.AUTO_SEED_ON_START:
+					self._timed(
+						"seed", ensure_seed,
+						self.session_factory, self.project_dir, settings.WORD_LIST_PATH, self.fast_start,
+					)
+				if settings.AUTO_CREATE_SUPER_ADMIN and settings.SUPER_ADMIN_EMAIL and settings.SUPER_ADMIN_PASSWORD:
+					self._timed(
+						"super_admin", ensure_super_admin,
+						self.session_factory, settings.SUPER_ADMIN_EMAIL, settings.SUPER_ADMIN_PASSWORD, self.fast_start,
+					)
+		except Exception as exc:
+			log_event("bootstrap_failed", error=str(exc))
+			if not self.fast_start:
+				raise
+		finally:
+			self.completed_ms = self._elapsed_ms()
+			self.ready.set()
+			log_event("bootstrap_complete", **self.metrics())
+
+	def start_background(self) -> None:
+		self._thread = threading.Thread(target=self.run_deferred, name="bootstrap", daemon=True)
+		self._thread.start()
+
+	def mark_serving(self) -> None:
+		self.startup_ms = self._elapsed_ms()
+		log_event("startup_complete", fast_start=self.fast_start, startup_ms=self.startup_ms)
+
+	def _elapsed_ms(self) -> float:
+		return round((time.perf_counter() - self.started_at) * 1000, 3)
+
+	def metrics(self) -> dict:
+		return {
+			"fast_start": self.fast_start,
+			"ready": self.ready.is_set(),
+			"startup_ms": self.startup_ms,
+			"bootstrap_ms": self.completed_ms,
+			"phases": dict(self.phases),
+		}
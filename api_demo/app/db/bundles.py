@@ -0,0 +1,370 @@
+"""Versioned offline bundles: one standalone SQLite file per language.
+
+A bundle holds the language's word entries (lemma, search keys, pos, status and the
+pre-rendered entry document) and legacy words, with indexes on two precomputed search
+keys: ``search_key`` (NFC, case-folded) and ``fold_key`` (also stripped of tone marks
+and other diacritics, for typing without Clafrica). ``meta`` records the format,
+language and version.
+
+The version is the language's change-log cursor (see app/db/changes.py) at build time.
+A rebuild copies the previous bundle and applies only the changes after its version. A
+reset or a format change forces a full build. At an unchanged cursor nothing is rebuilt,
+even with ``full``, unless the file no longer matches its checksum, so a version's file
+and ETag never change. Files are written next to their final
+name and renamed into place, and ``latest.json`` in the language's directory points at
+the current one:
+
+	BUNDLE_DIR/<language_id>/latest.json
+	BUNDLE_DIR/<language_id>/<slug>-v<version>.sqlite
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import REGISTRY, export_stats
+from app.core.scheduler import CoalescingScheduler
+from app.core.unicode_utils import fold_for_search
+from app.db.changes import ENTITY_ENTRY, ENTITY_LANGUAGE, ENTITY_WORD, latest_per_entity
+from app.db.coordination import process_lock
+from app.db.documents import documents_for
+from app.db.models import ChangeLog, Language, Word, WordEntry
+from app.db.sqlite_export import BULK_LOAD_PRAGMAS
+
+FORMAT = 1
+BATCH = 1000
+
+# Keys are already case-folded; NOCASE lets SQLite serve ``LIKE 'prefix%'`` from the indexes.
+SCHEMA = (
+	"CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+	"CREATE TABLE entries ("
+	"id INTEGER PRIMARY KEY, lemma TEXT NOT NULL, "
+	"search_key TEXT NOT NULL COLLATE NOCASE, fold_key TEXT NOT NULL COLLATE NOCASE, "
+	"pos TEXT, status TEXT, has_definition INTEGER NOT NULL, document TEXT NOT NULL)",
+	"CREATE TABLE words ("
+	"id INTEGER PRIMARY KEY, word TEXT NOT NULL, "
+	"search_key TEXT NOT NULL COLLATE NOCASE, fold_key TEXT NOT NULL COLLATE NOCASE, "
+	"is_defined INTEGER NOT NULL, definition TEXT, examples TEXT, synonyms TEXT, "
+	"translation_fr TEXT, translation_en TEXT, updated_at TEXT)",
+)
+INDEXES = (
+	"CREATE INDEX ix_entries_search_key ON entries (search_key)",
+	"CREATE INDEX ix_entries_fold_key ON entries (fold_key)",
+	"CREATE INDEX ix_words_search_key ON words (search_key)",
+	"CREATE INDEX ix_words_fold_key ON words (fold_key)",
+)
+ENTRY_COLUMNS = (
+	WordEntry.id,
+	WordEntry.lemma_raw,
+	WordEntry.lemma_nfc,
+	WordEntry.pos,
+	WordEntry.status,
+	WordEntry.has_definition,
+	WordEntry.document,
+)
+WORD_COLUMNS = (
+	Word.id,
+	Word.word,
+	Word.is_defined,
+	Word.definition,
+	Word.examples,
+	Word.synonyms,
+	Word.translation_fr,
+	Word.translation_en,
+	Word.updated_at,
+)
+
+def search_key(text: str) -> str:
+	return unicodedata.normalize("NFC", text.strip()).casefold()
+
+
+def bundle_dir(language_id: int, root: Optional[str] = None) -> Path:
+	return Path(root or settings.BUNDLE_DIR) / str(language_id)
+
+
+def read_manifest(language_id: int, root: Optional[str] = None, version: Optional[int] = None) -> Optional[dict]:
+	"""The current bundle's manifest, or that of a retained older ``version``."""
+	directory = bundle_dir(language_id, root)
+	if version is None:
+		path = directory / "latest.json"
+	else:
+		path = next(directory.glob(f"*-v{version}.sqlite.json"), directory / "missing")
+	try:
+		return json.loads(path.read_text(encoding="utf-8"))
+	except (FileNotFoundError, ValueError):
+		return None
+
+
+def bundle_path(manifest: dict, root: Optional[str] = None) -> Path:
+	return bundle_dir(manifest["language_id"], root) / manifest["file"]
+
+
+def _entry_rows(db, rows) -> List[tuple]:
+	return [
+		(
+			row.id, row.lemma_raw, search_key(row.lemma_nfc), fold_for_search(row.lemma_nfc),
+			row.pos, row.status, int(bool(row.has_definition)), document,
+		)
+		for row, document in zip(rows, documents_for(db, rows))
+	]
+
+
+def _word_rows(rows) -> List[tuple]:
+	return [
+		(
+			row.id, row.word, search_key(row.word), fold_for_search(row.word), int(bool(row.is_defined)),
+			row.definition, row.examples, row.synonyms, row.translation_fr, row.translation_en,
+			row.updated_at.isoformat() if row.updated_at else None,
+		)
+		for row in rows
+	]
+
+
+def _write_all(db, conn, language_id: int) -> None:
+	for model, columns, table in ((WordEntry, ENTRY_COLUMNS, "entries"), (Word, WORD_COLUMNS, "words")):
+		last_id = 0
+		while True:
+			rows = (
+				db.query(*columns)
+				.filter(model.language_id == language_id, model.id > last_id)
+				.order_by(model.id)
+				.limit(BATCH)
+				.all()
+			)
+			if not rows:
+				break
+			_insert(db, conn, table, rows)
+			last_id = rows[-1].id
+
+
+def _insert(db, conn, table: str, rows) -> None:
+	values = _entry_rows(db, rows) if table == "entries" else _word_rows(rows)
+	if values:
+		placeholders = ", ".join("?" * len(values[0]))
+		conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", values)
+
+
+def _apply_changes(db, conn, changes: List[ChangeLog]) -> int:
+	latest = latest_per_entity(changes)
+	for entity, model, columns, table in (
+		(ENTITY_ENTRY, WordEntry, ENTRY_COLUMNS, "entries"),
+		(ENTITY_WORD, Word, WORD_COLUMNS, "words"),
+	):
+		ids = [row.entity_id for row in latest if row.entity == entity]
+		for start in range(0, len(ids), BATCH):
+			chunk = ids[start:start + BATCH]
+			rows = db.query(*columns).filter(model.id.in_(chunk)).all()
+			_insert(db, conn, table, rows)
+			# Tombstones, and upserted rows that are gone by now.
+			gone = set(chunk) - {row.id for row in rows}
+			conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(entity_id,) for entity_id in gone])
+	return len(latest)
+
+
+def _sha256(path: Path) -> str:
+	digest = hashlib.sha256()
+	with path.open("rb") as handle:
+		for chunk in iter(lambda: handle.read(1 << 20), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def _prune(directory: Path, keep: int) -> None:
+	files = sorted(directory.glob("*-v*.sqlite"), key=lambda path: path.stat().st_mtime, reverse=True)
+	for path in files[max(1, keep):]:
+		path.unlink(missing_ok=True)
+		path.with_name(path.name + ".json").unlink(missing_ok=True)
+
+
+def build_bundle(db, language_id: int, root: Optional[str] = None, full: bool = False) -> dict:
+	"""Bring the language's bundle up to its change-log cursor. Returns the manifest."""
+	with process_lock("bundle_build"):
+		started = time.perf_counter()
+		language = db.get(Language, language_id)
+		if language is None:
+			raise LookupError(f"Language {language_id} not found")
+		# Read the cursor before the data: rows written meanwhile are re-applied next time.
+		version = db.query(func.max(ChangeLog.id)).filter(ChangeLog.language_id == language_id).scalar() or 0
+		directory = bundle_dir(language_id, root)
+		previous = read_manifest(language_id, root)
+		previous_path = bundle_path(previous, root) if previous else None
+		usable = previous is not None and previous.get("format") == FORMAT and previous_path.exists()
+		if usable and previous["version"] == version and (not full or _sha256(previous_path) == previous["sha256"]):
+			# Nothing changed. Rebuilding would rewrite this version's file with another
+			# built_at, so its checksum (the download ETag) would change under the same name.
+			return previous
+		# A lower version means the database went back (restore).
+		incremental = not full and usable and previous["version"] < version
+		changes = []
+		if incremental:
+			changes = (
+				db.query(ChangeLog)
+				.filter(ChangeLog.language_id == language_id, ChangeLog.id > previous["version"], ChangeLog.id <= version)
+				.order_by(ChangeLog.id)
+				.all()
+			)
+			# A reset purges the rows before it, so the bundle cannot be patched forward.
+			incremental = not any(change.entity == ENTITY_LANGUAGE for change in changes)
+
+		directory.mkdir(parents=True, exist_ok=True)
+		tmp = directory / f".build-{uuid.uuid4().hex}.sqlite"
+		try:
+			if incremental:
+				shutil.copyfile(previous_path, tmp)
+			conn = sqlite3.connect(str(tmp))
+			try:
+				for pragma in BULK_LOAD_PRAGMAS:
+					conn.execute(pragma)
+				if incremental:
+					applied = _apply_changes(db, conn, changes)
+				else:
+					for statement in SCHEMA:
+						conn.execute(statement)
+					_write_all(db, conn, language_id)
+					for statement in INDEXES:
+						conn.execute(statement)
+					applied = None
+				entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+				words = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+				built_at = datetime.utcnow().isoformat()
+				meta = {
+					"format": FORMAT,
+					"language_id": language_id,
+					"language_name": language.name,
+					"language_slug": language.slug,
+					"version": version,
+					"built_at": built_at,
+					"entries": entries,
+					"words": words,
+				}
+				conn.executemany(
+					"INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+					[(key, str(value)) for key, value in meta.items()],
+				)
+				conn.commit()
+				if not incremental:
+					conn.execute("ANALYZE")
+				conn.execute("PRAGMA journal_mode=DELETE")
+			finally:
+				conn.close()
+			final = directory / f"{language.slug}-v{version}.sqlite"
+			os.replace(tmp, final)
+		finally:
+			tmp.unlink(missing_ok=True)
+
+		manifest = {
+			**meta,
+			"file": final.name,
+			"size": final.stat().st_size,
+			"sha256": _sha256(final),
+			"mode": "incremental" if incremental else "full",
+			"changes_applied": applied,
+		}
+		# A copy next to the file keeps older versions servable; latest.json is swapped last.
+		for name in (final.name + ".json", "latest.json"):
+			manifest_tmp = directory / f"{name}.tmp"
+			manifest_tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+			os.replace(manifest_tmp, directory / name)
+		_prune(directory, settings.BUNDLE_KEEP)
+		log_event(
+			"bundle_built",
+			**{k: manifest[k] for k in ("language_id", "version", "mode", "changes_applied", "entries", "words", "size")},
+			duration_ms=round((time.perf_counter() - started) * 1000, 3),
+		)
+		return manifest
+
+
+def remove_bundles(language_id: int, root: Optional[str] = None) -> None:
+	shutil.rmtree(bundle_dir(language_id, root), ignore_errors=True)
+
+
+def pending_changes(db, manifest: dict) -> int:
+	return (
+		db.query(func.count(ChangeLog.id))
+		.filter(ChangeLog.language_id == manifest["language_id"], ChangeLog.id > manifest["version"])
+		.scalar()
+	)
+
+
+_pending_languages: set = set()
+_pending_lock = threading.Lock()
+
+
+def _scheduled_build(reason: str) -> None:
+	from app.db.session import SessionLocal
+
+	with _pending_lock:
+		language_ids = sorted(_pending_languages)
+		_pending_languages.clear()
+	db = SessionLocal()
+	try:
+		for language_id in language_ids:
+			try:
+				build_bundle(db, language_id)
+			except LookupError:
+				remove_bundles(language_id)
+			except Exception as exc:
+				db.rollback()
+				log_event("bundle_build_failed", language_id=language_id, error=str(exc))
+	finally:
+		db.close()
+
+
+bundle_scheduler = CoalescingScheduler(
+	"bundles",
+	_scheduled_build,
+	debounce_sec=settings.BUNDLE_DEBOUNCE_SEC,
+	max_delay_sec=settings.BUNDLE_MAX_DELAY_SEC,
+)
+
+
+def _collect_bundle_metrics() -> None:
+	export_stats("bundle_scheduler", "Offline bundle rebuild scheduler state", bundle_scheduler.stats())
+
+
+REGISTRY.register_collector(_collect_bundle_metrics)
+
+
+def request_bundle_rebuild(language_ids: Iterable[int]) -> None:
+	"""Signal that languages changed; rebuilds are coalesced by the scheduler."""
+	if not settings.BUNDLE_AUTO_REBUILD:
+		return
+	with _pending_lock:
+		_pending_languages.update(language_ids)
+	bundle_scheduler.notify("change_log")
+
+
+def main() -> None:
+	from app.db.session import SessionLocal
+
+	parser = argparse.ArgumentParser(description="Offline language bundles")
+	parser.add_argument("command", choices=["build"])
+	parser.add_argument("--language-id", type=int, action="append", help="Repeatable; default: every language")
+	parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of applying changes (skipped when nothing changed)")
+	args = parser.parse_args()
+	db = SessionLocal()
+	try:
+		language_ids = args.language_id or [row.id for row in db.query(Language.id).order_by(Language.id)]
+		for language_id in language_ids:
+			manifest = build_bundle(db, language_id, full=args.full)
+			print(json.dumps(manifest))
+	finally:
+		db.close()
+
+
+if __name__ == "__main__":
+	main()
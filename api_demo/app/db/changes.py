@@ -0,0 +1,113 @@
+"""Change feed for offline and mobile clients that mirror a language.
+
+Every write to a language's dictionary appends ``change_log`` rows in the same
+transaction: an ``upsert`` per word entry or legacy word it touched. Sense, example,
+translation and relation changes are reported as an upsert of their entry, since the
+entry document carries the whole tree, and children that are no longer there were
+deleted. Deleting or reseeding a language purges its rows and leaves a single
+``delete`` or ``reset`` row on ``language``, which tells clients to drop what they hold.
+
+``GET /dictionary/changes?language_id=&since=<cursor>`` returns the rows after the
+cursor using the ``(language_id, id)`` index, so a sync costs O(changes) rather than
+O(dictionary). ``id`` is the cursor. Writers take a per-language transaction lock on
+Postgres before appending, so ids become visible in order and a client never skips a
+change that commits late.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.types import DateTime, String
+
+from app.db.models import ChangeLog, Language, Word, WordEntry
+
+ENTITY_ENTRY = "word_entry"
+ENTITY_WORD = "word"
+ENTITY_LANGUAGE = "language"
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+OP_RESET = "reset"
+
+# First key of the two-key pg_advisory_xact_lock; the second is the language id.
+LOCK_CLASS = 0x4348
+
+
+def _lock_language(db, language_id: int) -> None:
+	dialect = db.dialect if hasattr(db, "dialect") else db.get_bind().dialect
+	if dialect.name == "postgresql":
+		db.execute(text("SELECT pg_advisory_xact_lock(:lock_class, :language_id)"), {
+			"lock_class": LOCK_CLASS,
+			"language_id": language_id,
+		})
+
+
+def record_changes(db, language_id: int, entity: str, entity_ids: Iterable[int], op: str = OP_UPSERT) -> int:
+	"""Append one row per id; call just before the commit of the change."""
+	created_at = datetime.utcnow()
+	rows = [
+		{"language_id": language_id, "entity": entity, "entity_id": entity_id, "op": op, "created_at": created_at}
+		for entity_id in entity_ids
+	]
+	if rows:
+		_lock_language(db, language_id)
+		db.execute(insert(ChangeLog), rows)
+		# Read after commit by app.db.session to schedule bundle rebuilds and static publication.
+		db.info.setdefault("changed_languages", set()).add(language_id)
+	return len(rows)
+
+
+def record_inserted(db, language_id: int, model, entity: str, after_id: int) -> None:
+	"""Upserts for every ``model`` row of the language with an id above ``after_id`` (bulk loads)."""
+	_lock_language(db, language_id)
+	db.info.setdefault("changed_languages", set()).add(language_id)
+	source = (
+		select(
+			model.language_id,
+			literal(entity, String),
+			model.id,
+			literal(OP_UPSERT, String),
+			literal(datetime.utcnow(), DateTime),
+		)
+		.where(model.language_id == language_id, model.id > after_id)
+		.order_by(model.id)
+	)
+	db.execute(
+		insert(ChangeLog).from_select(["language_id", "entity", "entity_id", "op", "created_at"], source)
+	)
+
+
+def backfill_change_log(db) -> None:
+	"""Record every existing word and entry as an upsert, for a log added to a populated database."""
+	for (language_id,) in db.query(Language.id).order_by(Language.id).all():
+		record_inserted(db, language_id, Word, ENTITY_WORD, 0)
+		record_inserted(db, language_id, WordEntry, ENTITY_ENTRY, 0)
+
+
+def reset_language(db, language_id: int, op: str = OP_RESET) -> None:
+	"""Drop the language's history and leave one ``reset`` (reseed) or ``delete`` row."""
+	_lock_language(db, language_id)
+	db.execute(ChangeLog.__table__.delete().where(ChangeLog.language_id == language_id))
+	record_changes(db, language_id, ENTITY_LANGUAGE, [language_id], op)
+
+
+def read_changes(db, language_id: int, since: int, limit: int) -> Tuple[List[ChangeLog], bool]:
+	"""Rows after ``since`` in order, up to ``limit``; the flag says whether more follow."""
+	rows = (
+		db.query(ChangeLog)
+		.filter(ChangeLog.language_id == language_id, ChangeLog.id > since)
+		.order_by(ChangeLog.id.asc())
+		.limit(limit + 1)
+		.all()
+	)
+	return rows[:limit], len(rows) > limit
+
+
+def latest_per_entity(rows: List[ChangeLog]) -> List[ChangeLog]:
+	"""Keep only the last row for each entity, in sequence order."""
+	latest = {}
+	for row in rows:
+		key = (row.entity, row.entity_id)
+		latest.pop(key, None)
+		latest[key] = row
+	return list(latest.values())
@@ -0,0 +1,71 @@
+"""Streaming compression for backup payloads (gzip from the stdlib, zstd if installed)."""
+
+import zlib
+from typing import Iterable, Iterator
+
+try:  # Optional dependency: pip install zstandard
+	import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+	zstandard = None
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+def resolve_method(method: str) -> str:
+	method = (method or "none").lower()
+	if method not in SUFFIXES:
+		raise ValueError(f"Unknown compression method: {method}")
+	if method == "zstd" and zstandard is None:
+		return "gzip"
+	return method
+
+
+def compression_suffix(method: str) -> str:
+	return SUFFIXES[resolve_method(method)]
+
+
+def method_for_key(key: str) -> str:
+	for method, suffix in SUFFIXES.items():
+		if suffix and key.endswith(suffix):
+			return method
+	return "none"
+
+
+def compress_chunks(chunks: Iterable[bytes], method: str, level: int = 6) -> Iterator[bytes]:
+	method = resolve_method(method)
+	if method == "none":
+		yield from chunks
+		return
+	if method == "zstd":
+		compressor = zstandard.ZstdCompressor(level=level).compressobj()
+	else:
+		compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+	for chunk in chunks:
+		out = compressor.compress(chunk)
+		if out:
+			yield out
+	tail = compressor.flush()
+	if tail:
+		yield tail
+
+
+def decompress_chunks(chunks: Iterable[bytes], method: str) -> Iterator[bytes]:
+	method = (method or "none").lower()
+	if method == "zstd" and zstandard is None:
+		raise RuntimeError("The zstandard package is required to read .zst backups")
+	if method == "none":
+		yield from chunks
+		return
+	if method == "zstd":
+		decompressor = zstandard.ZstdDecompressor().decompressobj()
+	else:
+		decompressor = zlib.decompressobj(31)
+	for chunk in chunks:
+		out = decompressor.decompress(chunk)
+		if out:
+			yield out
+	if method == "gzip":
+		tail = decompressor.flush()
+		if tail:
+			yield tail
+
@@ -0,0 +1,244 @@
+"""Coordination between worker processes (``WEB_CONCURRENCY`` > 1).
+
+Locks: ``process_lock(name)`` serializes a section across processes. It locks
+``COORDINATION_DIR/<name>.lock`` (``flock``, or ``msvcrt.locking`` on Windows), which
+covers the workers of one host, and on Postgres also takes a session advisory lock, which
+covers other hosts using the database. Where neither file lock exists it falls back to a
+lock that only covers this process.
+Bootstrap, backups, bundle builds and static publication run under one.
+
+Shared state: ``read_state``/``write_state`` keep small values, such as the time of the
+last backup, as files in ``COORDINATION_DIR``.
+
+Cache invalidation: a module registers a clear function with ``register_cache``.
+``invalidate(name)`` runs it in this process and bumps the cache's generation in
+``generations.json``. In multi-worker mode every worker polls that file every
+``CACHE_INVALIDATION_POLL_SEC`` and clears the caches whose generation moved.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import REGISTRY, export_stats
+
+try:
+	import fcntl
+except ImportError:  # Windows
+	fcntl = None
+try:
+	import msvcrt
+except ImportError:
+	msvcrt = None
+
+# First key of the two-key pg_advisory_lock; the second is a hash of the lock name.
+LOCK_CLASS = 0x434F
+GENERATIONS = "generations.json"
+
+_lock_counts: Dict[str, dict] = {}
+_counts_lock = threading.Lock()
+_local_locks: Dict[str, threading.Lock] = {}
+
+
+def coordination_dir() -> Path:
+	path = Path(settings.COORDINATION_DIR)
+	path.mkdir(parents=True, exist_ok=True)
+	return path
+
+
+def _count(name: str, waited_ms: float) -> None:
+	with _counts_lock:
+		counts = _lock_counts.setdefault(name, {"acquired": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0})
+		counts["acquired"] += 1
+		counts["wait_ms_total"] = round(counts["wait_ms_total"] + waited_ms, 3)
+		counts["wait_ms_max"] = max(counts["wait_ms_max"], round(waited_ms, 3))
+
+
+def _lock_file(handle, blocking: bool) -> bool:
+	if fcntl is not None:
+		try:
+			fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+		except BlockingIOError:
+			return False
+		return True
+	# msvcrt locks a byte range from the current position; LK_LOCK gives up after ~10s, so poll.
+	handle.seek(0)
+	while True:
+		try:
+			msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+			return True
+		except OSError:
+			if not blocking:
+				return False
+		time.sleep(0.05)
+
+
+def _unlock_file(handle) -> None:
+	if fcntl is not None:
+		fcntl.flock(handle, fcntl.LOCK_UN)
+	else:
+		handle.seek(0)
+		msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _file_lock(name: str, blocking: bool) -> Iterator[bool]:
+	if fcntl is None and msvcrt is None:
+		lock = _local_locks.setdefault(name, threading.Lock())
+		if not lock.acquire(blocking=blocking):
+			yield False
+			return
+		try:
+			yield True
+		finally:
+			lock.release()
+		return
+	with open(coordination_dir() / f"{name}.lock", "a+") as handle:
+		if not _lock_file(handle, blocking):
+			yield False
+			return
+		try:
+			yield True
+		finally:
+			_unlock_file(handle)
+
+
+@contextmanager
+def _advisory_lock(name: str, blocking: bool) -> Iterator[bool]:
+	if not settings.DATABASE_URL.startswith("postgresql"):
+		yield True
+		return
+	from app.db.session import engine
+
+	params = {"lock_class": LOCK_CLASS, "key": zlib.crc32(name.encode("utf-8")) & 0x7FFFFFFF}
+	with engine.connect() as conn:
+		if blocking:
+			conn.execute(text("SELECT pg_advisory_lock(:lock_class, :key)"), params)
+			held = True
+		else:
+			held = conn.execute(text("SELECT pg_try_advisory_lock(:lock_class, :key)"), params).scalar()
+		# Session-level lock: end the transaction so the connection is not left idle in it.
+		conn.commit()
+		try:
+			yield bool(held)
+		finally:
+			if held:
+				conn.execute(text("SELECT pg_advisory_unlock(:lock_class, :key)"), params)
+				conn.commit()
+
+
+@contextmanager
+def process_lock(name: str, blocking: bool = True) -> Iterator[bool]:
+	"""Hold ``name`` across processes. Yields False, without holding it, if ``blocking`` is off and it is taken."""
+	started = time.perf_counter()
+	with _file_lock(name, blocking) as held:
+		if not held:
+			yield False
+			return
+		with _advisory_lock(name, blocking) as held:
+			if held:
+				_count(name, (time.perf_counter() - started) * 1000)
+			yield held
+
+
+def read_state(name: str) -> Optional[str]:
+	try:
+		return (coordination_dir() / name).read_text(encoding="utf-8")
+	except FileNotFoundError:
+		return None
+
+
+def write_state(name: str, value: str) -> None:
+	path = coordination_dir() / name
+	part = path.with_name(f"{path.name}.{os.getpid()}.part")
+	part.write_text(value, encoding="utf-8")
+	os.replace(part, path)  # readers never see a partial value
+
+
+# ---------------------------------------------------------------------------
+# Cache invalidation
+# ---------------------------------------------------------------------------
+
+_caches: Dict[str, Callable[[], None]] = {}
+_seen: Dict[str, int] = {}
+_invalidations = {"local": 0, "remote": 0}
+_watcher: Optional[threading.Thread] = None
+
+
+def register_cache(name: str, clear: Callable[[], None]) -> None:
+	_caches[name] = clear
+
+
+def _generations() -> Dict[str, int]:
+	try:
+		return json.loads(read_state(GENERATIONS) or "{}")
+	except ValueError:
+		return {}
+
+
+def invalidate(name: str) -> None:
+	"""Clear cache ``name`` here and tell the other workers to clear theirs."""
+	clear = _caches.get(name)
+	if clear is not None:
+		clear()
+	_invalidations["local"] += 1
+	with _file_lock("generations", blocking=True):
+		generations = _generations()
+		generations[name] = generations.get(name, 0) + 1
+		write_state(GENERATIONS, json.dumps(generations, sort_keys=True))
+	_seen[name] = generations[name]
+
+
+def poll_invalidations() -> int:
+	"""Clear the caches other processes invalidated since the last poll. Returns how many."""
+	cleared = 0
+	for name, generation in _generations().items():
+		if _seen.get(name, 0) == generation:
+			continue
+		_seen[name] = generation
+		clear = _caches.get(name)
+		if clear is not None:
+			clear()
+			cleared += 1
+	_invalidations["remote"] += cleared
+	return cleared
+
+
+def _watch() -> None:
+	while True:
+		time.sleep(settings.CACHE_INVALIDATION_POLL_SEC)
+		try:
+			poll_invalidations()
+		except Exception as exc:
+			log_event("cache_invalidation_poll_failed", error=str(exc))
+
+
+def start_cache_watcher() -> None:
+	"""Poll for other workers' invalidations; only needed with several workers."""
+	global _watcher
+	if settings.WEB_CONCURRENCY <= 1 or (_watcher is not None and _watcher.is_alive()):
+		return
+	# Invalidations from before this worker started concern caches it has not filled.
+	_seen.update(_generations())
+	_watcher = threading.Thread(target=_watch, name="cache-invalidation", daemon=True)
+	_watcher.start()
+
+
+def _collect_coordination_metrics() -> None:
+	with _counts_lock:
+		counts = {name: dict(values) for name, values in _lock_counts.items()}
+	for name, values in counts.items():
+		export_stats("process_lock", "Cross-process lock", values, labels={"lock": name})
+	export_stats("cache_invalidations", "Cache invalidations (local, remote)", dict(_invalidations))
+
+
+REGISTRY.register_collector(_collect_coordination_metrics)
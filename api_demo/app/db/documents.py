@@ -0,0 +1,121 @@
+"""Pre-rendered JSON documents for word entries.
+
+``word_entries.document`` holds the ``WordEntryOut`` JSON of an entry with its senses,
+examples, translations and relations. The write paths re-render it in the same
+transaction as the change, so ``GET /dictionary/word-entries`` and
+``GET /dictionary/word-entries/{id}`` return the stored text without loading the ORM
+tree or validating it through pydantic. Entries without a document (bulk-loaded rows,
+databases upgraded in place) are rendered on read; ``python -m app.db.documents
+rebuild`` stores them.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.fastjson import dumps, trusted_dump
+from app.db.models import Language, Sense, WordEntry
+from app.schemas.dictionary import WordEntryOut
+
+REBUILD_BATCH = 500
+
+_entries = WordEntry.__table__
+# Naming updated_at keeps its onupdate default from firing: a re-render is not an edit.
+STORE_DOCUMENT = (
+	update(_entries)
+	.where(_entries.c.id == bindparam("entry_id"))
+	.values(document=bindparam("document"), updated_at=_entries.c.updated_at)
+)
+
+
+def render_entry(entry: WordEntry) -> str:
+	if settings.FAST_JSON:
+		return dumps(trusted_dump(WordEntryOut, entry)).decode("utf-8")
+	return WordEntryOut.model_validate(entry).model_dump_json(by_alias=True)
+
+
+def load_entries(db: Session, entry_ids: Sequence[int]) -> List[WordEntry]:
+	"""Entries with their whole tree, re-read so collections reflect flushed changes."""
+	if not entry_ids:
+		return []
+	return (
+		db.query(WordEntry)
+		.options(
+			selectinload(WordEntry.senses).selectinload(Sense.examples),
+			selectinload(WordEntry.senses).selectinload(Sense.translations),
+			selectinload(WordEntry.senses).selectinload(Sense.relations),
+		)
+		.populate_existing()
+		.filter(WordEntry.id.in_(entry_ids))
+		.order_by(WordEntry.id)
+		.all()
+	)
+
+
+def store_documents(db: Session, entries: Sequence[WordEntry]) -> Dict[int, str]:
+	"""Render already-loaded entries and write their documents. Returns them by entry id."""
+	documents = {entry.id: render_entry(entry) for entry in entries}
+	if documents:
+		db.execute(STORE_DOCUMENT, [{"entry_id": k, "document": v} for k, v in documents.items()])
+		for entry in entries:
+			set_committed_value(entry, "document", documents[entry.id])
+	return documents
+
+
+def refresh_entry_document(db: Session, entry_id: int) -> str:
+	"""Re-render one entry from the database; call after its changes are made, before commit."""
+	db.flush()
+	return store_documents(db, load_entries(db, [entry_id]))[entry_id]
+
+
+def documents_for(db: Session, rows) -> List[str]:
+	"""Documents for ``(id, document)`` rows, rendering (without storing) any that are missing."""
+	missing = [row.id for row in rows if row.document is None]
+	rendered = {entry.id: render_entry(entry) for entry in load_entries(db, missing)}
+	return [row.document if row.document is not None else rendered[row.id] for row in rows]
+
+
+def rebuild_documents(db: Session, language_id: Optional[int] = None, missing_only: bool = False) -> int:
+	"""Re-render documents in id batches, committing each. Returns entries rendered."""
+	if language_id is None:
+		# One language at a time, so each batch stays within one partition.
+		language_ids = [row.id for row in db.query(Language.id).order_by(Language.id)]
+		return sum(rebuild_documents(db, language, missing_only) for language in language_ids)
+	rendered = 0
+	last_id = 0
+	while True:
+		query = db.query(WordEntry.id).filter(WordEntry.language_id == language_id, WordEntry.id > last_id)
+		if missing_only:
+			query = query.filter(WordEntry.document.is_(None))
+		ids = [row.id for row in query.order_by(WordEntry.id).limit(REBUILD_BATCH)]
+		if not ids:
+			return rendered
+		rendered += len(store_documents(db, load_entries(db, ids)))
+		db.commit()
+		db.expunge_all()
+		last_id = ids[-1]
+
+
+def main() -> None:
+	from app.db.session import SessionLocal
+
+	parser = argparse.ArgumentParser(description="Pre-rendered word entry documents")
+	parser.add_argument("command", choices=["rebuild"])
+	parser.add_argument("--language-id", type=int, default=None)
+	parser.add_argument("--missing-only", action="store_true", help="Only entries without a document")
+	args = parser.parse_args()
+	if args.command == "rebuild":
+		db = SessionLocal()
+		try:
+			rendered = rebuild_documents(db, args.language_id, args.missing_only)
+		finally:
+			db.close()
+		print(f"Rendered {rendered} documents")
+
+
+if __name__ == "__main__":
+	main()
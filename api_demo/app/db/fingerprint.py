@@ -0,0 +1,82 @@
+"""Cheap "did the database change?" fingerprints for backup dedup.
+
+SQLite: the file change counter from the database header plus size/mtime of the main
+file and its WAL (WAL commits do not touch the main file until a checkpoint).
+Postgres: the current WAL insert position (``pg_current_wal_lsn()``), which only
+advances when something is written.
+
+A fingerprint that cannot be read is ``None`` and never matches, so the backup runs.
+"""
+
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+
+def sqlite_fingerprint(db_path: Path) -> Optional[str]:
+	db_path = Path(db_path)
+	try:
+		with db_path.open("rb") as handle:
+			header = handle.read(100)
+		(change_counter,) = struct.unpack(">I", header[24:28])
+		parts = [f"counter={change_counter}", _stat_part(db_path)]
+	except (OSError, struct.error):
+		return None
+	wal_path = db_path.with_name(db_path.name + "-wal")
+	if wal_path.exists():
+		parts.append(_stat_part(wal_path))
+	return "sqlite:" + ";".join(parts)
+
+
+def _stat_part(path: Path) -> str:
+	stat = path.stat()
+	return f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def postgres_fingerprint(pg_url) -> Optional[str]:
+	engine = create_engine(pg_url, poolclass=NullPool)
+	try:
+		with engine.connect() as conn:
+			lsn = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+	except Exception:
+		return None
+	finally:
+		engine.dispose()
+	return f"pg_lsn:{lsn}" if lsn else None
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+	digest = hashlib.sha256()
+	with Path(path).open("rb") as handle:
+		while True:
+			chunk = handle.read(chunk_size)
+			if not chunk:
+				return digest.hexdigest()
+			digest.update(chunk)
+
+
+def _state_path(base_name: str) -> Path:
+	return Path(settings.BACKUP_STATE_DIR) / f"{base_name}-fingerprint.json"
+
+
+def read_backup_fingerprint(base_name: str) -> dict:
+	path = _state_path(base_name)
+	try:
+		return json.loads(path.read_text(encoding="utf-8"))
+	except (OSError, ValueError):
+		return {}
+
+
+def write_backup_fingerprint(base_name: str, **values) -> None:
+	path = _state_path(base_name)
+	path.parent.mkdir(parents=True, exist_ok=True)
+	tmp_path = path.with_suffix(".tmp")
+	tmp_path.write_text(json.dumps(values, sort_keys=True), encoding="utf-8")
+	tmp_path.replace(path)
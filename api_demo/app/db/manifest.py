@@ -0,0 +1,121 @@
+"""Backup manifests: what a snapshot should contain, written next to it at backup time.
+
+``<object_key>.manifest.json`` records the snapshot kind, compression, size and sha256
+of the uncompressed payload, and per-table row counts. The restore tool
+(``app/db/restore.py``) checks a restored database against it.
+"""
+
+import hashlib
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_key(object_key: str) -> str:
+	return object_key + MANIFEST_SUFFIX
+
+
+def sqlite_row_counts(db_path: Path) -> Dict[str, int]:
+	conn = sqlite3.connect(str(db_path))
+	try:
+		tables = [
+			row[0]
+			for row in conn.execute(
+				"SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+			)
+		]
+		return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] for name in tables}
+	finally:
+		conn.close()
+
+
+def build_manifest(
+	object_key: str,
+	kind: str,
+	sha256: str,
+	size: int,
+	row_counts: Optional[Dict[str, int]],
+	compression: str = "none",
+	**extra,
+) -> dict:
+	manifest = {
+		"version": MANIFEST_VERSION,
+		"object_key": object_key,
+		"kind": kind,
+		"compression": compression,
+		"sha256": sha256,
+		"size": size,
+		"row_counts": row_counts,
+		"created_at": datetime.now(timezone.utc).isoformat(),
+	}
+	manifest.update(extra)
+	return manifest
+
+
+def write_manifest(storage, manifest: dict) -> int:
+	data = json.dumps(manifest, sort_keys=True).encode("utf-8")
+	return storage.put_bytes(data, manifest_key(manifest["object_key"]))
+
+
+def read_manifest(storage, object_key: str) -> Optional[dict]:
+	key = manifest_key(object_key)
+	if not storage.list(key):
+		return None
+	return json.loads(storage.get_bytes(key).decode("utf-8"))
+
+
+class HashingCounter:
+	"""Pass-through iterator that hashes and counts the bytes flowing through it."""
+
+	def __init__(self, chunks: Iterable[bytes]):
+		self._chunks = chunks
+		self._digest = hashlib.sha256()
+		self.count = 0
+
+	def __iter__(self) -> Iterator[bytes]:
+		for chunk in self._chunks:
+			self._digest.update(chunk)
+			self.count += len(chunk)
+			yield chunk
+
+	def hexdigest(self) -> str:
+		return self._digest.hexdigest()
+
+
+@contextmanager
+def postgres_snapshot(pg_url):
+	"""Hold a repeatable-read transaction open and yield (snapshot_id, row_counts).
+
+	Passing the snapshot id to ``pg_dump --snapshot`` makes the dump see exactly the
+	rows that were counted. If the snapshot cannot be exported, yields (None, counts)
+	with counts taken outside the dump's snapshot.
+	"""
+	engine = create_engine(pg_url, poolclass=NullPool)
+	try:
+		with engine.connect() as conn:
+			conn = conn.execution_options(isolation_level="REPEATABLE READ")
+			with conn.begin():
+				try:
+					with conn.begin_nested():
+						snapshot_id = conn.execute(text("SELECT pg_export_snapshot()")).scalar()
+				except Exception:
+					snapshot_id = None
+				tables = conn.execute(
+					text("SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename")
+				).scalars().all()
+				counts = {
+					name: conn.execute(text(f'SELECT COUNT(*) FROM public."{name}"')).scalar()
+					for name in tables
+				}
+				yield snapshot_id, counts
+	finally:
+		engine.dispose()
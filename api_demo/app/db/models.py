@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Boolean, Index, false, func, text
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 from app.db.base import Base
 
@@ -31,7 +31,12 @@ class Item(Base):
 
 class WordEntry(Base):
 	__tablename__ = "word_entries"
-	__table_args__ = (UniqueConstraint("language_id", "lemma_nfc", name="uq_language_lemma_nfc"),)
+	__table_args__ = (
+		UniqueConstraint("language_id", "lemma_nfc", name="uq_language_lemma_nfc"),
+		# Language listings, with and without the status filter, in id order.
+		Index("ix_word_entries_language_id_id", "language_id", "id"),
+		Index("ix_word_entries_language_status_id", "language_id", "status", "id"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	language_id = Column(Integer, ForeignKey("languages.id"), nullable=False)
@@ -41,10 +46,16 @@ class WordEntry(Base):
 	pronunciation = Column(String, nullable=True)
 	notes = Column(Text, nullable=True)
 	status = Column(String, default="draft")  # "draft" or "published"
+	# Some sense has a non-blank definition; set by the write paths (see app/db/stats.py).
+	has_definition = Column(Boolean, nullable=False, default=False, server_default=false())
 	created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 	updated_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+	# Who made the entry defined: the contributor credited in the stats (see app/db/stats.py).
+	defined_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 	created_at = Column(DateTime, default=datetime.utcnow)
 	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+	# Rendered WordEntryOut JSON, kept current by the write paths (see app/db/documents.py).
+	document = deferred(Column(Text, nullable=True))
 
 	created_by = relationship("User", foreign_keys=[created_by_id])
 	updated_by = relationship("User", foreign_keys=[updated_by_id])
@@ -57,7 +68,7 @@ class Sense(Base):
 	__table_args__ = (UniqueConstraint("word_entry_id", "sense_no", name="uq_word_sense_no"),)
 
 	id = Column(Integer, primary_key=True, index=True)
-	word_entry_id = Column(Integer, ForeignKey("word_entries.id"), nullable=False)
+	word_entry_id = Column(Integer, ForeignKey("word_entries.id"), nullable=False, index=True)
 	sense_no = Column(Integer, nullable=False)  # 1, 2, 3, ...
 	pos = Column(String, nullable=True)  # Part of speech per sense
 	definition_text = Column(Text, nullable=False)
@@ -75,7 +86,7 @@ class SenseExample(Base):
 	__tablename__ = "sense_examples"
 
 	id = Column(Integer, primary_key=True, index=True)
-	sense_id = Column(Integer, ForeignKey("senses.id"), nullable=False)
+	sense_id = Column(Integer, ForeignKey("senses.id"), nullable=False, index=True)
 	example_text = Column(Text, nullable=False)
 	translation_fr = Column(Text, nullable=True)
 	translation_en = Column(Text, nullable=True)
@@ -87,6 +98,7 @@ class SenseExample(Base):
 
 class SenseTranslation(Base):
 	__tablename__ = "sense_translations"
+	__table_args__ = (Index("ix_sense_translations_sense_id_lang_code", "sense_id", "lang_code"),)
 
 	id = Column(Integer, primary_key=True, index=True)
 	sense_id = Column(Integer, ForeignKey("senses.id"), nullable=False)
@@ -101,9 +113,9 @@ class SenseRelation(Base):
 	__tablename__ = "sense_relations"
 
 	id = Column(Integer, primary_key=True, index=True)
-	sense_id = Column(Integer, ForeignKey("senses.id"), nullable=False)
+	sense_id = Column(Integer, ForeignKey("senses.id"), nullable=False, index=True)
 	relation_type = Column(String, nullable=False)  # "synonym", "antonym", "variant", "hypernym", "hyponym"
-	related_word_entry_id = Column(Integer, ForeignKey("word_entries.id"), nullable=True)
+	related_word_entry_id = Column(Integer, ForeignKey("word_entries.id"), nullable=True, index=True)
 	fallback_text = Column(String, nullable=True)  # Free text if not yet in DB
 	rank = Column(Integer, default=1)
 
@@ -114,7 +126,14 @@ class SenseRelation(Base):
 # Legacy flat Word model (for backwards compatibility with old UI)
 class Word(Base):
 	__tablename__ = "words"
-	__table_args__ = (UniqueConstraint("language_id", "word", name="uq_language_word"),)
+	__table_args__ = (
+		UniqueConstraint("language_id", "word", name="uq_language_word"),
+		Index("ix_words_language_id_id", "language_id", "id"),
+		# Exact (case-insensitive) search.
+		Index("ix_words_language_lower_word", "language_id", func.lower(text("word"))),
+		# status=defined|undefined listings and /dictionary/random.
+		Index("ix_words_language_defined_id", "language_id", "is_defined", "id"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	language_id = Column(Integer, ForeignKey("languages.id"), nullable=False)
@@ -124,10 +143,14 @@ class Word(Base):
 	synonyms = Column(Text, nullable=True)
 	translation_fr = Column(Text, nullable=True)
 	translation_en = Column(Text, nullable=True)
+	# Non-blank definition; set by the write paths (see app/db/stats.py).
+	is_defined = Column(Boolean, nullable=False, default=False, server_default=false())
 	updated_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+	# Who made the word defined: the contributor credited in the stats (see app/db/stats.py).
+	defined_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-	updated_by = relationship("User")
+	updated_by = relationship("User", foreign_keys=[updated_by_id])
 	language = relationship("Language", back_populates="words")
 
 class Language(Base):
@@ -141,6 +164,31 @@ class Language(Base):
 	word_entries = relationship("WordEntry", back_populates="language")
 	words = relationship("Word", back_populates="language")
 
+class DictionaryStat(Base):
+	"""Materialized per-language counter, kept in step with the dictionary write paths."""
+	__tablename__ = "dictionary_stats"
+
+	language_id = Column(Integer, ForeignKey("languages.id"), primary_key=True)
+	metric = Column(String, primary_key=True)  # "words_total", "entries_pos:noun", "contributor:12", ...
+	value = Column(Integer, nullable=False, default=0)
+
+class ChangeLog(Base):
+	"""One row per dictionary change, in commit order per language (see app/db/changes.py)."""
+	__tablename__ = "change_log"
+	__table_args__ = (
+		# Incremental sync reads (language_id, seq > cursor) in seq order.
+		Index("ix_change_log_language_id_id", "language_id", "id"),
+		# AUTOINCREMENT so SQLite never reuses the sequence numbers of purged rows.
+		{"sqlite_autoincrement": True},
+	)
+
+	id = Column(Integer, primary_key=True)  # the sequence number clients use as their cursor
+	language_id = Column(Integer, nullable=False)  # no FK: tombstones outlive the language
+	entity = Column(String, nullable=False)  # "word_entry", "word" or "language"
+	entity_id = Column(Integer, nullable=False)
+	op = Column(String, nullable=False)  # "upsert", "delete" or "reset"
+	created_at = Column(DateTime, default=datetime.utcnow)
+
 class InviteCode(Base):
 	__tablename__ = "invite_codes"
 
@@ -165,3 +213,10 @@ class EmailVerification(Base):
 	created_at = Column(DateTime, default=datetime.utcnow)
 
 	user = relationship("User")
+
+class BootstrapState(Base):
+	__tablename__ = "bootstrap_state"
+
+	key = Column(String, primary_key=True)  # "schema", "seed", "super_admin"
+	fingerprint = Column(String, nullable=False)
+	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,618 @@
+"""Optional per-language partitioning of the dictionary tables.
+
+Languages share one set of tables, so reseeding or bulk-loading one of them locks and
+bloats the tables every other language reads from. Partitioning keeps each language's
+rows apart.
+
+Postgres: migration ``0018_partition_by_language`` makes ``word_entries`` and ``words``
+``PARTITION BY LIST (language_id)`` tables with one partition per language
+(``word_entries_l<id>``) and a default partition. Creating a language creates its
+partitions and deleting it drops them. Deletes and vacuums of one language then touch
+only its partitions, and queries filtered on ``language_id`` are pruned to them. The
+foreign keys into ``word_entries`` carry the language too (see the migration).
+
+SQLite: with ``PARTITION_BY_LANGUAGE=true`` every language gets its own database file,
+``PARTITION_DIR/language_<id>.db``. The file holds the language's entries and their
+children, words, change log and counters. Users, languages and the rest stay in
+``DATABASE_URL``, which each language file ATTACHes, so joins with ``users`` keep
+working. A bulk load holds the write lock of one file only. ``RoutingSession`` sends
+each statement to the right file: by its ``language_id`` criteria or values, by the
+row id it targets, or, failing both, to the language the transaction already uses.
+Shared tables follow the transaction's language so that it stays on one connection.
+A transaction may read several languages but writes only one. New rows get ids from
+``language_id << 32`` upwards (AUTOINCREMENT), so ids stay unique across files and
+name their file. Rows moved over by ``enable`` keep their ids and are found by probing
+the files once.
+"""
+
+import argparse
+import threading
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, MetaData, create_engine, event, inspect, text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.schema import Column
+from sqlalchemy.sql.selectable import TableClause
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import instrument_engine, uninstrument_engine
+from app.db.base import Base
+from app.db.coordination import invalidate, register_cache
+from app.db.models import ChangeLog, DictionaryStat, Language, Sense, SenseExample, SenseRelation, SenseTranslation, Word, WordEntry
+from app.db.slow_query import slow_query_log
+
+PARTITIONED_MODELS = (WordEntry, Sense, SenseExample, SenseTranslation, SenseRelation, Word, ChangeLog, DictionaryStat)
+PARTITIONED_TABLES = frozenset(model.__table__.name for model in PARTITIONED_MODELS)
+# Postgres partitions only the tables that carry language_id and take the bulk writes.
+PG_PARTITIONED = ("word_entries", "words")
+
+ID_SHIFT = 32
+NO_LANGUAGE = 0  # an id criterion that matched no file: route to the empty, read-only file
+SESSION_KEY = "partition_language"
+LOCATE_CACHE_SIZE = 100_000
+
+_LANGUAGE = "language_id"
+
+
+class PartitionRoutingError(RuntimeError):
+	"""A statement on the dictionary tables whose language could not be determined."""
+
+
+def routing_enabled() -> bool:
+	return settings.PARTITION_BY_LANGUAGE and settings.DATABASE_URL.startswith("sqlite")
+
+
+def main_tables() -> list:
+	"""Tables that live in DATABASE_URL (all of them unless SQLite routing is on)."""
+	if not routing_enabled():
+		return list(Base.metadata.sorted_tables)
+	return [table for table in Base.metadata.sorted_tables if table.name not in PARTITIONED_TABLES]
+
+
+def _build_resolvers() -> Dict[tuple, str]:
+	"""(table, column) -> how a compared value names a language: directly, or via a row id."""
+	resolvers = {}
+	for name in PARTITIONED_TABLES:
+		table = Base.metadata.tables[name]
+		if "language_id" in table.c:
+			resolvers[(name, "language_id")] = _LANGUAGE
+		if "id" in table.c and table.c.id.primary_key:
+			resolvers[(name, "id")] = name
+		for fk in table.foreign_keys:
+			if fk.column.table.name in PARTITIONED_TABLES and fk.column.name == "id":
+				resolvers[(name, fk.parent.name)] = fk.column.table.name
+	return resolvers
+
+
+RESOLVERS = _build_resolvers()
+# Columns of a new row that point at its parent, for rows without language_id.
+PARENT_COLUMNS = {
+	name: [
+		(column, target)
+		for (table, column), target in RESOLVERS.items()
+		if table == name and column != "id" and target != _LANGUAGE
+	]
+	for name in PARTITIONED_TABLES
+}
+
+
+# ---------------------------------------------------------------------------
+# SQLite language files
+# ---------------------------------------------------------------------------
+
+_engines: Dict[int, object] = {}
+_engines_lock = threading.Lock()
+_main_engine = None
+_known_languages: set = set()
+_located: Dict[tuple, int] = {}
+
+
+def main_db_path() -> Path:
+	database = make_url(settings.DATABASE_URL).database
+	if not database or database == ":memory:":
+		raise PartitionRoutingError("PARTITION_BY_LANGUAGE needs a file-based SQLite DATABASE_URL")
+	return Path(database).resolve()
+
+
+def language_db_path(language_id: int) -> Path:
+	return Path(settings.PARTITION_DIR) / f"language_{language_id}.db"
+
+
+def language_files() -> Dict[int, Path]:
+	directory = Path(settings.PARTITION_DIR)
+	if not directory.exists():
+		return {}
+	files = {}
+	for path in directory.glob("language_*.db"):
+		suffix = path.stem[len("language_"):]
+		if suffix.isdigit():
+			files[int(suffix)] = path
+	return dict(sorted(files.items()))
+
+
+def _attach_main(dbapi_connection, connection_record) -> None:
+	# Unqualified users/languages/... resolve to the attached main database.
+	cursor = dbapi_connection.cursor()
+	cursor.execute("ATTACH DATABASE ? AS app", (str(main_db_path()),))
+	cursor.close()
+
+
+def _file_engine(path: Path, language_id: int, readonly: bool = False):
+	url = f"sqlite:///file:{path.resolve()}?mode=ro&uri=true" if readonly else f"sqlite:///{path.resolve()}"
+	engine = create_engine(url, connect_args={"check_same_thread": False})
+	event.listen(engine, "connect", _attach_main)
+	slow_query_log.add_connect_listener(engine, _attach_main)
+	instrument_engine(engine, f"language_{language_id}")
+	return engine
+
+
+def _dispose(engine) -> None:
+	engine.dispose()
+	uninstrument_engine(engine)
+
+
+def _file_metadata() -> MetaData:
+	"""The dictionary tables as created in a language file: integer ids use AUTOINCREMENT."""
+	metadata = MetaData()
+	for table in Base.metadata.sorted_tables:
+		table.to_metadata(metadata)
+	for name in PARTITIONED_TABLES:
+		primary_key = list(metadata.tables[name].primary_key.columns)
+		if len(primary_key) == 1 and isinstance(primary_key[0].type, Integer):
+			metadata.tables[name].dialect_options["sqlite"]["autoincrement"] = True
+	return metadata
+
+
+def prepare_language_file(engine, language_id: int) -> None:
+	"""Create missing tables, columns and indexes, and start the id sequences at ``language_id << 32``."""
+	from app.db.bootstrap import add_missing_columns
+	from app.db.stats import backfill_defined_by, rebuild_language_stats, refresh_definition_flags
+
+	metadata = _file_metadata()
+	tables = [table for table in metadata.sorted_tables if table.name in PARTITIONED_TABLES]
+	metadata.create_all(engine, tables=tables)
+	added = add_missing_columns(engine)
+	first_id = language_id << ID_SHIFT
+	with engine.begin() as conn:
+		for table in tables:
+			for index in table.indexes:
+				conn.execute(CreateIndex(index, if_not_exists=True))
+			if table.dialect_options["sqlite"]["autoincrement"]:
+				conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name AND seq < :seq"), {
+					"name": table.name, "seq": first_id,
+				})
+				conn.execute(text(
+					"INSERT INTO sqlite_sequence (name, seq) SELECT :name, :seq "
+					"WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"
+				), {"name": table.name, "seq": first_id})
+	if added:
+		db = Session(bind=engine)
+		try:
+			refresh_definition_flags(db)
+			if backfill_defined_by(db):
+				rebuild_language_stats(db, language_id)
+			db.commit()
+		finally:
+			db.close()
+		log_event("schema_columns_added", columns=added, language_id=language_id)
+
+
+def _language_exists(language_id: int) -> bool:
+	if language_id in _known_languages:
+		return True
+	with _main_engine.connect() as conn:
+		found = conn.execute(text("SELECT 1 FROM languages WHERE id = :id"), {"id": language_id}).first()
+	if found:
+		_known_languages.add(language_id)
+	return found is not None
+
+
+def _empty_engine():
+	engine = _engines.get(NO_LANGUAGE)
+	if engine is None:
+		path = Path(settings.PARTITION_DIR) / "empty.db"
+		if not path.exists():
+			path.parent.mkdir(parents=True, exist_ok=True)
+			writable = _file_engine(path, NO_LANGUAGE)
+			prepare_language_file(writable, NO_LANGUAGE)
+			_dispose(writable)
+		engine = _engines[NO_LANGUAGE] = _file_engine(path, NO_LANGUAGE, readonly=True)
+	return engine
+
+
+def language_engine(language_id: int):
+	"""The engine for a language's file, creating the file for an existing language."""
+	engine = _engines.get(language_id)
+	if engine is not None:
+		return engine
+	with _engines_lock:
+		engine = _engines.get(language_id)
+		if engine is not None:
+			return engine
+		path = language_db_path(language_id)
+		if language_id == NO_LANGUAGE or (not path.exists() and not _language_exists(language_id)):
+			# Unknown language: reads find nothing, writes fail, and no stray file is created.
+			return _empty_engine()
+		path.parent.mkdir(parents=True, exist_ok=True)
+		engine = _file_engine(path, language_id)
+		prepare_language_file(engine, language_id)
+		_engines[language_id] = engine
+		return engine
+
+
+def dispose_engines() -> None:
+	with _engines_lock:
+		for engine in _engines.values():
+			_dispose(engine)
+		_engines.clear()
+		_located.clear()
+
+
+def locate(table: str, row_id: int) -> int:
+	"""The language whose file holds ``table`` row ``row_id`` (NO_LANGUAGE if none does)."""
+	if row_id >> ID_SHIFT:
+		return row_id >> ID_SHIFT
+	key = (table, row_id)
+	if key in _located:
+		return _located[key]
+	for language_id in language_files():
+		with language_engine(language_id).connect() as conn:
+			if conn.execute(text(f'SELECT 1 FROM "{table}" WHERE id = :id'), {"id": row_id}).first():
+				if len(_located) >= LOCATE_CACHE_SIZE:
+					_located.clear()
+				# Ids are never reused across files, so the answer cannot go stale.
+				_located[key] = language_id
+				return language_id
+	return NO_LANGUAGE
+
+
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+
+def _first_value(bind: BindParameter, params):
+	value = bind.effective_value
+	if value is None and params:
+		first = params[0] if isinstance(params, (list, tuple)) else params
+		value = first.get(bind.key) if isinstance(first, dict) else None
+	if isinstance(value, (list, tuple)):
+		value = value[0] if value else None
+	return value
+
+
+def _resolve(table: str, column: str, value) -> Optional[int]:
+	target = RESOLVERS.get((table, column))
+	if target is None or value is None:
+		return None
+	if target == _LANGUAGE:
+		return int(value)
+	return locate(target, int(value))
+
+
+def statement_language(statement, params=None) -> Optional[int]:
+	"""The language a statement is about, from its criteria, its row ids or its insert values."""
+	found = set()
+	if isinstance(statement, Insert) and statement.table.name in PARTITIONED_TABLES and params:
+		first = params[0] if isinstance(params, (list, tuple)) else params
+		if isinstance(first, dict) and first.get("language_id") is not None:
+			found.add(int(first["language_id"]))
+	for element in visitors.iterate(statement):
+		if not isinstance(element, BinaryExpression) or element.operator not in (operators.eq, operators.in_op):
+			continue
+		for column, other in ((element.left, element.right), (element.right, element.left)):
+			if isinstance(column, Column) and isinstance(other, BindParameter) and isinstance(column.table, TableClause):
+				language_id = _resolve(column.table.name, column.name, _first_value(other, params))
+				if language_id is not None:
+					found.add(language_id)
+	if len(found) > 1:
+		found.discard(NO_LANGUAGE)
+	if len(found) > 1:
+		raise PartitionRoutingError(f"Statement spans languages {sorted(found)}; run one statement per language")
+	return found.pop() if found else None
+
+
+def _touches_partitions(mapper, clause) -> bool:
+	if mapper is not None and inspect(mapper).local_table.name in PARTITIONED_TABLES:
+		return True
+	if clause is not None:
+		return any(
+			isinstance(element, TableClause) and element.name in PARTITIONED_TABLES
+			for element in visitors.iterate(clause)
+		)
+	return False
+
+
+def _claim(session, language_id: int, write: bool) -> None:
+	current = session.info.get(SESSION_KEY)
+	if current is None:
+		if language_id != NO_LANGUAGE:
+			session.info[SESSION_KEY] = language_id
+	elif write and language_id != current:
+		raise PartitionRoutingError(
+			f"This transaction writes to language {current}; commit before writing to language {language_id}"
+		)
+
+
+class RoutingSession(Session):
+	"""Session that binds dictionary statements to the language file they concern."""
+
+	def get_bind(self, mapper=None, *, clause=None, bind=None, language_id=None, **kw):
+		if bind is not None:
+			return bind
+		if language_id is None:
+			language_id = self.info.get(SESSION_KEY)
+		if language_id is None:
+			if _touches_partitions(mapper, clause):
+				raise PartitionRoutingError(
+					"No language for a query on the dictionary tables; filter on language_id or a row id"
+				)
+			return super().get_bind(mapper, clause=clause, **kw)
+		return language_engine(language_id)
+
+
+def _instance_language(session, obj) -> Optional[int]:
+	state = inspect(obj)
+	values = state.dict
+	if values.get("language_id") is not None:
+		return values["language_id"]
+	current = session.info.get(SESSION_KEY)
+	if current is not None:
+		return current
+	table = state.mapper.local_table.name
+	for column, target in PARENT_COLUMNS.get(table, ()):
+		if values.get(column) is not None:
+			return locate(target, values[column])
+	for relationship in ("word_entry", "sense"):
+		parent = values.get(relationship)
+		if parent is not None:
+			return _instance_language(session, parent)
+	if state.identity:
+		return locate(table, state.identity[0])
+	return None
+
+
+def _route_statement(orm_execute_state) -> None:
+	language_id = statement_language(orm_execute_state.statement, orm_execute_state.parameters)
+	if language_id is None:
+		return
+	write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+	_claim(orm_execute_state.session, language_id, write)
+	orm_execute_state.bind_arguments["language_id"] = language_id
+
+
+def _route_flush(session, flush_context, instances) -> None:
+	for obj in chain(session.new, session.dirty, session.deleted):
+		if inspect(obj).mapper.local_table.name not in PARTITIONED_TABLES:
+			continue
+		language_id = _instance_language(session, obj)
+		if language_id is not None:
+			_claim(session, language_id, write=True)
+
+
+def _release(session, transaction) -> None:
+	if transaction.parent is None:
+		session.info.pop(SESSION_KEY, None)
+
+
+def install_routing(session_factory, engine) -> None:
+	"""Route ``session_factory`` sessions (class_=RoutingSession) to the language files."""
+	global _main_engine
+	_main_engine = engine
+	event.listen(session_factory, "do_orm_execute", _route_statement)
+	event.listen(session_factory, "before_flush", _route_flush)
+	event.listen(session_factory, "after_transaction_end", _release)
+
+
+# ---------------------------------------------------------------------------
+# Postgres partitions
+# ---------------------------------------------------------------------------
+
+_pg_partitioned: Optional[bool] = None
+CACHE_NAME = "partitions"
+
+
+def postgres_partitioned(conn) -> bool:
+	global _pg_partitioned
+	if _pg_partitioned is None:
+		_pg_partitioned = bool(conn.execute(text(
+			"SELECT count(*) FROM pg_partitioned_table WHERE partrelid = to_regclass('word_entries')"
+		)).scalar())
+	return _pg_partitioned
+
+
+def create_language_partitions(conn, language_id: int) -> None:
+	for table in PG_PARTITIONED:
+		conn.execute(text(
+			f'CREATE TABLE IF NOT EXISTS "{table}_l{int(language_id)}" PARTITION OF "{table}" '
+			f"FOR VALUES IN ({int(language_id)})"
+		))
+
+
+def drop_language_partitions(conn, language_id: int) -> None:
+	for table in PG_PARTITIONED:
+		partition = f"{table}_l{int(language_id)}"
+		if conn.execute(text("SELECT to_regclass(:name)"), {"name": partition}).scalar() is None:
+			continue
+		# The composite foreign keys into word_entries depend on each partition: detaching
+		# checks that nothing references its rows, after which it can be dropped.
+		conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{partition}"'))
+		conn.execute(text(f'DROP TABLE "{partition}"'))
+
+
+@event.listens_for(Language, "after_insert")
+def _add_language_partitions(mapper, connection, target) -> None:
+	if connection.dialect.name == "postgresql" and postgres_partitioned(connection):
+		create_language_partitions(connection, target.id)
+
+
+@event.listens_for(Language, "after_delete")
+def _drop_language_partitions(mapper, connection, target) -> None:
+	# Its rows are gone by now (delete_language); dropping the partitions returns the space.
+	if connection.dialect.name == "postgresql" and postgres_partitioned(connection):
+		drop_language_partitions(connection, target.id)
+
+
+@event.listens_for(Language, "after_delete")
+def _forget_language(mapper, connection, target) -> None:
+	session = object_session(target)
+	if session is not None:
+		# Broadcast by app.db.session after the commit, so other workers drop what they cached.
+		session.info.setdefault("invalidate_caches", set()).add(CACHE_NAME)
+
+
+def _clear_caches() -> None:
+	global _pg_partitioned
+	_known_languages.clear()
+	_located.clear()
+	_pg_partitioned = None
+
+
+register_cache(CACHE_NAME, _clear_caches)
+
+
+# ---------------------------------------------------------------------------
+# SQLite split / merge
+# ---------------------------------------------------------------------------
+
+def _copy_filters(language_id: int) -> Dict[str, str]:
+	"""WHERE clauses selecting one language's rows of each table, in the ``src`` schema."""
+	entries = f"SELECT id FROM src.word_entries WHERE language_id = {int(language_id)}"
+	senses = f"SELECT id FROM src.senses WHERE word_entry_id IN ({entries})"
+	return {
+		"word_entries": f"language_id = {int(language_id)}",
+		"words": f"language_id = {int(language_id)}",
+		"change_log": f"language_id = {int(language_id)}",
+		"dictionary_stats": f"language_id = {int(language_id)}",
+		"senses": f"word_entry_id IN ({entries})",
+		"sense_examples": f"sense_id IN ({senses})",
+		"sense_translations": f"sense_id IN ({senses})",
+		"sense_relations": f"sense_id IN ({senses})",
+	}
+
+
+def _copy_table(conn, table, source_schema: str, where: str = "1 = 1") -> int:
+	columns = ", ".join(f'"{column.name}"' for column in table.columns)
+	where = where.replace("src.", f"{source_schema}.")
+	result = conn.exec_driver_sql(
+		f'INSERT INTO main."{table.name}" ({columns}) SELECT {columns} FROM {source_schema}."{table.name}" WHERE {where}'
+	)
+	return result.rowcount
+
+
+def split_sqlite(engine) -> Dict[int, int]:
+	"""Move every language's dictionary rows from DATABASE_URL into its own file. Run with the app stopped."""
+	global _main_engine
+	_main_engine = engine
+	tables = [table for table in Base.metadata.sorted_tables if table.name in PARTITIONED_TABLES]
+	with engine.connect() as conn:
+		present = set(inspect(conn).get_table_names())
+		if "word_entries" not in present:
+			raise PartitionRoutingError("The main database has no dictionary tables; already split?")
+		language_ids = conn.exec_driver_sql(
+			"SELECT id FROM languages UNION SELECT DISTINCT language_id FROM change_log ORDER BY 1"
+		).scalars().all()
+		# Rows added after a merge may carry ids from another language's range, which would misroute them.
+		stray = conn.exec_driver_sql(
+			f"SELECT language_id, id FROM word_entries WHERE (id >> {ID_SHIFT}) NOT IN (0, language_id) "
+			f"UNION ALL SELECT language_id, id FROM words WHERE (id >> {ID_SHIFT}) NOT IN (0, language_id) LIMIT 1"
+		).first()
+	if stray:
+		raise PartitionRoutingError(
+			f"Row id {stray[1]} of language {stray[0]} lies in another language's id range; cannot split"
+		)
+	copied = {}
+	for language_id in language_ids:
+		_known_languages.add(language_id)
+		path = language_db_path(language_id)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		target = _file_engine(path, language_id)
+		prepare_language_file(target, language_id)
+		filters = _copy_filters(language_id)
+		with target.connect() as conn:
+			with conn.begin():
+				copied[language_id] = sum(
+					_copy_table(conn, table, "app", filters[table.name]) for table in tables if table.name in present
+				)
+		_dispose(target)
+		log_event("partition_split", language_id=language_id, rows=copied[language_id])
+	with engine.begin() as conn:
+		for table in reversed(tables):
+			if table.name in present:
+				conn.exec_driver_sql(f'DROP TABLE "{table.name}"')
+	with engine.connect() as conn:
+		conn.exec_driver_sql("VACUUM")
+	return copied
+
+
+def merge_sqlite(engine) -> Dict[int, int]:
+	"""Move the language files back into DATABASE_URL (files are kept as ``*.merged``). Run with the app stopped."""
+	tables = [table for table in Base.metadata.sorted_tables if table.name in PARTITIONED_TABLES]
+	Base.metadata.create_all(engine, tables=tables)
+	dispose_engines()  # the files are renamed below
+	copied = {}
+	for language_id, path in language_files().items():
+		with engine.connect() as conn:
+			conn.exec_driver_sql("ATTACH DATABASE ? AS part", (str(path.resolve()),))
+			conn.commit()
+			try:
+				with conn.begin():
+					copied[language_id] = sum(_copy_table(conn, table, "part") for table in tables)
+			finally:
+				conn.exec_driver_sql("DETACH DATABASE part")
+				conn.commit()
+		path.rename(path.with_name(path.name + ".merged"))
+		log_event("partition_merge", language_id=language_id, rows=copied[language_id])
+	return copied
+
+
+def status(engine) -> dict:
+	if engine.dialect.name == "postgresql":
+		with engine.connect() as conn:
+			partitions = conn.execute(text(
+				"SELECT CAST(inhparent AS regclass)::text, CAST(inhrelid AS regclass)::text FROM pg_inherits "
+				"WHERE inhparent IN (to_regclass('word_entries'), to_regclass('words')) ORDER BY 1, 2"
+			)).all()
+		return {"dialect": "postgresql", "partitions": [f"{parent}: {child}" for parent, child in partitions]}
+	files = language_files()
+	return {
+		"dialect": engine.dialect.name,
+		"routing_enabled": routing_enabled(),
+		"partition_dir": settings.PARTITION_DIR,
+		"files": {language_id: path.stat().st_size for language_id, path in files.items()},
+	}
+
+
+def main() -> None:
+	import json
+
+	from app.db.session import engine
+
+	parser = argparse.ArgumentParser(description="Per-language partitioning of the dictionary tables")
+	parser.add_argument("command", choices=["status", "enable", "disable"])
+	args = parser.parse_args()
+	if args.command == "status":
+		print(json.dumps(status(engine), indent=2))
+		return
+	if engine.dialect.name == "postgresql":
+		raise SystemExit("On Postgres, partitioning is migration 0018_partition_by_language: run `alembic upgrade head`")
+	if engine.dialect.name != "sqlite":
+		raise SystemExit(f"Per-language partitioning is not supported on {engine.dialect.name}")
+	if args.command == "enable":
+		copied = split_sqlite(engine)
+		print(f"Split {sum(copied.values())} rows into {len(copied)} language files; start with PARTITION_BY_LANGUAGE=true")
+	else:
+		copied = merge_sqlite(engine)
+		print(f"Merged {sum(copied.values())} rows from {len(copied)} language files; start with PARTITION_BY_LANGUAGE=false")
+	invalidate(CACHE_NAME)
+
+
+if __name__ == "__main__":
+	main()
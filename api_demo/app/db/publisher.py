@@ -0,0 +1,323 @@
+"""Static JSON publication of published word entries, for CDN-served reads.
+
+For each language the publisher writes, under ``<language_id>/`` in the publish store
+(``PUBLISH_DIR``, served at ``/public`` when ``PUBLISH_SERVE=true``, or the S3 bucket
+under ``PUBLISH_S3_PREFIX``):
+
+	manifest.json            version, shard map and counts
+	entries/<id>.json        the entry document (``WordEntryOut``), published entries only
+	index/<hex>.json         lemma index shard: every published entry whose folded lemma
+	                         (see ``fold_for_search``) starts with the shard prefix
+
+Shards are keyed by the first ``PUBLISH_SHARD_PREFIX_LEN`` characters of the folded
+lemma. File names are the prefix's UTF-8 bytes in hex, and ``manifest.json`` maps each
+prefix to its file. The version is the language's change-log cursor. A republish reads
+the changes after the manifest's version and rewrites only those entries and the shards
+they fall in. A reset, a missing entry or a format change triggers a full publication.
+Entry files are written before the shards that point at them, and the manifest last.
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import REGISTRY, export_stats
+from app.core.scheduler import CoalescingScheduler
+from app.core.unicode_utils import fold_for_search
+from app.db.changes import ENTITY_ENTRY, ENTITY_LANGUAGE
+from app.db.coordination import process_lock
+from app.db.documents import documents_for
+from app.db.models import ChangeLog, Language, WordEntry
+from app.db.storage import BackupStorage, LocalStorage, s3_storage
+
+FORMAT = 1
+BATCH = 1000
+JSON = "application/json"
+PUBLISHED = "published"
+
+ENTRY_COLUMNS = (
+	WordEntry.id,
+	WordEntry.lemma_raw,
+	WordEntry.lemma_nfc,
+	WordEntry.pos,
+	WordEntry.status,
+	WordEntry.document,
+)
+
+def publish_storage() -> BackupStorage:
+	if settings.PUBLISH_STORAGE == "s3":
+		return s3_storage()
+	return LocalStorage(Path(settings.PUBLISH_DIR))
+
+
+def _root() -> str:
+	return settings.PUBLISH_S3_PREFIX if settings.PUBLISH_STORAGE == "s3" else ""
+
+
+def shard_prefix(lemma: str, length: Optional[int] = None) -> str:
+	return fold_for_search(lemma)[: length or settings.PUBLISH_SHARD_PREFIX_LEN]
+
+
+def shard_file(prefix: str) -> str:
+	return f"index/{prefix.encode('utf-8').hex() or '_'}.json"
+
+
+def _index_row(row) -> dict:
+	return {
+		"id": row.id,
+		"lemma": row.lemma_raw,
+		"fold_key": fold_for_search(row.lemma_nfc),
+		"pos": row.pos,
+	}
+
+
+def _encode(payload) -> bytes:
+	return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _Publication:
+	def __init__(self, storage: BackupStorage, language_id: int):
+		self.storage = storage
+		self.base = f"{_root()}{language_id}/"
+		self.written = 0
+		# Deleted after the new manifest is written, so readers never follow a dangling pointer.
+		self.removed: List[str] = []
+
+	def key(self, path: str) -> str:
+		return self.base + path
+
+	def put(self, path: str, data: bytes) -> None:
+		self.storage.put_bytes(data, self.key(path), content_type=JSON)
+		self.written += 1
+
+	def get_json(self, path: str):
+		return json.loads(self.storage.get_bytes(self.key(path)).decode("utf-8"))
+
+	def read_manifest(self) -> Optional[dict]:
+		try:
+			return self.get_json("manifest.json")
+		except Exception:
+			return None  # missing or unreadable: publish everything
+
+	def put_shard(self, prefix: str, rows: List[dict]) -> dict:
+		rows.sort(key=lambda row: (row["fold_key"], row["id"]))
+		self.put(shard_file(prefix), _encode({"prefix": prefix, "entries": rows}))
+		return {"file": shard_file(prefix), "count": len(rows)}
+
+
+def _published_rows(db, language_id: int, entry_ids: Optional[List[int]] = None):
+	"""Published entries with their documents, in id batches."""
+	if entry_ids is not None:
+		for start in range(0, len(entry_ids), BATCH):
+			rows = db.query(*ENTRY_COLUMNS).filter(WordEntry.id.in_(entry_ids[start:start + BATCH])).all()
+			yield rows
+		return
+	last_id = 0
+	while True:
+		rows = (
+			db.query(*ENTRY_COLUMNS)
+			.filter(WordEntry.language_id == language_id, WordEntry.status == PUBLISHED, WordEntry.id > last_id)
+			.order_by(WordEntry.id)
+			.limit(BATCH)
+			.all()
+		)
+		if not rows:
+			return
+		yield rows
+		last_id = rows[-1].id
+
+
+def _publish_full(db, publication: _Publication, language_id: int, prefix_len: int) -> Dict[str, dict]:
+	shards: Dict[str, List[dict]] = {}
+	entry_paths = set()
+	for rows in _published_rows(db, language_id):
+		for row, document in zip(rows, documents_for(db, rows)):
+			publication.put(f"entries/{row.id}.json", document.encode("utf-8"))
+			entry_paths.add(publication.key(f"entries/{row.id}.json"))
+			shards.setdefault(shard_prefix(row.lemma_nfc, prefix_len), []).append(_index_row(row))
+	shard_map = {prefix: publication.put_shard(prefix, rows) for prefix, rows in shards.items()}
+	# Anything else under the language (entries no longer published, old shards) goes.
+	keep = entry_paths | {publication.key(info["file"]) for info in shard_map.values()}
+	keep.add(publication.key("manifest.json"))
+	stale = [item["Key"] for item in publication.storage.list(publication.base) if item["Key"] not in keep]
+	publication.storage.delete(stale)
+	return shard_map
+
+
+def _publish_changes(db, publication: _Publication, manifest: dict, entry_ids: List[int]) -> Optional[Dict[str, dict]]:
+	"""Rewrite the changed entries and their shards. Returns None if a full publication is needed."""
+	prefix_len = manifest["prefix_len"]
+	current = {}
+	for rows in _published_rows(db, manifest["language_id"], entry_ids):
+		for row, document in zip(rows, documents_for(db, rows)):
+			current[row.id] = (row, document)
+	if len(current) != len(entry_ids):
+		# Entries only disappear with their language (a reset), so this copy is out of step.
+		return None
+	shard_map = dict(manifest["shards"])
+	affected: Dict[str, List] = {}
+	removed = []
+	for row, document in current.values():
+		# Lemmas do not change after creation, so an entry stays in the same shard.
+		affected.setdefault(shard_prefix(row.lemma_nfc, prefix_len), []).append(row)
+		if row.status == PUBLISHED:
+			publication.put(f"entries/{row.id}.json", document.encode("utf-8"))
+		else:
+			removed.append(publication.key(f"entries/{row.id}.json"))
+	for prefix, rows in affected.items():
+		ids = {row.id for row in rows}
+		existing = publication.get_json(shard_map[prefix]["file"])["entries"] if prefix in shard_map else []
+		merged = [item for item in existing if item["id"] not in ids]
+		merged.extend(_index_row(row) for row in rows if row.status == PUBLISHED)
+		if merged:
+			shard_map[prefix] = publication.put_shard(prefix, merged)
+		elif prefix in shard_map:
+			removed.append(publication.key(shard_map.pop(prefix)["file"]))
+	publication.removed.extend(removed)
+	return shard_map
+
+
+def publish_language(db, language_id: int, full: bool = False, storage: Optional[BackupStorage] = None) -> dict:
+	"""Bring the language's static files up to its change-log cursor. Returns the manifest."""
+	with process_lock("static_publish"):
+		started = time.perf_counter()
+		language = db.get(Language, language_id)
+		if language is None:
+			raise LookupError(f"Language {language_id} not found")
+		version = db.query(func.max(ChangeLog.id)).filter(ChangeLog.language_id == language_id).scalar() or 0
+		publication = _Publication(storage or publish_storage(), language_id)
+		previous = None if full else publication.read_manifest()
+		shard_map = None
+		mode = "full"
+		changed = None
+		if (
+			previous is not None
+			and previous.get("format") == FORMAT
+			and previous.get("prefix_len") == settings.PUBLISH_SHARD_PREFIX_LEN
+			and previous["version"] <= version
+		):
+			if previous["version"] == version:
+				return previous
+			changes = (
+				db.query(ChangeLog.entity, ChangeLog.entity_id)
+				.filter(ChangeLog.language_id == language_id, ChangeLog.id > previous["version"], ChangeLog.id <= version)
+				.all()
+			)
+			if not any(change.entity == ENTITY_LANGUAGE for change in changes):
+				entry_ids = sorted({change.entity_id for change in changes if change.entity == ENTITY_ENTRY})
+				shard_map = _publish_changes(db, publication, previous, entry_ids)
+				mode = "incremental"
+				changed = len(entry_ids)
+		if shard_map is None:
+			mode = "full"
+			changed = None
+			shard_map = _publish_full(db, publication, language_id, settings.PUBLISH_SHARD_PREFIX_LEN)
+		manifest = {
+			"format": FORMAT,
+			"language_id": language_id,
+			"language_name": language.name,
+			"language_slug": language.slug,
+			"version": version,
+			"published_at": datetime.utcnow().isoformat(),
+			"prefix_len": settings.PUBLISH_SHARD_PREFIX_LEN,
+			"entries": sum(info["count"] for info in shard_map.values()),
+			"shards": dict(sorted(shard_map.items())),
+		}
+		publication.put("manifest.json", _encode(manifest))
+		publication.storage.delete(publication.removed)
+		log_event(
+			"static_publish",
+			language_id=language_id,
+			version=version,
+			mode=mode,
+			changed_entries=changed,
+			files_written=publication.written,
+			files_removed=len(publication.removed),
+			entries=manifest["entries"],
+			duration_ms=round((time.perf_counter() - started) * 1000, 3),
+		)
+		return manifest
+
+
+def unpublish_language(language_id: int, storage: Optional[BackupStorage] = None) -> None:
+	storage = storage or publish_storage()
+	prefix = f"{_root()}{language_id}/"
+	storage.delete([item["Key"] for item in storage.list(prefix)])
+
+
+_pending_languages: set = set()
+_pending_lock = threading.Lock()
+
+
+def _scheduled_publish(reason: str) -> None:
+	from app.db.session import SessionLocal
+
+	with _pending_lock:
+		language_ids = sorted(_pending_languages)
+		_pending_languages.clear()
+	db = SessionLocal()
+	try:
+		for language_id in language_ids:
+			try:
+				publish_language(db, language_id)
+			except LookupError:
+				unpublish_language(language_id)
+			except Exception as exc:
+				db.rollback()
+				log_event("static_publish_failed", language_id=language_id, error=str(exc))
+	finally:
+		db.close()
+
+
+publish_scheduler = CoalescingScheduler(
+	"static_publish",
+	_scheduled_publish,
+	debounce_sec=settings.PUBLISH_DEBOUNCE_SEC,
+	max_delay_sec=settings.PUBLISH_MAX_DELAY_SEC,
+)
+
+
+def _collect_publish_metrics() -> None:
+	export_stats("publish_scheduler", "Static publication scheduler state", publish_scheduler.stats())
+
+
+REGISTRY.register_collector(_collect_publish_metrics)
+
+
+def request_publish(language_ids: Iterable[int]) -> None:
+	"""Signal that languages changed; publications are coalesced by the scheduler."""
+	if not settings.PUBLISH_AUTO:
+		return
+	with _pending_lock:
+		_pending_languages.update(language_ids)
+	publish_scheduler.notify("change_log")
+
+
+def main() -> None:
+	from app.db.session import SessionLocal
+
+	parser = argparse.ArgumentParser(description="Static JSON publication")
+	parser.add_argument("command", choices=["publish"])
+	parser.add_argument("--language-id", type=int, action="append", help="Repeatable; default: every language")
+	parser.add_argument("--full", action="store_true", help="Republish everything instead of applying changes")
+	args = parser.parse_args()
+	db = SessionLocal()
+	try:
+		language_ids = args.language_id or [row.id for row in db.query(Language.id).order_by(Language.id)]
+		for language_id in language_ids:
+			manifest = publish_language(db, language_id, full=args.full)
+			print(json.dumps({k: v for k, v in manifest.items() if k != "shards"}, ensure_ascii=False))
+	finally:
+		db.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,233 @@
+"""Read replicas for dictionary reads.
+
+With ``READ_REPLICA_URLS`` set, ``get_db`` gives ``GET``/``HEAD`` requests under
+``/dictionary`` a session whose reads go to a replica. Every other request, and any write a
+replica session makes, uses the primary ``engine``.
+
+On Postgres a replica that has replayed the primary's current WAL position is caught up;
+otherwise it holds every commit up to ``pg_last_xact_replay_timestamp()``. Other databases
+(the local stand-ins the tests use) are compared by change log: every dictionary write
+appends ``change_log`` rows in its transaction (app/db/changes.py), so a replica lacking
+rows the primary has is behind by the age of the oldest missing row. Writes outside the
+dictionary are not seen there. A background thread measures each replica's position every
+``REPLICA_LAG_CHECK_SEC``; routing only reads the last measurement, so no request waits on a
+replica. A replica more than ``REPLICA_MAX_LAG_SEC`` behind, unreachable, or not measured
+yet is skipped until it catches up.
+
+Read-your-writes: a successful write request sets the ``last_write`` cookie for
+``READ_YOUR_WRITES_SEC``. That client's reads stay on the primary until a replica has
+replicated past the time of the write.
+"""
+
+import itertools
+import threading
+import time
+from datetime import timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.metrics import REGISTRY, export_stats, instrument_engine
+from app.db.models import ChangeLog
+
+REPLICA_KEY = "replica_engine"
+WRITE_COOKIE = "last_write"
+READ_METHODS = ("GET", "HEAD")
+READ_PREFIX = "/dictionary"
+
+
+class Replica:
+	def __init__(self, name: str, engine):
+		self.name = name
+		self.engine = engine
+		# Epoch seconds up to which the replica holds every change (None: unknown or unreachable).
+		self.replicated_until: Optional[float] = None
+		self.lag_sec: Optional[float] = None
+		self.checked_at = 0.0
+		self.reads = 0
+		self.error: Optional[str] = None
+
+
+def _wal_replicated_until(primary, replica_engine, checked_at: float) -> float:
+	with primary.connect() as conn:
+		lsn = conn.execute(text("SELECT CAST(pg_current_wal_lsn() AS text)")).scalar()
+	with replica_engine.connect() as conn:
+		caught_up, replayed_at = conn.execute(
+			text(
+				"SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn), "
+				"EXTRACT(EPOCH FROM pg_last_xact_replay_timestamp())"
+			),
+			{"lsn": lsn},
+		).one()
+	if caught_up:
+		return checked_at
+	return min(checked_at, float(replayed_at or 0))
+
+
+def replicated_until(primary, replica_engine) -> float:
+	"""Epoch time up to which ``replica_engine`` has every commit the primary has."""
+	checked_at = time.time()
+	if primary.dialect.name == "postgresql":
+		return _wal_replicated_until(primary, replica_engine, checked_at)
+	# Other databases (local stand-ins): compare change logs, which covers dictionary writes only.
+	with replica_engine.connect() as conn:
+		replica_max = conn.execute(select(func.max(ChangeLog.id))).scalar() or 0
+	with primary.connect() as conn:
+		oldest_missing = conn.execute(
+			select(func.min(ChangeLog.created_at)).where(ChangeLog.id > replica_max)
+		).scalar()
+	if oldest_missing is None:
+		return checked_at
+	# created_at is naive UTC (datetime.utcnow()).
+	return min(checked_at, oldest_missing.replace(tzinfo=timezone.utc).timestamp())
+
+
+class ReplicaSet:
+	"""Picks a replica that is caught up enough for a read, round-robin."""
+
+	def __init__(self, primary, engines: Dict[str, object], max_lag_sec: float, check_sec: float):
+		self.primary = primary
+		self.replicas: List[Replica] = [Replica(name, engine) for name, engine in engines.items()]
+		self.max_lag_sec = max_lag_sec
+		self.check_sec = check_sec
+		self.primary_fallbacks = 0
+		self._refresh_lock = threading.Lock()
+		self._turn = itertools.count()
+		self._stopping = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> None:
+		"""Measure replica lag in a background thread every ``check_sec``."""
+		if self._thread is not None and self._thread.is_alive():
+			return
+		self._stopping.clear()
+		self._thread = threading.Thread(target=self._watch, name="replica-lag", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		self._stopping.set()
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	def _watch(self) -> None:
+		while True:
+			self.refresh()
+			if self._stopping.wait(max(self.check_sec, 0.1)):
+				return
+
+	def refresh(self) -> None:
+		"""Measure every replica now; requests keep routing on the previous measurement meanwhile."""
+		with self._refresh_lock:
+			for replica in self.replicas:
+				now = time.time()
+				try:
+					replica.replicated_until = replicated_until(self.primary, replica.engine)
+					replica.lag_sec = round(max(0.0, now - replica.replicated_until), 3)
+					if replica.error is not None:
+						log_event("replica_recovered", replica=replica.name)
+					replica.error = None
+				except Exception as exc:
+					replica.replicated_until = replica.lag_sec = None
+					if replica.error != str(exc):
+						log_event("replica_check_failed", replica=replica.name, error=str(exc))
+					replica.error = str(exc)
+				replica.checked_at = time.time()
+
+	def choose(self, last_write: Optional[float] = None):
+		"""A replica engine fit for the read, or None to read from the primary."""
+		candidates = [
+			replica
+			for replica in self.replicas
+			if replica.lag_sec is not None
+			and replica.lag_sec <= self.max_lag_sec
+			# The lag thread may be clearing a failed replica's fields between these reads.
+			and (last_write is None or (replica.replicated_until or 0.0) >= last_write)
+		]
+		if not candidates:
+			self.primary_fallbacks += 1
+			return None
+		replica = candidates[next(self._turn) % len(candidates)]
+		replica.reads += 1
+		return replica.engine
+
+	def stats(self) -> dict:
+		return {
+			"replicas": len(self.replicas),
+			"usable": sum(1 for r in self.replicas if r.lag_sec is not None and r.lag_sec <= self.max_lag_sec),
+			"primary_fallbacks": self.primary_fallbacks,
+		}
+
+
+class ReplicaSession(Session):
+	"""Reads go to ``info[REPLICA_KEY]`` when set. Flushes and DML go to the primary, and so does
+	everything after them, so the session reads its own writes."""
+
+	def get_bind(self, mapper=None, *, clause=None, **kw):
+		replica = self.info.get(REPLICA_KEY)
+		if replica is not None:
+			if not self._flushing and not isinstance(clause, UpdateBase):
+				return replica
+			del self.info[REPLICA_KEY]
+		return super().get_bind(mapper, clause=clause, **kw)
+
+
+def replica_urls() -> List[str]:
+	return [url.strip() for url in settings.READ_REPLICA_URLS.split(",") if url.strip()]
+
+
+def create_replica_set(primary) -> ReplicaSet:
+	engines = {}
+	for number, url in enumerate(replica_urls()):
+		connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+		engine = create_engine(url, connect_args=connect_args)
+		# Names, not URLs, in logs and metrics: URLs may carry credentials.
+		name = f"replica{number}"
+		instrument_engine(engine, name)
+		engines[name] = engine
+	# Started by create_app(); until its first measurement, reads stay on the primary.
+	replica_set = ReplicaSet(primary, engines, settings.REPLICA_MAX_LAG_SEC, settings.REPLICA_LAG_CHECK_SEC)
+
+	def collect() -> None:
+		export_stats("read_replicas", "Read replica routing", replica_set.stats())
+		for replica in replica_set.replicas:
+			export_stats(
+				"read_replica",
+				"Read replica",
+				{"lag_sec": replica.lag_sec if replica.lag_sec is not None else -1, "reads": replica.reads},
+				labels={"replica": replica.name},
+			)
+
+	REGISTRY.register_collector(collect)
+	return replica_set
+
+
+def last_write_time(request) -> Optional[float]:
+	try:
+		return float(request.cookies[WRITE_COOKIE])
+	except (KeyError, ValueError):
+		return None
+
+
+def replica_for_request(replica_set: Optional[ReplicaSet], request):
+	"""The replica engine a request's reads should use, or None for the primary."""
+	if replica_set is None or request.method not in READ_METHODS or not request.url.path.startswith(READ_PREFIX):
+		return None
+	return replica_set.choose(last_write_time(request))
+
+
+async def read_your_writes_middleware(request, call_next):
+	response = await call_next(request)
+	if request.method not in READ_METHODS and response.status_code < 400:
+		# Set after the handler committed, so the time is never earlier than the write.
+		response.set_cookie(
+			WRITE_COOKIE,
+			f"{time.time():.3f}",
+			max_age=max(1, int(settings.READ_YOUR_WRITES_SEC)),
+			httponly=True,
+			samesite="lax",
+		)
+	return response
@@ -0,0 +1,307 @@
+"""Restore a backup snapshot and verify it against the manifest written at backup time.
+
+	python -m app.db.restore list
+	python -m app.db.restore sqlite --dest restored.db [--key KEY] [--reindex]
+	python -m app.db.restore postgres --target-url postgresql://... [--key KEY]
+
+SQLite snapshots are streamed (and decompressed) into a temporary file next to the
+destination, incremental deltas are replayed, and the file is only moved into place
+once its sha256, ``PRAGMA integrity_check`` and per-table row counts match the
+manifest. Postgres dumps are streamed into ``psql`` inside one transaction that is only
+committed when the dump's sha256 matches; pg_dump already orders index creation after
+the data load, and ``maintenance_work_mem`` is raised so those builds run in memory.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.db.compression import decompress_chunks, method_for_key
+from app.db.fingerprint import file_sha256
+from app.db.manifest import MANIFEST_SUFFIX, HashingCounter, read_manifest, sqlite_row_counts
+from app.db.sqlite_incremental import apply_delta
+from app.db.storage import BackupStorage, get_storage
+
+SNAPSHOT_SUFFIXES = (".db", ".sql", ".sql.gz", ".sql.zst", ".delta.gz")
+
+
+class RestoreVerificationError(ValueError):
+	pass
+
+
+def _backup_prefix() -> str:
+	return settings.S3_PREFIX.strip("/") if settings.S3_PREFIX else "backups"
+
+
+def _kind_for_key(key: str) -> str:
+	if key.endswith(".delta.gz"):
+		return "sqlite_delta"
+	if key.endswith(".db"):
+		return "sqlite"
+	return "pg_dump"
+
+
+def list_snapshots(storage: BackupStorage, prefix: Optional[str] = None) -> List[dict]:
+	"""Every restorable snapshot under the prefix, oldest first.
+
+	Snapshots written before manifests existed are listed with ``manifest: False``.
+	"""
+	prefix = prefix or _backup_prefix()
+	items = storage.list(f"{prefix}/")
+	keys = {item["Key"] for item in items}
+	snapshots = []
+	for item in items:
+		key = item["Key"]
+		if key.endswith(MANIFEST_SUFFIX) or not key.endswith(SNAPSHOT_SUFFIXES):
+			continue
+		if key + MANIFEST_SUFFIX in keys:
+			manifest = read_manifest(storage, key)
+			snapshots.append(dict(manifest, manifest=True))
+		elif not key.endswith(".delta.gz"):
+			snapshots.append(
+				{
+					"object_key": key,
+					"kind": _kind_for_key(key),
+					"created_at": item.get("LastModified", ""),
+					"size": item.get("Size", 0),
+					"manifest": False,
+				}
+			)
+	snapshots.sort(key=lambda snapshot: (snapshot.get("created_at", ""), snapshot["object_key"]))
+	return snapshots
+
+
+def select_snapshot(storage: BackupStorage, key: Optional[str] = None, kinds=None) -> dict:
+	snapshots = list_snapshots(storage)
+	if key:
+		for snapshot in snapshots:
+			if snapshot["object_key"] == key:
+				return snapshot
+		raise FileNotFoundError(f"No snapshot with key {key}")
+	if kinds:
+		snapshots = [snapshot for snapshot in snapshots if snapshot["kind"] in kinds]
+	if not snapshots:
+		raise FileNotFoundError("No snapshots found")
+	return snapshots[-1]
+
+
+def _report(snapshot: dict, started: float, downloaded: int, restored: int, rows: int, checks: dict) -> dict:
+	seconds = max(time.perf_counter() - started, 1e-9)
+	return {
+		"object_key": snapshot["object_key"],
+		"kind": snapshot["kind"],
+		"verified": bool(snapshot.get("manifest")),
+		"bytes_downloaded": downloaded,
+		"bytes_restored": restored,
+		"rows": rows,
+		"seconds": round(seconds, 3),
+		"mb_per_sec": round(restored / seconds / (1024 * 1024), 2),
+		"rows_per_sec": round(rows / seconds, 1),
+		"checks": checks,
+	}
+
+
+def _check_row_counts(actual: Dict[str, int], expected: Optional[Dict[str, int]]) -> dict:
+	if expected is None:
+		return {}
+	mismatched = {
+		name: {"expected": count, "actual": actual.get(name)}
+		for name, count in expected.items()
+		if actual.get(name) != count
+	}
+	if mismatched:
+		raise RestoreVerificationError(f"Row counts do not match the manifest: {json.dumps(mismatched)}")
+	return {"row_counts": "ok", "tables": len(expected)}
+
+
+def restore_sqlite(
+	storage: BackupStorage,
+	snapshot: dict,
+	dest_path: Path,
+	force: bool = False,
+	reindex: bool = False,
+	quick_check: bool = False,
+) -> dict:
+	dest_path = Path(dest_path).expanduser().resolve()
+	if dest_path.exists() and not force:
+		raise FileExistsError(f"{dest_path} exists; pass force=True (--force) to replace it")
+	if snapshot["kind"] not in ("sqlite", "sqlite_delta"):
+		raise ValueError(f"{snapshot['object_key']} is not a SQLite snapshot")
+
+	started = time.perf_counter()
+	dest_path.parent.mkdir(parents=True, exist_ok=True)
+	chain = snapshot.get("chain") or {"base_key": snapshot["object_key"], "deltas": []}
+	fd, tmp_name = tempfile.mkstemp(prefix=f".{dest_path.name}.", suffix=".restore", dir=dest_path.parent)
+	tmp_path = Path(tmp_name)
+	try:
+		base_key = chain["base_key"]
+		raw = HashingCounter(storage.iter_chunks(base_key))
+		payload = HashingCounter(decompress_chunks(raw, method_for_key(base_key)))
+		with os.fdopen(fd, "wb") as handle:
+			for chunk in payload:
+				handle.write(chunk)
+		downloaded = raw.count
+		for delta_key in chain.get("deltas", []):
+			delta = storage.get_bytes(delta_key)
+			downloaded += len(delta)
+			apply_delta(tmp_path, delta)
+		sha256 = payload.hexdigest() if not chain.get("deltas") else file_sha256(tmp_path)
+		restored = tmp_path.stat().st_size
+
+		checks = {}
+		if snapshot.get("manifest"):
+			if sha256 != snapshot["sha256"] or restored != snapshot["size"]:
+				raise RestoreVerificationError(
+					f"Checksum mismatch for {snapshot['object_key']}: expected {snapshot['sha256']}, got {sha256}"
+				)
+			checks["sha256"] = "ok"
+
+		conn = sqlite3.connect(str(tmp_path))
+		try:
+			pragma = "quick_check" if quick_check else "integrity_check"
+			result = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+			if result != ["ok"]:
+				raise RestoreVerificationError(f"{pragma} failed: {'; '.join(result[:5])}")
+			checks[pragma] = "ok"
+			if reindex:
+				reindex_started = time.perf_counter()
+				conn.execute("PRAGMA journal_mode=OFF")
+				conn.execute("PRAGMA synchronous=OFF")
+				conn.execute("REINDEX")
+				conn.commit()
+				conn.execute("PRAGMA journal_mode=DELETE")
+				checks["reindex_ms"] = round((time.perf_counter() - reindex_started) * 1000, 3)
+		finally:
+			conn.close()
+
+		counts = sqlite_row_counts(tmp_path)
+		checks.update(_check_row_counts(counts, snapshot.get("row_counts")))
+		os.replace(tmp_path, dest_path)
+	except BaseException:
+		tmp_path.unlink(missing_ok=True)
+		raise
+
+	report = _report(snapshot, started, downloaded, restored, sum(counts.values()), checks)
+	log_event("backup_restore_complete", dest=str(dest_path), **{k: v for k, v in report.items() if k != "checks"})
+	return report
+
+
+def _postgres_row_counts(target_url: str) -> Dict[str, int]:
+	engine = create_engine(target_url, poolclass=NullPool)
+	try:
+		with engine.connect() as conn:
+			tables = conn.execute(
+				text("SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename")
+			).scalars().all()
+			return {name: conn.execute(text(f'SELECT COUNT(*) FROM public."{name}"')).scalar() for name in tables}
+	finally:
+		engine.dispose()
+
+
+def restore_postgres(
+	storage: BackupStorage,
+	snapshot: dict,
+	target_url: str,
+	maintenance_work_mem: str = "512MB",
+) -> dict:
+	"""Load a pg_dump snapshot into an empty database at target_url."""
+	if snapshot["kind"] != "pg_dump":
+		raise ValueError(f"{snapshot['object_key']} is not a pg_dump snapshot")
+	started = time.perf_counter()
+	key = snapshot["object_key"]
+	raw = HashingCounter(storage.iter_chunks(key))
+	payload = HashingCounter(decompress_chunks(raw, method_for_key(key)))
+	psql_url = target_url.replace("postgresql+psycopg2://", "postgresql://", 1)
+	env = dict(os.environ)
+	env["PGOPTIONS"] = f"-c maintenance_work_mem={maintenance_work_mem} -c synchronous_commit=off"
+	checks = {}
+	with tempfile.TemporaryFile() as stderr:
+		process = subprocess.Popen(
+			["psql", "-X", "-q", "-v", "ON_ERROR_STOP=1", psql_url],
+			stdin=subprocess.PIPE,
+			stdout=subprocess.DEVNULL,
+			stderr=stderr,
+			env=env,
+		)
+		try:
+			# The dump is applied inside one transaction that is only committed once the
+			# whole stream checked out; anything else drops the connection and rolls back.
+			process.stdin.write(b"BEGIN;\n")
+			for chunk in payload:
+				process.stdin.write(chunk)
+			if snapshot.get("manifest"):
+				if payload.hexdigest() != snapshot["sha256"] or payload.count != snapshot["size"]:
+					raise RestoreVerificationError(f"Checksum mismatch for {key}")
+				checks["sha256"] = "ok"
+			process.stdin.write(b"\nCOMMIT;\n")
+			process.stdin.close()
+			returncode = process.wait()
+		except BaseException:
+			process.kill()
+			process.wait()
+			raise
+		if returncode != 0:
+			stderr.seek(0)
+			raise RuntimeError(stderr.read().decode("utf-8", errors="replace"))
+
+	counts = _postgres_row_counts(psql_url)
+	if snapshot.get("row_counts_exact", True):
+		checks.update(_check_row_counts(counts, snapshot.get("row_counts")))
+	report = _report(snapshot, started, raw.count, payload.count, sum(counts.values()), checks)
+	log_event("backup_restore_complete", target="postgres", **{k: v for k, v in report.items() if k != "checks"})
+	return report
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Restore and verify database backups")
+	subparsers = parser.add_subparsers(dest="command", required=True)
+	subparsers.add_parser("list", help="List restorable snapshots")
+	sqlite_parser = subparsers.add_parser("sqlite", help="Restore a SQLite snapshot to a file")
+	sqlite_parser.add_argument("--dest", required=True)
+	sqlite_parser.add_argument("--key", help="Snapshot object key (default: newest)")
+	sqlite_parser.add_argument("--force", action="store_true", help="Replace an existing destination file")
+	sqlite_parser.add_argument("--reindex", action="store_true", help="Rebuild all indexes after restoring")
+	sqlite_parser.add_argument("--quick-check", action="store_true", help="Use PRAGMA quick_check")
+	pg_parser = subparsers.add_parser("postgres", help="Restore a pg_dump snapshot into an empty database")
+	pg_parser.add_argument("--target-url", required=True)
+	pg_parser.add_argument("--key", help="Snapshot object key (default: newest)")
+	pg_parser.add_argument("--maintenance-work-mem", default="512MB")
+	for sub in (sqlite_parser, pg_parser):
+		sub.add_argument("--allow-unverified", action="store_true", help="Restore snapshots without a manifest")
+	args = parser.parse_args(argv)
+
+	storage = get_storage()
+	if args.command == "list":
+		for snapshot in list_snapshots(storage):
+			print(json.dumps({k: snapshot.get(k) for k in ("object_key", "kind", "created_at", "size", "manifest")}))
+		return 0
+
+	kinds = ("sqlite", "sqlite_delta") if args.command == "sqlite" else ("pg_dump",)
+	snapshot = select_snapshot(storage, args.key, kinds)
+	if not snapshot.get("manifest") and not args.allow_unverified:
+		parser.error(f"{snapshot['object_key']} has no manifest; pass --allow-unverified to restore it anyway")
+	try:
+		if args.command == "sqlite":
+			report = restore_sqlite(storage, snapshot, Path(args.dest), args.force, args.reindex, args.quick_check)
+		else:
+			report = restore_postgres(storage, snapshot, args.target_url, args.maintenance_work_mem)
+	except RestoreVerificationError as exc:
+		print(json.dumps({"object_key": snapshot["object_key"], "verified": False, "error": str(exc)}))
+		return 1
+	print(json.dumps(report))
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
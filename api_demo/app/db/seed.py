@@ -1,10 +1,15 @@
+from collections import Counter
 from pathlib import Path
-from typing import Iterable, Set
+from typing import Iterable, List, Set
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.db.models import WordEntry, Sense, Word, Language
+from app.db.models import WordEntry, Sense, SenseExample, SenseRelation, SenseTranslation, Word, Language
 from app.core.unicode_utils import normalize_lemma
+from app.db.changes import ENTITY_ENTRY, ENTITY_WORD, record_changes, record_inserted, reset_language
+from app.db.documents import store_documents
+from app.db.stats import apply_stats_delta, clear_language_stats
 
 
 def resolve_word_list_path(project_dir: Path, configured_path: str) -> Path:
@@ -18,6 +23,24 @@ def resolve_word_list_path(project_dir: Path, configured_path: str) -> Path:
 	return parent_candidate
 
 
+def delete_language_entries(db: Session, language_id: int) -> None:
+	"""Bulk-delete a language's entries and their children, deepest first.
+
+	``query.delete()`` skips the ORM cascades, and neither SQLite (foreign keys off) nor
+	the schema cascade on delete, so children are removed explicitly instead of being
+	orphaned (SQLite reuses the freed entry ids) or blocking the delete (Postgres).
+	"""
+	entry_ids = db.query(WordEntry.id).filter(WordEntry.language_id == language_id).scalar_subquery()
+	sense_ids = db.query(Sense.id).filter(Sense.word_entry_id.in_(entry_ids)).scalar_subquery()
+	for child in (SenseExample, SenseTranslation, SenseRelation):
+		db.query(child).filter(child.sense_id.in_(sense_ids)).delete(synchronize_session=False)
+	db.query(SenseRelation).filter(SenseRelation.related_word_entry_id.in_(entry_ids)).update(
+		{SenseRelation.related_word_entry_id: None}, synchronize_session=False
+	)
+	db.query(Sense).filter(Sense.word_entry_id.in_(entry_ids)).delete(synchronize_session=False)
+	db.query(WordEntry).filter(WordEntry.language_id == language_id).delete(synchronize_session=False)
+
+
 def _read_word_list(word_list_path: Path) -> Iterable[str]:
 	try:
 		text = word_list_path.read_text(encoding="utf-8-sig")
@@ -52,7 +75,9 @@ def seed_words(db: Session, word_list_path: Path, language: Language, force: boo
 	
 	if force:
 		db.query(Word).filter(Word.language_id == language_id).delete()
-		db.query(WordEntry).filter(WordEntry.language_id == language_id).delete()
+		delete_language_entries(db, language_id)
+		clear_language_stats(db, language_id)
+		reset_language(db, language_id)
 		db.commit()
 	else:
 		existing_words = {
@@ -90,12 +115,15 @@ def seed_words(db: Session, word_list_path: Path, language: Language, force: boo
 			Word(language_id=language_id, word=w, definition=None)
 			for w in words_to_add
 		]
+		last_word_id = db.query(func.max(Word.id)).filter(Word.language_id == language_id).scalar() or 0
 		db.bulk_save_objects(word_objects)
+		apply_stats_delta(db, language_id, Counter(), Counter(words_total=len(word_objects)))
+		record_inserted(db, language_id, Word, ENTITY_WORD, last_word_id)
 		db.commit()
 		
 	# Also create WordEntry + Sense for each (for new API), in batches to reduce commits.
 	batch_size = 500
-	batch_count = 0
+	batch = []
 	for lemma_raw, lemma_nfc in entries_to_add:
 		word_entry = WordEntry(
 			language_id=language_id,
@@ -103,15 +131,25 @@ def seed_words(db: Session, word_list_path: Path, language: Language, force: boo
 			lemma_nfc=lemma_nfc,
 			status="draft"
 		)
-		word_entry.senses.append(Sense(sense_no=1, definition_text=""))
+		# Empty child collections are known, so documents render without lazy loads.
+		word_entry.senses.append(Sense(sense_no=1, definition_text="", examples=[], translations=[], relations=[]))
 		db.add(word_entry)
-		batch_count += 1
-		if batch_count >= batch_size:
-			db.commit()
-			db.expunge_all()
-			batch_count = 0
-	if batch_count:
-		db.commit()
-		db.expunge_all()
+		batch.append(word_entry)
+		if len(batch) >= batch_size:
+			_commit_entry_batch(db, language_id, batch)
+			batch = []
+	if batch:
+		_commit_entry_batch(db, language_id, batch)
 	
 	return len(entries_to_add)
+
+
+def _commit_entry_batch(db: Session, language_id: int, entries: List[WordEntry]) -> None:
+	db.flush()
+	store_documents(db, entries)
+	record_changes(db, language_id, ENTITY_ENTRY, [entry.id for entry in entries])
+	# Seeded entries are undefined drafts, so the counter delta is known without re-reading them.
+	count = len(entries)
+	apply_stats_delta(db, language_id, Counter(), Counter(entries_total=count, entries_draft=count))
+	db.commit()
+	db.expunge_all()
@@ -1,26 +1,87 @@
+from fastapi import Request
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
-from threading import Thread
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
-from app.db.backup import backup_db_to_s3
+from app.core.logging import log_event
+from app.core.metrics import instrument_engine
+from app.db.backup import request_backup
+from app.db.bundles import request_bundle_rebuild
+from app.db.coordination import invalidate
+from app.db.partitions import RoutingSession, install_routing, routing_enabled
+from app.db.publisher import request_publish
+from app.db.replicas import REPLICA_KEY, ReplicaSession, create_replica_set, replica_for_request, replica_urls
+from app.db.slow_query import install_slow_query_log
 
 connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine)
+install_slow_query_log()
+
+replica_set = None
+if replica_urls():
+	if routing_enabled():
+		# Per-language SQLite files have no replicas; reads stay on the files.
+		log_event("read_replicas_ignored", detail="PARTITION_BY_LANGUAGE is on")
+	else:
+		replica_set = create_replica_set(engine)
+
+if routing_enabled():
+	session_class = RoutingSession
+elif replica_set is not None:
+	session_class = ReplicaSession
+else:
+	session_class = Session
+SessionLocal = sessionmaker(class_=session_class, autocommit=False, autoflush=False, bind=engine)
+if routing_enabled():
+	install_routing(SessionLocal, engine)
+
+def _has_real_changes(session):
+	# session.dirty also lists objects whose attributes were set to their current value.
+	if session.new or session.deleted:
+		return True
+	return any(session.is_modified(obj) for obj in session.dirty)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flushed_changes(session, flush_context):
+	# Objects flushed before commit are no longer in session.new/dirty at before_commit.
+	if settings.S3_AUTO_BACKUP_ENABLED and _has_real_changes(session):
+		session.info["needs_s3_backup"] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_bulk_changes(orm_execute_state):
+	if settings.S3_AUTO_BACKUP_ENABLED and (
+		orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+	):
+		orm_execute_state.session.info["needs_s3_backup"] = True
 
 @event.listens_for(SessionLocal, "before_commit")
 def _mark_session_backup(session):
-	if session.new or session.dirty or session.deleted:
+	if settings.S3_AUTO_BACKUP_ENABLED and _has_real_changes(session):
 		session.info["needs_s3_backup"] = True
 
 @event.listens_for(SessionLocal, "after_commit")
 def _run_session_backup(session):
 	if session.info.pop("needs_s3_backup", False):
-		Thread(target=backup_db_to_s3, kwargs={"reason": "commit"}, daemon=True).start()
+		request_backup("commit")
+	languages = session.info.pop("changed_languages", None)
+	if languages:
+		request_bundle_rebuild(languages)
+		request_publish(languages)
+	for cache in session.info.pop("invalidate_caches", ()):
+		invalidate(cache)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_session_backup(session):
+	session.info.pop("needs_s3_backup", None)
+	session.info.pop("changed_languages", None)
+	session.info.pop("invalidate_caches", None)
 
-def get_db():
+def get_db(request: Request):
 	db = SessionLocal()
+	replica = replica_for_request(replica_set, request)
+	if replica is not None:
+		db.info[REPLICA_KEY] = replica
 	try:
 		yield db
 	finally:
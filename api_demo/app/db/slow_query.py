@@ -0,0 +1,209 @@
+"""Slow-query log with sampled plan capture.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged as ``slow_query`` events with the
+statement, the shape of its parameters (types, never values), the duration and the
+request id and route they ran under. A sample of them (``SLOW_QUERY_EXPLAIN_SAMPLE_RATE``,
+and each distinct statement at most once per ``SLOW_QUERY_EXPLAIN_INTERVAL_SEC``) get
+their plan captured by a background thread on a connection of its own (a ``NullPool``
+engine per database, never one from the app pool) and logged as
+``slow_query_plan``: ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN (FORMAT JSON)`` on
+Postgres, with ``ANALYZE`` for SELECTs when ``SLOW_QUERY_EXPLAIN_ANALYZE=true``.
+"""
+
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.logging import log_event, request_context
+from app.core.metrics import REGISTRY, add_statement_observer
+
+MAX_STATEMENT_CHARS = 2000
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+slow_queries = REGISTRY.counter("sql_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ["operation"])
+explained_queries = REGISTRY.counter("sql_slow_query_plans_total", "Slow-query plans captured, by outcome.", ["outcome"])
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> Any:
+	"""Describe parameters by type only, so values (emails, hashes) never reach the log."""
+	if executemany and isinstance(parameters, (list, tuple)):
+		first = parameters[0] if parameters else None
+		return {"rows": len(parameters), "row": parameters_shape(first)}
+	if isinstance(parameters, dict):
+		return {key: type(value).__name__ for key, value in parameters.items()}
+	if isinstance(parameters, (list, tuple)):
+		return [type(value).__name__ for value in parameters]
+	return type(parameters).__name__ if parameters is not None else None
+
+
+def statement_id(statement: str) -> str:
+	return hashlib.blake2b(" ".join(statement.split()).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SlowQueryLog:
+	def __init__(
+		self,
+		threshold_ms: float,
+		sample_rate: float,
+		explain_interval_sec: float,
+		explain_analyze: bool = False,
+		max_pending: int = 16,
+	):
+		self.threshold_ms = threshold_ms
+		self.sample_rate = max(0.0, min(1.0, sample_rate))
+		self.explain_interval_sec = explain_interval_sec
+		self.explain_analyze = explain_analyze
+		self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+		self._last_explained: Dict[str, float] = {}
+		self._lock = threading.Lock()
+		self._thread: Optional[threading.Thread] = None
+		self._random = random.Random()
+		self._explain_engines = weakref.WeakKeyDictionary()
+		self._connect_listeners = weakref.WeakKeyDictionary()
+
+	@property
+	def enabled(self) -> bool:
+		return self.threshold_ms > 0
+
+	def observe(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+		duration_ms = elapsed * 1000
+		if not self.enabled or duration_ms < self.threshold_ms:
+			return
+		context = request_context.get() or {}
+		query_id = statement_id(statement)
+		operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+		slow_queries.inc(operation=operation if operation in EXPLAINABLE else "OTHER")
+		log_event(
+			"slow_query",
+			query_id=query_id,
+			duration_ms=round(duration_ms, 3),
+			statement=statement[:MAX_STATEMENT_CHARS],
+			parameters=parameters_shape(parameters, executemany),
+			executemany=executemany,
+			request_id=context.get("request_id"),
+			route=context.get("route") or context.get("path"),
+			method=context.get("method"),
+		)
+		if operation in EXPLAINABLE and self._should_explain(query_id):
+			first = parameters[0] if executemany and parameters else parameters
+			self._submit((conn.engine, statement, first, query_id, context.get("request_id")))
+
+	def _should_explain(self, query_id: str) -> bool:
+		if self._random.random() >= self.sample_rate:
+			return False
+		now = time.monotonic()
+		with self._lock:
+			last = self._last_explained.get(query_id)
+			if last is not None and now - last < self.explain_interval_sec:
+				return False
+			self._last_explained[query_id] = now
+			if len(self._last_explained) > 10_000:
+				self._last_explained.clear()
+		return True
+
+	def _submit(self, job) -> None:
+		try:
+			self._queue.put_nowait(job)
+		except queue.Full:
+			explained_queries.inc(outcome="dropped")
+			return
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._worker, name="slow-query-explain", daemon=True)
+				self._thread.start()
+
+	def _worker(self) -> None:
+		while True:
+			engine, statement, parameters, query_id, request_id = self._queue.get()
+			try:
+				plan = self.explain(engine, statement, parameters)
+			except Exception as exc:
+				explained_queries.inc(outcome="failed")
+				log_event("slow_query_plan_failed", query_id=query_id, request_id=request_id, error=str(exc))
+			else:
+				explained_queries.inc(outcome="captured")
+				log_event("slow_query_plan", query_id=query_id, request_id=request_id, **plan)
+			finally:
+				self._queue.task_done()
+
+	def add_connect_listener(self, engine, listener: Callable) -> None:
+		"""Also run ``listener(dbapi_connection, record)`` on the plan connections for ``engine``."""
+		self._connect_listeners.setdefault(engine, []).append(listener)
+
+	def explain_engine(self, engine):
+		"""A NullPool engine on ``engine``'s database, so plans never take or wait for an app pool connection."""
+		with self._lock:
+			explain_engine = self._explain_engines.get(engine)
+			if explain_engine is None:
+				explain_engine = create_engine(engine.url, poolclass=NullPool)
+				for listener in self._connect_listeners.get(engine, ()):
+					event.listen(explain_engine, "connect", listener)
+				self._explain_engines[engine] = explain_engine
+			return explain_engine
+
+	def explain(self, engine, statement: str, parameters) -> dict:
+		"""Plan ``statement`` on a new connection of its own (no engine events, no shared transaction)."""
+		dialect = engine.dialect.name
+		analyze = False
+		if dialect == "sqlite":
+			sql = f"EXPLAIN QUERY PLAN {statement}"
+		elif dialect == "postgresql":
+			analyze = self.explain_analyze and statement.lstrip().upper().startswith(("SELECT", "WITH"))
+			sql = f"EXPLAIN ({'ANALYZE, ' if analyze else ''}FORMAT JSON) {statement}"
+		else:
+			sql = f"EXPLAIN {statement}"
+		raw = self.explain_engine(engine).raw_connection()
+		try:
+			cursor = raw.cursor()
+			try:
+				cursor.execute(sql, parameters if parameters is not None else ())
+				rows = cursor.fetchall()
+			finally:
+				cursor.close()
+			# EXPLAIN ANALYZE really runs the statement; never keep anything it did.
+			raw.rollback()
+		finally:
+			raw.close()
+		if dialect == "sqlite":
+			details = [row[3] for row in rows]
+			return {
+				"dialect": dialect,
+				"plan": details,
+				"full_scan": any(detail.startswith("SCAN ") and " USING " not in detail for detail in details),
+			}
+		if dialect == "postgresql":
+			plan = rows[0][0] if rows else None
+			if isinstance(plan, str):
+				plan = json.loads(plan)
+			return {"dialect": dialect, "analyze": analyze, "plan": plan}
+		return {"dialect": dialect, "plan": [list(row) for row in rows]}
+
+	def wait_idle(self, timeout: float = 5.0) -> bool:
+		"""Block until queued plans are captured (used by tests)."""
+		deadline = time.monotonic() + timeout
+		while self._queue.unfinished_tasks:
+			if time.monotonic() >= deadline:
+				return False
+			time.sleep(0.01)
+		return True
+
+
+slow_query_log = SlowQueryLog(
+	threshold_ms=settings.SLOW_QUERY_MS,
+	sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+	explain_interval_sec=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SEC,
+	explain_analyze=settings.SLOW_QUERY_EXPLAIN_ANALYZE,
+)
+
+
+def install_slow_query_log() -> None:
+	add_statement_observer(slow_query_log.observe)
@@ -0,0 +1,197 @@
+"""Bulk export of the application database into a standalone SQLite file.
+
+Tables are read concurrently (one raw DBAPI cursor per table, server-side on
+Postgres, ``workers`` at a time) and handed to a single writer thread as batches of tuples, which go into SQLite
+through ``executemany`` on a raw connection with bulk-load pragmas. On Postgres every reader
+imports one snapshot exported from a held transaction, so all tables are read as of the
+same point in time. Tables are created
+without their secondary indexes; those are built once the data is in.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import sqlite as sqlite_dialect_module
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.db.base import Base
+import app.db.models  # noqa: F401
+
+_DIALECT = sqlite_dialect_module.dialect()
+_DONE = object()
+
+BULK_LOAD_PRAGMAS = (
+	"PRAGMA journal_mode=OFF",
+	"PRAGMA synchronous=OFF",
+	"PRAGMA locking_mode=EXCLUSIVE",
+	"PRAGMA temp_store=MEMORY",
+	"PRAGMA cache_size=-262144",
+	"PRAGMA foreign_keys=OFF",
+)
+
+
+def _row_converters(table) -> List:
+	# Reuse SQLAlchemy's SQLite bind processing so datetimes are stored the same way
+	# the ORM would store them.
+	return [column.type.dialect_impl(_DIALECT).bind_processor(_DIALECT) for column in table.columns]
+
+
+_NATIVE = (str, int, float, bytes)
+
+
+def _convert_rows(rows, converters) -> List[tuple]:
+	active = [(index, convert) for index, convert in enumerate(converters) if convert is not None]
+	if not active:
+		return [tuple(row) for row in rows]
+	converted = []
+	for row in rows:
+		row = list(row)
+		for index, convert in active:
+			value = row[index]
+			# Values already in SQLite storage form (e.g. from a SQLite source) pass through.
+			if value is not None and not isinstance(value, _NATIVE):
+				row[index] = convert(value)
+		converted.append(tuple(row))
+	return converted
+
+
+@contextmanager
+def _shared_snapshot(src_engine) -> Iterator[Optional[str]]:
+	"""On Postgres, hold a repeatable-read transaction open and yield its exported snapshot id."""
+	if src_engine.dialect.name != "postgresql":
+		yield None
+		return
+	with src_engine.connect() as conn:
+		conn = conn.execution_options(isolation_level="REPEATABLE READ")
+		with conn.begin():
+			yield conn.execute(text("SELECT pg_export_snapshot()")).scalar()
+
+
+def _read_table(
+	src_engine, table, batch_size: int, out: queue.Queue, stop: threading.Event, snapshot_id: Optional[str] = None
+) -> int:
+	converters = _row_converters(table)
+	count = 0
+	with src_engine.connect() as conn:
+		if snapshot_id is not None:
+			# Must come first in the transaction; the raw cursor below runs inside it.
+			conn = conn.execution_options(isolation_level="REPEATABLE READ")
+			conn.execute(text("SET TRANSACTION SNAPSHOT :snapshot_id"), {"snapshot_id": snapshot_id})
+		# Raw DBAPI rows skip SQLAlchemy's result processing; on Postgres a named cursor
+		# keeps the result on the server and streams it in batch_size chunks.
+		dbapi_conn = conn.connection.dbapi_connection
+		if conn.dialect.name == "postgresql":
+			cursor = dbapi_conn.cursor(name=f"sqlite_export_{table.name}")
+			cursor.itersize = batch_size
+		else:
+			cursor = dbapi_conn.cursor()
+		try:
+			cursor.execute(str(select(*table.columns).compile(dialect=conn.dialect)))
+			while not stop.is_set():
+				rows = cursor.fetchmany(batch_size)
+				if not rows:
+					break
+				batch = _convert_rows(rows, converters)
+				count += len(batch)
+				out.put((table, batch))
+		finally:
+			cursor.close()
+	return count
+
+
+def export_to_sqlite(src_url, sqlite_path: Path, workers: int = 4, batch_size: int = 5000) -> Dict:
+	"""Copy every mapped table from ``src_url`` into a new SQLite file at ``sqlite_path``."""
+	sqlite_path = Path(sqlite_path)
+	sqlite_path.unlink(missing_ok=True)
+	tables = list(Base.metadata.sorted_tables)
+	started = time.perf_counter()
+
+	dest = sqlite3.connect(str(sqlite_path), isolation_level=None, check_same_thread=False)
+	src_engine = create_engine(src_url, poolclass=NullPool)  # one connection per reader thread
+	stop = threading.Event()
+	batches: queue.Queue = queue.Queue(maxsize=max(2, workers * 2))
+	rows_per_table: Dict[str, int] = {}
+	try:
+		for pragma in BULK_LOAD_PRAGMAS:
+			dest.execute(pragma)
+		for table in tables:
+			dest.execute(str(CreateTable(table).compile(dialect=_DIALECT)))
+
+		def read_all():
+			try:
+				with _shared_snapshot(src_engine) as snapshot_id, ThreadPoolExecutor(
+					max_workers=max(1, workers), thread_name_prefix="sqlite-export"
+				) as pool:
+					futures = {
+						pool.submit(_read_table, src_engine, table, batch_size, batches, stop, snapshot_id): table
+						for table in tables
+					}
+					for future, table in futures.items():
+						rows_per_table[table.name] = future.result()
+				batches.put(_DONE)
+			except BaseException as exc:  # surfaced to the writer below
+				batches.put(exc)
+
+		reader = threading.Thread(target=read_all, name="sqlite-export-readers", daemon=True)
+		reader.start()
+
+		statements = {
+			table.name: f'INSERT INTO {_quote(table.name)} ({", ".join(_quote(c.name) for c in table.columns)}) '
+			f'VALUES ({", ".join("?" for _ in table.columns)})'
+			for table in tables
+		}
+		load_started = time.perf_counter()
+		dest.execute("BEGIN")
+		try:
+			while True:
+				item = batches.get()
+				if item is _DONE:
+					break
+				if isinstance(item, BaseException):
+					raise item
+				table, rows = item
+				dest.executemany(statements[table.name], rows)
+			dest.execute("COMMIT")
+		except BaseException:
+			stop.set()
+			# Unblock readers waiting on a full queue so they can see the stop flag.
+			while reader.is_alive():
+				try:
+					batches.get(timeout=0.1)
+				except queue.Empty:
+					pass
+			dest.execute("ROLLBACK")
+			raise
+		load_ms = (time.perf_counter() - load_started) * 1000
+
+		index_started = time.perf_counter()
+		for table in tables:
+			for index in sorted(table.indexes, key=lambda idx: idx.name or ""):
+				dest.execute(str(CreateIndex(index).compile(dialect=_DIALECT)))
+		dest.execute("ANALYZE")
+		index_ms = (time.perf_counter() - index_started) * 1000
+		dest.execute("PRAGMA journal_mode=DELETE")
+	finally:
+		dest.close()
+		src_engine.dispose()
+
+	return {
+		"rows": sum(rows_per_table.values()),
+		"rows_per_table": rows_per_table,
+		"load_ms": round(load_ms, 3),
+		"index_ms": round(index_ms, 3),
+		"total_ms": round((time.perf_counter() - started) * 1000, 3),
+		"bytes": sqlite_path.stat().st_size,
+	}
+
+
+def _quote(name: str) -> str:
+	return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,164 @@
+"""Page-level incremental snapshots for SQLite backups.
+
+A chain is one full base file followed by deltas. Each delta holds only the pages that
+changed since the previous snapshot (page number + raw page bytes, gzip-compressed)
+plus the new page count, so replaying the chain over the base reproduces the snapshot.
+"""
+
+import gzip
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+DELTA_MAGIC = b"SQLDELTA1\n"
+_PAGE_NO = struct.Struct(">I")
+
+
+def read_page_size(db_path: Path) -> int:
+	with Path(db_path).open("rb") as handle:
+		header = handle.read(100)
+	if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+		raise ValueError(f"Not a SQLite database: {db_path}")
+	(page_size,) = struct.unpack(">H", header[16:18])
+	return 65536 if page_size == 1 else page_size
+
+
+def iter_pages(db_path: Path, page_size: int) -> Iterator[bytes]:
+	with Path(db_path).open("rb") as handle:
+		while True:
+			page = handle.read(page_size)
+			if not page:
+				return
+			yield page
+
+
+def page_hashes(db_path: Path, page_size: int) -> List[str]:
+	return [hashlib.blake2b(page, digest_size=16).hexdigest() for page in iter_pages(db_path, page_size)]
+
+
+def build_delta(
+	db_path: Path,
+	page_size: int,
+	previous_hashes: List[str],
+	meta: dict,
+) -> Tuple[bytes, List[str], int]:
+	"""Return (compressed delta, new page hashes, changed page count)."""
+	hashes: List[str] = []
+	chunks: List[bytes] = []
+	for page_no, page in enumerate(iter_pages(db_path, page_size)):
+		digest = hashlib.blake2b(page, digest_size=16).hexdigest()
+		hashes.append(digest)
+		if page_no >= len(previous_hashes) or previous_hashes[page_no] != digest:
+			chunks.append(_PAGE_NO.pack(page_no))
+			chunks.append(page)
+	changed = len(chunks) // 2
+	header = dict(meta, page_size=page_size, page_count=len(hashes), changed_pages=changed)
+	header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+	raw = DELTA_MAGIC + _PAGE_NO.pack(len(header_bytes)) + header_bytes + b"".join(chunks)
+	return gzip.compress(raw, compresslevel=6), hashes, changed
+
+
+def read_delta_header(delta: bytes) -> dict:
+	raw = gzip.decompress(delta)
+	header, _ = _split_delta(raw)
+	return header
+
+
+def _split_delta(raw: bytes) -> Tuple[dict, int]:
+	if not raw.startswith(DELTA_MAGIC):
+		raise ValueError("Not a SQLite page delta")
+	offset = len(DELTA_MAGIC)
+	(header_len,) = _PAGE_NO.unpack_from(raw, offset)
+	offset += _PAGE_NO.size
+	header = json.loads(raw[offset:offset + header_len].decode("utf-8"))
+	return header, offset + header_len
+
+
+def apply_delta(db_path: Path, delta: bytes) -> dict:
+	"""Write the delta's pages into db_path in place and truncate to its page count."""
+	raw = gzip.decompress(delta)
+	header, offset = _split_delta(raw)
+	page_size = header["page_size"]
+	record = _PAGE_NO.size + page_size
+	with Path(db_path).open("r+b") as handle:
+		while offset < len(raw):
+			(page_no,) = _PAGE_NO.unpack_from(raw, offset)
+			handle.seek(page_no * page_size)
+			handle.write(raw[offset + _PAGE_NO.size:offset + record])
+			offset += record
+		handle.truncate(header["page_count"] * page_size)
+	return header
+
+
+class ChainState:
+	"""Local record of the current chain: which pages the last snapshot had."""
+
+	def __init__(self, path: Path):
+		self.path = Path(path)
+		self.data: dict = {}
+		if self.path.exists():
+			try:
+				self.data = json.loads(self.path.read_text(encoding="utf-8"))
+			except (OSError, ValueError):
+				self.data = {}
+
+	@property
+	def base_key(self) -> Optional[str]:
+		return self.data.get("base_key")
+
+	@property
+	def chain_id(self) -> Optional[str]:
+		return self.data.get("chain_id")
+
+	@property
+	def deltas(self) -> List[str]:
+		return self.data.get("deltas", [])
+
+	@property
+	def page_size(self) -> Optional[int]:
+		return self.data.get("page_size")
+
+	@property
+	def hashes(self) -> List[str]:
+		return self.data.get("hashes", [])
+
+	def start_chain(self, base_key: str, chain_id: str, page_size: int, hashes: List[str]) -> None:
+		self.data = {
+			"base_key": base_key,
+			"chain_id": chain_id,
+			"deltas": [],
+			"page_size": page_size,
+			"hashes": hashes,
+		}
+
+	def add_delta(self, delta_key: str, hashes: List[str]) -> None:
+		self.data["deltas"] = self.deltas + [delta_key]
+		self.data["hashes"] = hashes
+
+	def manifest(self) -> dict:
+		return {
+			"base_key": self.base_key,
+			"chain_id": self.chain_id,
+			"deltas": self.deltas,
+			"page_size": self.page_size,
+		}
+
+	def save(self) -> None:
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		tmp_path = self.path.with_suffix(".tmp")
+		tmp_path.write_text(json.dumps(self.data), encoding="utf-8")
+		tmp_path.replace(self.path)
+
+
+def restore_chain(storage, chain_manifest: dict, dest_path: Path) -> int:
+	"""Download the base, replay every delta in order; returns bytes downloaded."""
+	dest_path = Path(dest_path)
+	storage.get_file(chain_manifest["base_key"], dest_path)
+	downloaded = dest_path.stat().st_size
+	for delta_key in chain_manifest.get("deltas", []):
+		delta = storage.get_bytes(delta_key)
+		downloaded += len(delta)
+		apply_delta(dest_path, delta)
+	return downloaded
@@ -0,0 +1,341 @@
+"""Materialized dictionary counters (per language) and contributor leaderboard.
+
+Write paths snapshot the counters an entity contributes before and after a change and
+apply the difference in the same transaction. A defined word or entry is credited to the
+user who made it defined (``defined_by_id``), not to whoever edited it last, so
+``users.defined_count`` counts the definitions a user contributed that still stand. ``reconcile_stats`` rebuilds everything
+from grouped queries when the counters are suspected to have drifted.
+
+	python -m app.db.stats reconcile
+"""
+
+import argparse
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models import DictionaryStat, Language, Sense, User, Word, WordEntry
+
+CONTRIBUTOR_PREFIX = "contributor:"
+POS_PREFIX = "entries_pos:"
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def is_word_defined(word: Word) -> bool:
+	return bool(word.definition and word.definition.strip())
+
+
+def senses_have_definition(senses) -> bool:
+	"""Works on Sense rows and on sense payloads alike."""
+	return any((sense.definition_text or "").strip() for sense in senses)
+
+
+def sync_word_flags(word: Word) -> Word:
+	"""Set ``Word.is_defined`` from the definition; call after every definition change."""
+	word.is_defined = is_word_defined(word)
+	return word
+
+
+# SQL forms of the two flags, for backfills and reconcile.
+WORD_DEFINED_SQL = func.trim(func.coalesce(Word.definition, "")) != ""
+ENTRY_DEFINED_SQL = (
+	exists().where(Sense.word_entry_id == WordEntry.id).where(func.trim(Sense.definition_text) != "")
+)
+
+
+def refresh_definition_flags(db: Session, language_id: Optional[int] = None) -> int:
+	"""Fix any ``is_defined`` / ``has_definition`` flag that disagrees with the text. Returns rows changed."""
+	words = db.query(Word).filter(Word.is_defined != WORD_DEFINED_SQL)
+	entries = db.query(WordEntry).filter(WordEntry.has_definition != ENTRY_DEFINED_SQL)
+	if language_id is not None:
+		words = words.filter(Word.language_id == language_id)
+		entries = entries.filter(WordEntry.language_id == language_id)
+	# Setting updated_at to itself keeps its onupdate default from firing: a backfill is not an edit.
+	changed = words.update(
+		{Word.is_defined: WORD_DEFINED_SQL, Word.updated_at: Word.updated_at}, synchronize_session=False
+	)
+	changed += entries.update(
+		{WordEntry.has_definition: ENTRY_DEFINED_SQL, WordEntry.updated_at: WordEntry.updated_at},
+		synchronize_session=False,
+	)
+	return changed
+
+
+def backfill_defined_by(db: Session, language_id: Optional[int] = None) -> int:
+	"""Credit defined rows that have no ``defined_by_id`` to their last editor (for databases that predate it)."""
+	changed = 0
+	for model, defined in ((Word, Word.is_defined), (WordEntry, WordEntry.has_definition)):
+		query = db.query(model).filter(defined, model.defined_by_id.is_(None), model.updated_by_id.isnot(None))
+		if language_id is not None:
+			query = query.filter(model.language_id == language_id)
+		changed += query.update(
+			{model.defined_by_id: model.updated_by_id, model.updated_at: model.updated_at}, synchronize_session=False
+		)
+	return changed
+
+
+def credit_definition(row, was_defined: bool, user_id: Optional[int]) -> None:
+	"""Credit ``user_id`` when ``row`` (a Word or WordEntry) becomes defined; call after its flag is set.
+
+	Editing an already-defined row keeps the original credit; making it undefined drops it.
+	"""
+	defined = row.is_defined if isinstance(row, Word) else row.has_definition
+	if not defined:
+		row.defined_by_id = None
+	elif not was_defined:
+		row.defined_by_id = user_id
+
+
+def word_counters(word: Optional[Word]) -> Counter:
+	counters = Counter()
+	if word is None:
+		return counters
+	counters["words_total"] += 1
+	if word.is_defined:
+		counters["words_defined"] += 1
+		if word.defined_by_id:
+			counters[f"{CONTRIBUTOR_PREFIX}{word.defined_by_id}"] += 1
+	return counters
+
+
+def entry_counters(entry: Optional[WordEntry]) -> Counter:
+	counters = Counter()
+	if entry is None:
+		return counters
+	counters["entries_total"] += 1
+	counters[f"entries_{entry.status or 'draft'}"] += 1
+	if entry.pos:
+		counters[f"{POS_PREFIX}{entry.pos}"] += 1
+	if entry.has_definition:
+		counters["entries_defined"] += 1
+		if entry.defined_by_id:
+			counters[f"{CONTRIBUTOR_PREFIX}{entry.defined_by_id}"] += 1
+	return counters
+
+
+def apply_stats_delta(db: Session, language_id: int, before: Counter, after: Counter) -> None:
+	"""Add (after - before) to the language counters and to users.defined_count."""
+	delta = Counter(after)
+	delta.subtract(before)
+	for metric, change in delta.items():
+		if not change:
+			continue
+		_increment(db, language_id, metric, change)
+		if metric.startswith(CONTRIBUTOR_PREFIX):
+			user_id = int(metric[len(CONTRIBUTOR_PREFIX):])
+			db.query(User).filter(User.id == user_id).update(
+				{User.defined_count: func.coalesce(User.defined_count, 0) + change},
+				synchronize_session=False,
+			)
+
+
+def _increment(db: Session, language_id: int, metric: str, change: int) -> None:
+	# One upsert statement: two writers creating the same counter cannot both insert it.
+	insert = UPSERT_INSERTS[db.get_bind().dialect.name](DictionaryStat)
+	db.execute(
+		insert.on_conflict_do_update(
+			index_elements=[DictionaryStat.language_id, DictionaryStat.metric],
+			set_={"value": DictionaryStat.value + insert.excluded.value},
+		),
+		{"language_id": language_id, "metric": metric, "value": change},
+	)
+
+
+def move_contributions(db: Session, language_id: int, from_user_ids: Iterable[int], to_user_id: int) -> None:
+	"""Credit one language's definitions by ``from_user_ids`` to ``to_user_id``, counters included."""
+	from_user_ids = list(from_user_ids)
+	for model in (Word, WordEntry):
+		db.query(model).filter(model.language_id == language_id, model.defined_by_id.in_(from_user_ids)).update(
+			{model.defined_by_id: to_user_id, model.updated_at: model.updated_at}, synchronize_session=False
+		)
+	rows = db.query(DictionaryStat).filter(
+		DictionaryStat.language_id == language_id,
+		DictionaryStat.metric.in_([f"{CONTRIBUTOR_PREFIX}{user_id}" for user_id in from_user_ids]),
+	).all()
+	before = Counter({row.metric: row.value for row in rows})
+	apply_stats_delta(db, language_id, before, Counter({f"{CONTRIBUTOR_PREFIX}{to_user_id}": sum(before.values())}))
+
+
+def clear_language_stats(db: Session, language_id: int) -> None:
+	"""Drop a language's counters, taking its contributions back out of users.defined_count."""
+	rows = db.query(DictionaryStat).filter(
+		DictionaryStat.language_id == language_id,
+		DictionaryStat.metric.like(f"{CONTRIBUTOR_PREFIX}%"),
+	).all()
+	for row in rows:
+		apply_stats_delta(db, language_id, Counter({row.metric: row.value}), Counter())
+	db.query(DictionaryStat).filter(DictionaryStat.language_id == language_id).delete(
+		synchronize_session=False
+	)
+
+
+def _grouped_counters(db: Session, language_ids: Optional[Iterable[int]] = None) -> dict:
+	"""Compute every counter with one grouped query per source table."""
+	per_language: dict = {}
+
+	word_defined = Word.is_defined
+	word_query = db.query(
+		Word.language_id, word_defined, Word.defined_by_id, func.count(Word.id)
+	).group_by(Word.language_id, word_defined, Word.defined_by_id)
+
+	entry_defined = WordEntry.has_definition
+	entry_query = db.query(
+		WordEntry.language_id,
+		WordEntry.status,
+		WordEntry.pos,
+		entry_defined,
+		WordEntry.defined_by_id,
+		func.count(WordEntry.id),
+	).group_by(WordEntry.language_id, WordEntry.status, WordEntry.pos, entry_defined, WordEntry.defined_by_id)
+
+	if language_ids is not None:
+		language_ids = list(language_ids)
+		word_query = word_query.filter(Word.language_id.in_(language_ids))
+		entry_query = entry_query.filter(WordEntry.language_id.in_(language_ids))
+
+	for language_id, defined, defined_by_id, count in word_query.all():
+		counters = per_language.setdefault(language_id, Counter())
+		counters["words_total"] += count
+		if defined:
+			counters["words_defined"] += count
+			if defined_by_id:
+				counters[f"{CONTRIBUTOR_PREFIX}{defined_by_id}"] += count
+
+	for language_id, status, pos, defined, defined_by_id, count in entry_query.all():
+		counters = per_language.setdefault(language_id, Counter())
+		counters["entries_total"] += count
+		counters[f"entries_{status or 'draft'}"] += count
+		if pos:
+			counters[f"{POS_PREFIX}{pos}"] += count
+		if defined:
+			counters["entries_defined"] += count
+			if defined_by_id:
+				counters[f"{CONTRIBUTOR_PREFIX}{defined_by_id}"] += count
+
+	return per_language
+
+
+def rebuild_language_stats(db: Session, language_id: int) -> None:
+	"""Recompute one language's counters in place (used after bulk deletes/reseeds)."""
+	clear_language_stats(db, language_id)
+	counters = _grouped_counters(db, [language_id]).get(language_id, Counter())
+	apply_stats_delta(db, language_id, Counter(), counters)
+
+
+def reconcile_stats(db: Session) -> int:
+	"""Rebuild the definition flags, all counters and users.defined_count from the dictionary tables."""
+	rows = 0
+	totals = Counter()
+	# One language per transaction: with PARTITION_BY_LANGUAGE each lives in its own file.
+	for (language_id,) in db.query(Language.id).order_by(Language.id).all():
+		refresh_definition_flags(db, language_id)
+		counters = _grouped_counters(db, [language_id]).get(language_id, Counter())
+		db.query(DictionaryStat).filter(DictionaryStat.language_id == language_id).delete(
+			synchronize_session=False
+		)
+		for metric, value in counters.items():
+			if not value:
+				continue
+			db.add(DictionaryStat(language_id=language_id, metric=metric, value=value))
+			rows += 1
+			if metric.startswith(CONTRIBUTOR_PREFIX):
+				totals[int(metric[len(CONTRIBUTOR_PREFIX):])] += value
+		db.commit()
+	db.query(User).update({User.defined_count: 0}, synchronize_session=False)
+	for user_id, value in totals.items():
+		db.query(User).filter(User.id == user_id).update(
+			{User.defined_count: value}, synchronize_session=False
+		)
+	db.commit()
+	return rows
+
+
+def language_stats(db: Session, language_id: Optional[int] = None, leaderboard_size: int = 10) -> list:
+	languages = db.query(Language).order_by(Language.name.asc())
+	if language_id is not None:
+		languages = languages.filter(Language.id == language_id)
+	languages = languages.all()
+	by_language: dict = {}
+	# Per language, so each read stays within one partition (see app/db/partitions.py).
+	for language in languages:
+		for row in db.query(DictionaryStat).filter(DictionaryStat.language_id == language.id).all():
+			by_language.setdefault(row.language_id, {})[row.metric] = row.value
+
+	contributor_ids = {
+		int(metric[len(CONTRIBUTOR_PREFIX):])
+		for metrics in by_language.values()
+		for metric in metrics
+		if metric.startswith(CONTRIBUTOR_PREFIX)
+	}
+	emails = {}
+	if contributor_ids:
+		emails = {
+			user_id: email
+			for user_id, email in db.query(User.id, User.email).filter(User.id.in_(contributor_ids)).all()
+		}
+
+	result = []
+	for language in languages:
+		metrics = by_language.get(language.id, {})
+		words_total = metrics.get("words_total", 0)
+		words_defined = metrics.get("words_defined", 0)
+		entries_total = metrics.get("entries_total", 0)
+		entries_defined = metrics.get("entries_defined", 0)
+		leaderboard = sorted(
+			(
+				(int(metric[len(CONTRIBUTOR_PREFIX):]), value)
+				for metric, value in metrics.items()
+				if metric.startswith(CONTRIBUTOR_PREFIX) and value > 0
+			),
+			key=lambda item: (-item[1], item[0]),
+		)[:leaderboard_size]
+		result.append(
+			{
+				"language_id": language.id,
+				"name": language.name,
+				"words": {
+					"total": words_total,
+					"defined": words_defined,
+					"undefined": words_total - words_defined,
+				},
+				"entries": {
+					"total": entries_total,
+					"defined": entries_defined,
+					"undefined": entries_total - entries_defined,
+					"draft": metrics.get("entries_draft", 0),
+					"published": metrics.get("entries_published", 0),
+					"by_pos": {
+						metric[len(POS_PREFIX):]: value
+						for metric, value in sorted(metrics.items())
+						if metric.startswith(POS_PREFIX) and value > 0
+					},
+				},
+				"leaderboard": [
+					{"user_id": user_id, "email": emails.get(user_id, "anonymous"), "defined": value}
+					for user_id, value in leaderboard
+				],
+			}
+		)
+	return result
+
+
+def main() -> None:
+	from app.db.session import SessionLocal
+
+	parser = argparse.ArgumentParser(description="Dictionary statistics maintenance")
+	parser.add_argument("command", choices=["reconcile"])
+	args = parser.parse_args()
+	if args.command == "reconcile":
+		db = SessionLocal()
+		try:
+			rows = reconcile_stats(db)
+		finally:
+			db.close()
+		print(f"Rebuilt {rows} counters")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,287 @@
+"""Backup storage targets.
+
+``S3Storage`` talks to S3 in-process through boto3 and ``LocalStorage`` keeps objects
+in a directory, which doubles as a stand-in for S3 in development and tests. Pick one
+with ``BACKUP_STORAGE=s3|local``.
+"""
+
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BackupStorage:
+	def put_file(self, local_path: Path, key: str) -> int:
+		"""Upload a file and return the number of bytes sent."""
+		raise NotImplementedError
+
+	def put_stream(self, chunks: Iterable[bytes], key: str) -> int:
+		"""Upload an iterable of byte chunks without holding it all in memory."""
+		raise NotImplementedError
+
+	def put_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> int:
+		raise NotImplementedError
+
+	def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+		raise NotImplementedError
+
+	def get_file(self, key: str, local_path: Path) -> None:
+		with Path(local_path).open("wb") as handle:
+			for chunk in self.iter_chunks(key):
+				handle.write(chunk)
+
+	def get_bytes(self, key: str) -> bytes:
+		raise NotImplementedError
+
+	def list(self, prefix: str) -> List[dict]:
+		"""Return ``{"Key", "Size", "LastModified"}`` dicts for keys under prefix."""
+		raise NotImplementedError
+
+	def delete(self, keys: Iterable[str]) -> None:
+		raise NotImplementedError
+
+
+class LocalStorage(BackupStorage):
+	def __init__(self, root: Path):
+		self.root = Path(root)
+
+	def _path(self, key: str) -> Path:
+		path = (self.root / key).resolve()
+		if self.root.resolve() not in path.parents:
+			raise ValueError(f"Key escapes storage root: {key}")
+		return path
+
+	def put_file(self, local_path: Path, key: str) -> int:
+		dest = self._path(key)
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		shutil.copyfile(local_path, dest)
+		return dest.stat().st_size
+
+	def put_stream(self, chunks: Iterable[bytes], key: str) -> int:
+		dest = self._path(key)
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		total = 0
+		tmp_path = dest.with_name(dest.name + ".part")
+		try:
+			with tmp_path.open("wb") as handle:
+				for chunk in chunks:
+					handle.write(chunk)
+					total += len(chunk)
+		except BaseException:
+			# A failed source (e.g. a dump that errored mid-way) must not leave a .part behind.
+			tmp_path.unlink(missing_ok=True)
+			raise
+		tmp_path.replace(dest)
+		return total
+
+	def put_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> int:
+		dest = self._path(key)
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		# Renamed into place so readers (e.g. static serving) never see a partial file.
+		tmp_path = dest.with_name(dest.name + ".part")
+		tmp_path.write_bytes(data)
+		tmp_path.replace(dest)
+		return len(data)
+
+	def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+		return read_file_chunks(self._path(key), chunk_size)
+
+	def get_file(self, key: str, local_path: Path) -> None:
+		shutil.copyfile(self._path(key), local_path)
+
+	def get_bytes(self, key: str) -> bytes:
+		return self._path(key).read_bytes()
+
+	def list(self, prefix: str) -> List[dict]:
+		if not self.root.exists():
+			return []
+		items = []
+		for path in self.root.rglob("*"):
+			if not path.is_file():
+				continue
+			key = path.relative_to(self.root).as_posix()
+			if not key.startswith(prefix):
+				continue
+			stat = path.stat()
+			items.append(
+				{
+					"Key": key,
+					"Size": stat.st_size,
+					"LastModified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+				}
+			)
+		items.sort(key=lambda item: item["Key"])
+		return items
+
+	def delete(self, keys: Iterable[str]) -> None:
+		root = self.root.resolve()
+		for key in keys:
+			path = self._path(key)
+			path.unlink(missing_ok=True)
+			parent = path.parent
+			while parent != root and parent.exists() and not any(parent.iterdir()):
+				parent.rmdir()
+				parent = parent.parent
+
+
+class S3Storage(BackupStorage):
+	"""S3 (or any S3-compatible endpoint) through the boto3 SDK.
+
+	Streams go up as multipart uploads: parts are cut at ``part_size`` and sent by
+	``concurrency`` threads, and at most ``concurrency`` parts are buffered at once.
+	"""
+
+	def __init__(self, bucket: str, client=None, part_size: int = 8 * 1024 * 1024, concurrency: int = 4):
+		self.bucket = bucket
+		self._client = client
+		self.part_size = part_size
+		self.concurrency = max(1, concurrency)
+
+	@property
+	def client(self):
+		if self._client is None:
+			import boto3  # Imported lazily so local-only setups do not need it.
+
+			self._client = boto3.client("s3", endpoint_url=settings.S3_ENDPOINT_URL or None)
+		return self._client
+
+	def put_stream(self, chunks: Iterable[bytes], key: str) -> int:
+		buffer = bytearray()
+		total = 0
+		upload_id = None
+		futures = []
+		slots = threading.BoundedSemaphore(self.concurrency)
+		executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-part")
+		try:
+			for chunk in chunks:
+				buffer += chunk
+				total += len(chunk)
+				while len(buffer) >= self.part_size:
+					if upload_id is None:
+						upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+					part = bytes(buffer[:self.part_size])
+					del buffer[:self.part_size]
+					futures.append(self._submit_part(executor, slots, key, upload_id, len(futures) + 1, part))
+					_raise_failed(futures)
+			if upload_id is None:
+				self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer))
+				return total
+			if buffer:
+				futures.append(self._submit_part(executor, slots, key, upload_id, len(futures) + 1, bytes(buffer)))
+			parts = [future.result() for future in futures]
+			self.client.complete_multipart_upload(
+				Bucket=self.bucket,
+				Key=key,
+				UploadId=upload_id,
+				MultipartUpload={"Parts": parts},
+			)
+			return total
+		except BaseException:
+			if upload_id is not None:
+				for future in futures:
+					future.cancel()
+				self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+			raise
+		finally:
+			executor.shutdown(wait=True)
+
+	def _submit_part(self, executor, slots, key: str, upload_id: str, part_number: int, body: bytes):
+		# Blocks once `concurrency` parts are in flight, which bounds memory use.
+		slots.acquire()
+
+		def upload():
+			try:
+				response = self.client.upload_part(
+					Bucket=self.bucket,
+					Key=key,
+					UploadId=upload_id,
+					PartNumber=part_number,
+					Body=body,
+				)
+				return {"PartNumber": part_number, "ETag": response["ETag"]}
+			finally:
+				slots.release()
+
+		return executor.submit(upload)
+
+	def put_file(self, local_path: Path, key: str) -> int:
+		return self.put_stream(read_file_chunks(local_path), key)
+
+	def put_bytes(self, data: bytes, key: str, content_type: Optional[str] = None) -> int:
+		extra = {"ContentType": content_type} if content_type else {}
+		self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+		return len(data)
+
+	def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+		body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+		try:
+			while True:
+				chunk = body.read(chunk_size)
+				if not chunk:
+					return
+				yield chunk
+		finally:
+			body.close()
+
+	def get_bytes(self, key: str) -> bytes:
+		return b"".join(self.iter_chunks(key))
+
+	def list(self, prefix: str) -> List[dict]:
+		items = []
+		kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+		while True:
+			response = self.client.list_objects_v2(**kwargs)
+			for item in response.get("Contents", []):
+				last_modified = item.get("LastModified")
+				if hasattr(last_modified, "isoformat"):
+					last_modified = last_modified.isoformat()
+				items.append({"Key": item["Key"], "Size": item.get("Size", 0), "LastModified": last_modified or ""})
+			if not response.get("IsTruncated"):
+				return items
+			kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+	def delete(self, keys: Iterable[str]) -> None:
+		keys = list(keys)
+		for start in range(0, len(keys), 1000):
+			batch = keys[start:start + 1000]
+			self.client.delete_objects(
+				Bucket=self.bucket,
+				Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+			)
+
+
+def _raise_failed(futures) -> None:
+	for future in futures:
+		if future.done() and future.exception() is not None:
+			raise future.exception()
+
+
+def read_file_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+	with Path(path).open("rb") as handle:
+		while True:
+			chunk = handle.read(chunk_size)
+			if not chunk:
+				return
+			yield chunk
+
+
+def s3_storage() -> S3Storage:
+	"""S3_BUCKET with the configured multipart part size and upload concurrency."""
+	return S3Storage(
+		settings.S3_BUCKET,
+		part_size=settings.S3_UPLOAD_PART_SIZE_MB * 1024 * 1024,
+		concurrency=settings.S3_UPLOAD_CONCURRENCY,
+	)
+
+
+def get_storage() -> BackupStorage:
+	if settings.BACKUP_STORAGE == "local":
+		return LocalStorage(Path(settings.BACKUP_LOCAL_DIR))
+	return s3_storage()
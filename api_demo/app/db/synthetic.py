@@ -0,0 +1,426 @@
+"""Synthetic dictionary data for scale testing.
+
+Fills the dictionary tables (``languages``, ``word_entries``, ``senses``,
+``sense_examples``, ``sense_translations``, ``sense_relations`` and the legacy ``words``)
+for ``languages`` new languages of ``entries`` entries each. Lemmas are tone-marked
+syllables built from the Clafrica character inventory (``clafrica_map.py``): vowels
+carrying the level and contour tone marks, plus the special consonants (ŋ, ɓ, ɗ, ɲ, ʔ).
+Lemma ``i`` of a language is a bijection of ``i``, so lemmas never collide, even across
+runs that add entries to the same language.
+
+Rows go in through the fastest path per dialect: ``executemany`` on a raw SQLite
+connection with bulk-load pragmas, ``COPY ... FROM STDIN`` on Postgres. Secondary indexes
+on the loaded tables are dropped first and rebuilt once, and the ``dictionary_stats``
+counters are reconciled at the end.
+
+	python -m app.db.synthetic --database-url sqlite:///./scale.db --languages 2 --entries 500000
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import random
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from app.core.clafrica import load_clafrica_map
+from app.core.config import settings
+from app.core.logging import log_event
+from app.core.unicode_utils import normalize_lemma
+from app.db.base import Base
+from app.db.changes import ENTITY_ENTRY, ENTITY_WORD, record_inserted
+from app.db.models import Language, Sense, SenseExample, SenseRelation, SenseTranslation, Word, WordEntry
+from app.db.partitions import routing_enabled
+from app.db.sqlite_export import BULK_LOAD_PRAGMAS
+from app.db.stats import reconcile_stats
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+VOWELS = set("aeiouɑɛəɔʉɨ")
+# Level (grave, acute, macron), falling/rising (circumflex, caron) and the contour tones.
+TONE_MARKS = {"\u0300", "\u0301", "\u0304", "\u0302", "\u030c", "\u1dc4", "\u1dc5", "\u1dc7"}
+LATIN_ONSETS = (
+	"b", "c", "ch", "d", "f", "g", "gh", "h", "k", "l", "m", "mb", "n", "nd", "ng", "nt",
+	"p", "pf", "s", "sh", "t", "ts", "v", "w", "y", "z",
+)
+CODAS = ("", "", "", "ŋ", "n", "m")
+POS_WEIGHTS = (("noun", 50), ("verb", 25), ("adjective", 10), ("adverb", 5), ("ideophone", 5), ("pronoun", 5))
+REGISTERS = (None, None, None, "formal", "informal", "archaic")
+DOMAINS = (None, None, None, None, "agriculture", "kinship", "market", "body", "religion", "music")
+RELATION_TYPES = ("synonym", "antonym", "variant", "hypernym", "hyponym")
+GLOSS_EN = (
+	"water", "house", "child", "market", "fire", "road", "chief", "song", "rain", "farm", "goat", "hand",
+	"to carry", "to sing", "to sell", "to plant", "to cook", "to greet", "big", "small", "red", "old", "new",
+)
+GLOSS_FR = (
+	"eau", "maison", "enfant", "marché", "feu", "route", "chef", "chanson", "pluie", "champ", "chèvre", "main",
+	"porter", "chanter", "vendre", "planter", "cuisiner", "saluer", "grand", "petit", "rouge", "vieux", "nouveau",
+)
+DEFINITION_WORDS = (
+	"a", "the", "kind", "of", "used", "for", "when", "person", "who", "place", "where", "thing", "that",
+	"is", "made", "from", "during", "season", "village", "family", "ceremony", "tool", "plant", "animal",
+)
+LOADED_TABLES = ("word_entries", "senses", "sense_examples", "sense_translations", "sense_relations", "words")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _graphemes(value: str) -> List[str]:
+	graphemes: List[str] = []
+	for char in unicodedata.normalize("NFD", value):
+		if unicodedata.combining(char) and graphemes:
+			graphemes[-1] += char
+		else:
+			graphemes.append(char)
+	return graphemes
+
+
+def clafrica_inventory(project_dir: Path = PROJECT_DIR) -> Tuple[List[str], List[str]]:
+	"""(tone-marked nuclei, special consonants) found in the Clafrica map, NFC, sorted."""
+	nuclei = set(VOWELS)
+	consonants = set()
+	for value in load_clafrica_map(project_dir).values():
+		for grapheme in _graphemes(value):
+			base, marks = grapheme[0], set(grapheme[1:])
+			if base != base.lower():
+				continue
+			if base in VOWELS and len(marks) <= 1 and marks <= TONE_MARKS:
+				nuclei.add(unicodedata.normalize("NFC", grapheme))
+			elif not marks and base.isalpha() and base not in VOWELS and not base.isascii() and base != "ε":
+				consonants.add(base)
+	return sorted(nuclei), sorted(consonants)
+
+
+class LemmaGenerator:
+	"""Maps entry index -> unique tone-marked lemma (1 syllable first, then 2, then 3...)."""
+
+	MULTIPLIER = 2_654_435_761  # prime; scatters neighbouring indexes across the syllable space
+
+	def __init__(self, project_dir: Path = PROJECT_DIR):
+		nuclei, consonants = clafrica_inventory(project_dir)
+		onsets = [""] + list(LATIN_ONSETS) + consonants
+		self.syllables = sorted({onset + nucleus + coda for onset in onsets for nucleus in nuclei for coda in CODAS})
+		self.size = len(self.syllables)
+
+	def lemma(self, index: int) -> str:
+		length, space = 1, self.size
+		while index >= space:
+			index -= space
+			length += 1
+			space *= self.size
+		multiplier = self.MULTIPLIER
+		while math.gcd(multiplier, space) != 1:
+			multiplier += 2
+		value = (index * multiplier + length) % space
+		parts = []
+		for _ in range(length):
+			value, digit = divmod(value, self.size)
+			parts.append(self.syllables[digit])
+		return unicodedata.normalize("NFC", "".join(parts))
+
+
+class _SqliteWriter:
+	def __init__(self, engine):
+		self.raw = engine.raw_connection()
+		cursor = self.raw.cursor()
+		self.journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+		for pragma in BULK_LOAD_PRAGMAS:
+			cursor.execute(pragma)
+		cursor.close()
+
+	def write(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+		if not rows:
+			return
+		placeholders = ", ".join("?" for _ in columns)
+		self.raw.cursor().executemany(f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({placeholders})', rows)
+
+	def commit(self) -> None:
+		self.raw.commit()
+
+	def close(self) -> None:
+		cursor = self.raw.cursor()
+		cursor.execute("PRAGMA locking_mode=NORMAL")
+		cursor.execute(f"PRAGMA journal_mode={self.journal_mode}")
+		cursor.close()
+		self.raw.close()
+
+
+class _PostgresWriter:
+	def __init__(self, engine):
+		self.raw = engine.raw_connection()
+
+	def write(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+		if not rows:
+			return
+		buffer = io.StringIO()
+		writer = csv.writer(buffer)
+		for row in rows:
+			writer.writerow(["\\N" if value is None else value for value in row])
+		buffer.seek(0)
+		cursor = self.raw.cursor()
+		try:
+			cursor.copy_expert(
+				f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer
+			)
+		finally:
+			cursor.close()
+
+	def commit(self) -> None:
+		self.raw.commit()
+
+	def close(self) -> None:
+		cursor = self.raw.cursor()
+		try:
+			for table in LOADED_TABLES:
+				cursor.execute(
+					f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+				)
+		finally:
+			cursor.close()
+		self.raw.commit()
+		self.raw.close()
+
+
+def _secondary_indexes() -> list:
+	return [
+		index
+		for name in LOADED_TABLES
+		for index in Base.metadata.tables[name].indexes
+		if not index.unique
+	]
+
+
+def _next_ids(conn) -> Dict[str, int]:
+	models = {
+		"word_entries": WordEntry,
+		"senses": Sense,
+		"sense_examples": SenseExample,
+		"sense_translations": SenseTranslation,
+		"sense_relations": SenseRelation,
+		"words": Word,
+	}
+	return {name: (conn.execute(select(func.max(model.id))).scalar() or 0) + 1 for name, model in models.items()}
+
+
+def _language_ids(conn, count: int, prefix: str) -> List[Tuple[int, int]]:
+	"""Get or create ``count`` synthetic languages; returns (language_id, entries already there)."""
+	result = []
+	for number in range(1, count + 1):
+		name = f"{prefix} {number}"
+		language_id = conn.execute(select(Language.id).where(Language.name == name)).scalar()
+		if language_id is None:
+			slug = name.lower().replace(" ", "-")
+			language_id = conn.execute(
+				Language.__table__.insert().values(name=name, slug=slug, created_at=datetime.utcnow())
+			).inserted_primary_key[0]
+		existing = conn.execute(select(func.count(WordEntry.id)).where(WordEntry.language_id == language_id)).scalar()
+		result.append((language_id, existing))
+	return result
+
+
+class _Batch:
+	def __init__(self):
+		self.rows: Dict[str, List[tuple]] = {name: [] for name in LOADED_TABLES}
+
+	def size(self) -> int:
+		return len(self.rows["word_entries"])
+
+
+COLUMNS = {
+	"word_entries": (
+		"id", "language_id", "lemma_raw", "lemma_nfc", "pos", "pronunciation", "notes", "status",
+		"has_definition", "created_at", "updated_at",
+	),
+	"senses": ("id", "word_entry_id", "sense_no", "pos", "definition_text", "register", "domain", "notes"),
+	"sense_examples": ("id", "sense_id", "example_text", "translation_fr", "translation_en", "source", "rank"),
+	"sense_translations": ("id", "sense_id", "lang_code", "translation_text", "rank"),
+	"sense_relations": ("id", "sense_id", "relation_type", "related_word_entry_id", "fallback_text", "rank"),
+	"words": (
+		"id", "language_id", "word", "definition", "examples", "synonyms", "translation_fr", "translation_en",
+		"is_defined", "updated_at",
+	),
+}
+
+
+def _rows_for_language(
+	language_id: int,
+	first_index: int,
+	entries: int,
+	ids: Dict[str, int],
+	lemmas: LemmaGenerator,
+	rng: random.Random,
+	max_senses: int,
+	defined_ratio: float,
+	batch_size: int,
+) -> Iterator[_Batch]:
+	pos_names = [name for name, _ in POS_WEIGHTS]
+	pos_weights = [weight for _, weight in POS_WEIGHTS]
+	now = datetime.utcnow()
+	first_entry_id = ids["word_entries"]
+	last_index = first_index + entries
+	batch = _Batch()
+	for index in range(first_index, last_index):
+		entry_id = ids["word_entries"]
+		ids["word_entries"] += 1
+		lemma_raw, lemma_nfc = normalize_lemma(lemmas.lemma(index))
+		pos = rng.choices(pos_names, pos_weights)[0]
+		defined = rng.random() < defined_ratio
+		created = now - timedelta(seconds=rng.randrange(2 * 365 * 86400))
+		stamp = created.strftime(TIMESTAMP_FORMAT)
+		batch.rows["word_entries"].append((
+			entry_id, language_id, lemma_raw, lemma_nfc, pos, None, None,
+			"published" if defined and rng.random() < 0.5 else "draft", defined, stamp, stamp,
+		))
+		senses = 1 + min(max_senses - 1, int(rng.expovariate(1.5))) if defined else 1
+		first_definition = ""
+		for sense_no in range(1, senses + 1):
+			sense_id = ids["senses"]
+			ids["senses"] += 1
+			definition = " ".join(rng.choices(DEFINITION_WORDS, k=rng.randint(4, 14))) if defined else ""
+			first_definition = first_definition or definition
+			batch.rows["senses"].append((
+				sense_id, entry_id, sense_no, pos, definition, rng.choice(REGISTERS), rng.choice(DOMAINS), None,
+			))
+			if not defined:
+				continue
+			gloss = rng.randrange(len(GLOSS_EN))
+			for rank, (lang_code, gloss_text) in enumerate((("fr", GLOSS_FR[gloss]), ("en", GLOSS_EN[gloss])), 1):
+				batch.rows["sense_translations"].append((ids["sense_translations"], sense_id, lang_code, gloss_text, rank))
+				ids["sense_translations"] += 1
+			for rank in range(1, rng.randint(0, 2) + 1):
+				example = " ".join([lemma_raw] + [lemmas.lemma(rng.randrange(last_index)) for _ in range(rng.randint(2, 5))])
+				batch.rows["sense_examples"].append((
+					ids["sense_examples"], sense_id, example, f"{GLOSS_FR[gloss]} ...", f"{GLOSS_EN[gloss]} ...", None, rank,
+				))
+				ids["sense_examples"] += 1
+			if rng.random() < 0.3:
+				# Point at an entry of the same language loaded earlier in this run, or leave free text.
+				related = rng.randrange(first_entry_id, entry_id) if entry_id > first_entry_id and rng.random() < 0.8 else None
+				batch.rows["sense_relations"].append((
+					ids["sense_relations"], sense_id, rng.choice(RELATION_TYPES), related,
+					None if related else lemmas.lemma(rng.randrange(last_index)), 1,
+				))
+				ids["sense_relations"] += 1
+		batch.rows["words"].append((
+			ids["words"], language_id, lemma_raw, first_definition or None, None, None,
+			None, None, defined, stamp,
+		))
+		ids["words"] += 1
+		if batch.size() >= batch_size:
+			yield batch
+			batch = _Batch()
+	if batch.size():
+		yield batch
+
+
+def generate(
+	database_url: str,
+	languages: int = 1,
+	entries: int = 100_000,
+	max_senses: int = 3,
+	defined_ratio: float = 0.6,
+	seed: int = 1,
+	batch_size: int = 20_000,
+	language_prefix: str = "Synthetic",
+	drop_indexes: bool = True,
+) -> dict:
+	"""Add ``languages`` synthetic languages of ``entries`` entries each. Returns a report."""
+	started = time.perf_counter()
+	engine = create_engine(database_url)
+	dialect = engine.dialect.name
+	if dialect not in ("sqlite", "postgresql"):
+		raise ValueError(f"unsupported dialect {dialect!r}")
+	if dialect == "sqlite" and routing_enabled():
+		# The loader writes the dictionary tables through this engine, which only sees the main file.
+		raise ValueError("synthetic loading into SQLite is not supported with PARTITION_BY_LANGUAGE=true")
+	Base.metadata.create_all(bind=engine)
+	with engine.begin() as conn:
+		targets = _language_ids(conn, languages, language_prefix)
+		ids = _next_ids(conn)
+		ids_before = dict(ids)
+		indexes = _secondary_indexes() if drop_indexes else []
+		for index in indexes:
+			conn.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+	lemmas = LemmaGenerator()
+	counts = {name: 0 for name in LOADED_TABLES}
+	writer = _SqliteWriter(engine) if dialect == "sqlite" else _PostgresWriter(engine)
+	try:
+		for number, (language_id, existing) in enumerate(targets):
+			rng = random.Random(f"{seed}:{language_id}:{existing}")
+			for batch in _rows_for_language(
+				language_id, existing, entries, ids, lemmas, rng, max(1, max_senses), defined_ratio, batch_size
+			):
+				for table in LOADED_TABLES:
+					writer.write(table, COLUMNS[table], batch.rows[table])
+					counts[table] += len(batch.rows[table])
+				writer.commit()
+	finally:
+		writer.close()
+	load_seconds = time.perf_counter() - started
+
+	with engine.begin() as conn:
+		for index in indexes:
+			conn.execute(CreateIndex(index, if_not_exists=True))
+	index_seconds = time.perf_counter() - started - load_seconds
+
+	db = sessionmaker(bind=engine)()
+	try:
+		reconcile_stats(db)
+		for language_id, _ in targets:
+			record_inserted(db, language_id, WordEntry, ENTITY_ENTRY, ids_before["word_entries"] - 1)
+			record_inserted(db, language_id, Word, ENTITY_WORD, ids_before["words"] - 1)
+		db.commit()
+	finally:
+		db.close()
+	engine.dispose()
+
+	report = {
+		"dialect": dialect,
+		"languages": [language_id for language_id, _ in targets],
+		"rows": counts,
+		"syllables": lemmas.size,
+		"load_seconds": round(load_seconds, 2),
+		"index_seconds": round(index_seconds, 2),
+		"total_seconds": round(time.perf_counter() - started, 2),
+	}
+	log_event("synthetic_dataset_complete", **report)
+	return report
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Generate a synthetic dictionary dataset for scale testing")
+	parser.add_argument("--database-url", default=settings.DATABASE_URL)
+	parser.add_argument("--languages", type=int, default=1)
+	parser.add_argument("--entries", type=int, default=100_000, help="Entries per language")
+	parser.add_argument("--max-senses", type=int, default=3)
+	parser.add_argument("--defined-ratio", type=float, default=0.6, help="Share of entries with definitions")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--batch-size", type=int, default=20_000)
+	parser.add_argument("--language-prefix", default="Synthetic")
+	parser.add_argument("--keep-indexes", action="store_true", help="Load with secondary indexes in place")
+	args = parser.parse_args(argv)
+	report = generate(
+		args.database_url,
+		languages=args.languages,
+		entries=args.entries,
+		max_senses=args.max_senses,
+		defined_ratio=args.defined_ratio,
+		seed=args.seed,
+		batch_size=args.batch_size,
+		language_prefix=args.language_prefix,
+		drop_indexes=not args.keep_indexes,
+	)
+	print(json.dumps(report))
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
@@ -1,68 +1,64 @@
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from fastapi.exceptions import RequestValidationError
 
 from app.core.config import settings
-from app.core.logging import request_id_middleware
+from app.core.logging import logging_stats, request_id_middleware
+from app.core.profiler import profiling_middleware
+from app.core.metrics import REGISTRY, export_stats, metrics_middleware, render_metrics, track_in_flight
 from app.core.errors import validation_exception_handler
-from app.db.session import engine, SessionLocal
-from app.db.base import Base
-from app.db.models import User, Word, Language
-from app.db.seed import resolve_word_list_path, seed_words, seed_languages
+from app.db.session import engine, SessionLocal, replica_set
+from app.db.replicas import read_your_writes_middleware
+from app.db.bootstrap import Bootstrapper, seed_dictionary  # noqa: F401
+from app.db.coordination import start_cache_watcher
 
 from app.routers.auth import router as auth_router
 from app.routers.dictionary import router as dictionary_router
 from app.routers.users import router as users_router
-from app.core.security import hash_password
+from app.routers.profiles import router as profiles_router
+from app.routers.bundles import router as bundles_router
+from app.core.security import calibrate_bcrypt_rounds, password_pool
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	yield
+	if replica_set is not None:
+		replica_set.stop(timeout=5)
+	# Stop the bcrypt worker processes with the server rather than at interpreter exit.
+	password_pool.shutdown()
 
-def seed_dictionary(session_factory, project_dir: Path, configured_path: str) -> None:
-	word_list_path = resolve_word_list_path(project_dir, configured_path)
-	db = session_factory()
-	try:
-		seed_languages(db, ["Nufi", "Medumba", "Ghomala'", "Yoruba"])
-		nufi = db.query(Language).filter(Language.name == "Nufi").first()
-		if nufi:
-			seed_words(db, word_list_path, nufi, force=False)
-	finally:
-		db.close()
 
 def create_app() -> FastAPI:
-	app = FastAPI(title=settings.APP_NAME)
+	dependencies = [Depends(track_in_flight)] if settings.METRICS_ENABLED else []
+	app = FastAPI(title=settings.APP_NAME, dependencies=dependencies, lifespan=lifespan)
 
 	base_dir = Path(__file__).resolve().parent
 	project_dir = base_dir.parent
 	static_dir = base_dir / "static"
 
-	# DB init
-	Base.metadata.create_all(bind=engine)
-	if settings.AUTO_SEED_ON_START:
-		seed_dictionary(SessionLocal, project_dir, settings.WORD_LIST_PATH)
-	if settings.AUTO_CREATE_SUPER_ADMIN and settings.SUPER_ADMIN_EMAIL and settings.SUPER_ADMIN_PASSWORD:
-		db = SessionLocal()
-		try:
-			email = settings.SUPER_ADMIN_EMAIL.lower()
-			user = db.query(User).filter(User.email == email).first()
-			if not user:
-				user = User(
-					email=email,
-					password_hash=hash_password(settings.SUPER_ADMIN_PASSWORD),
-					role="super_admin",
-					is_verified=True,
-				)
-				db.add(user)
-			else:
-				user.role = "super_admin"
-				user.password_hash = hash_password(settings.SUPER_ADMIN_PASSWORD)
-				user.is_verified = True
-			db.commit()
-		finally:
-			db.close()
-
-	# Middleware
+	bootstrapper = Bootstrapper(engine, SessionLocal, project_dir, fast_start=settings.FAST_START)
+	app.state.bootstrap = bootstrapper
+
+	if settings.BCRYPT_CALIBRATE_ON_START:
+		calibrate_bcrypt_rounds(settings.BCRYPT_TARGET_MS)
+
+	# DB init (seed + super admin move to a background thread in fast-start mode)
+	bootstrapper.run_schema()
+	if not settings.FAST_START:
+		bootstrapper.run_deferred()
+
+	# Middleware (the last one added runs first)
+	if replica_set is not None:
+		app.middleware("http")(read_your_writes_middleware)
+	app.middleware("http")(profiling_middleware)
 	app.middleware("http")(request_id_middleware)
+	if settings.METRICS_ENABLED:
+		app.middleware("http")(metrics_middleware)
 
 	# Validation error handler (consistent format)
 	app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -71,8 +67,15 @@ def create_app() -> FastAPI:
 	app.include_router(auth_router)
 	app.include_router(dictionary_router)
 	app.include_router(users_router)
+	app.include_router(profiles_router)
+	app.include_router(bundles_router)
 
 	app.mount("/static", StaticFiles(directory=static_dir), name="static")
+	if settings.PUBLISH_SERVE and settings.PUBLISH_STORAGE == "local":
+		# Static publication (app/db/publisher.py); StaticFiles sends ETag/Last-Modified and 304s.
+		publish_dir = Path(settings.PUBLISH_DIR)
+		publish_dir.mkdir(parents=True, exist_ok=True)
+		app.mount("/public", StaticFiles(directory=publish_dir), name="public")
 
 	@app.get("/")
 	def ui():
@@ -90,6 +93,28 @@ def create_app() -> FastAPI:
 	def health():
 		return {"status": "OK"}
 
+	if settings.METRICS_ENABLED:
+		def collect_startup() -> None:
+			stats = bootstrapper.metrics()
+			export_stats("app_startup", "Startup and bootstrap", {k: v for k, v in stats.items() if k != "phases"})
+			phase_gauge = REGISTRY.gauge("app_bootstrap_phase_ms", "Bootstrap phase duration in ms.", ["phase"])
+			for phase, info in stats["phases"].items():
+				phase_gauge.set(info["duration_ms"], phase=phase)
+
+		REGISTRY.register_collector(collect_startup)
+		REGISTRY.register_collector(lambda: export_stats("log_events", "Structured log pipeline", logging_stats()))
+
+		@app.get("/metrics", include_in_schema=False)
+		def metrics():
+			return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+	start_cache_watcher()
+	if replica_set is not None:
+		replica_set.start()
+	bootstrapper.mark_serving()
+	if settings.FAST_START:
+		bootstrapper.start_background()
+
 	return app
 
 app = create_app()
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 import httpx
 import secrets
@@ -14,7 +15,7 @@ from app.schemas.auth import (
 	VerifyEmailRequest, VerifyEmailConfirmRequest, InviteCreateRequest
 )
 from app.core.security import (
-	hash_password, verify_password,
+	hash_password_async, verify_password_async,
 	create_access_token, create_refresh_token, decode_token,
 	require_role,
 )
@@ -27,16 +28,30 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 # For learning: in-memory reset tokens (replace with DB/email later)
 reset_tokens = {}  # email -> token
 
+def _find_user(db: Session, email: str):
+	return db.query(User).filter(User.email == email).first()
+
+# bcrypt endpoints are async: they await the hashing pool without holding a threadpool
+# thread, and run their (sync) database work in the threadpool.
+
 @router.post("/register")
-def register(request: Request, payload: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: Request, payload: RegisterRequest, db: Session = Depends(get_db)):
 	email = payload.email.lower()
-	exists = db.query(User).filter(User.email == email).first()
+	exists = await run_in_threadpool(_find_user, db, email)
 	if exists and not exists.is_deleted:
 		raise HTTPException(status_code=409, detail="Email already registered")
 
+	password_hash = await hash_password_async(payload.password)
+	await run_in_threadpool(_save_registration, db, email, exists, password_hash)
+
+	log_event("user_registered", email=email, request_id=request.state.request_id)
+	response = {"status": "OK", "message": "Registered."}
+	return response
+
+def _save_registration(db: Session, email: str, exists, password_hash: str) -> None:
 	if exists and exists.is_deleted:
 		user = exists
-		user.password_hash = hash_password(payload.password)
+		user.password_hash = password_hash
 		user.role = "user"
 		user.auth_provider = "local"
 		user.google_sub = None
@@ -46,7 +61,7 @@ def register(request: Request, payload: RegisterRequest, db: Session = Depends(g
 	else:
 		user = User(
 			email=email,
-			password_hash=hash_password(payload.password),
+			password_hash=password_hash,
 			role="user",
 			auth_provider="local",
 			is_verified=True,
@@ -60,16 +75,12 @@ def register(request: Request, payload: RegisterRequest, db: Session = Depends(g
 	)
 	db.commit()
 
-	log_event("user_registered", email=email, request_id=request.state.request_id)
-	response = {"status": "OK", "message": "Registered."}
-	return response
-
 @router.post("/login", response_model=TokenResponse)
-def login(request: Request, payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, payload: LoginRequest, db: Session = Depends(get_db)):
 	email = payload.email.lower()
-	user = db.query(User).filter(User.email == email).first()
+	user = await run_in_threadpool(_find_user, db, email)
 
-	if not user or user.is_deleted or not verify_password(payload.password, user.password_hash):
+	if not user or user.is_deleted or not await verify_password_async(payload.password, user.password_hash):
 		raise HTTPException(status_code=401, detail="Invalid credentials")
 	if not user.is_verified:
 		raise HTTPException(status_code=403, detail="Email not verified")
@@ -110,7 +121,7 @@ def password_reset_request(payload: ResetPasswordRequest, db: Session = Depends(
 	return {"status": "OK", "message": "If the account exists, a reset link/token was generated."}
 
 @router.post("/password-reset/confirm")
-def password_reset_confirm(payload: ResetPasswordConfirmRequest, db: Session = Depends(get_db)):
+async def password_reset_confirm(payload: ResetPasswordConfirmRequest, db: Session = Depends(get_db)):
 	# Demo: token is access token and must match stored token
 	# Production: use separate token type + one-time-use store
 	try:
@@ -124,12 +135,12 @@ def password_reset_confirm(payload: ResetPasswordConfirmRequest, db: Session = D
 	if reset_tokens.get(email) != payload.token:
 		raise HTTPException(status_code=400, detail="Invalid reset token")
 
-	user = db.query(User).filter(User.email == email.lower()).first()
+	user = await run_in_threadpool(_find_user, db, email.lower())
 	if not user:
 		raise HTTPException(status_code=400, detail="Invalid token")
 
-	user.password_hash = hash_password(payload.new_password)
-	db.commit()
+	user.password_hash = await hash_password_async(payload.new_password)
+	await run_in_threadpool(db.commit)
 
 	reset_tokens.pop(email, None)
 	return {"status": "OK", "message": "Password updated"}
@@ -209,32 +220,31 @@ def google_login(invite: str | None = None):
 	return RedirectResponse(f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}")
 
 @router.get("/google/callback", response_model=TokenResponse)
-def google_callback(code: str, state: str | None = None, db: Session = Depends(get_db)):
+async def google_callback(code: str, state: str | None = None, db: Session = Depends(get_db)):
 	if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET or not settings.GOOGLE_REDIRECT_URI:
 		raise HTTPException(status_code=500, detail="Google OAuth not configured")
 
-	token_res = httpx.post(
-		"https://oauth2.googleapis.com/token",
-		data={
-			"code": code,
-			"client_id": settings.GOOGLE_CLIENT_ID,
-			"client_secret": settings.GOOGLE_CLIENT_SECRET,
-			"redirect_uri": settings.GOOGLE_REDIRECT_URI,
-			"grant_type": "authorization_code",
-		},
-		timeout=10,
-	)
-	if token_res.status_code != 200:
-		raise HTTPException(status_code=400, detail="Google token exchange failed")
-	access_token = token_res.json().get("access_token")
-	if not access_token:
-		raise HTTPException(status_code=400, detail="Google token missing")
-
-	userinfo_res = httpx.get(
-		"https://www.googleapis.com/oauth2/v3/userinfo",
-		headers={"Authorization": f"Bearer {access_token}"},
-		timeout=10,
-	)
+	async with httpx.AsyncClient(timeout=10) as client:
+		token_res = await client.post(
+			"https://oauth2.googleapis.com/token",
+			data={
+				"code": code,
+				"client_id": settings.GOOGLE_CLIENT_ID,
+				"client_secret": settings.GOOGLE_CLIENT_SECRET,
+				"redirect_uri": settings.GOOGLE_REDIRECT_URI,
+				"grant_type": "authorization_code",
+			},
+		)
+		if token_res.status_code != 200:
+			raise HTTPException(status_code=400, detail="Google token exchange failed")
+		access_token = token_res.json().get("access_token")
+		if not access_token:
+			raise HTTPException(status_code=400, detail="Google token missing")
+
+		userinfo_res = await client.get(
+			"https://www.googleapis.com/oauth2/v3/userinfo",
+			headers={"Authorization": f"Bearer {access_token}"},
+		)
 	if userinfo_res.status_code != 200:
 		raise HTTPException(status_code=400, detail="Google user info failed")
 	userinfo = userinfo_res.json()
@@ -243,11 +253,19 @@ def google_callback(code: str, state: str | None = None, db: Session = Depends(g
 	if not email or not sub:
 		raise HTTPException(status_code=400, detail="Google user info incomplete")
 
-	user = db.query(User).filter(User.email == email).first()
+	user = await run_in_threadpool(_find_user, db, email)
+	password_hash = await hash_password_async(secrets.token_urlsafe(16)) if not user else None
+	await run_in_threadpool(_save_google_user, db, user, email, sub, password_hash)
+
+	access = create_access_token(email=email)
+	refresh = create_refresh_token(email=email)
+	return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
+
+def _save_google_user(db: Session, user, email: str, sub: str, password_hash: str | None) -> None:
 	if not user:
 		user = User(
 			email=email,
-			password_hash=hash_password(secrets.token_urlsafe(16)),
+			password_hash=password_hash,
 			role="user",
 			auth_provider="google",
 			google_sub=sub,
@@ -271,7 +289,3 @@ def google_callback(code: str, state: str | None = None, db: Session = Depends(g
 			if not user.is_verified:
 				user.is_verified = True
 			db.commit()
-
-	access = create_access_token(email=email)
-	refresh = create_refresh_token(email=email)
-	return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
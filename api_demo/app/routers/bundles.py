@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.core.security import require_role
+from app.db.bundles import build_bundle, bundle_path, pending_changes, read_manifest
+from app.db.publisher import publish_language
+from app.db.session import get_db
+
+router = APIRouter(prefix="/dictionary/bundles", tags=["dictionary"])
+
+MEDIA_TYPE = "application/vnd.sqlite3"
+
+
+def _etag(manifest: dict) -> str:
+	return f'"{manifest["sha256"][:32]}"'
+
+
+def _manifest_or_404(language_id: int) -> dict:
+	manifest = read_manifest(language_id)
+	if manifest is None or not bundle_path(manifest).exists():
+		raise HTTPException(status_code=404, detail="No bundle built for this language")
+	return manifest
+
+
+@router.get("/{language_id}")
+def get_bundle_manifest(language_id: int, db: Session = Depends(get_db)):
+	"""Current bundle version, size and checksum, plus how many changes it is behind."""
+	manifest = _manifest_or_404(language_id)
+	return {
+		**manifest,
+		"etag": _etag(manifest),
+		"pending_changes": pending_changes(db, manifest),
+		"download_url": f"/dictionary/bundles/{language_id}/download",
+	}
+
+
+@router.api_route("/{language_id}/download", methods=["GET", "HEAD"])
+def download_bundle(language_id: int, request: Request, version: int | None = Query(None, ge=0)):
+	"""The bundle file, with ETag/If-None-Match and Range/If-Range support.
+
+	Older versions stay available (BUNDLE_KEEP) via ``?version=`` so interrupted
+	downloads can resume after a rebuild.
+	"""
+	if version is None:
+		manifest = _manifest_or_404(language_id)
+	else:
+		manifest = read_manifest(language_id, version=version)
+		if manifest is None or not bundle_path(manifest).exists():
+			raise HTTPException(status_code=404, detail="Bundle version not available")
+	etag = _etag(manifest)
+	headers = {"etag": etag, "cache-control": "no-cache"}
+	if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+		return Response(status_code=304, headers=headers)
+	path = bundle_path(manifest)
+	return FileResponse(path, media_type=MEDIA_TYPE, filename=path.name, headers=headers)
+
+
+@router.post("/{language_id}/build")
+def build_language_bundle(
+	language_id: int,
+	full: bool = False,
+	db: Session = Depends(get_db),
+	user=Depends(require_role("admin")),
+):
+	try:
+		return build_bundle(db, language_id, full=full)
+	except LookupError:
+		raise HTTPException(status_code=404, detail="Language not found")
+
+
+@router.post("/{language_id}/publish")
+def publish_language_files(
+	language_id: int,
+	full: bool = False,
+	db: Session = Depends(get_db),
+	user=Depends(require_role("admin")),
+):
+	"""Write the static JSON publication (entries + lemma shards); see app/db/publisher.py."""
+	try:
+		return publish_language(db, language_id, full=full)
+	except LookupError:
+		raise HTTPException(status_code=404, detail="Language not found")
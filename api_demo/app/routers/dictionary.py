@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pathlib import Path
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -13,13 +15,40 @@ from app.schemas.dictionary import (
 from app.core.security import get_optional_user
 from app.core.clafrica import load_clafrica_map
 from app.core.config import settings
+from app.core.fastjson import FastJSONResponse, encode_datetime
 from app.core.logging import log_event
 from app.core.unicode_utils import normalize_lemma
-from app.db.seed import resolve_word_list_path, seed_words
+from app.db.changes import (
+	ENTITY_ENTRY,
+	ENTITY_WORD,
+	OP_DELETE,
+	OP_UPSERT,
+	latest_per_entity,
+	read_changes,
+	record_changes,
+	reset_language,
+)
+from app.db.documents import documents_for, refresh_entry_document
+from app.db.seed import delete_language_entries, resolve_word_list_path, seed_words
+from app.db.stats import (
+	apply_stats_delta,
+	clear_language_stats,
+	credit_definition,
+	entry_counters,
+	language_stats,
+	senses_have_definition,
+	sync_word_flags,
+	word_counters,
+)
 
 router = APIRouter(prefix="/dictionary", tags=["dictionary"])
 
 
+def _json(body: str) -> Response:
+	# Stored entry documents are already WordEntryOut JSON; skip response_model serialization.
+	return Response(content=body, media_type="application/json")
+
+
 # ============================================================================
 # New Sense-First API Endpoints (AGENTS.md compliant)
 # ============================================================================
@@ -56,9 +85,11 @@ def create_word_entry(
 		pronunciation=payload.pronunciation,
 		notes=payload.notes,
 		status=payload.status,
+		has_definition=senses_have_definition(payload.senses),
 		created_by_id=user_id,
 		updated_by_id=user_id,
 	)
+	credit_definition(word_entry, False, user_id)
 	db.add(word_entry)
 	db.flush()  # Get the ID before adding children
 	
@@ -69,7 +100,7 @@ def create_word_entry(
 			sense_no=sense_payload.sense_no,
 			pos=sense_payload.pos,
 			definition_text=sense_payload.definition_text,
-			register=sense_payload.register,
+			register=sense_payload.register_,
 			domain=sense_payload.domain,
 			notes=sense_payload.notes,
 		)
@@ -121,8 +152,11 @@ def create_word_entry(
 			)
 			db.add(relation)
 	
+	db.flush()
+	apply_stats_delta(db, word_entry.language_id, Counter(), entry_counters(word_entry))
+	document = refresh_entry_document(db, word_entry.id)
+	record_changes(db, word_entry.language_id, ENTITY_ENTRY, [word_entry.id])
 	db.commit()
-	db.refresh(word_entry)
 	
 	log_event(
 		"word_entry_create",
@@ -133,7 +167,7 @@ def create_word_entry(
 		user_id=user_id,
 	)
 	
-	return word_entry
+	return _json(document)
 
 
 @router.put("/word-entries/{word_entry_id}", response_model=WordEntryOut)
@@ -147,6 +181,8 @@ def update_word_entry(
 	word_entry = db.query(WordEntry).filter(WordEntry.id == word_entry_id).first()
 	if not word_entry:
 		raise HTTPException(status_code=404, detail="WordEntry not found")
+	stats_before = entry_counters(word_entry)
+	was_defined = word_entry.has_definition
 	
 	# Update basic fields
 	word_entry.pos = payload.pos
@@ -188,7 +224,7 @@ def update_word_entry(
 		sense.sense_no = sense_payload.sense_no
 		sense.pos = sense_payload.pos
 		sense.definition_text = sense_payload.definition_text
-		sense.register = sense_payload.register
+		sense.register = sense_payload.register_
 		sense.domain = sense_payload.domain
 		sense.notes = sense_payload.notes
 		if not sense_payload.id:
@@ -278,19 +314,25 @@ def update_word_entry(
 				)
 				db.add(relation)
 	
+	word_entry.has_definition = senses_have_definition(payload.senses)
+	credit_definition(word_entry, was_defined, user_id)
+	db.flush()
+	apply_stats_delta(db, word_entry.language_id, stats_before, entry_counters(word_entry))
+	document = refresh_entry_document(db, word_entry.id)
+	sense_count = len(word_entry.senses)
+	record_changes(db, word_entry.language_id, ENTITY_ENTRY, [word_entry_id])
 	db.commit()
-	db.refresh(word_entry)
 	
 	log_event(
 		"word_entry_update",
-		word_entry_id=word_entry.id,
+		word_entry_id=word_entry_id,
 		language_id=word_entry.language_id,
 		lemma=word_entry.lemma_raw,
-		sense_count=len(word_entry.senses),
+		sense_count=sense_count,
 		user_id=user_id,
 	)
 	
-	return word_entry
+	return _json(document)
 
 
 @router.get("/word-entries/{word_entry_id}", response_model=WordEntryOut)
@@ -299,10 +341,10 @@ def get_word_entry(
 	db: Session = Depends(get_db),
 ):
 	"""Retrieve a WordEntry with all nested Senses, Examples, Translations, Relations."""
-	word_entry = db.query(WordEntry).filter(WordEntry.id == word_entry_id).first()
-	if not word_entry:
+	row = db.query(WordEntry.id, WordEntry.document).filter(WordEntry.id == word_entry_id).first()
+	if not row:
 		raise HTTPException(status_code=404, detail="WordEntry not found")
-	return word_entry
+	return _json(documents_for(db, [row])[0])
 
 
 @router.get("/word-entries", response_model=list[WordEntryOut])
@@ -315,7 +357,7 @@ def list_word_entries(
 	db: Session = Depends(get_db),
 ):
 	"""List WordEntries with optional search and filtering."""
-	query = db.query(WordEntry).filter(WordEntry.language_id == language_id)
+	query = db.query(WordEntry.id, WordEntry.document).filter(WordEntry.language_id == language_id)
 	
 	if search:
 		search_nfc = normalize_lemma(search)[1]
@@ -325,13 +367,57 @@ def list_word_entries(
 		query = query.filter(WordEntry.status == status)
 	
 	query = query.order_by(WordEntry.id.asc())
-	return query.offset(offset).limit(limit).all()
+	rows = query.offset(offset).limit(limit).all()
+	return _json("[" + ",".join(documents_for(db, rows)) + "]")
 
 
 # ============================================================================
 # Legacy Flat-Word API Endpoints (for backwards compatibility)
 # ============================================================================
 
+WORD_LIST_COLUMNS = (
+	Word.id,
+	Word.language_id,
+	Word.word,
+	Word.definition,
+	Word.examples,
+	Word.synonyms,
+	Word.translation_fr,
+	Word.translation_en,
+)
+
+
+def _word_list(query):
+	"""Serialize a ``(Word, User.email)`` query; FAST_JSON selects plain columns instead."""
+	if settings.FAST_JSON:
+		keys = [column.key for column in WORD_LIST_COLUMNS]
+		rows = query.with_entities(*WORD_LIST_COLUMNS, User.email, Word.updated_at).all()
+		return FastJSONResponse([
+			{
+				**dict(zip(keys, row)),
+				"updated_by_email": row[-2] or "anonymous",
+				"updated_at": encode_datetime(row[-1]),
+			}
+			for row in rows
+		])
+	return [_word_dict(word, email) for word, email in query.all()]
+
+
+def _word_dict(word: Word, email: str | None) -> dict:
+	return {
+		"id": word.id,
+		"language_id": word.language_id,
+		"word": word.word,
+		"definition": word.definition,
+		"examples": word.examples,
+		"synonyms": word.synonyms,
+		"translation_fr": word.translation_fr,
+		"translation_en": word.translation_en,
+		"updated_by_email": email or "anonymous",
+		"updated_at": word.updated_at,
+	}
+
+
 @router.get("")
 def list_words(
 	language_id: int = Query(..., ge=1),
@@ -351,26 +437,11 @@ def list_words(
 		else:
 			query = query.filter(func.lower(Word.word).like(f"%{search_value}%"))
 	if status == "defined":
-		query = query.filter(Word.definition.is_not(None)).filter(Word.definition != "")
+		query = query.filter(Word.is_defined.is_(True))
 	elif status == "undefined":
-		query = query.filter((Word.definition.is_(None)) | (Word.definition == ""))
+		query = query.filter(Word.is_defined.is_(False))
 	query = query.order_by(Word.id.asc())
-	rows = query.offset(offset).limit(limit).all()
-	return [
-		{
-			"id": word.id,
-			"language_id": word.language_id,
-			"word": word.word,
-			"definition": word.definition,
-			"examples": word.examples,
-			"synonyms": word.synonyms,
-			"translation_fr": word.translation_fr,
-			"translation_en": word.translation_en,
-			"updated_by_email": email or "anonymous",
-			"updated_at": word.updated_at,
-		}
-		for word, email in rows
-	]
+	return _word_list(query.offset(offset).limit(limit))
 
 
 @router.get("/random")
@@ -383,25 +454,10 @@ def random_words(
 		db.query(Word, User.email)
 		.outerjoin(User, Word.updated_by_id == User.id)
 		.filter(Word.language_id == language_id)
-		.filter((Word.definition.is_(None)) | (Word.definition == ""))
+		.filter(Word.is_defined.is_(False))
 		.order_by(func.random())
 	)
-	rows = query.limit(limit).all()
-	return [
-		{
-			"id": word.id,
-			"language_id": word.language_id,
-			"word": word.word,
-			"definition": word.definition,
-			"examples": word.examples,
-			"synonyms": word.synonyms,
-			"translation_fr": word.translation_fr,
-			"translation_en": word.translation_en,
-			"updated_by_email": email or "anonymous",
-			"updated_at": word.updated_at,
-		}
-		for word, email in rows
-	]
+	return _word_list(query.limit(limit))
 
 
 @router.get("/clafrica-map")
@@ -421,16 +477,19 @@ def update_word(
 	word = db.query(Word).filter(Word.id == word_id, Word.language_id == language_id).first()
 	if not word:
 		raise HTTPException(status_code=404, detail="Word not found")
-	was_defined = bool(word.definition and word.definition.strip())
+	stats_before = word_counters(word)
+	was_defined = word.is_defined
 	word.definition = payload.definition
 	word.examples = payload.examples
 	word.synonyms = payload.synonyms
 	word.translation_fr = payload.translation_fr
 	word.translation_en = payload.translation_en
+	sync_word_flags(word)
 	user_id = user.id if user else None
 	word.updated_by_id = user_id
-	if user and not was_defined and payload.definition.strip():
-		user.defined_count = (user.defined_count or 0) + 1
+	credit_definition(word, was_defined, user_id)
+	apply_stats_delta(db, word.language_id, stats_before, word_counters(word))
+	record_changes(db, word.language_id, ENTITY_WORD, [word.id])
 	db.commit()
 	db.refresh(word)
 	log_event(
@@ -473,9 +532,12 @@ def create_word(
 		translation_en=payload.translation_en,
 		updated_by_id=(user.id if user else None),
 	)
+	sync_word_flags(row)
+	credit_definition(row, False, row.updated_by_id)
 	db.add(row)
-	if user:
-		user.defined_count = (user.defined_count or 0) + 1
+	db.flush()
+	apply_stats_delta(db, row.language_id, Counter(), word_counters(row))
+	record_changes(db, row.language_id, ENTITY_WORD, [row.id])
 	db.commit()
 	db.refresh(row)
 	log_event(
@@ -498,6 +560,59 @@ def list_languages(db: Session = Depends(get_db)):
 	return [{"id": r.id, "name": r.name, "slug": r.slug} for r in rows]
 
 
+@router.get("/stats")
+def dictionary_stats(
+	language_id: int | None = Query(None, ge=1),
+	leaderboard: int = Query(10, ge=0, le=100),
+	db: Session = Depends(get_db),
+):
+	"""Per-language defined/undefined, draft/published and POS counts plus top contributors."""
+	return language_stats(db, language_id=language_id, leaderboard_size=leaderboard)
+
+
+@router.get("/changes")
+def list_changes(
+	language_id: int = Query(..., ge=1),
+	since: int = Query(0, ge=0),
+	limit: int = Query(500, ge=1, le=1000),
+	db: Session = Depends(get_db),
+):
+	"""Delta sync: changes to a language after the ``since`` cursor (see app/db/changes.py)."""
+	rows, has_more = read_changes(db, language_id, since, limit)
+	latest = latest_per_entity(rows)
+	entry_ids = [row.entity_id for row in latest if row.entity == ENTITY_ENTRY and row.op == OP_UPSERT]
+	word_ids = [row.entity_id for row in latest if row.entity == ENTITY_WORD and row.op == OP_UPSERT]
+	entries = {}
+	if entry_ids:
+		entry_rows = db.query(WordEntry.id, WordEntry.document).filter(WordEntry.id.in_(entry_ids)).all()
+		entries = {row.id: json.loads(document) for row, document in zip(entry_rows, documents_for(db, entry_rows))}
+	words = {}
+	if word_ids:
+		word_rows = (
+			db.query(Word, User.email)
+			.outerjoin(User, Word.updated_by_id == User.id)
+			.filter(Word.id.in_(word_ids))
+			.all()
+		)
+		words = {word.id: _word_dict(word, email) for word, email in word_rows}
+	changes = []
+	for row in latest:
+		data = None
+		op = row.op
+		if op == OP_UPSERT:
+			data = (entries if row.entity == ENTITY_ENTRY else words).get(row.entity_id)
+			if data is None:
+				op = OP_DELETE  # removed after this change was recorded
+		changes.append({"seq": row.id, "entity": row.entity, "id": row.entity_id, "op": op, "data": data})
+	return {
+		"language_id": language_id,
+		"since": since,
+		"next_cursor": rows[-1].id if rows else since,
+		"has_more": has_more,
+		"changes": changes,
+	}
+
+
 @router.post("/languages")
 def create_language(
 	payload: LanguageCreate,
@@ -525,7 +640,10 @@ def delete_language(
 	if not row:
 		raise HTTPException(status_code=404, detail="Language not found")
 	# Delete words first to avoid orphaned entries
+	clear_language_stats(db, row.id)
 	db.query(Word).filter(Word.language_id == row.id).delete()
+	delete_language_entries(db, row.id)
+	reset_language(db, row.id, OP_DELETE)
 	db.delete(row)
 	db.commit()
 	return {"status": "OK", "id": language_id}
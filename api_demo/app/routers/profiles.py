@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.profiler import profile_store
+from app.core.security import require_role
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+@router.get("")
+def list_profiles(user=Depends(require_role("admin"))):
+	return profile_store.list()
+
+@router.get("/{request_id}")
+def get_profile(request_id: str, format: str = "json", user=Depends(require_role("admin"))):
+	profile = profile_store.get(request_id)
+	if profile is None:
+		raise HTTPException(status_code=404, detail="Profile not found")
+	if format == "folded":
+		return PlainTextResponse(profile.folded())
+	return {**profile.summary(), "top_stacks": [
+		{"stack": stack.split(";"), "samples": count} for stack, count in profile.stacks.most_common(20)
+	]}
@@ -1,11 +1,13 @@
 from datetime import datetime
 import secrets
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from app.db.session import get_db
-from app.db.models import User, Word, InviteCode, EmailVerification, Item
-from app.core.security import require_role, get_current_user, is_super_admin, hash_password
+from app.db.models import User, Word, WordEntry, InviteCode, EmailVerification, Item, Language
+from app.db.stats import move_contributions
+from app.core.security import require_role, get_current_user, is_super_admin, hash_password_async
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -96,9 +98,17 @@ def deduplicate_user(
 	keep = rows[0]
 	duplicate_ids = [u.id for u in rows[1:]]
 	if duplicate_ids:
-		db.query(Word).filter(Word.updated_by_id.in_(duplicate_ids)).update(
-			{Word.updated_by_id: keep.id}, synchronize_session=False
-		)
+		# One language per transaction, as with PARTITION_BY_LANGUAGE each lives in its own file.
+		for (language_id,) in db.query(Language.id).order_by(Language.id).all():
+			db.query(Word).filter(Word.language_id == language_id, Word.updated_by_id.in_(duplicate_ids)).update(
+				{Word.updated_by_id: keep.id}, synchronize_session=False
+			)
+			for column in (WordEntry.created_by_id, WordEntry.updated_by_id):
+				db.query(WordEntry).filter(WordEntry.language_id == language_id, column.in_(duplicate_ids)).update(
+					{column: keep.id}, synchronize_session=False
+				)
+			move_contributions(db, language_id, duplicate_ids, keep.id)
+			db.commit()
 		db.query(InviteCode).filter(InviteCode.used_by_id.in_(duplicate_ids)).update(
 			{InviteCode.used_by_id: keep.id}, synchronize_session=False
 		)
@@ -115,7 +125,7 @@ def deduplicate_user(
 	return {"status": "OK", "email": email, "deleted": len(duplicate_ids), "kept_id": keep.id}
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
 	user_id: int,
 	db: Session = Depends(get_db),
 	current_user=Depends(get_current_user),
@@ -123,7 +133,7 @@ def delete_user(
 	if not is_super_admin(current_user):
 		raise HTTPException(status_code=403, detail="Forbidden")
 
-	target = db.query(User).filter(User.id == user_id).first()
+	target = await run_in_threadpool(lambda: db.query(User).filter(User.id == user_id).first())
 	if not target:
 		raise HTTPException(status_code=404, detail="User not found")
 	if target.id == current_user.id:
@@ -131,6 +141,14 @@ def delete_user(
 	if is_super_admin(target):
 		raise HTTPException(status_code=403, detail="Cannot delete super admin")
 
+	# bcrypt is awaited on the hashing pool; the database work runs in the threadpool.
+	email = target.email
+	password_hash = await hash_password_async(secrets.token_urlsafe(16))
+	await run_in_threadpool(_delete_user, db, target, password_hash)
+	return {"status": "OK", "id": user_id, "email": email, "deleted": 1}
+
+def _delete_user(db: Session, target: User, password_hash: str) -> None:
+	user_id = target.id
 	db.query(Item).filter(Item.owner_id == user_id).delete(synchronize_session=False)
 	db.query(InviteCode).filter(InviteCode.used_by_id == user_id).update(
 		{InviteCode.used_by_id: None}, synchronize_session=False
@@ -147,6 +165,5 @@ def delete_user(
 	target.role = "deleted"
 	target.auth_provider = "deleted"
 	target.google_sub = None
-	target.password_hash = hash_password(secrets.token_urlsafe(16))
+	target.password_hash = password_hash
 	db.commit()
-	return {"status": "OK", "id": user_id, "email": target.email, "deleted": 1}
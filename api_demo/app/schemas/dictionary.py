@@ -65,7 +65,10 @@ class SenseBase(BaseModel):
 	sense_no: int = Field(ge=1)
 	pos: Optional[str] = Field(None, max_length=50)
 	definition_text: str = Field(min_length=1, max_length=10000)
-	register: Optional[str] = Field(None, max_length=50)
+	# Named "register", the field shadows BaseModel.register: a value sent in the payload is
+	# kept, but an omitted one reads as that classmethod instead of None. Hence register_,
+	# with the alias keeping "register" in the API.
+	register_: Optional[str] = Field(None, alias="register", max_length=50)
 	domain: Optional[str] = Field(None, max_length=50)
 	notes: Optional[str] = Field(None, max_length=1000)
 
@@ -0,0 +1,385 @@
+"""HTTP load benchmark for the dictionary API.
+
+Starts the app with uvicorn against a temporary SQLite database (or ``--database-url``,
+e.g. an empty Postgres database), lets it seed the Nufi word list, then drives each
+scenario with ``--concurrency`` client threads and prints one JSON result per scenario
+(p50/p95/p99/mean latency, throughput, errors):
+
+	search, list_first_page, list_deep_page, random, get_entry, create_entry,
+	update_entry_nested, reseed, auth_register, auth_login
+
+``--output`` writes the whole run (results plus git commit and parameters) to a file;
+``--compare`` prints the change against such a file from an earlier run.
+
+	python -m benchmarks.api_load --requests 200 --concurrency 8 --output before.json
+	python -m benchmarks.api_load --requests 200 --concurrency 8 --compare before.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+SCENARIOS = (
+	"search",
+	"list_first_page",
+	"list_deep_page",
+	"random",
+	"get_entry",
+	"create_entry",
+	"update_entry_nested",
+	"reseed",
+	"auth_register",
+	"auth_login",
+)
+# Reseeding rewrites a whole language, so it gets its own (small) request count.
+SLOW_SCENARIOS = {"reseed"}
+COMPARED_FIELDS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _percentile(values, pct):
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+def _free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+class Server:
+	"""The app under uvicorn in a subprocess, with its own database and log file."""
+
+	def __init__(self, database_url: str, workdir: Path, bcrypt_rounds: int, env: Optional[Dict[str, str]] = None):
+		self.port = _free_port()
+		self.base_url = f"http://127.0.0.1:{self.port}"
+		self.log_path = workdir / "server.log"
+		self.env = {
+			**os.environ,
+			"DATABASE_URL": database_url,
+			"AUTO_SEED_ON_START": "true",
+			"AUTO_CREATE_SUPER_ADMIN": "true",
+			"BCRYPT_ROUNDS": str(bcrypt_rounds),
+			"S3_AUTO_BACKUP_ENABLED": "false",
+			"BACKUP_STATE_DIR": str(workdir / "backup_state"),
+			"FAST_START": "false",
+			**(env or {}),
+		}
+		self._process: Optional[subprocess.Popen] = None
+
+	def start(self, timeout: float = 180.0) -> None:
+		log = open(self.log_path, "wb")
+		self._process = subprocess.Popen(
+			[
+				sys.executable, "-m", "uvicorn", "app.main:app",
+				"--host", "127.0.0.1", "--port", str(self.port),
+				"--no-access-log", "--log-level", "warning",
+			],
+			cwd=PROJECT_DIR,
+			env=self.env,
+			stdout=log,
+			stderr=subprocess.STDOUT,
+		)
+		log.close()
+		deadline = time.monotonic() + timeout
+		while time.monotonic() < deadline:
+			if self._process.poll() is not None:
+				raise RuntimeError(f"server exited with {self._process.returncode}, see {self.log_path}")
+			try:
+				if httpx.get(f"{self.base_url}/health", timeout=1.0).status_code == 200:
+					return
+			except httpx.HTTPError:
+				pass
+			time.sleep(0.2)
+		self.stop()
+		raise RuntimeError(f"server did not become healthy in {timeout:.0f}s, see {self.log_path}")
+
+	def stop(self) -> None:
+		if self._process is not None and self._process.poll() is None:
+			self._process.terminate()
+			try:
+				self._process.wait(timeout=15)
+			except subprocess.TimeoutExpired:
+				self._process.kill()
+
+
+class Fixture:
+	"""IDs and credentials the scenarios draw from, read from the seeded server."""
+
+	def __init__(self, client: httpx.Client):
+		self.client = client
+		languages = {row["name"]: row["id"] for row in client.get("/dictionary/languages").json()}
+		self.language_id = languages["Nufi"]
+		# A seeded language other than the one being read, so reseeding does not skew the reads.
+		self.reseed_language_id = next(lang_id for name, lang_id in languages.items() if name != "Nufi")
+		self.words = self._collect_words()
+		self.entry_ids = [
+			row["id"]
+			for row in client.get(
+				"/dictionary/word-entries", params={"language_id": self.language_id, "limit": 200}
+			).json()
+		]
+		self.admin_headers = self._login("superadmin@example.com", "superadmin")
+		self.user_email = "benchmark-user@example.com"
+		self.user_password = "benchmark-pass-1"
+		client.post("/auth/register", json={"email": self.user_email, "password": self.user_password})
+		self._counter = itertools.count()
+		self._lock = threading.Lock()
+
+	def _collect_words(self) -> List[str]:
+		words, offset = [], 0
+		while True:
+			page = self.client.get(
+				"/dictionary", params={"language_id": self.language_id, "limit": 200, "offset": offset}
+			).json()
+			words.extend(row["word"] for row in page)
+			if len(page) < 200:
+				return words
+			offset += 200
+
+	def _login(self, email: str, password: str) -> Dict[str, str]:
+		response = self.client.post("/auth/login", json={"email": email, "password": password})
+		response.raise_for_status()
+		return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+	def next_index(self) -> int:
+		with self._lock:
+			return next(self._counter)
+
+	def unique(self, prefix: str) -> str:
+		return f"{prefix}{os.getpid()}x{self.next_index()}"
+
+
+def _sense(sense_no: int, rng: random.Random) -> dict:
+	return {
+		"sense_no": sense_no,
+		"definition_text": f"benchmark definition {rng.randint(0, 1_000_000)}",
+		"examples": [{"example_text": f"example {n}", "translation_en": f"translation {n}", "rank": n} for n in (1, 2)],
+		"translations": [
+			{"lang_code": "fr", "translation_text": "mot", "rank": 1},
+			{"lang_code": "en", "translation_text": "word", "rank": 1},
+		],
+		"relations": [{"relation_type": "synonym", "fallback_text": "synonym", "rank": 1}],
+	}
+
+
+def build_scenarios(fixture: Fixture, page_size: int) -> Dict[str, Callable[[httpx.Client, random.Random], httpx.Response]]:
+	language_id = fixture.language_id
+	deep_offset = max(0, len(fixture.words) - page_size)
+
+	def search(client, rng):
+		word = rng.choice(fixture.words)
+		return client.get("/dictionary", params={"language_id": language_id, "search": word[:3], "limit": page_size})
+
+	def list_first_page(client, rng):
+		return client.get("/dictionary", params={"language_id": language_id, "limit": page_size, "offset": 0})
+
+	def list_deep_page(client, rng):
+		return client.get("/dictionary", params={"language_id": language_id, "limit": page_size, "offset": deep_offset})
+
+	def random_words(client, rng):
+		return client.get("/dictionary/random", params={"language_id": language_id, "limit": 10})
+
+	def get_entry(client, rng):
+		return client.get(f"/dictionary/word-entries/{rng.choice(fixture.entry_ids)}")
+
+	def create_entry(client, rng):
+		payload = {"language_id": language_id, "lemma_raw": fixture.unique("bench"), "senses": [_sense(1, rng)]}
+		return client.post("/dictionary/word-entries", json=payload, headers=fixture.admin_headers)
+
+	def update_entry_nested(client, rng):
+		# Entries are taken in turn so concurrent updates never race on the same entry.
+		entry_id = fixture.entry_ids[fixture.next_index() % len(fixture.entry_ids)]
+		payload = {
+			"language_id": language_id,
+			"lemma_raw": "unused",
+			"status": "draft",
+			"senses": [_sense(1, rng), _sense(2, rng)],
+		}
+		return client.put(f"/dictionary/word-entries/{entry_id}", json=payload, headers=fixture.admin_headers)
+
+	def reseed(client, rng):
+		return client.post(
+			"/dictionary/reseed",
+			params={"confirm": "true", "language_id": fixture.reseed_language_id},
+			headers=fixture.admin_headers,
+		)
+
+	def auth_register(client, rng):
+		email = f"{fixture.unique('bench')}@example.com"
+		return client.post("/auth/register", json={"email": email, "password": "benchmark-pass-1"})
+
+	def auth_login(client, rng):
+		return client.post("/auth/login", json={"email": fixture.user_email, "password": fixture.user_password})
+
+	return {
+		"search": search,
+		"list_first_page": list_first_page,
+		"list_deep_page": list_deep_page,
+		"random": random_words,
+		"get_entry": get_entry,
+		"create_entry": create_entry,
+		"update_entry_nested": update_entry_nested,
+		"reseed": reseed,
+		"auth_register": auth_register,
+		"auth_login": auth_login,
+	}
+
+
+def run_scenario(name: str, call, client: httpx.Client, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+	rng = random.Random(seed)
+	for _ in range(warmup):
+		call(client, rng)
+
+	latencies: List[float] = []
+	statuses: Dict[str, int] = {}
+	lock = threading.Lock()
+
+	def one(index: int) -> None:
+		local_rng = random.Random(seed * 1_000_003 + index)
+		started = time.perf_counter()
+		try:
+			status = str(call(client, local_rng).status_code)
+		except httpx.HTTPError as exc:
+			status = type(exc).__name__
+		elapsed_ms = (time.perf_counter() - started) * 1000
+		with lock:
+			latencies.append(elapsed_ms)
+			statuses[status] = statuses.get(status, 0) + 1
+
+	started = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as clients:
+		list(clients.map(one, range(requests)))
+	elapsed = time.perf_counter() - started
+	errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+
+	return {
+		"benchmark": "api_load",
+		"scenario": name,
+		"requests": requests,
+		"concurrency": concurrency,
+		"errors": errors,
+		"statuses": dict(sorted(statuses.items())),
+		"throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+		"p50_ms": round(_percentile(latencies, 50), 2),
+		"p95_ms": round(_percentile(latencies, 95), 2),
+		"p99_ms": round(_percentile(latencies, 99), 2),
+		"mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+		"max_ms": round(max(latencies), 2) if latencies else 0.0,
+	}
+
+
+def compare(baseline: dict, results: List[dict]) -> List[dict]:
+	"""Per-scenario change (percent) of throughput and latency percentiles vs ``baseline``."""
+	previous = {row["scenario"]: row for row in baseline.get("results", [])}
+	rows = []
+	for row in results:
+		before = previous.get(row["scenario"])
+		if before is None:
+			continue
+		change = {}
+		for field in COMPARED_FIELDS:
+			old, new = before.get(field), row.get(field)
+			change[field] = {
+				"baseline": old,
+				"current": new,
+				"change_pct": round((new - old) / old * 100, 1) if old else None,
+			}
+		rows.append({"benchmark": "api_load_compare", "scenario": row["scenario"], **change})
+	return rows
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--database-url", default="", help="empty = a temporary SQLite file")
+	parser.add_argument("--requests", type=int, default=200)
+	parser.add_argument("--slow-requests", type=int, default=3, help="requests for reseed")
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--warmup", type=int, default=5)
+	parser.add_argument("--page-size", type=int, default=50)
+	parser.add_argument("--bcrypt-rounds", type=int, default=12)
+	parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--output", type=Path, help="write the full run as JSON")
+	parser.add_argument("--compare", type=Path, help="a previous --output file to compare against")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory(prefix="api-load-") as tmp:
+		workdir = Path(tmp)
+		database_url = args.database_url or f"sqlite:///{workdir / 'bench.db'}"
+		server = Server(database_url, workdir, args.bcrypt_rounds)
+		server.start()
+		results = []
+		try:
+			with httpx.Client(
+				base_url=server.base_url,
+				timeout=120.0,
+				limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+			) as client:
+				fixture = Fixture(client)
+				scenarios = build_scenarios(fixture, args.page_size)
+				for name in args.scenarios:
+					slow = name in SLOW_SCENARIOS
+					result = run_scenario(
+						name,
+						scenarios[name],
+						client,
+						requests=args.slow_requests if slow else args.requests,
+						concurrency=1 if slow else args.concurrency,
+						warmup=0 if slow else args.warmup,
+						seed=args.seed,
+					)
+					results.append(result)
+					print(json.dumps(result), flush=True)
+		finally:
+			server.stop()
+
+	run = {
+		"meta": {
+			"created_at": datetime.now(timezone.utc).isoformat(),
+			"git_commit": _git_commit(),
+			"database": database_url.split(":", 1)[0],
+			"python": platform.python_version(),
+			"words": len(fixture.words),
+			"params": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+		},
+		"results": results,
+	}
+	if args.output:
+		args.output.write_text(json.dumps(run, indent=2), encoding="utf-8")
+	if args.compare:
+		for row in compare(json.loads(args.compare.read_text(encoding="utf-8")), results):
+			print(json.dumps(row))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,84 @@
+"""Auth throughput benchmark for the bcrypt worker pool.
+
+Runs a burst of concurrent password verifications through PasswordHashPool with
+different worker counts (0 = inline on the calling threads) and prints one JSON
+result per configuration.
+
+	python -m benchmarks.auth_throughput --requests 64 --concurrency 16 --workers 0 2 4
+"""
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.password_pool import PasswordHashPool, PasswordPoolBusy, _crypt_context
+
+
+def _percentile(values, pct):
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+def run(workers: int, requests: int, concurrency: int, rounds: int, max_pending: int) -> dict:
+	password = "benchmark-password-1"
+	password_hash = _crypt_context(rounds).hash(password)
+	pool = PasswordHashPool(workers=workers, max_pending=max_pending, wait_timeout=30)
+	if workers > 0:
+		# Warm the worker processes so spawn cost is not counted.
+		with ThreadPoolExecutor(max_workers=workers) as warm:
+			list(warm.map(lambda _: pool.verify(password, password_hash, rounds), range(workers)))
+
+	latencies = []
+	rejected = 0
+
+	def one(_):
+		nonlocal rejected
+		started = time.perf_counter()
+		try:
+			pool.verify(password, password_hash, rounds)
+		except PasswordPoolBusy:
+			rejected += 1
+			return
+		latencies.append((time.perf_counter() - started) * 1000)
+
+	started = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as clients:
+		list(clients.map(one, range(requests)))
+	elapsed = time.perf_counter() - started
+	pool.shutdown()
+
+	return {
+		"benchmark": "auth_verify",
+		"workers": workers,
+		"rounds": rounds,
+		"requests": requests,
+		"concurrency": concurrency,
+		"rejected": rejected,
+		"throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+		"p50_ms": round(_percentile(latencies, 50), 2),
+		"p95_ms": round(_percentile(latencies, 95), 2),
+		"p99_ms": round(_percentile(latencies, 99), 2),
+		"mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--requests", type=int, default=64)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--rounds", type=int, default=12)
+	parser.add_argument("--max-pending", type=int, default=64)
+	parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+	args = parser.parse_args()
+	for workers in args.workers:
+		result = run(workers, args.requests, args.concurrency, args.rounds, args.max_pending)
+		print(json.dumps(result))
+
+
+if __name__ == "__main__":
+	main()
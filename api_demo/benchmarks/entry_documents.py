@@ -0,0 +1,140 @@
+"""Entry read latency and CPU: stored documents vs rendering through the ORM.
+
+Creates ``--entries`` word entries with nested senses, examples, translations and
+relations in a temporary SQLite database, then times ``GET /dictionary/word-entries/{id}``
+and the full-view ``GET /dictionary/word-entries`` listing in-process, first returning the
+stored ``word_entries.document`` text and then with the documents cleared, which makes
+the endpoints load the ORM tree and validate it through ``WordEntryOut`` on every read.
+CPU is process time per request (app and client run in the same process).
+
+	python -m benchmarks.entry_documents --entries 200 --requests 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _percentile(values, pct):
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+def _entry_payload(language_id: int, index: int, senses: int) -> dict:
+	return {
+		"language_id": language_id,
+		"lemma_raw": f"ŋwɑ̀{index}",
+		"pos": "noun",
+		"status": "published",
+		"senses": [
+			{
+				"sense_no": sense_no,
+				"definition_text": f"definition {index}.{sense_no} " * 4,
+				"register": "formal",
+				"examples": [{"example_text": f"example {index}.{sense_no}.{n}", "translation_fr": "exemple"} for n in range(2)],
+				"translations": [
+					{"lang_code": "fr", "translation_text": f"mot {index}"},
+					{"lang_code": "en", "translation_text": f"word {index}"},
+				],
+				"relations": [{"relation_type": "synonym", "fallback_text": f"ŋwɑ̀{index + 1}"}],
+			}
+			for sense_no in range(1, senses + 1)
+		],
+	}
+
+
+def _measure(client, name: str, mode: str, requests: int, url_for) -> dict:
+	latencies = []
+	cpu = []
+	for i in range(requests):
+		url, params = url_for(i)
+		cpu_started = time.process_time()
+		started = time.perf_counter()
+		response = client.get(url, params=params)
+		latencies.append((time.perf_counter() - started) * 1000)
+		cpu.append((time.process_time() - cpu_started) * 1000)
+		response.raise_for_status()
+	return {
+		"benchmark": name,
+		"mode": mode,
+		"requests": requests,
+		"p50_ms": round(_percentile(latencies, 50), 3),
+		"p95_ms": round(_percentile(latencies, 95), 3),
+		"mean_ms": round(statistics.fmean(latencies), 3),
+		"cpu_ms_per_request": round(statistics.fmean(cpu), 3),
+	}
+
+
+def run(entries: int, senses: int, requests: int, page_size: int) -> list:
+	from fastapi.testclient import TestClient
+
+	from app.db.models import WordEntry
+	from app.db.session import SessionLocal
+	from app.main import app
+
+	results = []
+	with TestClient(app) as client:
+		language_id = client.post("/dictionary/languages", json={"name": "Benchmark"}).json()["id"]
+		ids = []
+		for index in range(entries):
+			response = client.post("/dictionary/word-entries", json=_entry_payload(language_id, index, senses))
+			response.raise_for_status()
+			ids.append(response.json()["id"])
+		pages = max(1, entries // page_size)
+		scenarios = {
+			"get_entry": lambda i: (f"/dictionary/word-entries/{ids[i % len(ids)]}", None),
+			"list_entries": lambda i: (
+				"/dictionary/word-entries",
+				{"language_id": language_id, "limit": page_size, "offset": (i % pages) * page_size},
+			),
+		}
+		for mode in ("stored", "orm"):
+			if mode == "orm":
+				db = SessionLocal()
+				try:
+					db.query(WordEntry).filter(WordEntry.language_id == language_id).update(
+						{WordEntry.document: None, WordEntry.updated_at: WordEntry.updated_at}, synchronize_session=False
+					)
+					db.commit()
+				finally:
+					db.close()
+			for name, url_for in scenarios.items():
+				_measure(client, name, mode, min(20, requests), url_for)  # warm-up
+				results.append(_measure(client, name, mode, requests, url_for))
+	return results
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--entries", type=int, default=200)
+	parser.add_argument("--senses", type=int, default=3, help="Senses per entry")
+	parser.add_argument("--requests", type=int, default=500)
+	parser.add_argument("--page-size", type=int, default=50)
+	args = parser.parse_args()
+	with tempfile.TemporaryDirectory() as tmp:
+		# Settings are read at import time, so point the app at the scratch database first.
+		os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+		os.environ["AUTO_SEED_ON_START"] = "false"
+		os.environ["ACCESS_LOG_ENABLED"] = "false"
+		results = run(args.entries, args.senses, args.requests, args.page_size)
+	by_key = {(r["benchmark"], r["mode"]): r for r in results}
+	for result in results:
+		if result["mode"] == "stored":
+			orm = by_key[(result["benchmark"], "orm")]
+			result["speedup_p50"] = round(orm["p50_ms"] / result["p50_ms"], 2) if result["p50_ms"] else None
+			result["cpu_saved_pct"] = (
+				round(100 * (1 - result["cpu_ms_per_request"] / orm["cpu_ms_per_request"]), 1)
+				if orm["cpu_ms_per_request"] else None
+			)
+		print(json.dumps(result))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,133 @@
+"""Serialization cost of a 200-row list page: default path vs the FAST_JSON path.
+
+Works on in-memory rows (no database, no HTTP) so only serialization is timed:
+
+- words: ``jsonable_encoder`` + Starlette ``JSONResponse`` on the dicts ``list_words``
+  builds, vs pre-encoded datetimes + ``FastJSONResponse``.
+- entries: ``response_model`` style validation (``WordEntryOut.model_validate``) +
+  ``jsonable_encoder`` + ``JSONResponse``; pydantic's own ``model_dump_json`` per entry;
+  and ``trusted_dump`` + ``dumps``.
+
+Prints the median microseconds per page for each variant, and whether orjson was used.
+
+	python -m benchmarks.json_lists --rows 200 --repeat 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import fastjson
+from app.core.fastjson import FastJSONResponse, dumps, encode_datetime, trusted_dump
+from app.db.models import Sense, SenseExample, SenseRelation, SenseTranslation, WordEntry
+from app.schemas.dictionary import WordEntryOut
+
+
+def build_words(rows: int) -> list:
+	started = datetime(2026, 1, 1, 12, 0, 0, 123456)
+	return [
+		{
+			"id": i,
+			"language_id": 1,
+			"word": f"ŋwɑ̀{i}",
+			"definition": f"definition {i}" if i % 2 else None,
+			"examples": f"example {i}" if i % 3 else None,
+			"synonyms": None,
+			"translation_fr": f"mot {i}",
+			"translation_en": f"word {i}",
+			"updated_by_email": "anonymous",
+			"updated_at": started + timedelta(seconds=i),
+		}
+		for i in range(1, rows + 1)
+	]
+
+
+def build_entries(rows: int, senses: int) -> list:
+	started = datetime(2026, 1, 1, 12, 0, 0, 123456)
+	entries = []
+	for i in range(1, rows + 1):
+		entry = WordEntry(
+			id=i, language_id=1, lemma_raw=f"ŋwɑ̀{i}", lemma_nfc=f"ŋwɑ̀{i}", pos="noun", status="published",
+			created_at=started, updated_at=started + timedelta(seconds=i),
+		)
+		for n in range(1, senses + 1):
+			entry.senses.append(Sense(
+				id=i * 10 + n, sense_no=n, definition_text=f"definition {i}.{n}", register="formal",
+				examples=[SenseExample(id=i * 10 + n, example_text=f"example {i}.{n}", rank=1)],
+				translations=[
+					SenseTranslation(id=i * 20 + n, lang_code="fr", translation_text=f"mot {i}", rank=1),
+					SenseTranslation(id=i * 20 + n + 10, lang_code="en", translation_text=f"word {i}", rank=1),
+				],
+				relations=[SenseRelation(id=i * 10 + n, relation_type="synonym", fallback_text=f"ŋwɑ̀{i + 1}", rank=1)],
+			))
+		entries.append(entry)
+	return entries
+
+
+def _time(fn, repeat: int) -> float:
+	fn()  # warm-up
+	samples = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		fn()
+		samples.append((time.perf_counter() - started) * 1_000_000)
+	return statistics.median(samples)
+
+
+def run(rows: int, senses: int, repeat: int) -> list:
+	words = build_words(rows)
+	entries = build_entries(rows, senses)
+
+	def words_default():
+		return JSONResponse(jsonable_encoder(words)).body
+
+	def words_fast():
+		return FastJSONResponse([{**word, "updated_at": encode_datetime(word["updated_at"])} for word in words]).body
+
+	def entries_response_model():
+		return JSONResponse(jsonable_encoder([WordEntryOut.model_validate(entry) for entry in entries])).body
+
+	def entries_pydantic_json():
+		return ("[" + ",".join(WordEntryOut.model_validate(e).model_dump_json(by_alias=True) for e in entries) + "]").encode()
+
+	def entries_fast():
+		return dumps([trusted_dump(WordEntryOut, entry) for entry in entries])
+
+	assert json.loads(words_default()) == json.loads(words_fast())
+	assert json.loads(entries_pydantic_json()) == json.loads(entries_fast())
+
+	results = []
+	for name, variants in (
+		("words", {"default": words_default, "fast": words_fast}),
+		("entries", {"default": entries_response_model, "pydantic_json": entries_pydantic_json, "fast": entries_fast}),
+	):
+		timings = {variant: _time(fn, repeat) for variant, fn in variants.items()}
+		for variant, micros in timings.items():
+			results.append({
+				"benchmark": name,
+				"variant": variant,
+				"rows": rows,
+				"orjson": fastjson.orjson is not None,
+				"median_us": round(micros, 1),
+				"speedup_vs_default": round(timings["default"] / micros, 2) if micros else None,
+			})
+	return results
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--rows", type=int, default=200)
+	parser.add_argument("--senses", type=int, default=2, help="Senses per entry")
+	parser.add_argument("--repeat", type=int, default=200)
+	args = parser.parse_args()
+	for result in run(args.rows, args.senses, args.repeat):
+		print(json.dumps(result))
+
+
+if __name__ == "__main__":
+	main()
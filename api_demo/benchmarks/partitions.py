@@ -0,0 +1,171 @@
+"""Cross-language interference: one shared SQLite file vs one file per language.
+
+Starts the app under uvicorn twice, once with ``PARTITION_BY_LANGUAGE=false`` and once
+with it on (see app/db/partitions.py), each on a fresh database seeded with the Nufi word
+list. In each mode it reseeds Nufi ``--reseeds`` times while ``--writers`` threads create
+entries in Medumba and ``--readers`` threads list Medumba, then repeats the writes and
+reads with no reseed running. Prints one JSON result per mode and phase: reseed time,
+write and list latency (p50/p95/p99), failed writes (lock timeouts surface as 5xx) and
+the database size on disk.
+
+	python -m benchmarks.partitions --reseeds 3 --writers 2 --readers 2
+"""
+
+import argparse
+import itertools
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.api_load import Server, _percentile
+
+# Shared by both phases so created lemmas never collide.
+_lemma_numbers = itertools.count()
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+	return {
+		"requests": len(latencies),
+		"p50_ms": round(_percentile(latencies, 50), 3),
+		"p95_ms": round(_percentile(latencies, 95), 3),
+		"p99_ms": round(_percentile(latencies, 99), 3),
+	}
+
+
+def _disk_usage(workdir: Path) -> int:
+	return sum(path.stat().st_size for path in workdir.rglob("*.db*") if path.is_file())
+
+
+def _drive(base_url: str, headers: dict, language_id: int, writers: int, readers: int, stop: threading.Event) -> dict:
+	"""Create and list entries in ``language_id`` until ``stop`` is set."""
+	writes: List[float] = []
+	reads: List[float] = []
+	failures: Dict[str, int] = {}
+	lock = threading.Lock()
+
+	def write_loop() -> None:
+		with httpx.Client(base_url=base_url, timeout=120.0) as client:
+			while not stop.is_set():
+				with lock:
+					index = next(_lemma_numbers)
+				payload = {
+					"language_id": language_id,
+					"lemma_raw": f"bench{index}",
+					"senses": [{"sense_no": 1, "definition_text": "partition benchmark"}],
+				}
+				started = time.perf_counter()
+				response = client.post("/dictionary/word-entries", json=payload, headers=headers)
+				elapsed = (time.perf_counter() - started) * 1000
+				with lock:
+					if response.status_code == 200:
+						writes.append(elapsed)
+					else:
+						failures[str(response.status_code)] = failures.get(str(response.status_code), 0) + 1
+
+	def read_loop() -> None:
+		with httpx.Client(base_url=base_url, timeout=120.0) as client:
+			while not stop.is_set():
+				started = time.perf_counter()
+				response = client.get("/dictionary/word-entries", params={"language_id": language_id, "limit": 50})
+				elapsed = (time.perf_counter() - started) * 1000
+				with lock:
+					if response.status_code == 200:
+						reads.append(elapsed)
+					else:
+						failures[f"list_{response.status_code}"] = failures.get(f"list_{response.status_code}", 0) + 1
+
+	threads = [threading.Thread(target=write_loop) for _ in range(writers)]
+	threads += [threading.Thread(target=read_loop) for _ in range(readers)]
+	for thread in threads:
+		thread.start()
+	return {"threads": threads, "writes": writes, "reads": reads, "failures": failures}
+
+
+def _collect(state: dict) -> dict:
+	for thread in state["threads"]:
+		thread.join()
+	return {
+		"writes": _summary(state["writes"]),
+		"lists": _summary(state["reads"]),
+		"failed_requests": state["failures"],
+	}
+
+
+def run_mode(partitioned: bool, reseeds: int, writers: int, readers: int, idle_sec: float, bcrypt_rounds: int) -> List[dict]:
+	mode = "per_language_files" if partitioned else "shared_file"
+	with tempfile.TemporaryDirectory(prefix="partitions-bench-") as tmp:
+		workdir = Path(tmp)
+		server = Server(
+			f"sqlite:///{workdir / 'app.db'}",
+			workdir,
+			bcrypt_rounds,
+			env={
+				"PARTITION_BY_LANGUAGE": "true" if partitioned else "false",
+				"PARTITION_DIR": str(workdir / "partitions"),
+				"ACCESS_LOG_ENABLED": "false",
+			},
+		)
+		server.start()
+		try:
+			with httpx.Client(base_url=server.base_url, timeout=300.0) as client:
+				languages = {row["name"]: row["id"] for row in client.get("/dictionary/languages").json()}
+				token = client.post(
+					"/auth/login", json={"email": "superadmin@example.com", "password": "superadmin"}
+				).json()["access_token"]
+				headers = {"Authorization": f"Bearer {token}"}
+				other = languages["Medumba"]
+
+				stop = threading.Event()
+				state = _drive(server.base_url, headers, other, writers, readers, stop)
+				reseed_ms = []
+				for _ in range(reseeds):
+					started = time.perf_counter()
+					client.post(
+						"/dictionary/reseed",
+						params={"confirm": "true", "language_id": languages["Nufi"]},
+						headers=headers,
+					).raise_for_status()
+					reseed_ms.append((time.perf_counter() - started) * 1000)
+				stop.set()
+				during = _collect(state)
+
+				stop = threading.Event()
+				state = _drive(server.base_url, headers, other, writers, readers, stop)
+				time.sleep(idle_sec)
+				stop.set()
+				idle = _collect(state)
+		finally:
+			server.stop()
+		size = _disk_usage(workdir)
+	return [
+		{
+			"mode": mode,
+			"phase": "during_reseed",
+			"reseed_mean_ms": round(sum(reseed_ms) / len(reseed_ms), 3),
+			**during,
+			"disk_bytes": size,
+		},
+		{"mode": mode, "phase": "idle", **idle},
+	]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+	parser.add_argument("--reseeds", type=int, default=3)
+	parser.add_argument("--writers", type=int, default=2)
+	parser.add_argument("--readers", type=int, default=2)
+	parser.add_argument("--idle-sec", type=float, default=5.0, help="Length of the phase without a reseed")
+	parser.add_argument("--bcrypt-rounds", type=int, default=4)
+	args = parser.parse_args()
+	for partitioned in (False, True):
+		for result in run_mode(partitioned, args.reseeds, args.writers, args.readers, args.idle_sec, args.bcrypt_rounds):
+			print(json.dumps(result))
+
+
+if __name__ == "__main__":
+	main()
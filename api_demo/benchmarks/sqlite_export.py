@@ -0,0 +1,140 @@
+"""Snapshot export speed: row-by-row dict inserts vs the batched parallel exporter.
+
+Builds a source database with ``--entries`` word entries (plus one sense per two
+entries and a legacy word per ten), then exports it to SQLite with the previous
+approach (tables in sequence, ``fetchmany(1000)``, a dict per row through
+``table.insert()``) and with ``export_to_sqlite``. Pass ``--source-url`` to export an
+existing database (e.g. Postgres) instead of generating one.
+
+	python -m benchmarks.sqlite_export --entries 1000000 --workers 4
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+
+from app.db.base import Base
+from app.db.sqlite_export import export_to_sqlite
+
+
+def build_source(db_path: Path, entries: int) -> None:
+	engine = create_engine(f"sqlite:///{db_path}")
+	Base.metadata.create_all(bind=engine)
+	engine.dispose()
+	conn = sqlite3.connect(str(db_path))
+	conn.execute("PRAGMA journal_mode=OFF")
+	conn.execute("PRAGMA synchronous=OFF")
+	conn.execute("INSERT INTO languages (id, name, slug) VALUES (1, 'Nufi', 'nufi')")
+	created = "2026-01-01 00:00:00.000000"
+	batch = 50_000
+	for start in range(1, entries + 1, batch):
+		ids = range(start, min(entries, start + batch - 1) + 1)
+		conn.executemany(
+			"INSERT INTO word_entries (id, language_id, lemma_raw, lemma_nfc, pos, status, created_at, updated_at)"
+			" VALUES (?, 1, ?, ?, 'noun', 'draft', ?, ?)",
+			((i, f"ŋwɑ̀{i}", f"ŋwɑ̀{i}", created, created) for i in ids),
+		)
+		conn.executemany(
+			"INSERT INTO senses (word_entry_id, sense_no, definition_text) VALUES (?, 1, ?)",
+			((i, f"definition of entry {i}") for i in ids if i % 2 == 0),
+		)
+		conn.executemany(
+			"INSERT INTO words (language_id, word, definition, updated_at) VALUES (1, ?, ?, ?)",
+			((f"ŋwɑ̀{i}", f"definition {i}", created) for i in ids if i % 10 == 0),
+		)
+	conn.commit()
+	conn.close()
+
+
+def export_row_by_row(src_url: str, sqlite_path: Path) -> None:
+	# The exporter used before: sequential tables, dict per row, indexes maintained during load.
+	src_engine = create_engine(src_url)
+	dest_engine = create_engine(f"sqlite:///{sqlite_path}")
+	Base.metadata.create_all(bind=dest_engine)
+	with src_engine.connect() as src_conn, dest_engine.begin() as dest_conn:
+		for table in Base.metadata.sorted_tables:
+			result = src_conn.execute(select(table))
+			while True:
+				rows = result.fetchmany(1000)
+				if not rows:
+					break
+				dest_conn.execute(table.insert(), [dict(row._mapping) for row in rows])
+	src_engine.dispose()
+	dest_engine.dispose()
+
+
+def _counts(db_path: Path) -> dict:
+	conn = sqlite3.connect(str(db_path))
+	try:
+		return {
+			table.name: conn.execute(f'SELECT COUNT(*) FROM "{table.name}"').fetchone()[0]
+			for table in Base.metadata.sorted_tables
+		}
+	finally:
+		conn.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--entries", type=int, default=1_000_000)
+	parser.add_argument("--workers", type=int, default=4)
+	parser.add_argument("--batch-size", type=int, default=5000)
+	parser.add_argument("--source-url", default="")
+	parser.add_argument("--skip-baseline", action="store_true")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temp_dir:
+		root = Path(temp_dir)
+		src_url = args.source_url
+		if not src_url:
+			source = root / "source.db"
+			started = time.perf_counter()
+			build_source(source, args.entries)
+			src_url = f"sqlite:///{source}"
+			print(json.dumps({"benchmark": "sqlite_export_source", "entries": args.entries,
+				"build_ms": round((time.perf_counter() - started) * 1000, 1)}))
+
+		results = {}
+		if not args.skip_baseline:
+			baseline_path = root / "baseline.db"
+			started = time.perf_counter()
+			export_row_by_row(src_url, baseline_path)
+			results["row_by_row"] = {
+				"total_ms": round((time.perf_counter() - started) * 1000, 1),
+				"counts": _counts(baseline_path),
+			}
+
+		parallel_path = root / "parallel.db"
+		stats = export_to_sqlite(src_url, parallel_path, workers=args.workers, batch_size=args.batch_size)
+		results["parallel_batched"] = {
+			"total_ms": stats["total_ms"],
+			"load_ms": stats["load_ms"],
+			"index_ms": stats["index_ms"],
+			"counts": _counts(parallel_path),
+		}
+
+		for name, result in results.items():
+			rows = sum(result["counts"].values())
+			print(json.dumps({
+				"benchmark": "sqlite_export",
+				"exporter": name,
+				"workers": args.workers if name == "parallel_batched" else 1,
+				"rows": rows,
+				"rows_per_sec": round(rows / (result["total_ms"] / 1000), 1),
+				**{k: v for k, v in result.items() if k != "counts"},
+			}))
+		if "row_by_row" in results:
+			print(json.dumps({
+				"benchmark": "sqlite_export_summary",
+				"counts_match": results["row_by_row"]["counts"] == results["parallel_batched"]["counts"],
+				"speedup": round(results["row_by_row"]["total_ms"] / results["parallel_batched"]["total_ms"], 2),
+			}))
+
+
+if __name__ == "__main__":
+	main()
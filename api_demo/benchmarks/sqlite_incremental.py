@@ -0,0 +1,99 @@
+"""Bytes uploaded per edit: full SQLite snapshots vs page-level incremental backups.
+
+Seeds a temporary SQLite database from the word list, then applies single-word edits,
+taking a backup after each one in both modes against a local directory stand-in for S3.
+The incremental chain is restored at the end and checked byte-for-byte against the
+last snapshot.
+
+	python -m benchmarks.sqlite_incremental --edits 20
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.backup import _upload_sqlite_incremental, _write_sqlite_backup
+from app.db.base import Base
+from app.db.models import Language
+from app.db.seed import resolve_word_list_path, seed_words
+from app.db.sqlite_incremental import restore_chain
+from app.db.storage import LocalStorage
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--edits", type=int, default=20)
+	parser.add_argument("--full-every", type=int, default=1000)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temp_dir:
+		root = Path(temp_dir)
+		db_path = root / "bench.db"
+		engine = create_engine(f"sqlite:///{db_path}")
+		Base.metadata.create_all(bind=engine)
+		session = sessionmaker(bind=engine)()
+		language = Language(name="Nufi", slug="nufi")
+		session.add(language)
+		session.commit()
+		project_dir = Path(__file__).resolve().parents[1]
+		seed_words(session, resolve_word_list_path(project_dir, settings.WORD_LIST_PATH), language)
+		session.close()
+		engine.dispose()
+
+		settings.BACKUP_STATE_DIR = str(root / "state")
+		settings.S3_SQLITE_FULL_EVERY = args.full_every
+		full_storage = LocalStorage(root / "full")
+		incremental_storage = LocalStorage(root / "incremental")
+
+		conn = sqlite3.connect(str(db_path))
+		word_ids = [row[0] for row in conn.execute("SELECT id FROM words")]
+		rng = random.Random(7)
+		full_bytes = []
+		incremental_bytes = []
+		snapshot = root / "snapshot.db"
+		for edit in range(args.edits + 1):
+			if edit:
+				word_id = rng.choice(word_ids)
+				conn.execute(
+					"UPDATE words SET definition = ? WHERE id = ?",
+					(f"definition {edit} " * 4, word_id),
+				)
+				conn.commit()
+			snapshot.unlink(missing_ok=True)
+			_write_sqlite_backup(db_path, snapshot)
+			timestamp = f"20260101-{edit:06d}"
+			full_size = full_storage.put_file(snapshot, f"backups/bench-{timestamp}.db")
+			_, uploaded = _upload_sqlite_incremental(incremental_storage, snapshot, "backups", "bench", timestamp)
+			if edit:
+				# Edit 0 seeds both chains with a full copy, so it is not counted.
+				full_bytes.append(full_size)
+				incremental_bytes.append(uploaded)
+		conn.close()
+
+		manifest = json.loads(incremental_storage.get_bytes("backups/incremental/bench/latest.json"))
+		restored = root / "restored.db"
+		restore_chain(incremental_storage, manifest, restored)
+		identical = restored.read_bytes() == snapshot.read_bytes()
+
+	mean_full = sum(full_bytes) / len(full_bytes)
+	mean_incremental = sum(incremental_bytes) / len(incremental_bytes)
+	print(json.dumps({
+		"benchmark": "sqlite_incremental_backup",
+		"edits": args.edits,
+		"snapshot_bytes": full_bytes[-1],
+		"full_bytes_per_edit": round(mean_full, 1),
+		"incremental_bytes_per_edit": round(mean_incremental, 1),
+		"ratio": round(mean_incremental / mean_full, 4),
+		"restore_identical": identical,
+	}))
+
+
+if __name__ == "__main__":
+	main()
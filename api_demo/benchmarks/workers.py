@@ -0,0 +1,74 @@
+"""Throughput against the number of uvicorn worker processes.
+
+Starts the app once per ``--workers`` value with ``WEB_CONCURRENCY`` set (uvicorn's
+default worker count), on a temporary SQLite database seeded with the Nufi word list, and
+drives the read scenarios of ``benchmarks.api_load`` with ``--concurrency`` client
+threads. Prints one JSON result per worker count and scenario. Scaling is bounded by the
+CPU count reported with each result.
+
+	python -m benchmarks.workers --workers 1 2 4 --requests 400 --concurrency 16
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.api_load import Fixture, Server, build_scenarios, run_scenario
+
+SCENARIOS = ("get_entry", "list_first_page", "search")
+
+
+def run(workers: int, requests: int, concurrency: int, warmup_sec: float, bcrypt_rounds: int) -> list:
+	with tempfile.TemporaryDirectory(prefix="workers-bench-") as tmp:
+		workdir = Path(tmp)
+		server = Server(
+			f"sqlite:///{workdir / 'app.db'}",
+			workdir,
+			bcrypt_rounds,
+			env={
+				"WEB_CONCURRENCY": str(workers),
+				"COORDINATION_DIR": str(workdir / "coordination"),
+				"ACCESS_LOG_ENABLED": "false",
+			},
+		)
+		server.start()
+		try:
+			with httpx.Client(base_url=server.base_url, timeout=60.0) as client:
+				fixture = Fixture(client)
+				scenarios = build_scenarios(fixture, page_size=50)
+				# /health answers once the first worker is up; give the others time to finish booting.
+				deadline = time.monotonic() + warmup_sec
+				while time.monotonic() < deadline:
+					client.get("/dictionary/languages")
+				results = []
+				for name in SCENARIOS:
+					result = run_scenario(name, scenarios[name], client, requests, concurrency, warmup=10, seed=1)
+					results.append({"workers": workers, "cpus": os.cpu_count(), **result})
+				return results
+		finally:
+			server.stop()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+	parser.add_argument("--requests", type=int, default=400)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--warmup-sec", type=float, default=5.0)
+	parser.add_argument("--bcrypt-rounds", type=int, default=4)
+	args = parser.parse_args()
+	for workers in args.workers:
+		for result in run(workers, args.requests, args.concurrency, args.warmup_sec, args.bcrypt_rounds):
+			print(json.dumps({key: result[key] for key in (
+				"workers", "cpus", "scenario", "requests", "concurrency", "errors",
+				"throughput_rps", "p50_ms", "p95_ms", "p99_ms",
+			)}))
+
+
+if __name__ == "__main__":
+	main()
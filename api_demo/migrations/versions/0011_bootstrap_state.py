@@ -0,0 +1,28 @@
+"""Add bootstrap_state table for fast-start fingerprints.
+
+Revision ID: 0011_bootstrap_state
+Revises: 0010_add_sense_pos
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011_bootstrap_state'
+down_revision = '0010_add_sense_pos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	op.create_table(
+		'bootstrap_state',
+		sa.Column('key', sa.String(), nullable=False),
+		sa.Column('fingerprint', sa.String(), nullable=False),
+		sa.Column('updated_at', sa.DateTime(), nullable=True),
+		sa.PrimaryKeyConstraint('key')
+	)
+
+
+def downgrade() -> None:
+	op.drop_table('bootstrap_state')
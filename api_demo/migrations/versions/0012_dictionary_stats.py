@@ -0,0 +1,60 @@
+"""Add dictionary_stats counters table.
+
+Revision ID: 0012_dictionary_stats
+Revises: 0011_bootstrap_state
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012_dictionary_stats'
+down_revision = '0011_bootstrap_state'
+branch_labels = None
+depends_on = None
+
+# The grouped counts of app.db.stats._grouped_counters, in SQL of this revision's schema.
+WORD_DEFINED = "TRIM(COALESCE(words.definition, '')) <> ''"
+ENTRY_DEFINED = (
+	"EXISTS (SELECT 1 FROM senses WHERE senses.word_entry_id = word_entries.id "
+	"AND TRIM(senses.definition_text) <> '')"
+)
+COUNTS = f"""
+	SELECT language_id, 'words_total' AS metric, COUNT(*) AS value FROM words GROUP BY language_id
+	UNION ALL SELECT language_id, 'words_defined', COUNT(*) FROM words WHERE {WORD_DEFINED} GROUP BY language_id
+	UNION ALL SELECT language_id, 'contributor:' || CAST(updated_by_id AS VARCHAR), COUNT(*) FROM words
+		WHERE {WORD_DEFINED} AND updated_by_id IS NOT NULL GROUP BY language_id, updated_by_id
+	UNION ALL SELECT language_id, 'entries_total', COUNT(*) FROM word_entries GROUP BY language_id
+	UNION ALL SELECT language_id, 'entries_' || COALESCE(NULLIF(status, ''), 'draft'), COUNT(*) FROM word_entries
+		GROUP BY language_id, COALESCE(NULLIF(status, ''), 'draft')
+	UNION ALL SELECT language_id, 'entries_pos:' || pos, COUNT(*) FROM word_entries
+		WHERE pos IS NOT NULL AND pos <> '' GROUP BY language_id, pos
+	UNION ALL SELECT language_id, 'entries_defined', COUNT(*) FROM word_entries WHERE {ENTRY_DEFINED} GROUP BY language_id
+	UNION ALL SELECT language_id, 'contributor:' || CAST(updated_by_id AS VARCHAR), COUNT(*) FROM word_entries
+		WHERE {ENTRY_DEFINED} AND updated_by_id IS NOT NULL GROUP BY language_id, updated_by_id
+"""
+
+
+def upgrade() -> None:
+	op.create_table(
+		'dictionary_stats',
+		sa.Column('language_id', sa.Integer(), nullable=False),
+		sa.Column('metric', sa.String(), nullable=False),
+		sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+		sa.ForeignKeyConstraint(['language_id'], ['languages.id'], name='fk_dictionary_stats_language'),
+		sa.PrimaryKeyConstraint('language_id', 'metric')
+	)
+	# Write paths only add deltas, so start from the counts of the existing rows, as reconcile_stats would.
+	op.execute(
+		"INSERT INTO dictionary_stats (language_id, metric, value) "
+		f"SELECT language_id, metric, SUM(value) FROM ({COUNTS}) AS counts "
+		"WHERE language_id IN (SELECT id FROM languages) GROUP BY language_id, metric"
+	)
+	op.execute(
+		"UPDATE users SET defined_count = COALESCE((SELECT SUM(value) FROM dictionary_stats "
+		"WHERE metric = 'contributor:' || CAST(users.id AS VARCHAR)), 0)"
+	)
+
+
+def downgrade() -> None:
+	op.drop_table('dictionary_stats')
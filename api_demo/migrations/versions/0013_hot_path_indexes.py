@@ -0,0 +1,52 @@
+"""Composite and partial indexes for the dictionary hot paths.
+
+Revision ID: 0013_hot_path_indexes
+Revises: 0012_dictionary_stats
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013_hot_path_indexes'
+down_revision = '0012_dictionary_stats'
+branch_labels = None
+depends_on = None
+
+UNDEFINED_WORD = sa.text("definition IS NULL OR definition = ''")
+
+# (name, table, columns, extra kwargs); mirrors the Index definitions in app/db/models.py.
+INDEXES = [
+	('ix_word_entries_language_id_id', 'word_entries', ['language_id', 'id'], {}),
+	('ix_word_entries_language_status_id', 'word_entries', ['language_id', 'status', 'id'], {}),
+	('ix_sense_translations_sense_id_lang_code', 'sense_translations', ['sense_id', 'lang_code'], {}),
+	('ix_words_language_id_id', 'words', ['language_id', 'id'], {}),
+	('ix_words_language_lower_word', 'words', ['language_id', sa.text('lower(word)')], {}),
+	(
+		'ix_words_language_undefined', 'words', ['language_id', 'id'],
+		{'postgresql_where': UNDEFINED_WORD, 'sqlite_where': UNDEFINED_WORD},
+	),
+]
+
+# Single-column indexes from 0009 that the composites above make redundant.
+SUPERSEDED = [
+	('ix_word_entries_language_id', 'word_entries', ['language_id']),
+	('ix_sense_translations_sense_id', 'sense_translations', ['sense_id']),
+]
+
+
+def upgrade() -> None:
+	# CONCURRENTLY keeps the tables writable while the indexes build; it cannot run in a transaction.
+	with op.get_context().autocommit_block():
+		for name, table, columns, kwargs in INDEXES:
+			op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+		for name, table, _ in SUPERSEDED:
+			op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+	with op.get_context().autocommit_block():
+		for name, table, columns in SUPERSEDED:
+			op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+		for name, table, _, _ in reversed(INDEXES):
+			op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,45 @@
+"""Maintained definition flags: words.is_defined and word_entries.has_definition.
+
+Revision ID: 0014_definition_flags
+Revises: 0013_hot_path_indexes
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014_definition_flags'
+down_revision = '0013_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+UNDEFINED_WORD = sa.text("definition IS NULL OR definition = ''")
+
+
+def upgrade() -> None:
+	op.add_column('words', sa.Column('is_defined', sa.Boolean(), nullable=False, server_default=sa.false()))
+	op.add_column('word_entries', sa.Column('has_definition', sa.Boolean(), nullable=False, server_default=sa.false()))
+	# Everything starts false, so only the defined rows are rewritten.
+	op.execute("UPDATE words SET is_defined = TRUE WHERE TRIM(COALESCE(definition, '')) <> ''")
+	op.execute(
+		"UPDATE word_entries SET has_definition = TRUE WHERE EXISTS ("
+		"SELECT 1 FROM senses WHERE senses.word_entry_id = word_entries.id AND TRIM(senses.definition_text) <> '')"
+	)
+	with op.get_context().autocommit_block():
+		op.create_index(
+			'ix_words_language_defined_id', 'words', ['language_id', 'is_defined', 'id'],
+			postgresql_concurrently=True, if_not_exists=True,
+		)
+		op.drop_index('ix_words_language_undefined', table_name='words', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+	with op.get_context().autocommit_block():
+		op.create_index(
+			'ix_words_language_undefined', 'words', ['language_id', 'id'],
+			postgresql_where=UNDEFINED_WORD, sqlite_where=UNDEFINED_WORD,
+			postgresql_concurrently=True, if_not_exists=True,
+		)
+		op.drop_index('ix_words_language_defined_id', table_name='words', postgresql_concurrently=True, if_exists=True)
+	op.drop_column('word_entries', 'has_definition')
+	op.drop_column('words', 'is_defined')
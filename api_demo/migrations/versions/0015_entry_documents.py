@@ -0,0 +1,24 @@
+"""Pre-rendered word entry documents: word_entries.document.
+
+Revision ID: 0015_entry_documents
+Revises: 0014_definition_flags
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0015_entry_documents'
+down_revision = '0014_definition_flags'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	# Nullable, so adding it is a catalog-only change. Reads render entries without a
+	# document on the fly; `python -m app.db.documents rebuild --missing-only` stores them.
+	op.add_column('word_entries', sa.Column('document', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+	op.drop_column('word_entries', 'document')
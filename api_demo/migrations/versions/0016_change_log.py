@@ -0,0 +1,38 @@
+"""Change feed for delta sync: change_log.
+
+Revision ID: 0016_change_log
+Revises: 0015_entry_documents
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0016_change_log'
+down_revision = '0015_entry_documents'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+	op.create_table(
+		'change_log',
+		sa.Column('id', sa.Integer(), primary_key=True),
+		sa.Column('language_id', sa.Integer(), nullable=False),
+		sa.Column('entity', sa.String(), nullable=False),
+		sa.Column('entity_id', sa.Integer(), nullable=False),
+		sa.Column('op', sa.String(), nullable=False),
+		sa.Column('created_at', sa.DateTime(), nullable=True),
+	)
+	op.create_index('ix_change_log_language_id_id', 'change_log', ['language_id', 'id'])
+	# Existing rows become the first changes, so a client that syncs from 0 gets everything.
+	for entity, table in (('word', 'words'), ('word_entry', 'word_entries')):
+		op.execute(
+			"INSERT INTO change_log (language_id, entity, entity_id, op, created_at) "
+			f"SELECT language_id, '{entity}', id, 'upsert', CURRENT_TIMESTAMP FROM {table} ORDER BY id"
+		)
+
+
+def downgrade() -> None:
+	op.drop_index('ix_change_log_language_id_id', table_name='change_log')
+	op.drop_table('change_log')
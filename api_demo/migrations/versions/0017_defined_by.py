@@ -0,0 +1,32 @@
+"""Credit definitions to the user who made them: words/word_entries.defined_by_id.
+
+Revision ID: 0017_defined_by
+Revises: 0016_change_log
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0017_defined_by'
+down_revision = '0016_change_log'
+branch_labels = None
+depends_on = None
+
+TABLES = (('words', 'is_defined'), ('word_entries', 'has_definition'))
+
+
+def upgrade() -> None:
+	for table, flag in TABLES:
+		with op.batch_alter_table(table) as batch:
+			batch.add_column(sa.Column('defined_by_id', sa.Integer(), nullable=True))
+			batch.create_foreign_key(f'fk_{table}_defined_by', 'users', ['defined_by_id'], ['id'])
+		# The last editor is all the history there is; the contributor counters were keyed on it until now.
+		op.execute(f"UPDATE {table} SET defined_by_id = updated_by_id WHERE {flag}")
+
+
+def downgrade() -> None:
+	for table, _ in TABLES:
+		with op.batch_alter_table(table) as batch:
+			batch.drop_constraint(f'fk_{table}_defined_by', type_='foreignkey')
+			batch.drop_column('defined_by_id')
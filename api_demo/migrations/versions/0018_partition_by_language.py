@@ -0,0 +1,137 @@
+"""Partition word_entries and words by language (Postgres).
+
+Both tables become ``PARTITION BY LIST (language_id)`` with a ``<table>_l<id>`` partition per
+language and a ``<table>_default`` partition; app.db.partitions adds and drops a language's
+partitions with the language. A primary key on a partitioned table must include the
+partition key, so the keys become ``(id, language_id)``. The foreign keys into
+word_entries follow: ``senses.language_id`` and ``sense_relations.related_language_id``
+are added, filled by triggers from the entry the row points at (the ORM does not map
+them), and the foreign keys become ``(word_entry_id, language_id)`` and
+``(related_word_entry_id, related_language_id)``.
+
+Revision ID: 0018_partition_by_language
+Revises: 0017_defined_by
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0018_partition_by_language'
+down_revision = '0017_defined_by'
+branch_labels = None
+depends_on = None
+
+PARTITIONED = ('word_entries', 'words')
+# (table, entry id column, language column, foreign key name)
+REFERENCES = (
+	('senses', 'word_entry_id', 'language_id', 'fk_senses_word_entry'),
+	('sense_relations', 'related_word_entry_id', 'related_language_id', 'fk_sense_relations_related_word_entry'),
+)
+
+
+def _postgres() -> bool:
+	return op.get_bind().dialect.name == 'postgresql'
+
+
+def _drop_foreign_keys_into(table: str) -> None:
+	conn = op.get_bind()
+	referencing = conn.execute(sa.text(
+		"SELECT CAST(conrelid AS regclass)::text, conname FROM pg_constraint "
+		"WHERE confrelid = CAST(:table AS regclass) AND contype = 'f'"
+	), {'table': table}).all()
+	for owner, name in referencing:
+		op.execute(f'ALTER TABLE {owner} DROP CONSTRAINT "{name}"')
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+	"""Recreate ``table`` as a partitioned (or plain) table, keeping rows, sequence, constraints and indexes."""
+	conn = op.get_bind()
+	constraints = conn.execute(sa.text(
+		"SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+		"WHERE conrelid = CAST(:table AS regclass) AND contype IN ('u', 'f', 'c') ORDER BY conname"
+	), {'table': table}).all()
+	indexes = conn.execute(sa.text(
+		"SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+		"WHERE i.indrelid = CAST(:table AS regclass) "
+		"AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)"
+	), {'table': table}).scalars().all()
+	sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+
+	swap = f'{table}__swap'
+	if partitioned:
+		op.execute(f'CREATE TABLE "{swap}" (LIKE "{table}" INCLUDING DEFAULTS) PARTITION BY LIST (language_id)')
+		language_ids = conn.execute(sa.text(
+			f'SELECT id FROM languages UNION SELECT DISTINCT language_id FROM "{table}" ORDER BY 1'
+		)).scalars().all()
+		for language_id in language_ids:
+			op.execute(
+				f'CREATE TABLE "{table}_l{int(language_id)}" PARTITION OF "{swap}" FOR VALUES IN ({int(language_id)})'
+			)
+		op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{swap}" DEFAULT')
+	else:
+		op.execute(f'CREATE TABLE "{swap}" (LIKE "{table}" INCLUDING DEFAULTS)')
+	op.execute(f'INSERT INTO "{swap}" SELECT * FROM "{table}"')
+	if sequence:
+		# Dropping the old table would drop the sequence it owns.
+		op.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{swap}".id')
+	op.execute(f'DROP TABLE "{table}"')
+	op.execute(f'ALTER TABLE "{swap}" RENAME TO "{table}"')
+	op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({"id, language_id" if partitioned else "id"})')
+	for name, definition in constraints:
+		op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+	for definition in indexes:
+		op.execute(definition)
+
+
+def upgrade() -> None:
+	if not _postgres():
+		return  # SQLite partitions by file instead (app/db/partitions.py)
+	for table, entry_column, language_column, _ in REFERENCES:
+		op.add_column(table, sa.Column(language_column, sa.Integer(), nullable=True))
+		op.execute(
+			f"UPDATE {table} SET {language_column} = word_entries.language_id FROM word_entries "
+			f"WHERE word_entries.id = {table}.{entry_column}"
+		)
+		op.execute(f"""
+			CREATE FUNCTION {table}_{language_column}() RETURNS trigger AS $$
+			BEGIN
+				NEW.{language_column} := (SELECT language_id FROM word_entries WHERE id = NEW.{entry_column});
+				RETURN NEW;
+			END
+			$$ LANGUAGE plpgsql
+		""")
+		op.execute(
+			f"CREATE TRIGGER {table}_{language_column} BEFORE INSERT OR UPDATE OF {entry_column} ON {table} "
+			f"FOR EACH ROW EXECUTE FUNCTION {table}_{language_column}()"
+		)
+		# A dangling entry id leaves the language NULL, and a foreign key with a NULL column is not checked.
+		op.create_check_constraint(
+			f'ck_{table}_{language_column}', table, f'({entry_column} IS NULL) = ({language_column} IS NULL)'
+		)
+
+	for table in PARTITIONED:
+		_drop_foreign_keys_into(table)
+		_rebuild(table, partitioned=True)
+
+	for table, entry_column, language_column, name in REFERENCES:
+		op.execute(
+			f'ALTER TABLE {table} ADD CONSTRAINT "{name}" FOREIGN KEY ({entry_column}, {language_column}) '
+			"REFERENCES word_entries (id, language_id) ON UPDATE CASCADE"
+		)
+
+
+def downgrade() -> None:
+	if not _postgres():
+		return
+	for table in PARTITIONED:
+		_drop_foreign_keys_into(table)
+		_rebuild(table, partitioned=False)
+	for table, entry_column, language_column, name in REFERENCES:
+		op.drop_constraint(f'ck_{table}_{language_column}', table, type_='check')
+		op.execute(f"DROP TRIGGER {table}_{language_column} ON {table}")
+		op.execute(f"DROP FUNCTION {table}_{language_column}()")
+		op.drop_column(table, language_column)
+		op.execute(
+			f'ALTER TABLE {table} ADD CONSTRAINT "{name}" FOREIGN KEY ({entry_column}) REFERENCES word_entries (id)'
+		)
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time, so point the app at a throwaway database first.
+_test_dir = tempfile.mkdtemp(prefix="api-demo-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(_test_dir) / 'test.db'}")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("S3_AUTO_BACKUP_ENABLED", "false")
+os.environ.setdefault("BACKUP_STATE_DIR", str(Path(_test_dir) / "backup_state"))
+os.environ.setdefault("COORDINATION_DIR", str(Path(_test_dir) / "coordination"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
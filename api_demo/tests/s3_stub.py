@@ -0,0 +1,71 @@
+"""In-memory stand-in for the subset of the boto3 S3 client used by S3Storage."""
+
+import hashlib
+import io
+import itertools
+from datetime import datetime, timezone
+
+
+class _Body(io.BytesIO):
+	pass
+
+
+class LocalS3Client:
+	def __init__(self, page_size: int = 1000):
+		self.objects = {}
+		self.uploads = {}
+		self.page_size = page_size
+		self.fail_part = None
+		self._ids = itertools.count(1)
+
+	def put_object(self, Bucket, Key, Body):
+		self.objects[(Bucket, Key)] = (bytes(Body), datetime.now(timezone.utc))
+		return {"ETag": hashlib.md5(bytes(Body)).hexdigest()}
+
+	def create_multipart_upload(self, Bucket, Key):
+		upload_id = f"upload-{next(self._ids)}"
+		self.uploads[upload_id] = {"Bucket": Bucket, "Key": Key, "parts": {}}
+		return {"UploadId": upload_id}
+
+	def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+		if self.fail_part == PartNumber:
+			raise IOError(f"part {PartNumber} failed")
+		self.uploads[UploadId]["parts"][PartNumber] = bytes(Body)
+		return {"ETag": hashlib.md5(bytes(Body)).hexdigest()}
+
+	def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+		upload = self.uploads.pop(UploadId)
+		numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+		assert numbers == sorted(numbers) == list(range(1, len(numbers) + 1))
+		body = b"".join(upload["parts"][number] for number in numbers)
+		self.objects[(Bucket, Key)] = (body, datetime.now(timezone.utc))
+
+	def abort_multipart_upload(self, Bucket, Key, UploadId):
+		self.uploads.pop(UploadId, None)
+
+	def get_object(self, Bucket, Key):
+		body, _ = self.objects[(Bucket, Key)]
+		return {"Body": _Body(body)}
+
+	def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+		keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+		start = int(ContinuationToken or 0)
+		page = keys[start:start + self.page_size]
+		response = {
+			"Contents": [
+				{
+					"Key": key,
+					"Size": len(self.objects[(Bucket, key)][0]),
+					"LastModified": self.objects[(Bucket, key)][1],
+				}
+				for key in page
+			],
+			"IsTruncated": start + self.page_size < len(keys),
+		}
+		if response["IsTruncated"]:
+			response["NextContinuationToken"] = str(start + self.page_size)
+		return response
+
+	def delete_objects(self, Bucket, Delete):
+		for item in Delete["Objects"]:
+			self.objects.pop((Bucket, item["Key"]), None)
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import password_pool
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture(scope="module")
+def credentials(client):
+	credentials = {"email": "async.login@example.com", "password": "correct horse 1"}
+	assert client.post("/auth/register", json=credentials).status_code == 200
+	return credentials
+
+
+def test_register_and_login(client, credentials):
+	assert client.post("/auth/register", json=credentials).status_code == 409
+
+	response = client.post("/auth/login", json=credentials)
+	assert response.status_code == 200
+	assert response.json()["access_token"]
+	assert client.post("/auth/login", json={**credentials, "password": "wrong"}).status_code == 401
+
+
+def test_full_pool_answers_503_without_waiting(client, credentials):
+	held = 0
+	while password_pool._slots.acquire(blocking=False):
+		held += 1
+	rejected = password_pool.stats()["rejected"]
+	try:
+		started = time.perf_counter()
+		response = client.post("/auth/login", json=credentials)
+		elapsed = time.perf_counter() - started
+	finally:
+		for _ in range(held):
+			password_pool._slots.release()
+	assert response.status_code == 503
+	assert response.headers["retry-after"] == "1"
+	assert elapsed < password_pool.wait_timeout
+	assert password_pool.stats()["rejected"] == rejected + 1
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.security import verify_password
+from app.db.bootstrap import Bootstrapper, write_fingerprint
+from app.db.models import Language, User, Word
+from app.main import app
+
+ADMIN = "bootstrap.admin@example.com"
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+	"""A fresh SQLite database and word list, with seeding and the super admin turned on."""
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("a\nb\n", encoding="utf-8")
+	monkeypatch.setattr(settings, "AUTO_SEED_ON_START", True)
+	monkeypatch.setattr(settings, "WORD_LIST_PATH", str(word_list))
+	monkeypatch.setattr(settings, "AUTO_CREATE_SUPER_ADMIN", True)
+	monkeypatch.setattr(settings, "SUPER_ADMIN_EMAIL", ADMIN)
+	monkeypatch.setattr(settings, "SUPER_ADMIN_PASSWORD", "first admin 1")
+	engine = create_engine(f"sqlite:///{tmp_path / 'bootstrap.db'}")
+	yield engine, sessionmaker(bind=engine), tmp_path, word_list
+	engine.dispose()
+
+
+def _start(project, fast_start: bool = True) -> dict:
+	"""Start up the way create_app does; returns whether each phase ran."""
+	engine, factory, project_dir, _ = project
+	bootstrapper = Bootstrapper(engine, factory, project_dir, fast_start=fast_start)
+	bootstrapper.run_schema()
+	bootstrapper.mark_serving()
+	bootstrapper.start_background()
+	assert bootstrapper.ready.wait(30)
+	metrics = bootstrapper.metrics()
+	assert metrics["ready"] and metrics["fast_start"] == fast_start
+	assert metrics["startup_ms"] <= metrics["bootstrap_ms"]
+	assert all(phase["duration_ms"] >= 0 for phase in metrics["phases"].values())
+	return {name: phase["ran"] for name, phase in metrics["phases"].items()}
+
+
+def test_fast_start_skips_current_phases(project):
+	engine, factory, _, word_list = project
+	assert _start(project) == {"schema": True, "seed": True, "super_admin": True}
+	assert _start(project) == {"schema": False, "seed": False, "super_admin": False}
+	with factory() as db:
+		nufi = db.query(Language).filter(Language.name == "Nufi").one()
+		assert db.query(Word).filter(Word.language_id == nufi.id).count() == 2
+
+	# Without fast start every phase runs, fingerprints or not.
+	assert _start(project, fast_start=False) == {"schema": True, "seed": True, "super_admin": True}
+
+
+def test_changed_inputs_rerun_their_phase(project, monkeypatch):
+	engine, factory, _, word_list = project
+	_start(project)
+
+	word_list.write_text("a\nb\nc\n", encoding="utf-8")
+	assert _start(project) == {"schema": False, "seed": True, "super_admin": False}
+	with factory() as db:
+		nufi = db.query(Language).filter(Language.name == "Nufi").one()
+		assert db.query(Word).filter(Word.language_id == nufi.id).count() == 3
+
+	monkeypatch.setattr(settings, "SUPER_ADMIN_PASSWORD", "second admin 2")
+	assert _start(project) == {"schema": False, "seed": False, "super_admin": True}
+	with factory() as db:
+		admin = db.query(User).filter(User.email == ADMIN).one()
+		assert verify_password("second admin 2", admin.password_hash)
+
+	# A stored schema fingerprint from another version of the models.
+	with factory() as db:
+		write_fingerprint(db, "schema", "older models")
+	assert _start(project) == {"schema": True, "seed": False, "super_admin": False}
+
+	# A demoted admin is restored even though the password did not change.
+	with factory() as db:
+		db.query(User).filter(User.email == ADMIN).update({"role": "user"})
+		db.commit()
+	assert _start(project)["super_admin"]
+
+
+def test_phase_metrics_are_exported():
+	with TestClient(app) as client:
+		body = client.get("/metrics").text
+	assert 'app_bootstrap_phase_ms{phase="schema"}' in body
+	assert "app_startup_ready 1" in body
@@ -0,0 +1,159 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.bundles import build_bundle, bundle_dir, bundle_path, read_manifest
+from app.db.changes import ENTITY_WORD, OP_DELETE, record_changes
+from app.db.models import Word
+from app.db.session import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture
+def language(client, tmp_path, monkeypatch):
+	"""A language with two words and an entry, bundled under a BUNDLE_DIR of its own."""
+	monkeypatch.setattr(settings, "BUNDLE_DIR", str(tmp_path / "bundles"))
+	monkeypatch.setattr(settings, "BUNDLE_KEEP", 2)
+	credentials = {"email": "bundles@example.com", "password": "bundle pass 1"}
+	client.post("/auth/register", json=credentials)
+	token = client.post("/auth/login", json=credentials).json()["access_token"]
+	headers = {"Authorization": f"Bearer {token}"}
+	language_id = client.post("/dictionary/languages", json={"name": f"Bundles {tmp_path.name}"}).json()["id"]
+	for word in ("ŋkɑ̀", "mbʉ̀"):
+		client.post("/dictionary", json={"language_id": language_id, "word": word, "definition": word}, headers=headers)
+	client.post(
+		"/dictionary/word-entries",
+		json={"language_id": language_id, "lemma_raw": "Ndà", "senses": [{"sense_no": 1, "definition_text": "house"}]},
+		headers=headers,
+	)
+	return language_id, headers
+
+
+def _build(language_id: int, **kwargs) -> dict:
+	db = SessionLocal()
+	try:
+		return build_bundle(db, language_id, **kwargs)
+	finally:
+		db.close()
+
+
+def _tables(path) -> dict:
+	with sqlite3.connect(path) as conn:
+		return {
+			table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+			for table in ("entries", "words")
+		}
+
+
+def _assert_matches_full_build(manifest: dict, tmp_path) -> None:
+	full = _build(manifest["language_id"], root=str(tmp_path / "full"), full=True)
+	assert full["mode"] == "full" and full["version"] == manifest["version"]
+	assert _tables(bundle_path(manifest)) == _tables(bundle_path(full, str(tmp_path / "full")))
+
+
+def test_incremental_rebuild_matches_full_build(client, language, tmp_path):
+	language_id, headers = language
+	first = _build(language_id)
+	assert (first["mode"], first["entries"], first["words"]) == ("full", 1, 2)
+	with sqlite3.connect(bundle_path(first)) as conn:
+		assert conn.execute("SELECT search_key, fold_key FROM entries").fetchone() == ("ndà", "nda")
+
+	# An edit, a new word and a deleted word are patched into a copy of the previous bundle.
+	word_id = client.get(f"/dictionary?language_id={language_id}&search=ŋkɑ̀&exact=true").json()[0]["id"]
+	client.put(f"/dictionary/{word_id}?language_id={language_id}", json={"definition": "changed"}, headers=headers)
+	client.post("/dictionary", json={"language_id": language_id, "word": "ntɑ́", "definition": "new"}, headers=headers)
+	db = SessionLocal()
+	try:
+		gone = db.query(Word).filter(Word.language_id == language_id, Word.word == "mbʉ̀").one()
+		db.delete(gone)
+		record_changes(db, language_id, ENTITY_WORD, [gone.id], OP_DELETE)
+		db.commit()
+	finally:
+		db.close()
+	second = _build(language_id)
+	assert (second["mode"], second["changes_applied"], second["words"]) == ("incremental", 3, 2)
+	assert second["version"] > first["version"]
+	_assert_matches_full_build(second, tmp_path)
+
+
+def test_reset_forces_a_full_build(client, language, tmp_path, monkeypatch):
+	language_id, _ = language
+	_build(language_id)
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("a\nb\nc\n", encoding="utf-8")
+	monkeypatch.setattr(settings, "WORD_LIST_PATH", str(word_list))
+	client.post(f"/dictionary/reseed?confirm=true&language_id={language_id}")
+	manifest = _build(language_id)
+	assert (manifest["mode"], manifest["entries"], manifest["words"]) == ("full", 3, 3)
+	_assert_matches_full_build(manifest, tmp_path)
+
+	# Once the language is deleted there is nothing to build; the scheduler removes its bundles.
+	assert client.delete(f"/dictionary/languages/{language_id}").status_code == 200
+	with pytest.raises(LookupError):
+		_build(language_id)
+
+
+def test_unchanged_cursor_keeps_the_version(language):
+	language_id, _ = language
+	first = _build(language_id)
+	assert _build(language_id) == first
+	assert _build(language_id, full=True) == first
+	# A damaged file is rebuilt, under the same version.
+	with bundle_path(first).open("r+b") as handle:
+		handle.write(b"damaged")
+	rebuilt = _build(language_id, full=True)
+	assert rebuilt["version"] == first["version"] and rebuilt["built_at"] != first["built_at"]
+
+
+def test_old_versions_are_pruned_to_bundle_keep(client, language):
+	language_id, headers = language
+	versions = []
+	for number in range(3):
+		client.post("/dictionary", json={"language_id": language_id, "word": f"mot{number}", "definition": "x"}, headers=headers)
+		versions.append(_build(language_id)["version"])
+	files = sorted(path.name for path in bundle_dir(language_id).glob("*.sqlite"))
+	slug = read_manifest(language_id)["language_slug"]
+	assert files == sorted(f"{slug}-v{version}.sqlite" for version in versions[1:])
+	assert read_manifest(language_id, version=versions[0]) is None
+	assert read_manifest(language_id, version=versions[1])["version"] == versions[1]
+	assert client.get(f"/dictionary/bundles/{language_id}/download?version={versions[0]}").status_code == 404
+	assert client.get(f"/dictionary/bundles/{language_id}/download?version={versions[1]}").status_code == 200
+
+
+def test_download_conditional_and_range_requests(client, language):
+	language_id, headers = language
+	manifest = _build(language_id)
+	url = f"/dictionary/bundles/{language_id}/download"
+	response = client.get(url)
+	assert response.status_code == 200
+	etag = response.headers["etag"]
+	assert etag == client.get(f"/dictionary/bundles/{language_id}").json()["etag"]
+	assert response.content == bundle_path(manifest).read_bytes()
+
+	assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+	assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+	partial = client.get(url, headers={"Range": "bytes=0-99"})
+	assert partial.status_code == 206
+	assert partial.content == response.content[:100]
+	assert partial.headers["content-range"] == f"bytes 0-99/{manifest['size']}"
+	resumed = client.get(url, headers={"Range": "bytes=100-", "If-Range": etag})
+	assert resumed.status_code == 206
+	assert partial.content + resumed.content == response.content
+
+	# After a rebuild the old ETag no longer matches: the whole new file is sent.
+	client.post("/dictionary", json={"language_id": language_id, "word": "nouveau", "definition": "x"}, headers=headers)
+	_build(language_id)
+	stale = client.get(url, headers={"Range": "bytes=100-", "If-Range": etag})
+	assert stale.status_code == 200 and stale.headers["etag"] != etag
+	# The previous version can still be resumed.
+	old = client.get(f"{url}?version={manifest['version']}", headers={"Range": "bytes=100-", "If-Range": etag})
+	assert old.status_code == 206 and old.content == resumed.content
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.models import WordEntry
+from app.db.session import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture
+def language_id(client, request):
+	return client.post("/dictionary/languages", json={"name": f"Changes {request.node.name}"}).json()["id"]
+
+
+def _changes(client, language_id: int, since: int = 0, limit: int = 500) -> dict:
+	response = client.get("/dictionary/changes", params={"language_id": language_id, "since": since, "limit": limit})
+	assert response.status_code == 200
+	return response.json()
+
+
+def _entry(language_id: int, lemma: str, definition: str, **fields) -> dict:
+	return {"language_id": language_id, "lemma_raw": lemma, "senses": [{"sense_no": 1, "definition_text": definition}], **fields}
+
+
+def test_feed_pages_collapses_and_reports_deletes(client, language_id):
+	word = client.post("/dictionary", json={"language_id": language_id, "word": "tʉ̀", "definition": "one"}).json()
+	entry = client.post("/dictionary/word-entries", json=_entry(language_id, "tʉ̀", "one")).json()
+	for definition in ("two", "three"):
+		client.put(f"/dictionary/word-entries/{entry['id']}", json=_entry(language_id, "tʉ̀", definition))
+	other = client.post("/dictionary/word-entries", json=_entry(language_id, "kɑ̀", "other")).json()
+
+	# Paging: five rows, two at a time, cursor from next_cursor. Rows collapse within a page only.
+	pages, since = [], 0
+	while True:
+		page = _changes(client, language_id, since, limit=2)
+		pages.append(page)
+		since = page["next_cursor"]
+		if not page["has_more"]:
+			break
+	assert [page["has_more"] for page in pages] == [True, True, False]
+	seqs = [change["seq"] for page in pages for change in page["changes"]]
+	assert seqs == sorted(seqs) and seqs[-1] == since
+	assert [[(c["entity"], c["id"]) for c in page["changes"]] for page in pages] == [
+		[("word", word["id"]), ("word_entry", entry["id"])],
+		[("word_entry", entry["id"])],
+		[("word_entry", other["id"])],
+	]
+	assert _changes(client, language_id, since) == {
+		"language_id": language_id, "since": since, "next_cursor": since, "has_more": False, "changes": [],
+	}
+
+	# One page over everything: the three rows of the edited entry collapse into its latest.
+	feed = _changes(client, language_id)
+	assert [(c["entity"], c["id"], c["op"]) for c in feed["changes"]] == [
+		("word", word["id"], "upsert"),
+		("word_entry", entry["id"], "upsert"),
+		("word_entry", other["id"], "upsert"),
+	]
+	assert feed["next_cursor"] == max(seqs)
+	assert feed["changes"][1]["data"] == client.get(f"/dictionary/word-entries/{entry['id']}").json()
+	assert feed["changes"][1]["data"]["senses"][0]["definition_text"] == "three"
+	assert feed["changes"][0]["data"]["definition"] == "one"
+
+	# A row removed after its upsert was recorded is reported as a delete.
+	db = SessionLocal()
+	try:
+		db.delete(db.get(WordEntry, other["id"]))
+		db.commit()
+	finally:
+		db.close()
+	vanished = _changes(client, language_id)["changes"][-1]
+	assert (vanished["id"], vanished["op"], vanished["data"]) == (other["id"], "delete", None)
+
+
+def test_reseed_and_delete_leave_a_single_language_row(client, language_id, tmp_path, monkeypatch):
+	client.post("/dictionary", json={"language_id": language_id, "word": "mɑ̀", "definition": "before"})
+	cursor = _changes(client, language_id)["next_cursor"]
+
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("mɑ̀\nŋɑ̀\n", encoding="utf-8")
+	monkeypatch.setattr(settings, "WORD_LIST_PATH", str(word_list))
+	client.post("/dictionary/reseed", params={"confirm": "true", "language_id": language_id})
+
+	# A client at the old cursor first sees the reset, then the reseeded rows.
+	feed = _changes(client, language_id, cursor)
+	first, rest = feed["changes"][0], feed["changes"][1:]
+	assert (first["entity"], first["id"], first["op"], first["data"]) == ("language", language_id, "reset", None)
+	assert first["seq"] > cursor
+	assert sorted(c["entity"] for c in rest) == ["word", "word", "word_entry", "word_entry"]
+	assert all(c["op"] == "upsert" for c in rest)
+	# The history before the reseed is gone.
+	assert _changes(client, language_id)["changes"] == feed["changes"]
+
+	assert client.delete(f"/dictionary/languages/{language_id}").status_code == 200
+	changes = _changes(client, language_id)["changes"]
+	assert [(c["entity"], c["id"], c["op"], c["data"]) for c in changes] == [("language", language_id, "delete", None)]
@@ -0,0 +1,77 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from app.db import coordination
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+
+
+def _other_worker(code: str) -> subprocess.Popen:
+	"""A second process sharing COORDINATION_DIR with this one."""
+	return subprocess.Popen(
+		[sys.executable, "-c", textwrap.dedent(code)],
+		cwd=PROJECT_DIR,
+		stdin=subprocess.PIPE,
+		stdout=subprocess.PIPE,
+		text=True,
+	)
+
+
+def test_process_lock_excludes_other_processes():
+	worker = _other_worker("""
+		import sys
+		from app.db.coordination import process_lock
+		with process_lock("backup"):
+			print("held", flush=True)
+			sys.stdin.readline()
+	""")
+	try:
+		assert worker.stdout.readline().strip() == "held"
+		with coordination.process_lock("backup", blocking=False) as held:
+			assert not held
+	finally:
+		worker.communicate("\n", timeout=30)
+	with coordination.process_lock("backup", blocking=False) as held:
+		assert held
+
+
+def test_invalidation_reaches_other_workers():
+	cleared = []
+	coordination.register_cache("test_cache", lambda: cleared.append(True))
+	coordination.poll_invalidations()
+	cleared.clear()
+
+	worker = _other_worker("""
+		from app.db.coordination import invalidate
+		invalidate("test_cache")
+	""")
+	worker.communicate(timeout=30)
+	assert worker.returncode == 0
+
+	assert coordination.poll_invalidations() == 1
+	assert cleared == [True]
+	assert coordination.poll_invalidations() == 0
+
+	# Our own invalidations clear locally at once and are not picked up again by polling.
+	coordination.invalidate("test_cache")
+	assert cleared == [True, True]
+	assert coordination.poll_invalidations() == 0
+
+
+def test_state_round_trip():
+	coordination.write_state("test_value", "1.5")
+	assert coordination.read_state("test_value") == "1.5"
+	assert coordination.read_state("missing_value") is None
+
+
+def test_process_lock_without_os_file_locks(monkeypatch):
+	monkeypatch.setattr(coordination, "fcntl", None)
+	monkeypatch.setattr(coordination, "msvcrt", None)
+	with coordination.process_lock("local_only") as held:
+		assert held
+		with coordination.process_lock("local_only", blocking=False) as again:
+			assert not again
+	with coordination.process_lock("local_only", blocking=False) as held:
+		assert held
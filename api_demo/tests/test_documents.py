@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.documents import load_entries
+from app.db.models import WordEntry
+from app.db.session import SessionLocal
+from app.main import app
+from app.schemas.dictionary import WordEntryOut
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture(scope="module")
+def language_id(client):
+	return client.post("/dictionary/languages", json={"name": "Document Test"}).json()["id"]
+
+
+def _entry(language_id: int, lemma: str, definition: str, **sense) -> dict:
+	return {
+		"language_id": language_id,
+		"lemma_raw": lemma,
+		"senses": [{"sense_no": 1, "definition_text": definition, **sense}],
+	}
+
+
+def _stored(entry_id: int):
+	"""(stored document, freshly validated WordEntryOut JSON) for an entry."""
+	db = SessionLocal()
+	try:
+		document = db.query(WordEntry.document).filter(WordEntry.id == entry_id).scalar()
+		rendered = WordEntryOut.model_validate(load_entries(db, [entry_id])[0]).model_dump_json(by_alias=True)
+		return document, rendered
+	finally:
+		db.close()
+
+
+def test_update_rewrites_the_stored_document(client, language_id):
+	entry = client.post("/dictionary/word-entries", json=_entry(language_id, "ŋgʉ̀", "first")).json()
+	created, rendered = _stored(entry["id"])
+	assert json.loads(created) == json.loads(rendered)
+
+	response = client.put(
+		f"/dictionary/word-entries/{entry['id']}",
+		json=_entry(
+			language_id,
+			"ŋgʉ̀",
+			"second",
+			id=entry["senses"][0]["id"],
+			examples=[{"example_text": "ŋgʉ̀ example"}],
+			translations=[{"lang_code": "fr", "translation_text": "second"}],
+		),
+	)
+	assert response.status_code == 200
+	updated, rendered = _stored(entry["id"])
+	assert updated != created
+	assert json.loads(updated) == json.loads(rendered) == response.json()
+	sense = json.loads(updated)["senses"][0]
+	assert sense["definition_text"] == "second"
+	assert [example["example_text"] for example in sense["examples"]] == ["ŋgʉ̀ example"]
+	assert client.get(f"/dictionary/word-entries/{entry['id']}").json() == response.json()
+
+
+def test_entries_without_a_document_render_on_read(client, language_id):
+	entry = client.post("/dictionary/word-entries", json=_entry(language_id, "ŋgʉ́", "bulk loaded")).json()
+	db = SessionLocal()
+	try:
+		db.execute(update(WordEntry).where(WordEntry.id == entry["id"]).values(document=None, updated_at=WordEntry.updated_at))
+		db.commit()
+	finally:
+		db.close()
+
+	assert client.get(f"/dictionary/word-entries/{entry['id']}").json() == entry
+	listed = client.get("/dictionary/word-entries", params={"language_id": language_id}).json()
+	assert entry in listed
+	document, rendered = _stored(entry["id"])
+	assert document is None  # rendered for the response only, not stored
+	assert json.loads(rendered) == entry
+
+
+def test_sense_register_is_optional(client, language_id):
+	# The field is declared as register_: named "register", an omitted value fell through to
+	# BaseModel.register (a classmethod) instead of None and the insert failed.
+	without = client.post("/dictionary/word-entries", json=_entry(language_id, "mbʉ̀", "plain"))
+	assert without.status_code == 200
+	assert without.json()["senses"][0]["register"] is None
+	entry = client.post("/dictionary/word-entries", json=_entry(language_id, "mbɑ̀", "formal", register="formal")).json()
+	assert entry["senses"][0]["register"] == "formal"
+	assert "register_" not in entry["senses"][0]
+
+	response = client.put(
+		f"/dictionary/word-entries/{entry['id']}",
+		json=_entry(language_id, "mbɑ̀", "plain again", id=entry["senses"][0]["id"]),
+	)
+	assert response.status_code == 200
+	assert response.json()["senses"][0]["register"] is None
+	document, rendered = _stored(entry["id"])
+	assert json.loads(document)["senses"][0]["register"] is None
@@ -0,0 +1,109 @@
+"""FAST_JSON must not change what the list endpoints return."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import fastjson
+from app.core.config import settings
+from app.db.documents import rebuild_documents
+from app.db.session import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture(scope="module")
+def language_id(client):
+	"""Defined and undefined words, and entries whose senses have examples, translations and a relation."""
+	credentials = {"email": "fastjson@example.com", "password": "fast json 1"}
+	client.post("/auth/register", json=credentials)
+	token = client.post("/auth/login", json=credentials).json()["access_token"]
+	headers = {"Authorization": f"Bearer {token}"}
+	language_id = client.post("/dictionary/languages", json={"name": "Fast JSON"}).json()["id"]
+	client.post("/dictionary", json={
+		"language_id": language_id, "word": "ŋkɑ̀", "definition": "défini \"cité\"", "examples": "a\nb",
+		"translation_fr": "é", "translation_en": "e",
+	}, headers=headers)
+	client.post("/dictionary", json={"language_id": language_id, "word": "mbʉ̀", "definition": " "}, headers=headers)
+	target = client.post("/dictionary/word-entries", json={
+		"language_id": language_id, "lemma_raw": "ndà",
+		"senses": [{"sense_no": 1, "definition_text": "maison"}],
+	}, headers=headers).json()
+	response = client.post("/dictionary/word-entries", json={
+		"language_id": language_id, "lemma_raw": "Ndàʼ", "pos": "noun", "status": "published",
+		"senses": [
+			{
+				"sense_no": 1, "definition_text": "case", "register": "formal", "domain": "home",
+				"examples": [{"example_text": "ndàʼ à", "translation_fr": "la case", "rank": 1}],
+				"translations": [{"lang_code": "fr", "translation_text": "case"}],
+				"relations": [{"relation_type": "synonym", "related_word_entry_id": target["id"]}],
+			},
+			{"sense_no": 2, "definition_text": "foyer"},
+		],
+	}, headers=headers)
+	assert response.status_code == 200
+	return language_id
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+	if request.param == "orjson":
+		if fastjson.orjson is None:
+			pytest.skip("orjson is not installed")
+	else:
+		monkeypatch.setattr(fastjson, "orjson", None)
+	return request.param
+
+
+def _get(client, monkeypatch, fast: bool, url: str):
+	monkeypatch.setattr(settings, "FAST_JSON", fast)
+	response = client.get(url)
+	assert response.status_code == 200
+	return response
+
+
+def test_word_lists_match(client, language_id, serializer, monkeypatch):
+	url = f"/dictionary?language_id={language_id}"
+	default = _get(client, monkeypatch, False, url)
+	fast = _get(client, monkeypatch, True, url)
+	assert fast.content == default.content
+	words = fast.json()
+	assert [word["word"] for word in words] == ["ŋkɑ̀", "mbʉ̀"]
+	assert words[0]["updated_by_email"] == "fastjson@example.com"
+	assert words[0]["updated_at"] and words[0]["examples"] == "a\nb"
+
+	# Random order: compare the rows, not the bytes.
+	url = f"/dictionary/random?language_id={language_id}&limit=200"
+	default = _get(client, monkeypatch, False, url).json()
+	fast = _get(client, monkeypatch, True, url).json()
+	assert sorted(fast, key=lambda word: word["id"]) == sorted(default, key=lambda word: word["id"])
+	assert [word["word"] for word in fast] == ["mbʉ̀"]
+
+
+def test_entry_documents_match(client, language_id, serializer, monkeypatch):
+	url = f"/dictionary/word-entries?language_id={language_id}"
+	# Documents are rendered when entries are written; re-render them in each mode.
+	bodies = {}
+	for fast in (False, True):
+		monkeypatch.setattr(settings, "FAST_JSON", fast)
+		db = SessionLocal()
+		try:
+			assert rebuild_documents(db, language_id) == 2
+		finally:
+			db.close()
+		bodies[fast] = _get(client, monkeypatch, fast, url).content
+	assert bodies[True] == bodies[False]
+	entries = json.loads(bodies[True])
+	assert entries[0]["created_at"] and entries[0]["updated_at"]
+	sense = entries[1]["senses"][0]
+	assert (sense["register"], sense["domain"]) == ("formal", "home")
+	assert sense["examples"][0]["translation_fr"] == "la case"
+	assert sense["translations"][0]["translation_text"] == "case"
+	assert sense["relations"][0]["related_word_entry_id"] == entries[0]["id"]
+	assert [sense["sense_no"] for sense in entries[1]["senses"]] == [1, 2]
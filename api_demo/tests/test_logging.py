@@ -0,0 +1,99 @@
+import logging
+import random
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import logging as app_logging
+from app.core.config import settings
+from app.main import app
+
+
+class _Capture(logging.Handler):
+	def __init__(self):
+		super().__init__()
+		self.events = []
+
+	def emit(self, record):
+		self.events.append(record.msg)
+
+
+@pytest.fixture
+def captured():
+	handler = _Capture()
+	app_logging.logger.addHandler(handler)
+	yield handler.events
+	app_logging.logger.removeHandler(handler)
+
+
+def test_sampling_keeps_the_configured_share(captured, monkeypatch):
+	monkeypatch.setattr(app_logging, "_sample_rates", {"test_sampled": 0.25, "test_dropped": 0.0})
+	monkeypatch.setattr(app_logging, "_random", random.Random(7))
+	before = app_logging.logging_stats()
+
+	for _ in range(2000):
+		app_logging.log_event("test_sampled", value=1)
+	app_logging.log_event("test_dropped")
+	app_logging.log_event("test_unsampled")
+
+	kept = [event for event in captured if event["event"] == "test_sampled"]
+	assert 400 < len(kept) < 600
+	assert all(event["sample_rate"] == 0.25 for event in kept)
+	assert [event["event"] for event in captured if event["event"] != "test_sampled"] == ["test_unsampled"]
+	assert "sample_rate" not in captured[-1]
+	after = app_logging.logging_stats()
+	assert after["emitted"] - before["emitted"] == len(kept) + 1
+	assert after["sampled_out"] - before["sampled_out"] == 2000 - len(kept) + 1
+
+
+def test_counts_are_exact_across_threads(monkeypatch):
+	monkeypatch.setattr(app_logging.logger, "info", lambda message: None)  # counting only
+	before = app_logging.logging_stats()["emitted"]
+
+	def emit_many():
+		for _ in range(5000):
+			app_logging.log_event("test_threads")
+
+	threads = [threading.Thread(target=emit_many) for _ in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert app_logging.logging_stats()["emitted"] - before == 40000
+
+
+def test_access_log_event(captured, monkeypatch):
+	monkeypatch.setattr(settings, "ACCESS_LOG_ENABLED", True)
+	with TestClient(app) as client:
+		response = client.get("/dictionary/languages")
+		client.get("/missing-route")
+
+	access = [event for event in captured if event["event"] == "access"]
+	assert [(event["path"], event["status"]) for event in access] == [
+		("/dictionary/languages", 200),
+		("/missing-route", 404),
+	]
+	first = access[0]
+	assert first["request_id"] == response.headers["X-Request-Id"]
+	assert first["method"] == "GET"
+	assert first["route"] == "/dictionary/languages"
+	assert first["duration_ms"] >= 0
+
+	# Server errors are kept even when access events are sampled away.
+	monkeypatch.setattr(app_logging, "_sample_rates", {"access": 0.0})
+	captured.clear()
+	app_logging._access_log(_FakeRequest(), 503, 0.01)
+	app_logging._access_log(_FakeRequest(), 200, 0.01)
+	assert [event["status"] for event in captured if event["event"] == "access"] == [503]
+
+
+class _FakeRequest:
+	method = "GET"
+	client = None
+
+	class url:
+		path = "/fake"
+
+	class state:
+		request_id = "fake-request"
@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine
+
+from app.core.metrics import instrument_engine, render_metrics, uninstrument_engine
+
+
+def test_pool_metrics_are_per_engine_and_dropped_on_dispose(tmp_path):
+	first = create_engine(f"sqlite:///{tmp_path / 'first.db'}")
+	second = create_engine(f"sqlite:///{tmp_path / 'second.db'}")
+	instrument_engine(first, "test_first")
+	instrument_engine(second, "test_second")
+	with first.connect():
+		rendered = render_metrics()
+	assert 'db_pool_connections{engine="test_first",state="checked_out"} 1' in rendered
+	assert 'db_pool_connections{engine="test_second",state="checked_out"} 0' in rendered
+
+	first.dispose()
+	uninstrument_engine(first)
+	rendered = render_metrics()
+	assert 'engine="test_first"' not in rendered
+	assert 'db_pool_connections{engine="test_second",state="checked_out"} 0' in rendered
+	second.dispose()
+	uninstrument_engine(second)
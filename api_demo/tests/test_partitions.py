@@ -0,0 +1,178 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.base import Base
+from app.db.models import Language, Sense, Word, WordEntry
+from app.db.partitions import ID_SHIFT, NO_LANGUAGE, PartitionRoutingError, RoutingSession
+from app.db.seed import seed_languages, seed_words
+
+
+@pytest.fixture
+def main_engine(tmp_path, monkeypatch):
+	"""A main SQLite database of its own, with PARTITION_DIR next to it."""
+	monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'main.db'}")
+	monkeypatch.setattr(settings, "PARTITION_DIR", str(tmp_path / "partitions"))
+	monkeypatch.setattr(partitions, "_main_engine", None)
+	partitions._clear_caches()
+	engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+	yield engine
+	partitions.dispose_engines()
+	partitions._clear_caches()
+	engine.dispose()
+
+
+def _routed(engine, monkeypatch):
+	monkeypatch.setattr(settings, "PARTITION_BY_LANGUAGE", True)
+	factory = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+	partitions.install_routing(factory, engine)
+	return factory
+
+
+@pytest.fixture
+def routed(main_engine, monkeypatch):
+	"""A routed session factory over a main database holding Nufi (1) and Medumba (2)."""
+	factory = _routed(main_engine, monkeypatch)
+	Base.metadata.create_all(main_engine, tables=partitions.main_tables())
+	with factory() as db:
+		seed_languages(db, ["Nufi", "Medumba"])
+	return factory
+
+
+def _entry(language_id: int, lemma: str) -> WordEntry:
+	entry = WordEntry(language_id=language_id, lemma_raw=lemma, lemma_nfc=lemma, status="draft")
+	entry.senses.append(Sense(sense_no=1, definition_text=f"{lemma} meaning"))
+	return entry
+
+
+def _file_rows(language_id: int, table: str) -> list:
+	with sqlite3.connect(partitions.language_db_path(language_id)) as conn:
+		return conn.execute(f'SELECT id FROM "{table}" ORDER BY id').fetchall()
+
+
+def test_crud_goes_to_the_language_file(routed, main_engine):
+	with routed() as db:
+		entry = _entry(1, "ndà")
+		db.add(entry)
+		db.commit()
+		entry_id, sense_id = entry.id, entry.senses[0].id
+	assert entry_id >> ID_SHIFT == 1 and sense_id >> ID_SHIFT == 1
+	assert _file_rows(1, "word_entries") == [(entry_id,)]
+	assert _file_rows(1, "senses") == [(sense_id,)]
+	assert not partitions.language_db_path(2).exists()
+	with main_engine.connect() as conn:
+		assert "word_entries" not in {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master")}
+
+	# No language in the query: the row id names the file.
+	with routed() as db:
+		entry = db.get(WordEntry, entry_id)
+		assert [sense.definition_text for sense in entry.senses] == ["ndà meaning"]
+		entry.lemma_raw = "ndàà"
+		db.commit()
+	with routed() as db:
+		assert db.query(WordEntry.lemma_raw).filter(WordEntry.language_id == 1).scalar() == "ndàà"
+		db.delete(db.get(WordEntry, entry_id))
+		db.commit()
+	assert _file_rows(1, "word_entries") == []
+	assert _file_rows(1, "senses") == []
+
+
+def test_statement_spanning_languages_is_refused(routed):
+	with routed() as db:
+		with pytest.raises(PartitionRoutingError):
+			db.query(WordEntry).filter(or_(WordEntry.language_id == 1, WordEntry.language_id == 2)).all()
+		with pytest.raises(PartitionRoutingError):
+			# Nothing names a language.
+			db.query(WordEntry).all()
+
+
+def test_a_transaction_writes_one_language(routed):
+	with routed() as db:
+		db.add(_entry(1, "first"))
+		db.flush()
+		# Reading another language is allowed; it is routed to that language's file.
+		assert db.query(WordEntry).filter(WordEntry.language_id == 2).all() == []
+		db.add(_entry(2, "second"))
+		with pytest.raises(PartitionRoutingError):
+			db.flush()
+		db.rollback()
+	with routed() as db:
+		db.add(_entry(2, "second"))
+		db.commit()
+		assert db.query(WordEntry.lemma_raw).filter(WordEntry.language_id == 2).all() == [("second",)]
+	# Nothing of the rolled-back Nufi transaction reached its file.
+	assert _file_rows(1, "word_entries") == []
+
+
+def test_reseed_does_not_block_writes_to_another_language(routed, tmp_path):
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("\n".join(f"mot{number}" for number in range(2000)), encoding="utf-8")
+	with routed() as db:
+		seed_words(db, word_list, db.get(Language, 1))
+
+	failures = []
+
+	def reseed() -> None:
+		try:
+			with routed() as db:
+				seed_words(db, word_list, db.get(Language, 1), force=True)
+		except Exception as exc:
+			failures.append(exc)
+
+	reseeder = threading.Thread(target=reseed)
+	reseeder.start()
+	written = 0
+	try:
+		while reseeder.is_alive() or written < 5:
+			with routed() as db:
+				db.add(_entry(2, f"medumba{written}"))
+				db.commit()
+			written += 1
+	finally:
+		reseeder.join()
+	assert failures == []
+	with routed() as db:
+		assert db.query(WordEntry).filter(WordEntry.language_id == 1).count() == 2000
+		assert db.query(Word).filter(Word.language_id == 1).count() == 2000
+		assert db.query(WordEntry).filter(WordEntry.language_id == 2).count() == written
+	assert all(row_id >> ID_SHIFT == 2 for (row_id,) in _file_rows(2, "word_entries"))
+
+
+def test_split_and_merge_round_trip(main_engine, monkeypatch):
+	Base.metadata.create_all(main_engine)
+	with Session(bind=main_engine) as db:
+		seed_languages(db, ["Nufi", "Medumba"])
+		db.add_all([_entry(1, "nufi"), _entry(2, "medumba")])
+		db.commit()
+		before = {row.lemma_raw: (row.id, row.language_id) for row in db.query(WordEntry)}
+	assert all(row_id >> ID_SHIFT == 0 for row_id, _ in before.values())
+
+	copied = partitions.split_sqlite(main_engine)
+	assert copied[1] > 0 and copied[2] > 0
+	assert sorted(partitions.language_files()) == [1, 2]
+
+	routed = _routed(main_engine, monkeypatch)
+	nufi_id = before["nufi"][0]
+	# Ids from before the split are small: locate() probes the files once and caches the answer.
+	assert partitions.locate("word_entries", nufi_id) == 1
+	assert partitions._located[("word_entries", nufi_id)] == 1
+	assert partitions.locate("word_entries", 10**6) == NO_LANGUAGE
+	with routed() as db:
+		assert db.get(WordEntry, before["medumba"][0]).lemma_raw == "medumba"
+		added = _entry(2, "added")
+		db.add(added)
+		db.commit()
+		assert added.id == (2 << ID_SHIFT) + 1
+
+	partitions.merge_sqlite(main_engine)
+	assert partitions.language_files() == {}
+	assert partitions.language_db_path(1).with_name("language_1.db.merged").exists()
+	with Session(bind=main_engine) as db:
+		after = {row.lemma_raw: (row.id, row.language_id) for row in db.query(WordEntry)}
+		assert db.query(Sense).count() == 3
+	assert after == {**before, "added": ((2 << ID_SHIFT) + 1, 2)}
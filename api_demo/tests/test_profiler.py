@@ -0,0 +1,71 @@
+import queue
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import profiler
+from app.core.profiler import RequestProfile
+from app.core.security import create_access_token, hash_password
+from app.db.models import User
+from app.db.session import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture(scope="module")
+def admin_headers(client):
+	db = SessionLocal()
+	try:
+		db.add(User(email="profiler.admin@example.com", password_hash=hash_password("admin pass 1"), role="admin", is_verified=True))
+		db.commit()
+	finally:
+		db.close()
+	return {"Authorization": f"Bearer {create_access_token(email='profiler.admin@example.com')}"}
+
+
+def test_admin_requests_are_profiled(client, admin_headers):
+	response = client.get("/dictionary/languages", params={"profile": "1"}, headers=admin_headers)
+	assert response.status_code == 200
+	profile_id = response.headers["X-Profile-Id"]
+	assert client.get(f"/admin/profiles/{profile_id}", headers=admin_headers).json()["request_id"] == profile_id
+
+	# Without an admin token the header is ignored.
+	assert "X-Profile-Id" not in client.get("/dictionary/languages", params={"profile": "1"}).headers
+
+
+def test_worker_thread_is_dropped_once_back_in_the_pool():
+	jobs: queue.Queue = queue.Queue()
+	working = threading.Event()
+
+	def worker():
+		# Stands in for a threadpool worker: one busy job for the request, then waiting for the next.
+		profiler._thread_requests[threading.get_ident()] = "profiled-request"
+		deadline = time.monotonic() + 0.1
+		while time.monotonic() < deadline:
+			working.set()
+		jobs.get()
+
+	profile = RequestProfile("profiled-request", 0.002, threading.get_ident())
+	thread = threading.Thread(target=worker)
+	thread.start()
+	working.wait()
+	profile.add_thread(thread.ident)
+	profile.start()
+	try:
+		deadline = time.monotonic() + 5
+		while thread.ident in profile.threads and time.monotonic() < deadline:
+			time.sleep(0.01)
+	finally:
+		profile.stop()
+		jobs.put(None)
+		thread.join()
+		profiler._thread_requests.clear()
+	assert thread.ident not in profile.threads
+	assert any("test_profiler:worker" in stack for stack in profile.stacks)
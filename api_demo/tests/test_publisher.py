@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db import publisher
+from app.db.changes import ENTITY_ENTRY, record_changes
+from app.db.models import WordEntry
+from app.db.publisher import publish_language, publish_storage, shard_file, shard_prefix
+from app.db.session import SessionLocal
+from app.db.storage import LocalStorage, S3Storage
+from app.main import app
+
+LEMMAS = ("ndà", "ndɔ̀", "mbɑ́", "kʉ̀")
+
+
+class RecordingStorage(LocalStorage):
+	def __init__(self, root):
+		super().__init__(root)
+		self.written = []
+
+	def put_bytes(self, data: bytes, key: str, content_type=None) -> int:
+		self.written.append(key)
+		return super().put_bytes(data, key, content_type)
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture
+def language(client, tmp_path):
+	"""A language with one published entry per lemma, published in full to a fresh store."""
+	credentials = {"email": "publisher@example.com", "password": "publish pass 1"}
+	client.post("/auth/register", json=credentials)
+	token = client.post("/auth/login", json=credentials).json()["access_token"]
+	headers = {"Authorization": f"Bearer {token}"}
+	language_id = client.post("/dictionary/languages", json={"name": f"Publisher {tmp_path.name}"}).json()["id"]
+	ids = {}
+	for lemma in LEMMAS:
+		ids[lemma] = client.post("/dictionary/word-entries", json=_entry(language_id, lemma, "published"), headers=headers).json()["id"]
+	storage = RecordingStorage(tmp_path / "public")
+	_publish(language_id, storage)
+	storage.written.clear()
+	return language_id, ids, headers, storage
+
+
+def _entry(language_id: int, lemma: str, status: str, definition: str = "meaning") -> dict:
+	return {
+		"language_id": language_id,
+		"lemma_raw": lemma,
+		"status": status,
+		"senses": [{"sense_no": 1, "definition_text": definition}],
+	}
+
+
+def _publish(language_id: int, storage, **kwargs) -> dict:
+	db = SessionLocal()
+	try:
+		return publish_language(db, language_id, storage=storage, **kwargs)
+	finally:
+		db.close()
+
+
+def _shard(storage, language_id: int, lemma: str) -> list:
+	data = storage.get_bytes(f"{language_id}/{shard_file(shard_prefix(lemma))}")
+	return [row["id"] for row in json.loads(data)["entries"]]
+
+
+def _keys(storage, language_id: int) -> set:
+	return {item["Key"][len(f"{language_id}/"):] for item in storage.list(f"{language_id}/")}
+
+
+def test_incremental_publish_rewrites_only_affected_shards(client, language):
+	language_id, ids, headers, storage = language
+	assert shard_prefix("ndà") == shard_prefix("ndɔ̀") == "nd"
+	response = client.put(
+		f"/dictionary/word-entries/{ids['ndà']}", json=_entry(language_id, "ndà", "published", "house"), headers=headers
+	)
+	assert response.status_code == 200
+	manifest = _publish(language_id, storage)
+	assert sorted(storage.written) == sorted([
+		f"{language_id}/entries/{ids['ndà']}.json", f"{language_id}/{shard_file('nd')}", f"{language_id}/manifest.json",
+	])
+	assert "house" in storage.get_bytes(f"{language_id}/entries/{ids['ndà']}.json").decode("utf-8")
+	assert _shard(storage, language_id, "ndà") == [ids["ndà"], ids["ndɔ̀"]]
+	assert manifest["entries"] == len(LEMMAS)
+	# Nothing changed since: the manifest is returned as is, nothing is written.
+	storage.written.clear()
+	assert _publish(language_id, storage) == manifest
+	assert storage.written == []
+
+
+def test_unpublished_entries_and_empty_shards_are_removed(client, language):
+	language_id, ids, headers, storage = language
+	client.put(f"/dictionary/word-entries/{ids['ndà']}", json=_entry(language_id, "ndà", "draft"), headers=headers)
+	client.put(f"/dictionary/word-entries/{ids['kʉ̀']}", json=_entry(language_id, "kʉ̀", "draft"), headers=headers)
+	manifest = _publish(language_id, storage)
+	keys = _keys(storage, language_id)
+	assert f"entries/{ids['ndà']}.json" not in keys
+	assert _shard(storage, language_id, "ndɔ̀") == [ids["ndɔ̀"]]
+	# kʉ̀ was alone in its shard: the shard file goes and leaves the manifest.
+	assert shard_file(shard_prefix("kʉ̀")) not in keys
+	assert shard_prefix("kʉ̀") not in manifest["shards"]
+	assert manifest["entries"] == 2
+	assert keys == {
+		"manifest.json",
+		f"entries/{ids['ndɔ̀']}.json",
+		f"entries/{ids['mbɑ́']}.json",
+		shard_file("nd"),
+		shard_file(shard_prefix("mbɑ́")),
+	}
+
+
+def test_missing_changed_entry_falls_back_to_full_publish(language):
+	language_id, ids, _, storage = language
+	# A stale file from an older layout is swept by the full publication.
+	storage.put_bytes(b"{}", f"{language_id}/index/stale.json")
+	db = SessionLocal()
+	try:
+		db.delete(db.get(WordEntry, ids["mbɑ́"]))
+		record_changes(db, language_id, ENTITY_ENTRY, [ids["mbɑ́"]])
+		db.commit()
+	finally:
+		db.close()
+	storage.written.clear()
+	manifest = _publish(language_id, storage)
+	# Every remaining entry was rewritten, not just the changed one.
+	assert {f"{language_id}/entries/{ids[lemma]}.json" for lemma in ("ndà", "ndɔ̀", "kʉ̀")} <= set(storage.written)
+	keys = _keys(storage, language_id)
+	assert f"entries/{ids['mbɑ́']}.json" not in keys and "index/stale.json" not in keys
+	assert shard_prefix("mbɑ́") not in manifest["shards"]
+	assert manifest["entries"] == 3
+
+
+def test_publish_storage_uses_upload_settings(monkeypatch):
+	monkeypatch.setattr(settings, "PUBLISH_STORAGE", "s3")
+	monkeypatch.setattr(settings, "S3_BUCKET", "static-bucket")
+	monkeypatch.setattr(settings, "S3_UPLOAD_PART_SIZE_MB", 16)
+	monkeypatch.setattr(settings, "S3_UPLOAD_CONCURRENCY", 6)
+	storage = publish_storage()
+	assert isinstance(storage, S3Storage)
+	assert (storage.bucket, storage.part_size, storage.concurrency) == ("static-bucket", 16 * 1024 * 1024, 6)
+	assert publisher._root() == settings.PUBLISH_S3_PREFIX
@@ -0,0 +1,114 @@
+"""EXPLAIN every statement the dictionary hot paths run and fail on full table scans."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.main import app
+
+# Tiny lookup tables that are fine to scan.
+SCAN_ALLOWED = {"languages", "bootstrap_state"}
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+	language = client.post("/dictionary/languages", json={"name": "Plan Test"}).json()
+	language_id = language["id"]
+	word = client.post("/dictionary", json={"language_id": language_id, "word": "ŋwɑ̀", "definition": "plan test"}).json()
+	entry = client.post(
+		"/dictionary/word-entries",
+		json={
+			"language_id": language_id,
+			"lemma_raw": "mbɑ̀",
+			"senses": [{
+				"sense_no": 1,
+				"definition_text": "plan test",
+				"examples": [{"example_text": "mbɑ̀ ŋwɑ̀"}],
+				"translations": [{"lang_code": "fr", "translation_text": "test"}],
+				"relations": [{"relation_type": "synonym", "fallback_text": "ŋwɑ̀"}],
+			}],
+		},
+	).json()
+	return {"language_id": language_id, "word_id": word["id"], "entry": entry}
+
+
+def _capture(call):
+	statements = []
+
+	def before(conn, cursor, statement, parameters, context, executemany):
+		if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+			statements.append((statement, parameters))
+
+	event.listen(engine, "before_cursor_execute", before)
+	try:
+		response = call()
+	finally:
+		event.remove(engine, "before_cursor_execute", before)
+	assert response.status_code < 400, response.text
+	return statements
+
+
+def _full_scans(statement, parameters):
+	raw = engine.raw_connection()
+	try:
+		rows = raw.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+	finally:
+		raw.close()
+	scans = []
+	for row in rows:
+		detail = row[3]
+		if not detail.startswith("SCAN "):
+			continue
+		table = detail.split()[1]
+		# "SCAN t USING COVERING INDEX" still reads the whole index, so only the table name matters.
+		if table not in SCAN_ALLOWED and table != "CONSTANT":
+			scans.append(detail)
+	return scans
+
+
+HOT_PATHS = {
+	"list_first_page": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"]}),
+	"list_deep_page": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"], "offset": 5000}),
+	"list_search": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"], "search": "ŋw"}),
+	"list_exact": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"], "search": "ŋwɑ̀", "exact": True}),
+	"list_defined": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"], "status": "defined"}),
+	"list_undefined": lambda c, s: c.get("/dictionary", params={"language_id": s["language_id"], "status": "undefined"}),
+	"random": lambda c, s: c.get("/dictionary/random", params={"language_id": s["language_id"]}),
+	"entries": lambda c, s: c.get("/dictionary/word-entries", params={"language_id": s["language_id"]}),
+	"entries_by_status": lambda c, s: c.get(
+		"/dictionary/word-entries", params={"language_id": s["language_id"], "status": "published"}
+	),
+	"get_entry": lambda c, s: c.get(f"/dictionary/word-entries/{s['entry']['id']}"),
+	"update_entry": lambda c, s: c.put(
+		f"/dictionary/word-entries/{s['entry']['id']}",
+		json={
+			"language_id": s["language_id"],
+			"lemma_raw": "mbɑ̀",
+			"senses": [{"sense_no": 1, "definition_text": "updated", "translations": [{"lang_code": "en", "translation_text": "t"}]}],
+		},
+	),
+	"update_word": lambda c, s: c.put(
+		f"/dictionary/{s['word_id']}", json={"definition": "defined now"}, params={"language_id": s["language_id"]}
+	),
+	"stats": lambda c, s: c.get("/dictionary/stats", params={"language_id": s["language_id"]}),
+	"changes": lambda c, s: c.get("/dictionary/changes", params={"language_id": s["language_id"], "since": 1}),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_PATHS))
+def test_hot_path_uses_indexes(client, seeded, name):
+	statements = _capture(lambda: HOT_PATHS[name](client, seeded))
+	assert statements, f"{name} ran no statements"
+	problems = {}
+	for statement, parameters in statements:
+		scans = _full_scans(statement, parameters)
+		if scans:
+			problems[" ".join(statement.split())[:200]] = scans
+	assert not problems, f"{name} falls back to full scans: {problems}"
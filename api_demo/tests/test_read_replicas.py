@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.db.base import Base
+from app.db.models import ChangeLog, Language
+from app.db.replicas import REPLICA_KEY, WRITE_COOKIE, ReplicaSession, ReplicaSet, replica_for_request
+
+
+@pytest.fixture
+def databases(tmp_path):
+	"""A primary and a replica: two SQLite files, each with one language the other lacks."""
+	primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+	replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+	for engine, name in ((primary, "Primary"), (replica, "Replica")):
+		Base.metadata.create_all(engine)
+		with engine.begin() as conn:
+			conn.execute(Language.__table__.insert(), {"name": name, "slug": name.lower()})
+	yield primary, replica
+	primary.dispose()
+	replica.dispose()
+
+
+def _log_change(engine, created_at: datetime) -> None:
+	with engine.begin() as conn:
+		conn.execute(ChangeLog.__table__.insert(), {
+			"id": 1, "language_id": 1, "entity": "word_entry", "entity_id": 1, "op": "upsert", "created_at": created_at,
+		})
+
+
+def _request(method: str, path: str, cookie: str = "") -> Request:
+	headers = [(b"cookie", cookie.encode())] if cookie else []
+	return Request({"type": "http", "method": method, "path": path, "headers": headers, "query_string": b""})
+
+
+def test_reads_use_replica_until_the_session_writes(databases):
+	primary, replica = databases
+	db = sessionmaker(class_=ReplicaSession, bind=primary)()
+	db.info[REPLICA_KEY] = replica
+	try:
+		assert [row.name for row in db.query(Language)] == ["Replica"]
+		db.add(Language(name="Added", slug="added"))
+		db.commit()
+		# The write went to the primary, and the session now reads its own writes there.
+		assert sorted(row.name for row in db.query(Language)) == ["Added", "Primary"]
+	finally:
+		db.close()
+	with replica.connect() as conn:
+		assert conn.execute(Language.__table__.select()).all()[0].name == "Replica"
+
+
+def test_lagging_replica_is_skipped(databases):
+	primary, replica = databases
+	replicas = ReplicaSet(primary, {"replica0": replica}, max_lag_sec=5, check_sec=3600)
+	# Not measured yet: reads stay on the primary.
+	assert replicas.choose() is None
+	replicas.refresh()
+	assert replicas.choose() is replica
+
+	_log_change(primary, datetime.utcnow() - timedelta(seconds=60))
+	# choose() only reads the last measurement.
+	assert replicas.choose() is replica
+	replicas.refresh()
+	assert replicas.choose() is None
+	assert replicas.replicas[0].lag_sec >= 60
+	assert replicas.primary_fallbacks == 2
+
+	_log_change(replica, datetime.utcnow() - timedelta(seconds=60))
+	replicas.refresh()
+	assert replicas.choose() is replica
+
+
+def test_lag_is_measured_in_the_background(databases):
+	primary, replica = databases
+	replicas = ReplicaSet(primary, {"replica0": replica}, max_lag_sec=5, check_sec=0.1)
+	replicas.start()
+	try:
+		deadline = time.monotonic() + 5
+		while replicas.choose() is None and time.monotonic() < deadline:
+			time.sleep(0.02)
+		assert replicas.choose() is replica
+
+		_log_change(primary, datetime.utcnow() - timedelta(seconds=60))
+		deadline = time.monotonic() + 5
+		while replicas.choose() is not None and time.monotonic() < deadline:
+			time.sleep(0.02)
+		assert replicas.choose() is None
+	finally:
+		replicas.stop(timeout=5)
+	assert not replicas._thread.is_alive()
+
+
+def test_read_your_writes_waits_for_replica_to_pass_the_write(databases):
+	primary, replica = databases
+	replicas = ReplicaSet(primary, {"replica0": replica}, max_lag_sec=5, check_sec=3600)
+	replicas.refresh()
+	# Measured before the write, so the replica cannot be shown to hold it yet.
+	written_at = time.time()
+	assert replicas.choose(last_write=written_at) is None
+	assert replicas.choose(last_write=written_at - 10) is replica
+	replicas.refresh()
+	assert replicas.choose(last_write=written_at) is replica
+
+
+def test_only_dictionary_reads_are_routed(databases):
+	primary, replica = databases
+	replicas = ReplicaSet(primary, {"replica0": replica}, max_lag_sec=5, check_sec=3600)
+	replicas.refresh()
+	assert replica_for_request(replicas, _request("GET", "/dictionary/word-entries")) is replica
+	assert replica_for_request(replicas, _request("POST", "/dictionary/word-entries")) is None
+	assert replica_for_request(replicas, _request("GET", "/users/me")) is None
+	assert replica_for_request(None, _request("GET", "/dictionary")) is None
+	future = f"{WRITE_COOKIE}={time.time() + 60:.3f}"
+	assert replica_for_request(replicas, _request("GET", "/dictionary", cookie=future)) is None
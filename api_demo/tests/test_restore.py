@@ -0,0 +1,108 @@
+import json
+import sqlite3
+
+import pytest
+
+from app.core.config import settings
+from app.db import backup
+from app.db.manifest import manifest_key
+from app.db.restore import RestoreVerificationError, list_snapshots, main, restore_sqlite, select_snapshot
+from app.db.storage import LocalStorage
+
+
+@pytest.fixture
+def live_db(tmp_path, monkeypatch):
+	db_path = tmp_path / "live.db"
+	conn = sqlite3.connect(db_path)
+	conn.execute("CREATE TABLE words (id INTEGER PRIMARY KEY, word TEXT)")
+	conn.execute("CREATE INDEX ix_words_word ON words (word)")
+	conn.executemany("INSERT INTO words (word) VALUES (?)", [(f"ŋwɑ̀{i}",) for i in range(2000)])
+	conn.commit()
+
+	storage = LocalStorage(tmp_path / "store")
+	monkeypatch.setattr(backup, "get_storage", lambda: storage)
+	monkeypatch.setattr("app.db.restore.get_storage", lambda: storage)
+	monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{db_path}")
+	monkeypatch.setattr(settings, "BACKUP_STORAGE", "local")
+	monkeypatch.setattr(settings, "BACKUP_LOCAL_DIR", str(tmp_path / "store"))
+	monkeypatch.setattr(settings, "BACKUP_STATE_DIR", str(tmp_path / "state"))
+	monkeypatch.setattr(settings, "S3_PREFIX", "backups")
+	monkeypatch.setattr(settings, "S3_SQLITE_INCREMENTAL", False)
+	yield conn, storage
+	conn.close()
+
+
+def _rows(path):
+	conn = sqlite3.connect(path)
+	try:
+		return conn.execute("SELECT id, word FROM words ORDER BY id").fetchall()
+	finally:
+		conn.close()
+
+
+def test_full_snapshot_round_trip(live_db, tmp_path):
+	conn, storage = live_db
+	backup._upload_database_backup(reason="test")
+
+	snapshot = select_snapshot(storage)
+	assert snapshot["manifest"] and snapshot["row_counts"] == {"words": 2000}
+	dest = tmp_path / "restored" / "app.db"
+	report = restore_sqlite(storage, snapshot, dest, reindex=True)
+
+	assert report["checks"]["sha256"] == "ok"
+	assert report["checks"]["integrity_check"] == "ok"
+	assert report["checks"]["row_counts"] == "ok"
+	assert report["rows"] == 2000 and report["mb_per_sec"] > 0
+	assert _rows(dest) == conn.execute("SELECT id, word FROM words ORDER BY id").fetchall()
+
+
+def test_incremental_chain_restores_latest_delta(live_db, tmp_path, monkeypatch):
+	conn, storage = live_db
+	monkeypatch.setattr(settings, "S3_SQLITE_INCREMENTAL", True)
+	backup._upload_database_backup(reason="base")
+	conn.execute("UPDATE words SET word = 'mbɑ' WHERE id = 7")
+	conn.commit()
+	backup._upload_database_backup(reason="edit")
+
+	snapshot = select_snapshot(storage)
+	assert snapshot["kind"] == "sqlite_delta" and len(snapshot["chain"]["deltas"]) == 1
+	dest = tmp_path / "restored.db"
+	restore_sqlite(storage, snapshot, dest)
+	assert _rows(dest)[6] == (7, "mbɑ")
+
+
+def test_corrupted_snapshot_is_rejected_and_destination_untouched(live_db, tmp_path):
+	_, storage = live_db
+	backup._upload_database_backup(reason="test")
+	snapshot = select_snapshot(storage)
+	manifest = json.loads(storage.get_bytes(manifest_key(snapshot["object_key"])))
+	manifest["row_counts"]["words"] = 1999
+	storage.put_bytes(json.dumps(manifest).encode(), manifest_key(snapshot["object_key"]))
+
+	dest = tmp_path / "restored.db"
+	with pytest.raises(RestoreVerificationError):
+		restore_sqlite(storage, select_snapshot(storage), dest)
+	assert not dest.exists()
+	assert not list(tmp_path.glob(".restored.db.*"))
+
+	data = bytearray(storage.get_bytes(snapshot["object_key"]))
+	data[-10] ^= 0xFF
+	storage.put_bytes(bytes(data), snapshot["object_key"])
+	with pytest.raises(RestoreVerificationError):
+		restore_sqlite(storage, snapshot, dest)
+
+
+def test_cli_lists_and_restores(live_db, tmp_path, capsys):
+	_, storage = live_db
+	backup._upload_database_backup(reason="test")
+	dest = tmp_path / "cli.db"
+
+	assert main(["list"]) == 0
+	listed = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+	assert [item["kind"] for item in listed] == ["sqlite"]
+	assert main(["sqlite", "--dest", str(dest)]) == 0
+	report = json.loads(capsys.readouterr().out)
+	assert report["verified"] and len(_rows(dest)) == 2000
+	with pytest.raises(FileExistsError):
+		main(["sqlite", "--dest", str(dest)])
+	assert len(list_snapshots(storage)) == 1
@@ -0,0 +1,162 @@
+"""CoalescingScheduler with short windows and a target that records its runs."""
+
+import threading
+import time
+
+import pytest
+
+from app.core.scheduler import CoalescingScheduler
+
+
+class Target:
+	def __init__(self, duration: float = 0.0, fail: bool = False):
+		self.duration = duration
+		self.fail = fail
+		self.runs = []  # (started_at, reasons)
+		self.active = 0
+		self.max_active = 0
+		self.release = threading.Event()
+		self.release.set()
+		self._lock = threading.Lock()
+		self._ran = threading.Condition(self._lock)
+
+	def __call__(self, reasons: str) -> None:
+		with self._lock:
+			self.active += 1
+			self.max_active = max(self.max_active, self.active)
+			self.runs.append((time.monotonic(), reasons))
+		self.release.wait()
+		time.sleep(self.duration)
+		with self._lock:
+			self.active -= 1
+			self._ran.notify_all()
+		if self.fail:
+			raise RuntimeError("target failed")
+
+	def wait_runs(self, count: int, timeout: float = 5.0) -> bool:
+		with self._lock:
+			return self._ran.wait_for(lambda: len(self.runs) >= count and not self.active, timeout)
+
+
+@pytest.fixture
+def make():
+	schedulers = []
+
+	def make(target, **kwargs) -> CoalescingScheduler:
+		scheduler = CoalescingScheduler("test", target, **kwargs)
+		schedulers.append(scheduler)
+		return scheduler
+
+	yield make
+	for scheduler in schedulers:
+		scheduler.stop(timeout=5)
+
+
+def test_signals_within_the_debounce_window_make_one_run(make):
+	target = Target()
+	scheduler = make(target, debounce_sec=0.2, max_delay_sec=5)
+	for reason in ("a", "b", "a"):
+		scheduler.notify(reason)
+		time.sleep(0.05)
+	last_signal = time.monotonic() - 0.05
+	assert target.runs == []
+	assert target.wait_runs(1)
+	started_at, reasons = target.runs[0]
+	assert started_at - last_signal >= 0.2
+	assert reasons == "a,b"
+	time.sleep(0.3)
+	stats = scheduler.stats()
+	assert (len(target.runs), stats["signals"], stats["runs"], stats["coalesced"], stats["last_batch"]) == (1, 3, 1, 2, 3)
+	assert stats["queue_depth"] == 0
+
+
+def test_continuous_signals_run_by_max_delay(make):
+	target = Target()
+	scheduler = make(target, debounce_sec=0.2, max_delay_sec=0.5)
+	first_signal = time.monotonic()
+	# Signals every 50 ms never leave a 200 ms quiet gap, so only the cap starts runs.
+	while time.monotonic() - first_signal < 1.3:
+		scheduler.notify()
+		time.sleep(0.05)
+	assert len(target.runs) >= 2
+	assert target.runs[0][0] - first_signal >= 0.5
+	assert target.runs[0][0] - first_signal < 1.0
+	assert scheduler.stats()["last_lag_ms"] >= 500
+
+
+def test_one_run_at_a_time(make):
+	target = Target(duration=0.1)
+	scheduler = make(target, debounce_sec=0, max_delay_sec=0)
+
+	def notify_often() -> None:
+		for _ in range(20):
+			scheduler.notify()
+			time.sleep(0.01)
+
+	notifiers = [threading.Thread(target=notify_often) for _ in range(4)]
+	for thread in notifiers:
+		thread.start()
+	for thread in notifiers:
+		thread.join()
+	assert scheduler.flush(timeout=10)
+	stats = scheduler.stats()
+	assert target.max_active == 1
+	assert stats["signals"] == 80
+	# Signals arriving during a run are batched into the next one.
+	assert stats["runs"] == len(target.runs) < 80
+	assert stats["runs"] + stats["coalesced"] == 80
+
+
+def test_min_interval_spaces_runs(make):
+	target = Target()
+	scheduler = make(target, debounce_sec=0, max_delay_sec=0, min_interval_sec=0.3)
+	scheduler.notify()
+	assert target.wait_runs(1)
+	scheduler.notify()
+	assert target.wait_runs(2)
+	assert target.runs[1][0] - target.runs[0][0] >= 0.3
+
+
+def test_flush_runs_pending_work_now(make):
+	target = Target()
+	scheduler = make(target, debounce_sec=30, max_delay_sec=60)
+	assert scheduler.flush(timeout=1)  # nothing pending
+	scheduler.notify("backup")
+	started = time.monotonic()
+	assert scheduler.flush(timeout=5)
+	assert time.monotonic() - started < 5
+	assert [reasons for _, reasons in target.runs] == ["backup"]
+
+	# A run that does not finish in time makes flush return False.
+	target.release.clear()
+	scheduler.notify()
+	assert not scheduler.flush(timeout=0.2)
+	assert scheduler.stats()["running"]
+	target.release.set()
+	assert scheduler.flush(timeout=5)
+	assert scheduler.stats()["runs"] == 2
+
+
+def test_stop_drains_pending_work_and_ends_the_thread(make):
+	target = Target()
+	scheduler = make(target, debounce_sec=30, max_delay_sec=60)
+	scheduler.notify()
+	scheduler.stop(timeout=5)
+	assert len(target.runs) == 1
+	assert not scheduler._thread.is_alive()
+
+	# A later signal starts a new worker.
+	scheduler.notify()
+	assert scheduler.flush(timeout=5)
+	assert len(target.runs) == 2
+
+
+def test_a_failing_run_is_counted_and_the_worker_survives(make):
+	target = Target(fail=True)
+	scheduler = make(target, debounce_sec=0, max_delay_sec=0)
+	scheduler.notify()
+	assert scheduler.flush(timeout=5)
+	scheduler.notify()
+	assert scheduler.flush(timeout=5)
+	stats = scheduler.stats()
+	assert (stats["runs"], stats["failures"]) == (2, 2)
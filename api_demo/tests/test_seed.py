@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.models import Sense, SenseExample, SenseRelation, SenseTranslation, WordEntry
+from app.db.session import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+def _entry(language_id: int, lemma: str, **sense) -> dict:
+	return {
+		"language_id": language_id,
+		"lemma_raw": lemma,
+		"senses": [{"sense_no": 1, "definition_text": f"{lemma} meaning", **sense}],
+	}
+
+
+def test_reseed_deletes_the_entries_children(client, tmp_path, monkeypatch):
+	reseeded = client.post("/dictionary/languages", json={"name": "Seed Children"}).json()["id"]
+	other = client.post("/dictionary/languages", json={"name": "Seed Neighbour"}).json()["id"]
+	old = client.post("/dictionary/word-entries", json=_entry(
+		reseeded, "ŋkɑ̀",
+		examples=[{"example_text": "ŋkɑ̀ à"}],
+		translations=[{"lang_code": "fr", "translation_text": "chose"}],
+		relations=[{"relation_type": "variant", "fallback_text": "ŋkɑ"}],
+	)).json()
+	pointer = client.post("/dictionary/word-entries", json=_entry(
+		other, "mbʉ̀", relations=[{"relation_type": "synonym", "related_word_entry_id": old["id"]}],
+	)).json()
+	sense_id = old["senses"][0]["id"]
+
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("ndà\nntɑ́\n", encoding="utf-8")
+	monkeypatch.setattr(settings, "WORD_LIST_PATH", str(word_list))
+	assert client.post(f"/dictionary/reseed?confirm=true&language_id={reseeded}").json()["count"] == 2
+
+	db = SessionLocal()
+	try:
+		assert db.query(WordEntry).filter(WordEntry.lemma_raw == "ŋkɑ̀", WordEntry.language_id == reseeded).count() == 0
+		assert db.query(Sense).filter(Sense.id == sense_id).count() == 0
+		for child in (SenseExample, SenseTranslation, SenseRelation):
+			assert db.query(child).filter(child.sense_id == sense_id).count() == 0
+		# No sense is left without its entry, where a reseeded entry reusing the id would pick it up.
+		entry_ids = db.query(WordEntry.id)
+		assert db.query(Sense).filter(Sense.word_entry_id.notin_(entry_ids)).count() == 0
+		for entry in db.query(WordEntry).filter(WordEntry.language_id == reseeded):
+			assert [(sense.sense_no, sense.definition_text) for sense in entry.senses] == [(1, "")]
+		# A relation from another language into the reseeded one keeps its sense and loses its target.
+		relation = db.query(SenseRelation).filter(SenseRelation.sense_id == pointer["senses"][0]["id"]).one()
+		assert relation.related_word_entry_id is None
+	finally:
+		db.close()
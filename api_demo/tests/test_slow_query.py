@@ -0,0 +1,45 @@
+import time
+
+from sqlalchemy import create_engine, event, text
+
+from app.core.metrics import instrument_engine
+from app.db import slow_query
+from app.db.slow_query import install_slow_query_log, slow_query_log
+
+
+def _pause(dbapi_connection, connection_record) -> None:
+	dbapi_connection.create_function("pause", 1, lambda seconds: time.sleep(seconds))
+
+
+def test_slow_statement_plan_is_logged_from_its_own_connection(tmp_path, monkeypatch):
+	events = []
+	monkeypatch.setattr(slow_query, "log_event", lambda event, **fields: events.append((event, fields)))
+	monkeypatch.setattr(slow_query_log, "threshold_ms", 20)
+	monkeypatch.setattr(slow_query_log, "sample_rate", 1.0)
+	monkeypatch.setattr(slow_query_log, "explain_interval_sec", 0)
+	install_slow_query_log()
+
+	# A one-connection pool: planning must not need a second connection from it.
+	engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}", pool_size=1, max_overflow=0, pool_timeout=1)
+	event.listen(engine, "connect", _pause)
+	slow_query_log.add_connect_listener(engine, _pause)
+	instrument_engine(engine, "test_slow")
+	try:
+		with engine.connect() as conn:
+			conn.execute(text("CREATE TABLE samples (id INTEGER PRIMARY KEY, name TEXT)"))
+			conn.execute(text("INSERT INTO samples (name) VALUES ('x')"))
+			conn.execute(text("SELECT name FROM samples WHERE id = 1"))
+			conn.execute(text("SELECT name FROM samples WHERE name = :name AND pause(0.05) IS NULL"), {"name": "x"})
+			assert slow_query_log.wait_idle()
+	finally:
+		engine.dispose()
+
+	assert [name for name, _ in events] == ["slow_query", "slow_query_plan"]
+	logged, plan = events[0][1], events[1][1]
+	assert "pause(0.05)" in logged["statement"]
+	assert logged["parameters"] == ["str"]
+	assert logged["duration_ms"] >= 50
+	assert plan["query_id"] == logged["query_id"]
+	assert plan["dialect"] == "sqlite"
+	assert plan["plan"] == ["SCAN samples"]
+	assert plan["full_scan"] is True
@@ -0,0 +1,198 @@
+"""The incremental counters must always equal what reconcile_stats rebuilds from the tables."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.bootstrap import ensure_schema
+from app.db.models import DictionaryStat, Language, Sense, User, Word, WordEntry
+from app.db.session import SessionLocal
+from app.db.stats import move_contributions, reconcile_stats
+from app.main import app
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations" / "versions"
+
+
+@pytest.fixture(scope="module")
+def client():
+	with TestClient(app) as test_client:
+		yield test_client
+
+
+def _auth(client, email: str) -> dict:
+	credentials = {"email": email, "password": "stats pass 1"}
+	client.post("/auth/register", json=credentials)
+	token = client.post("/auth/login", json=credentials).json()["access_token"]
+	return {"Authorization": f"Bearer {token}"}
+
+
+def _counters(db, language_id: int, user_ids) -> tuple:
+	stats = {
+		row.metric: row.value
+		for row in db.query(DictionaryStat).filter(DictionaryStat.language_id == language_id)
+		if row.value
+	}
+	defined = {user.id: user.defined_count or 0 for user in db.query(User).filter(User.id.in_(user_ids))}
+	return stats, defined
+
+
+def _assert_reconciled(language_id: int, *user_ids: int) -> dict:
+	"""Reconcile (which rebuilds every counter) and check this test's counters did not move."""
+	db = SessionLocal()
+	try:
+		incremental = _counters(db, language_id, user_ids)
+		reconcile_stats(db)
+		assert _counters(db, language_id, user_ids) == incremental
+		return incremental[1]
+	finally:
+		db.close()
+
+
+def _entry(language_id: int, lemma: str, definition: str, **fields) -> dict:
+	return {
+		"language_id": language_id,
+		"lemma_raw": lemma,
+		"senses": [{"sense_no": 1, "definition_text": definition}],
+		**fields,
+	}
+
+
+def test_counters_match_reconcile(client, tmp_path, monkeypatch):
+	alice = _auth(client, "stats.alice@example.com")
+	bob = _auth(client, "stats.bob@example.com")
+	alice_id = client.get("/users/me", headers=alice).json()["id"]
+	bob_id = client.get("/users/me", headers=bob).json()["id"]
+	language_id = client.post("/dictionary/languages", json={"name": "Stats Test"}).json()["id"]
+
+	# Create: a defined and an undefined word, and a defined noun entry.
+	word = client.post(
+		"/dictionary", json={"language_id": language_id, "word": "ŋkɑ̀", "definition": "defined"}, headers=alice
+	).json()
+	client.post("/dictionary", json={"language_id": language_id, "word": "ŋkɑ̌", "definition": " "}, headers=alice)
+	entry = client.post(
+		"/dictionary/word-entries", json=_entry(language_id, "mfɑ̀", "defined", pos="noun"), headers=alice
+	).json()
+	defined = _assert_reconciled(language_id, alice_id, bob_id)
+	assert defined[alice_id] == 2
+
+	# Update: Bob edits both, but Alice made them defined and keeps the credit; the entry is
+	# published under another POS.
+	client.put(f"/dictionary/{word['id']}?language_id={language_id}", json={"definition": "redefined"}, headers=bob)
+	response = client.put(
+		f"/dictionary/word-entries/{entry['id']}",
+		json=_entry(language_id, "mfɑ̀", "redefined", pos="verb", status="published"),
+		headers=bob,
+	)
+	assert response.status_code == 200
+	defined = _assert_reconciled(language_id, alice_id, bob_id)
+	assert (defined[alice_id], defined[bob_id]) == (2, 0)
+
+	# Undefining the word drops Alice's credit; whoever defines it again gets it.
+	client.put(f"/dictionary/{word['id']}?language_id={language_id}", json={"definition": " "}, headers=bob)
+	client.put(f"/dictionary/{word['id']}?language_id={language_id}", json={"definition": "back"}, headers=bob)
+	defined = _assert_reconciled(language_id, alice_id, bob_id)
+	assert (defined[alice_id], defined[bob_id]) == (1, 1)
+
+	# Reseed replaces the language's rows with undefined ones from the word list.
+	word_list = tmp_path / "words.txt"
+	word_list.write_text("ŋkɑ̀\nmbʉ̀\nntɑ́\n", encoding="utf-8")
+	monkeypatch.setattr(settings, "WORD_LIST_PATH", str(word_list))
+	assert client.post(f"/dictionary/reseed?confirm=true&language_id={language_id}").json()["count"] == 3
+	defined = _assert_reconciled(language_id, alice_id, bob_id)
+	assert (defined[alice_id], defined[bob_id]) == (0, 0)
+
+	# Defining one word again, then deleting the language, takes it back out of defined_count.
+	words = client.get(f"/dictionary?language_id={language_id}&search=ntɑ́&exact=true").json()
+	word_id = words[0]["id"]
+	client.put(f"/dictionary/{word_id}?language_id={language_id}", json={"definition": "again"}, headers=bob)
+	assert _assert_reconciled(language_id, alice_id, bob_id)[bob_id] == 1
+
+	# Merging Bob into Alice (users/deduplicate) hands his definitions and counters over.
+	db = SessionLocal()
+	try:
+		move_contributions(db, language_id, [bob_id], alice_id)
+		db.commit()
+	finally:
+		db.close()
+	defined = _assert_reconciled(language_id, alice_id, bob_id)
+	assert (defined[alice_id], defined[bob_id]) == (1, 0)
+	assert client.delete(f"/dictionary/languages/{language_id}").status_code == 200
+	assert _assert_reconciled(language_id, alice_id, bob_id)[alice_id] == 0
+
+
+@pytest.fixture
+def upgraded_engine(tmp_path):
+	"""A database from before dictionary_stats and defined_by_id existed, with defined and undefined rows."""
+	engine = create_engine(f"sqlite:///{tmp_path / 'before_stats.db'}")
+	Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "dictionary_stats"])
+	with sessionmaker(bind=engine)() as db:
+		user = User(email="upgrade@example.com", password_hash="x", defined_count=5)
+		language = Language(name="Upgrade", slug="upgrade")
+		db.add_all([user, language])
+		db.flush()
+		db.add_all([
+			Word(language_id=language.id, word="a", definition="defined", is_defined=True, updated_by_id=user.id),
+			Word(language_id=language.id, word="b", definition=" "),
+			WordEntry(
+				language_id=language.id, lemma_raw="c", lemma_nfc="c", pos="noun", status="published",
+				has_definition=True, updated_by_id=user.id, senses=[Sense(sense_no=1, definition_text="defined")],
+			),
+			WordEntry(language_id=language.id, lemma_raw="d", lemma_nfc="d", senses=[Sense(sense_no=1, definition_text="")]),
+		])
+		db.commit()
+		user_id = user.id
+	with engine.begin() as conn:
+		with Operations.context(MigrationContext.configure(conn)) as op:
+			for table in ("words", "word_entries"):
+				with op.batch_alter_table(table, recreate="always") as batch:
+					batch.drop_column("defined_by_id")
+	yield engine, user_id
+	engine.dispose()
+
+
+def _all_counters(engine) -> tuple:
+	with sessionmaker(bind=engine)() as db:
+		stats = {(row.language_id, row.metric): row.value for row in db.query(DictionaryStat)}
+		return stats, {user.id: user.defined_count for user in db.query(User)}
+
+
+def _assert_upgraded(engine, user_id: int) -> None:
+	stats, defined = _all_counters(engine)
+	assert {metric: value for (_, metric), value in stats.items()} == {
+		"words_total": 2, "words_defined": 1, "entries_total": 2, "entries_defined": 1,
+		"entries_draft": 1, "entries_published": 1, "entries_pos:noun": 1, f"contributor:{user_id}": 2,
+	}
+	assert defined == {user_id: 2}
+	with sessionmaker(bind=engine)() as db:
+		reconcile_stats(db)
+	assert _all_counters(engine) == (stats, defined)
+
+
+def test_ensure_schema_fills_new_counters(upgraded_engine):
+	engine, user_id = upgraded_engine
+	assert ensure_schema(engine, sessionmaker(bind=engine), fast_start=False)
+	_assert_upgraded(engine, user_id)
+
+
+def _upgrade(engine, revision: str) -> None:
+	spec = importlib.util.spec_from_file_location(revision, MIGRATIONS_DIR / f"{revision}.py")
+	migration = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(migration)
+	with engine.begin() as conn:
+		with Operations.context(MigrationContext.configure(conn)):
+			migration.upgrade()
+
+
+def test_migrations_fill_new_counters(upgraded_engine):
+	engine, user_id = upgraded_engine
+	_upgrade(engine, "0012_dictionary_stats")
+	_upgrade(engine, "0017_defined_by")
+	_assert_upgraded(engine, user_id)
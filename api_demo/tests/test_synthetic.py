@@ -0,0 +1,125 @@
+import os
+import unicodedata
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.changes import ENTITY_ENTRY, ENTITY_WORD, OP_UPSERT
+from app.db.models import (
+	ChangeLog,
+	DictionaryStat,
+	Sense,
+	SenseExample,
+	SenseRelation,
+	SenseTranslation,
+	Word,
+	WordEntry,
+)
+from app.db.stats import reconcile_stats
+from app.db.synthetic import CODAS, LATIN_ONSETS, _graphemes, _secondary_indexes, clafrica_inventory, generate
+
+COUNTED = {
+	"word_entries": WordEntry,
+	"senses": Sense,
+	"sense_examples": SenseExample,
+	"sense_translations": SenseTranslation,
+	"sense_relations": SenseRelation,
+	"words": Word,
+}
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def database_url(request, tmp_path):
+	if request.param == "sqlite":
+		return f"sqlite:///{tmp_path / 'synthetic.db'}"
+	url = os.getenv("TEST_POSTGRES_URL")
+	if not url:
+		pytest.skip("TEST_POSTGRES_URL is not set")
+	engine = create_engine(url)
+	with engine.begin() as conn:
+		conn.execute(text("DROP SCHEMA public CASCADE"))
+		conn.execute(text("CREATE SCHEMA public"))
+	engine.dispose()
+	return url
+
+
+def _stats(db) -> dict:
+	return {(row.language_id, row.metric): row.value for row in db.query(DictionaryStat)}
+
+
+def test_generate_small_dataset(database_url):
+	# Batches smaller than a language, and a second run that adds to the same languages.
+	first = generate(database_url, languages=2, entries=60, max_senses=3, seed=7, batch_size=25)
+	second = generate(database_url, languages=2, entries=40, max_senses=3, seed=7, batch_size=25)
+	assert first["languages"] == second["languages"]
+	language_ids = first["languages"]
+	assert (first["rows"]["word_entries"], first["rows"]["words"]) == (120, 120)
+	assert (second["rows"]["word_entries"], second["rows"]["words"]) == (80, 80)
+
+	engine = create_engine(database_url)
+	db = sessionmaker(bind=engine)()
+	try:
+		for table, model in COUNTED.items():
+			assert db.query(func.count(model.id)).scalar() == first["rows"][table] + second["rows"][table], table
+		for table in ("senses", "sense_examples", "sense_translations", "sense_relations"):
+			assert first["rows"][table] > 0, table
+
+		# Lemmas: unique per language, built only from the Clafrica inventory and the Latin onsets.
+		nuclei, consonants = clafrica_inventory()
+		allowed = set(nuclei) | set(consonants) | set("".join(LATIN_ONSETS + CODAS))
+		for language_id in language_ids:
+			lemmas = [row.lemma_nfc for row in db.query(WordEntry.lemma_nfc).filter(WordEntry.language_id == language_id)]
+			assert len(lemmas) == len(set(lemmas)) == 100
+			for lemma in lemmas:
+				assert lemma == unicodedata.normalize("NFC", lemma)
+				assert {unicodedata.normalize("NFC", grapheme) for grapheme in _graphemes(lemma)} <= allowed, lemma
+
+		# Every entry has 1..max_senses senses; undefined entries have one empty sense.
+		senses = Counter(sense for (sense,) in db.query(Sense.word_entry_id))
+		assert set(senses.values()) <= {1, 2, 3}
+		assert set(senses) == {entry_id for (entry_id,) in db.query(WordEntry.id)}
+		undefined = db.query(Sense.definition_text).join(WordEntry).filter(WordEntry.has_definition.is_(False)).all()
+		assert undefined and {definition for (definition,) in undefined} == {""}
+
+		# Relation targets exist, in the language of the entry that points at them.
+		relations = (
+			db.query(SenseRelation.related_word_entry_id, WordEntry.language_id)
+			.join(Sense, SenseRelation.sense_id == Sense.id)
+			.join(WordEntry, Sense.word_entry_id == WordEntry.id)
+			.filter(SenseRelation.related_word_entry_id.isnot(None))
+			.all()
+		)
+		assert relations
+		targets = dict(db.query(WordEntry.id, WordEntry.language_id).filter(
+			WordEntry.id.in_({related for related, _ in relations})
+		).all())
+		assert all(targets.get(related) == language_id for related, language_id in relations)
+
+		# Counters are already what reconcile_stats would rebuild.
+		stats = _stats(db)
+		for language_id in language_ids:
+			assert stats[(language_id, "entries_total")] == stats[(language_id, "words_total")] == 100
+		reconcile_stats(db)
+		assert _stats(db) == stats
+
+		# The change log: one upsert per generated entry and word, nothing for the languages.
+		changes = db.query(ChangeLog.language_id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op).all()
+		assert {change.op for change in changes} == {OP_UPSERT}
+		assert len(changes) == len(set(changes)) == 400
+		for entity, model in ((ENTITY_ENTRY, WordEntry), (ENTITY_WORD, Word)):
+			rows = set(db.query(model.language_id, model.id))
+			assert {(change.language_id, change.entity_id) for change in changes if change.entity == entity} == rows
+	finally:
+		db.close()
+
+	# The secondary indexes dropped for the load are back.
+	catalog = (
+		"SELECT name FROM sqlite_master WHERE type = 'index'" if engine.dialect.name == "sqlite"
+		else "SELECT indexname FROM pg_indexes"  # reflection skips expression indexes
+	)
+	with engine.connect() as conn:
+		present = set(conn.execute(text(catalog)).scalars())
+	assert {index.name for index in _secondary_indexes()} <= present
+	engine.dispose()